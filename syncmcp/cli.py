@@ -2,33 +2,112 @@
 SyncMCP CLI 命令列介面
 
 使用 Click 實現的命令列工具
-"""
 
-from datetime import datetime
+各子命令只在執行時才匯入所需模組：`syncmcp mcp` 每次 AI 客戶端啟動都會被呼叫，
+不應為此載入 rich、InquirerPy 或用不到的核心引擎。
+"""
 
 import click
-from rich.console import Console
-from rich.table import Table
 
-from syncmcp.core.backup_manager import BackupManager
-from syncmcp.core.config_manager import ConfigManager
-from syncmcp.core.diff_engine import DiffEngine
-from syncmcp.core.sync_engine import SyncEngine, SyncStrategy
-from syncmcp.utils import get_history_manager, set_verbose
 
-console = Console()
+class _LazyConsole:
+    """首次使用時才建立 rich Console"""
+
+    def __init__(self):
+        self._console = None
+
+    def __getattr__(self, name):
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console()
+        return getattr(self._console, name)
+
+
+console = _LazyConsole()
+
+
+_PROFILE_MODES = ("cpu", "mem")
+
+
+class _CLIGroup(click.Group):
+    """讓 --profile 可以省略模式：`syncmcp --profile sync` 等同 `--profile=cpu`"""
+
+    def parse_args(self, ctx, args):
+        # 需要值的選項（例如 --log-format json），其值不是子命令
+        takes_value = {
+            name
+            for param in self.params
+            if isinstance(param, click.Option) and not param.is_flag and not param.count
+            for name in param.opts
+        }
+        index = 0
+        while index < len(args):
+            arg = args[index]
+            if not arg.startswith("-") or arg == "--":
+                break  # 之後是子命令及其參數
+            if arg == "--profile":
+                if index + 1 == len(args) or args[index + 1] not in _PROFILE_MODES:
+                    args = [*args[:index], "--profile=cpu", *args[index + 1 :]]
+                    break
+                index += 2
+            elif arg in takes_value:
+                index += 2
+            else:
+                index += 1
+        return super().parse_args(ctx, args)
 
 
-@click.group()
+@click.group(cls=_CLIGroup)
 @click.version_option(version="2.0.0", prog_name="syncmcp")
 @click.option("--verbose", "-v", is_flag=True, help="顯示詳細日誌")
+@click.option(
+    "--profile",
+    type=click.Choice(_PROFILE_MODES),
+    default=None,
+    help="分析命令效能（cpu: cProfile，mem: tracemalloc），報告寫入 ~/.syncmcp/profiles",
+)
+@click.option(
+    "--log-format",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    envvar="SYNCMCP_LOG_FORMAT",
+    show_default=True,
+    help="日誌文件格式（json: 每行一個 JSON 物件，帶 run_id 與各階段耗時）",
+)
 @click.pass_context
-def cli(ctx, verbose):
+def cli(ctx, verbose, profile, log_format):
     """SyncMCP - 智能 MCP 配置同步工具"""
     ctx.ensure_object(dict)
     ctx.obj["verbose"] = verbose
-    # 設定全局 logger verbose 級別
+    ctx.obj["log_format"] = log_format
+    # 設定全局 logger verbose 級別與文件格式
+    from syncmcp.utils import set_log_format, set_verbose
+
     set_verbose(verbose)
+    set_log_format(log_format)
+
+    if profile:
+        _start_profiler(ctx, profile)
+
+
+def _start_profiler(ctx, mode: str):
+    """開始分析，命令結束（包含失敗）時寫出報告並在 stderr 顯示摘要"""
+    from syncmcp.utils import CommandProfiler
+
+    profiler = CommandProfiler(mode, ctx.invoked_subcommand)
+
+    def finish():
+        report = profiler.stop()
+        # 輸出到 stderr，不影響 --format json、batch 等的標準輸出
+        click.echo(f"\n📊 效能分析 ({report.mode}) 已寫入: {report.path}", err=True)
+        for line in report.summary:
+            click.echo(f"   {line}", err=True)
+        if report.mode == "cpu":
+            click.echo(f"   [詳細] python -m pstats {report.path}", err=True)
+
+    ctx.call_on_close(finish)
+    profiler.start()
 
 
 @cli.command()
@@ -38,6 +117,11 @@ def cli(ctx, verbose):
 @click.pass_context
 def sync(ctx, auto, dry_run, backup):
     """執行 MCP 配置同步"""
+    from syncmcp.core.backup_manager import BackupManager
+    from syncmcp.core.config_manager import ConfigManager
+    from syncmcp.core.diff_engine import DiffEngine
+    from syncmcp.core.sync_engine import SyncEngine, SyncStrategy
+
     verbose = ctx.obj.get("verbose", False)
 
     # 初始化元件
@@ -48,9 +132,12 @@ def sync(ctx, auto, dry_run, backup):
 
     try:
         # 執行同步
-        with console.status("[bold green]分析配置..."):
+        with console.status("[bold green]分析配置...") as status:
             result = sync_engine.sync(
-                strategy=SyncStrategy.AUTO, dry_run=dry_run, create_backup=backup
+                strategy=SyncStrategy.AUTO,
+                dry_run=dry_run,
+                create_backup=backup,
+                progress=lambda event: status.update(f"[bold green]{event.message}..."),
             )
 
         # 顯示結果
@@ -94,10 +181,25 @@ def sync(ctx, auto, dry_run, backup):
 @click.option("--format", type=click.Choice(["table", "json"]), default="table")
 def status(format):
     """顯示所有客戶端的配置狀態"""
-    config_manager = ConfigManager()
-    configs = config_manager.load_all()
+    from syncmcp.daemon.client import query
+    from syncmcp.daemon.status import load_fresh_status
+
+    # 優先向背景監控查詢（溫快照）；其次使用仍有效的狀態文件；都沒有時才在本程序載入配置
+    status_data = query("status")
+    if status_data is not None:
+        monitor_data = query("monitor")
+    else:
+        monitor_data = load_fresh_status()
+        if monitor_data is not None:
+            status_data = monitor_data["clients"]
+        else:
+            status_data = _run_query("status")
 
     if format == "table":
+        from datetime import datetime
+
+        from rich.table import Table
+
         table = Table(title="MCP 配置狀態")
         table.add_column("客戶端", style="cyan")
         table.add_column("配置路徑", style="white")
@@ -105,38 +207,74 @@ def status(format):
         table.add_column("最後修改", style="yellow")
         table.add_column("狀態", style="magenta")
 
-        for name, config in configs.items():
-            mcp_count = len(config.mcpServers)
+        for name, client_status in status_data.items():
             last_modified = (
-                datetime.fromtimestamp(config.last_modified).strftime("%Y-%m-%d %H:%M:%S")
-                if config.last_modified
+                datetime.fromtimestamp(client_status["last_modified"]).strftime("%Y-%m-%d %H:%M:%S")
+                if client_status["last_modified"]
                 else "N/A"
             )
-            status_icon = "✅" if config.file_path.exists() else "❌"
-
-            table.add_row(name, str(config.file_path), str(mcp_count), last_modified, status_icon)
+            status_icon = "✅" if client_status["exists"] else "❌"
+
+            table.add_row(
+                name,
+                client_status["path"],
+                str(client_status["mcp_count"]),
+                last_modified,
+                status_icon,
+            )
 
         console.print(table)
+        if monitor_data is not None:
+            _print_monitor_summary(monitor_data)
     else:
         import json
 
-        status_data = {}
-        for name, config in configs.items():
-            status_data[name] = {
-                "path": str(config.file_path),
-                "mcp_count": len(config.mcpServers),
-                "last_modified": config.last_modified,
-                "exists": config.file_path.exists(),
-            }
+        status_data = {
+            name: {key: value for key, value in client_status.items() if key != "signature"}
+            for name, client_status in status_data.items()
+        }
         console.print(json.dumps(status_data, indent=2))
 
 
+def _run_query(method: str, params: dict | None = None):
+    """執行唯讀查詢：背景監控執行中時經由 socket 取得，否則在本程序內計算"""
+    from syncmcp.daemon.client import query
+
+    result = query(method, params)
+    if result is None:
+        from syncmcp.core.queries import local_query
+
+        result = local_query(method, params)
+    return result
+
+
+def _print_monitor_summary(data: dict):
+    """顯示背景監控的同步與健康檢查摘要"""
+    from datetime import datetime
+
+    console.print(f"[dim]資料來自背景監控 (pid {data['pid']})[/dim]")
+
+    last_sync = data.get("last_sync")
+    if last_sync:
+        when = datetime.fromtimestamp(last_sync["at"]).strftime("%Y-%m-%d %H:%M:%S")
+        outcome = "✅ 成功" if last_sync["success"] else "❌ 失敗"
+        console.print(f"最後自動同步: {when} {outcome}")
+
+    health = data.get("health")
+    if health:
+        checked = [item for item in health.values() if item["status"] != "pending"]
+        healthy = sum(1 for item in checked if item["status"] == "ok")
+        console.print(f"MCP 健康狀態: {healthy}/{len(checked)} 正常")
+        for name, item in sorted(health.items()):
+            if item["status"] not in ("ok", "pending"):
+                console.print(f"  ❌ {name} - {item['error']}")
+
+
 @cli.command()
 @click.argument("client", required=False)
 def list(client):
     """列出配置文件路徑和 MCP 列表"""
-    config_manager = ConfigManager()
-    configs = config_manager.load_all()
+    configs = _run_query("list")
 
     if client:
         # 顯示特定客戶端
@@ -146,11 +284,11 @@ def list(client):
 
         config = configs[client]
         console.print(f"\n[bold cyan]{client}[/bold cyan]")
-        console.print(f"路徑: {config.file_path}")
-        console.print(f"MCP 數量: {len(config.mcpServers)}\n")
+        console.print(f"路徑: {config['path']}")
+        console.print(f"MCP 數量: {len(config['mcpServers'])}\n")
 
-        if config.mcpServers:
-            for name, server in config.mcpServers.items():
+        if config["mcpServers"]:
+            for name, server in config["mcpServers"].items():
                 console.print(f"  • [green]{name}[/green]")
                 console.print(f"    command: {server.get('command', 'N/A')}")
                 if "args" in server:
@@ -161,11 +299,11 @@ def list(client):
         # 顯示所有客戶端
         for name, config in configs.items():
             console.print(f"\n[bold cyan]{name}[/bold cyan]")
-            console.print(f"路徑: {config.file_path}")
-            console.print(f"MCP 數量: {len(config.mcpServers)}")
-            if config.mcpServers:
+            console.print(f"路徑: {config['path']}")
+            console.print(f"MCP 數量: {len(config['mcpServers'])}")
+            if config["mcpServers"]:
                 console.print("MCP 列表:")
-                for mcp_name in config.mcpServers.keys():
+                for mcp_name in config["mcpServers"].keys():
                     console.print(f"  • {mcp_name}")
 
 
@@ -181,26 +319,310 @@ def open(client):
 @cli.command()
 def diff():
     """顯示同步前後的差異"""
-    config_manager = ConfigManager()
-    diff_engine = DiffEngine()
-
-    configs = config_manager.load_all()
-    diff_report = diff_engine.analyze(configs)
+    diff_report = _run_query("diff")
 
     console.print("\n[bold cyan]📊 配置差異分析[/bold cyan]\n")
 
-    text_report = diff_report.to_text()
+    text_report = diff_report["text"]
     if text_report == "無差異":
         console.print("[green]✅ 所有客戶端配置一致，無需同步[/green]")
     else:
         console.print(text_report)
 
         # 顯示警告
-        if diff_report.has_removals():
+        if diff_report["has_removals"]:
             console.print("\n[bold yellow]⚠️  警告: 檢測到配置將被移除[/bold yellow]")
             console.print("   執行同步前請確認這是預期的行為")
 
 
+@cli.command()
+@click.option("--dry-run", is_flag=True, help="執行所有命令但不寫入")
+@click.option("--backup/--no-backup", default=True, help="寫入前是否備份")
+def batch(dry_run, backup):
+    """
+    從 stdin 讀取換行分隔的 JSON 命令，在同一個交易中執行
+
+    每行一個命令，例如 {"op": "add", "name": "fs", "config": {"command": "npx"}}；
+    支援 add / set / remove / sync / status / list / diff / changes。
+    每個命令的結果以一行 JSON 輸出；讀完所有命令後若沒有錯誤才一次寫入。
+    """
+    import json
+    import sys
+
+    from syncmcp.core.records import to_plain
+    from syncmcp.core.transaction import ConfigTransaction
+
+    def emit(message: dict):
+        click.echo(json.dumps(message, ensure_ascii=False, default=to_plain))
+
+    failures = 0
+    with ConfigTransaction(strategy="batch") as transaction:
+        for line_number, line in enumerate(sys.stdin, 1):
+            if not line.strip():
+                continue
+            command = {}
+            try:
+                parsed = json.loads(line)
+                if not isinstance(parsed, dict):
+                    raise ValueError("命令必須是 JSON 物件")
+                command = parsed
+                result = transaction.execute(command)
+            except (ValueError, TypeError) as e:
+                failures += 1
+                emit(
+                    {
+                        "id": command.get("id", line_number),
+                        "op": command.get("op"),
+                        "ok": False,
+                        "error": str(e),
+                    }
+                )
+            else:
+                emit(
+                    {
+                        "id": command.get("id", line_number),
+                        "op": command["op"],
+                        "ok": True,
+                        "result": result,
+                    }
+                )
+
+        if failures:
+            emit({"op": "commit", "ok": False, "error": f"{failures} 個命令失敗，未寫入任何變更"})
+            raise SystemExit(1)
+        if dry_run:
+            emit(
+                {
+                    "op": "commit",
+                    "ok": True,
+                    "result": {"dry_run": True, "changes": transaction.changes()},
+                }
+            )
+            return
+
+        try:
+            commit = transaction.commit(create_backup=backup)
+        except OSError as e:
+            emit({"op": "commit", "ok": False, "error": str(e)})
+            raise SystemExit(1) from e
+        emit(
+            {
+                "op": "commit",
+                "ok": True,
+                "result": {
+                    "written": commit.written,
+                    "changes": commit.changes,
+                    "backup_path": commit.backup_path,
+                    "warnings": commit.warnings,
+                },
+            }
+        )
+
+
+def _server_edit_options(func):
+    """server 子命令共用的選項"""
+    options = [
+        click.option(
+            "--client",
+            "clients",
+            multiple=True,
+            type=click.Choice(["claude-code", "roo-code", "claude-desktop", "gemini"]),
+            help="只修改特定客戶端（可重複，預設全部）",
+        ),
+        click.option("--dry-run", is_flag=True, help="只顯示變更，不寫入"),
+        click.option("--backup/--no-backup", default=True, help="寫入前是否備份"),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+def _parse_pairs(values: tuple[str, ...], label: str) -> dict[str, str]:
+    """解析 KEY=VALUE 形式的選項"""
+    pairs = {}
+    for value in values:
+        key, sep, item = value.partition("=")
+        if not sep or not key:
+            raise click.BadParameter(f"需要 KEY=VALUE 格式: {value}", param_hint=label)
+        pairs[key] = item
+    return pairs
+
+
+def _edit_servers(edit, clients, dry_run: bool, backup: bool):
+    """
+    在一個交易中執行 server 子命令的修改並一次寫入
+
+    Args:
+        edit: 以交易為參數執行修改的函數
+        clients: 目標客戶端（空表示全部）
+        dry_run: 只顯示變更
+        backup: 寫入前是否備份
+    """
+    from syncmcp.core.transaction import ConfigTransaction
+
+    with ConfigTransaction(strategy="server") as transaction:
+        try:
+            edit(transaction, clients or None)
+        except ValueError as e:
+            console.print(f"[red]❌ {e}[/red]")
+            raise SystemExit(1) from e
+
+        changes = transaction.changes()
+        for warning in transaction.warnings:
+            console.print(f"[yellow]⚠️  {warning}[/yellow]")
+        for client, items in changes.items():
+            console.print(f"[cyan]{client}[/cyan]: {', '.join(items)}")
+        if not changes:
+            console.print("沒有需要寫入的變更")
+
+        if dry_run:
+            console.print("[dim]dry-run：未寫入任何文件[/dim]")
+            return
+        try:
+            result = transaction.commit(create_backup=backup)
+        except OSError as e:
+            console.print(f"[red]❌ 寫入失敗，已還原: {e}[/red]")
+            raise SystemExit(1) from e
+
+    if result.written:
+        console.print(f"[green]✅ 已寫入: {', '.join(result.written)}[/green]")
+    if result.backup_path:
+        console.print(f"[dim]備份: {result.backup_path}[/dim]")
+
+
+@cli.group()
+def server():
+    """在所有客戶端新增、修改、刪除、啟用或停用 MCP（一次寫入、只備份一次）"""
+
+
+@server.command("add", context_settings={"ignore_unknown_options": True})
+@click.argument("name", required=False)
+@click.argument("command", required=False)
+@click.argument("args", nargs=-1)
+@click.option("--url", help="遠端 MCP 的網址（取代 COMMAND）")
+@click.option(
+    "--transport",
+    type=click.Choice(["stdio", "http", "sse"]),
+    help="傳輸類型（預設依 COMMAND / --url 判斷）",
+)
+@click.option("--env", "env", multiple=True, help="環境變數 KEY=VALUE（可重複）")
+@click.option("--header", "headers", multiple=True, help="HTTP 標頭 KEY=VALUE（可重複）")
+@click.option(
+    "--from-file",
+    type=click.Path(exists=True, dir_okay=False),
+    help='從 JSON 文件一次新增多個 MCP（{"名稱": 配置} 或 {"mcpServers": {...}}）',
+)
+@_server_edit_options
+def server_add(
+    name, command, args, url, transport, env, headers, from_file, clients, dry_run, backup
+):
+    """新增或取代 MCP，例如 syncmcp server add fs npx -y @modelcontextprotocol/server-filesystem"""
+    import json
+
+    if from_file:
+        with click.open_file(from_file, encoding="utf-8") as f:
+            servers = json.load(f)
+        if isinstance(servers, dict) and isinstance(servers.get("mcpServers"), dict):
+            servers = servers["mcpServers"]
+        if not isinstance(servers, dict) or not servers:
+            raise click.BadParameter("文件中沒有 MCP 配置", param_hint="--from-file")
+    else:
+        if not name or not (command or url):
+            raise click.UsageError("需要 NAME 以及 COMMAND 或 --url")
+        config: dict = {"url": url} if url else {"command": command, "args": [*args]}
+        config["type"] = transport or ("http" if url else "stdio")
+        if env:
+            config["env"] = _parse_pairs(env, "--env")
+        if headers:
+            config["headers"] = _parse_pairs(headers, "--header")
+        servers = {name: config}
+
+    _edit_servers(
+        lambda transaction, targets: transaction.put_many(servers, targets),
+        clients,
+        dry_run,
+        backup,
+    )
+
+
+@server.command("rm")
+@click.argument("names", nargs=-1, required=True)
+@_server_edit_options
+def server_rm(names, clients, dry_run, backup):
+    """從所有客戶端刪除 MCP"""
+    _edit_servers(
+        lambda transaction, targets: transaction.remove_many(names, targets),
+        clients,
+        dry_run,
+        backup,
+    )
+
+
+@server.command("set")
+@click.argument("name")
+@click.option("--command", help="啟動命令")
+@click.option("--arg", "args", multiple=True, help="取代命令參數（可重複）")
+@click.option("--url", help="遠端 MCP 的網址")
+@click.option("--env", "env", multiple=True, help="設定環境變數 KEY=VALUE（可重複）")
+@click.option("--header", "headers", multiple=True, help="設定 HTTP 標頭 KEY=VALUE（可重複）")
+@click.option("--unset", multiple=True, help="刪除欄位，或以 env.KEY 刪除單一環境變數（可重複）")
+@_server_edit_options
+def server_set(name, command, args, url, env, headers, unset, clients, dry_run, backup):
+    """修改已存在的 MCP 的欄位"""
+    fields: dict = {}
+    if command:
+        fields["command"] = command
+    if args:
+        fields["args"] = [*args]
+    if url:
+        fields["url"] = url
+    if env:
+        fields["env"] = _parse_pairs(env, "--env")
+    if headers:
+        fields["headers"] = _parse_pairs(headers, "--header")
+    for field in unset:
+        parent, _, key = field.partition(".")
+        if key:
+            fields.setdefault(parent, {})[key] = None
+        else:
+            fields[parent] = None
+    if not fields:
+        raise click.UsageError("沒有要修改的欄位")
+
+    _edit_servers(
+        lambda transaction, targets: transaction.update(name, fields, targets),
+        clients,
+        dry_run,
+        backup,
+    )
+
+
+@server.command("enable")
+@click.argument("names", nargs=-1, required=True)
+@_server_edit_options
+def server_enable(names, clients, dry_run, backup):
+    """啟用先前停用的 MCP（還原到停用時所在的客戶端）"""
+    _edit_servers(
+        lambda transaction, targets: transaction.enable(names, targets),
+        clients,
+        dry_run,
+        backup,
+    )
+
+
+@server.command("disable")
+@click.argument("names", nargs=-1, required=True)
+@_server_edit_options
+def server_disable(names, clients, dry_run, backup):
+    """停用 MCP：從客戶端移除並保存配置，之後可用 enable 還原"""
+    _edit_servers(
+        lambda transaction, targets: transaction.disable(names, targets),
+        clients,
+        dry_run,
+        backup,
+    )
+
+
 @cli.command()
 @click.argument("backup_id", required=False)
 def restore(backup_id):
@@ -213,6 +635,12 @@ def restore(backup_id):
 @click.option("--stats", is_flag=True, help="顯示統計信息")
 def history(limit, stats):
     """查看同步歷史記錄"""
+    from datetime import datetime
+
+    from rich.table import Table
+
+    from syncmcp.utils import get_history_manager
+
     history_manager = get_history_manager()
 
     if stats:
@@ -286,6 +714,40 @@ def history(limit, stats):
             console.print()  # 空行分隔
 
 
+@cli.command()
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="寫入文件（原子替換，例如 node_exporter textfile 目錄中的 syncmcp.prom）；預設輸出到 stdout",
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["openmetrics", "prometheus"]),
+    default="openmetrics",
+    show_default=True,
+    help="輸出格式（node_exporter textfile collector 使用 prometheus）",
+)
+def metrics(output, fmt):
+    """輸出同步、健康檢查與存儲的指標（OpenMetrics）"""
+    from pathlib import Path
+
+    from syncmcp.daemon.metrics import collect_metrics, render_metrics, write_metrics
+
+    text = render_metrics(collect_metrics(), fmt)
+    if output is None:
+        click.echo(text, nl=False)
+        return
+    try:
+        write_metrics(Path(output), text)
+    except OSError as e:
+        console.print(f"[red]❌ 無法寫入指標文件: {e}[/red]")
+        raise SystemExit(1) from e
+    console.print(f"[green]✅ 指標已寫入 {output}[/green]")
+
+
 @cli.command()
 def interactive():
     """啟動互動式介面（TUI）"""
@@ -294,11 +756,35 @@ def interactive():
     tui_main()
 
 
+def _parse_http_address(value: str) -> tuple[str, int]:
+    """解析 HOST:PORT（只給 PORT 時使用 127.0.0.1）"""
+    host, _, port = value.rpartition(":")
+    host = host.strip("[]") or "127.0.0.1"
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        raise click.BadParameter(f"無效的位址: {value}（格式為 HOST:PORT）")
+    return host, int(port)
+
+
 @cli.command()
-def mcp():
+@click.option(
+    "--http",
+    "http_address",
+    metavar="HOST:PORT",
+    default=None,
+    help="以 Streamable HTTP 提供服務（例如 127.0.0.1:8765），多個客戶端共用同一程序",
+)
+def mcp(http_address):
     """啟動 MCP Server（供 Claude Code 等客戶端使用）"""
     import asyncio
 
+    if http_address:
+        from syncmcp.mcp.server import HTTP_PATH, main_http
+
+        host, port = _parse_http_address(http_address)
+        click.echo(f"MCP Server 監聽於 http://{host}:{port}{HTTP_PATH}", err=True)
+        asyncio.run(main_http(host, port))
+        return
+
     from syncmcp.mcp.server import main as mcp_main
 
     # 執行 MCP Server
@@ -306,7 +792,21 @@ def mcp():
 
 
 @cli.command()
-def doctor():
+@click.option(
+    "--client",
+    "clients",
+    multiple=True,
+    type=click.Choice(["claude-code", "roo-code", "claude-desktop", "gemini"]),
+    help="僅檢查特定客戶端的 MCP（可重複）",
+)
+@click.option("--timeout", default=30.0, show_default=True, help="單個 MCP 的啟動逾時（秒）")
+@click.option("--probe/--no-probe", default=True, help="是否啟動各 MCP 檢查健康狀態")
+@click.option("--fresh", is_flag=True, help="忽略快取，重新啟動所有 MCP")
+@click.option(
+    "--cache-ttl", default=3600.0, show_default=True, help="沿用先前檢查結果的有效時間（秒）"
+)
+@click.pass_context
+def doctor(ctx, clients, timeout, probe, fresh, cache_ttl):
     """診斷系統環境和安裝狀態"""
     import importlib.metadata
     import shutil
@@ -424,8 +924,16 @@ def doctor():
         console.print(f"  ⚪ {syncmcp_dir} (將在首次使用時創建)")
     console.print()
 
-    # 7. 總結
-    console.print("[bold]7. 診斷總結[/bold]")
+    # 7. MCP 健康檢查
+    if probe:
+        console.print("[bold]7. MCP 健康檢查[/bold]")
+        verbose = ctx.obj.get("verbose", False)
+        if not _probe_servers(clients, timeout, verbose, fresh=fresh, cache_ttl=cache_ttl):
+            all_ok = False
+        console.print()
+
+    # 8. 總結
+    console.print(f"[bold]{8 if probe else 7}. 診斷總結[/bold]")
     if all_ok and found_configs > 0:
         console.print("  ✅ [bold green]系統狀態良好，可以正常使用！[/bold green]")
     elif all_ok and found_configs == 0:
@@ -435,5 +943,274 @@ def doctor():
     console.print()
 
 
+def _probe_servers(
+    clients: tuple[str, ...],
+    timeout: float,
+    verbose: bool,
+    fresh: bool = False,
+    cache_ttl: float = 3600.0,
+) -> bool:
+    """
+    並行啟動所有 stdio MCP 並顯示 initialize 握手結果
+
+    配置和執行檔都未改變的 MCP 沿用快取的結果。
+
+    Args:
+        clients: 只檢查這些客戶端（空表示全部）
+        timeout: 單個 MCP 的逾時（秒）
+        verbose: 是否顯示失敗 MCP 的 stderr
+        fresh: 忽略快取，全部重新檢查
+        cache_ttl: 快取結果的有效時間（秒）
+
+    Returns:
+        所有 MCP 是否正常
+    """
+    from rich.markup import escape
+
+    from syncmcp.core.config_manager import ConfigManager
+    from syncmcp.core.health import HealthCache, HealthProber, ProbeStatus, collect_targets
+
+    configs = ConfigManager().load_all()
+    targets = collect_targets(configs, clients or None)
+    if not targets:
+        console.print("  ⚪ 沒有可檢查的 MCP")
+        return True
+
+    done = 0
+    with console.status(f"[bold green]正在檢查 {len(targets)} 個 MCP...") as status:
+
+        def on_result(result):
+            nonlocal done
+            done += 1
+            status.update(f"[bold green]正在檢查 MCP ({done}/{len(targets)})...")
+
+        prober = HealthProber(timeout=timeout, cache=HealthCache(ttl=cache_ttl))
+        results = prober.run(targets, on_result=on_result, fresh=fresh)
+
+    for result in results:
+        where = ", ".join(result.clients)
+        if result.cached:
+            where += "，快取"
+        if result.status is ProbeStatus.OK:
+            version = f" {result.server_version}" if result.server_version else ""
+            console.print(
+                f"  ✅ {result.name} ({result.latency_ms:.0f} ms){version} [dim]{where}[/dim]"
+            )
+        elif result.status is ProbeStatus.SKIPPED:
+            console.print(f"  ⚪ {result.name} - {result.error} [dim]{where}[/dim]")
+        else:
+            console.print(f"  ❌ {result.name} - {result.error} [dim]{where}[/dim]")
+            if result.hint:
+                console.print(f"     💡 {result.hint}")
+            tail = result.stderr_tail if verbose else result.stderr_tail[-3:]
+            for line in tail:
+                console.print(f"     [dim]{escape(line)}[/dim]", highlight=False)
+
+    healthy = sum(1 for result in results if result.status is ProbeStatus.OK)
+    checked = sum(1 for result in results if result.status is not ProbeStatus.SKIPPED)
+    console.print(f"\n  {healthy}/{checked} 個 MCP 正常運作")
+    if any(result.cached for result in results):
+        console.print("  [dim]部分結果來自快取，使用 --fresh 重新檢查[/dim]")
+    return all(result.ok for result in results)
+
+
+def _monitor_options(func):
+    """monitor start / run 共用的選項"""
+    options = [
+        click.option("--debounce", default=2.0, show_default=True, help="配置變更後等待的秒數"),
+        click.option("--backup/--no-backup", default=True, help="自動同步前是否備份"),
+        click.option("--autosync/--no-autosync", default=True, help="配置變更後是否自動同步"),
+        click.option("--probe/--no-probe", default=True, help="是否定期檢查 MCP 健康狀態"),
+        click.option(
+            "--probe-interval", default=900.0, show_default=True, help="正常 MCP 的檢查間隔（秒）"
+        ),
+        click.option(
+            "--serve/--no-serve",
+            default=True,
+            help="是否在 ~/.syncmcp/daemon.sock 上回答 status / list / diff 查詢",
+        ),
+        click.option(
+            "--metrics-file",
+            type=click.Path(dir_okay=False),
+            default=None,
+            help="每次更新狀態時以原子替換寫出指標文件（例如 node_exporter textfile 目錄）",
+        ),
+        click.option(
+            "--metrics-format",
+            type=click.Choice(["openmetrics", "prometheus"]),
+            default="openmetrics",
+            show_default=True,
+            help="指標文件格式",
+        ),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+@cli.group()
+def monitor():
+    """背景監控（自動同步與定期 MCP 健康檢查）"""
+
+
+@monitor.command("start")
+@_monitor_options
+@click.pass_context
+def monitor_start(
+    ctx,
+    debounce,
+    backup,
+    autosync,
+    probe,
+    probe_interval,
+    serve,
+    metrics_file,
+    metrics_format,
+):
+    """在背景啟動監控"""
+    import os
+
+    from syncmcp.daemon.monitor import monitor_log_file, monitor_pid_file
+    from syncmcp.daemon.process import read_pid, spawn_detached
+
+    pid = read_pid(monitor_pid_file())
+    if pid is not None:
+        console.print(f"[yellow]⚠️  背景監控已在執行 (pid {pid})[/yellow]")
+        return
+
+    args = ["monitor", "run", "--debounce", str(debounce), "--probe-interval", str(probe_interval)]
+    # 背景監控沿用相同的日誌格式
+    args = ["--log-format", ctx.find_root().params["log_format"], *args]
+    args.append("--backup" if backup else "--no-backup")
+    args.append("--autosync" if autosync else "--no-autosync")
+    args.append("--probe" if probe else "--no-probe")
+    args.append("--serve" if serve else "--no-serve")
+    if metrics_file is not None:
+        # 背景程序的工作目錄可能不同，使用絕對路徑
+        args.extend(["--metrics-file", os.path.abspath(metrics_file)])
+        args.extend(["--metrics-format", metrics_format])
+    try:
+        pid = spawn_detached(args, monitor_pid_file(), monitor_log_file())
+    except RuntimeError as e:
+        console.print(f"[red]❌ {e}[/red]")
+        raise SystemExit(1) from e
+
+    console.print(f"[green]✅ 背景監控已啟動 (pid {pid})[/green]")
+    console.print(f"[dim]日誌: {monitor_log_file()}[/dim]")
+
+
+@monitor.command("stop")
+def monitor_stop():
+    """停止背景監控"""
+    from syncmcp.core.health import PROBE_TIMEOUT
+    from syncmcp.daemon.monitor import monitor_pid_file
+    from syncmcp.daemon.process import stop_process
+
+    # 監控會等待進行中的健康檢查結束，以免留下孤立的 MCP 進程
+    pid = stop_process(monitor_pid_file(), timeout=PROBE_TIMEOUT + 10)
+    if pid is None:
+        console.print("[yellow]背景監控未在執行[/yellow]")
+    else:
+        console.print(f"[green]✅ 背景監控已停止 (pid {pid})[/green]")
+
+
+@monitor.command("status")
+def monitor_status():
+    """查看背景監控狀態"""
+    from datetime import datetime
+
+    from syncmcp.daemon.monitor import monitor_pid_file
+    from syncmcp.daemon.process import read_pid
+    from syncmcp.daemon.status import read_status
+
+    pid = read_pid(monitor_pid_file())
+    if pid is None:
+        console.print("⚪ 背景監控未在執行")
+        console.print("💡 使用 `syncmcp monitor start` 啟動")
+        return
+
+    console.print(f"✅ 背景監控執行中 (pid {pid})")
+    data = read_status()
+    if data is None or data.get("pid") != pid:
+        return
+
+    started = datetime.fromtimestamp(data["started_at"]).strftime("%Y-%m-%d %H:%M:%S")
+    console.print(f"   啟動時間: {started}")
+    console.print(f"   監聽方式: {data.get('backend') or 'N/A'}")
+    console.print(f"   自動同步次數: {data.get('sync_count', 0)}")
+    if data.get("socket"):
+        console.print(f"   查詢服務: {data['socket']}")
+    _print_monitor_summary(data)
+
+
+@monitor.command("run")
+@_monitor_options
+def monitor_run(
+    debounce, backup, autosync, probe, probe_interval, serve, metrics_file, metrics_format
+):
+    """在前景執行監控（供 start 或 systemd / launchd 使用）"""
+    from pathlib import Path
+
+    from syncmcp.daemon.monitor import Monitor
+
+    Monitor(
+        debounce=debounce,
+        create_backup=backup,
+        autosync=autosync,
+        probe=probe,
+        probe_interval=probe_interval,
+        serve=serve,
+        metrics_file=Path(metrics_file) if metrics_file is not None else None,
+        metrics_format=metrics_format,
+    ).run()
+
+
+@cli.command()
+@click.option("--debounce", default=2.0, show_default=True, help="配置變更後等待的秒數")
+@click.option("--backup/--no-backup", default=True, help="自動同步前是否備份")
+@click.option("--dry-run", is_flag=True, help="只顯示會同步的變更，不寫入")
+def watch(debounce, backup, dry_run):
+    """在前景監聽配置文件，變更後自動同步（Ctrl+C 結束）"""
+    import threading
+    from datetime import datetime
+
+    from syncmcp.daemon.autosync import AutoSync
+
+    autosync = AutoSync(debounce=debounce, create_backup=backup, dry_run=dry_run)
+    autosync.start()
+    console.print(f"👀 監聽 {len(autosync.paths)} 個客戶端配置 ({autosync.watcher.backend})")
+    for client, path in autosync.paths.items():
+        console.print(f"   [dim]{client}: {path}[/dim]")
+    console.print("[dim]按 Ctrl+C 結束[/dim]")
+
+    stop = threading.Event()
+    try:
+        while not stop.is_set():
+            if not autosync.wait_due(stop, 1.0):
+                continue
+            changed, result = autosync.run_pending()
+            if result is None:
+                continue
+
+            now = datetime.now().strftime("%H:%M:%S")
+            console.print(f"\n[cyan]{now}[/cyan] 偵測到變更: {', '.join(sorted(changed))}")
+            if not result.success:
+                console.print(f"[red]❌ 同步失敗: {'; '.join(result.errors)}[/red]")
+            elif dry_run:
+                for client, changes in result.changes.items():
+                    for change in changes:
+                        console.print(f"   • {client}: {change}")
+            elif result.written:
+                console.print(f"[green]✅ 已寫入: {', '.join(sorted(result.written))}[/green]")
+            else:
+                console.print("   所有客戶端已是最新")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        autosync.stop()
+    console.print("\n已停止監聽")
+
+
 if __name__ == "__main__":
     cli()
@@ -19,8 +19,16 @@ class BackupManager:
         """創建備份"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_id = f"backup_{timestamp}"
-        backup_path = self.backup_dir / backup_id
-        backup_path.mkdir()
+        # 同一秒內的多次備份加上序號（排序後仍在較早的備份之後）
+        suffix = 0
+        while True:
+            backup_path = self.backup_dir / backup_id
+            try:
+                backup_path.mkdir()
+                break
+            except FileExistsError:
+                suffix += 1
+                backup_id = f"backup_{timestamp}_{suffix}"
 
         # 保存所有配置
         for client_name, config in configs.items():
@@ -3,60 +3,272 @@
 """
 
 import json
+import os
+import re
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 from pathlib import Path
+from typing import Any
+
+from ..utils import content_digest, get_server_clock
+from .records import intern_servers, to_plain
+from .transport import STDIO, infer_type, render_servers, render_targets
+
+MCP_SECTION = "mcpServers"
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+def _skip_whitespace(text: str, idx: int) -> int:
+    """返回 idx 之後第一個非空白字元的位置"""
+    match = _WHITESPACE.match(text, idx)
+    assert match is not None  # 模式可匹配空字串，一定成功
+    return match.end()
+
+
+def _locate_section(text: str, key: str) -> tuple[Any, int, int] | None:
+    """
+    在頂層 JSON 物件中找出某個鍵的值及其字元位置
+
+    逐個解析頂層的值，只保留目標鍵的結果，其餘值解析後即丟棄。
+    重複的鍵以最後一個為準（與 json.load 一致）。
+
+    Args:
+        text: JSON 文件內容
+        key: 頂層鍵名
+
+    Returns:
+        (值, 起始位置, 結束位置)，鍵不存在時返回 None
+
+    Raises:
+        json.JSONDecodeError: 文件不是合法的 JSON 物件
+    """
+    idx = _skip_whitespace(text, 0)
+    if text[idx : idx + 1] != "{":
+        raise json.JSONDecodeError("Expecting top-level object", text, idx)
+
+    found = None
+    idx = _skip_whitespace(text, idx + 1)
+    if text[idx : idx + 1] == "}":
+        idx += 1
+    else:
+        while True:
+            if text[idx : idx + 1] != '"':
+                raise json.JSONDecodeError("Expecting property name", text, idx)
+            name, idx = _DECODER.raw_decode(text, idx)
+            idx = _skip_whitespace(text, idx)
+            if text[idx : idx + 1] != ":":
+                raise json.JSONDecodeError("Expecting ':' delimiter", text, idx)
+            start = _skip_whitespace(text, idx + 1)
+            value, idx = _DECODER.raw_decode(text, start)
+            if name == key:
+                found = (value, start, idx)
+
+            idx = _skip_whitespace(text, idx)
+            delimiter = text[idx : idx + 1]
+            idx = _skip_whitespace(text, idx + 1)
+            if delimiter == "}":
+                break
+            if delimiter != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, idx - 1)
+
+    if _skip_whitespace(text, idx) != len(text):
+        raise json.JSONDecodeError("Extra data", text, idx)
+    return found
 
 
 class ClientConfig:
-    """客戶端配置的統一表示"""
+    """
+    客戶端配置的統一表示
+
+    只保存 mcpServers 區段、文件指紋和該區段在文件中的位元組位置。
+    保存時若文件未被其他程序修改，直接替換該區段的位元組；
+    否則才載入完整文件重新寫出。
+    新內容先寫入同目錄的臨時檔，再以原子替換取代原文件。
+    """
+
+    __slots__ = (
+        "client_name",
+        "file_path",
+        "mcpServers",
+        "last_modified",
+        "section_modified",
+        "fingerprint",
+        "_span",
+        "_staged",
+    )
 
     def __init__(self, client_name: str, file_path: Path):
         self.client_name = client_name
         self.file_path = file_path
         self.mcpServers: dict = {}
         self.last_modified: float | None = None
-        self._raw_data: dict = {}
+        self.section_modified: float | None = None  # MCP 區段最後變更時間（由修改時鐘提供）
+        self.fingerprint: str | None = None  # 載入時文件內容的摘要
+        self._span: tuple[int, int, str] | None = None  # (起始位元組, 結束位元組, 行首縮排)
+        self._staged: tuple[Path, Path, bytes, tuple[int, int, str]] | None = None
+
+    def recency(self) -> tuple[float, float]:
+        """
+        比較配置新舊的鍵
+
+        Claude Code 會為無關的狀態改寫 ~/.claude.json，文件 mtime 因此偏新；
+        優先使用 MCP 區段最後變更的時間，修改時鐘沒有記錄時才使用 mtime。
+
+        Returns:
+            (MCP 區段變更時間, 文件 mtime)
+        """
+        mtime = self.last_modified or 0.0
+        section = mtime if self.section_modified is None else self.section_modified
+        return (section, mtime)
 
     def load(self):
         """載入配置文件"""
         if not self.file_path.exists():
             return
 
+        data = self.file_path.read_bytes()
+        text = data.decode("utf-8")
+        section = _locate_section(text, MCP_SECTION)
+
+        self._span = None
+        servers = {}
+        if section is not None:
+            value, start, end = section
+            if isinstance(value, dict):
+                servers = value
+            self._span = self._to_byte_span(text, data, start, end)
+
+        # 轉為共享記錄：各客戶端中內容相同的 MCP 共用同一物件
+        self.mcpServers = intern_servers(servers, owned=True)
+        self.fingerprint = content_digest(data)
+        self.last_modified = self.file_path.stat().st_mtime
+
+    def load_document(self) -> dict:
+        """
+        載入完整的配置文件（不保留在物件中）
+
+        Returns:
+            完整文件內容，文件不存在時返回空字典
+        """
+        if not self.file_path.exists():
+            return {}
         with open(self.file_path, encoding="utf-8") as f:
-            self._raw_data = json.load(f)
-            self.mcpServers = self._raw_data.get("mcpServers", {})
-            self.last_modified = self.file_path.stat().st_mtime
+            document: dict = json.load(f)
+        return document
 
     def save(self):
         """保存配置文件"""
-        # 確保目錄存在
-        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.stage()
+        try:
+            self.commit_staged()
+        except BaseException:
+            self.discard_staged()
+            raise
+
+    def stage(self) -> Path:
+        """
+        將保存後的內容寫入臨時檔（尚未取代原文件）
 
-        # 保持原有結構，只更新 mcpServers
-        if self.file_path.exists():
-            with open(self.file_path, encoding="utf-8") as f:
-                data = json.load(f)
+        Returns:
+            臨時檔路徑
+        """
+        self.discard_staged()
+        # 符號連結指向的實際文件（替換連結本身會讓連結變成普通文件）
+        target = self.file_path.resolve()
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        current = target.read_bytes() if target.exists() else None
+
+        if current is not None and self._span and content_digest(current) == self.fingerprint:
+            # 文件未被修改：只替換 mcpServers 區段，其餘內容保持原樣
+            start, end, indent = self._span
+            payload = self._dump_section(indent).encode("utf-8")
+            data = current[:start] + payload + current[end:]
+            span = (start, start + len(payload), indent)
         else:
-            data = {}
-
-        data["mcpServers"] = self.mcpServers
+            # 保持原有結構，只更新 mcpServers（需要載入完整文件）
+            document = json.loads(current) if current else {}
+            document[MCP_SECTION] = self.mcpServers
+            text = json.dumps(document, indent=2, ensure_ascii=False, default=to_plain)
+            data = text.encode("utf-8")
+            section = _locate_section(text, MCP_SECTION)
+            assert section is not None  # 剛寫入的鍵一定存在
+            span = self._to_byte_span(text, data, section[1], section[2])
+
+        tmp_file = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if current is not None:
+            os.chmod(tmp_file, target.stat().st_mode & 0o7777)
+
+        self._staged = (tmp_file, target, data, span)
+        return tmp_file
+
+    def commit_staged(self):
+        """
+        以 stage() 寫入的臨時檔原子替換配置文件
 
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        Raises:
+            RuntimeError: 沒有先呼叫 stage()
+        """
+        if self._staged is None:
+            raise RuntimeError(f"{self.client_name} 沒有待提交的內容，請先呼叫 stage()")
+        tmp_file, target, data, span = self._staged
+        os.replace(tmp_file, target)
+        self._staged = None
+
+        self._span = span
+        self.fingerprint = content_digest(data)
+        self.last_modified = target.stat().st_mtime
+
+    def discard_staged(self):
+        """刪除尚未提交的臨時檔"""
+        if self._staged is not None:
+            try:
+                self._staged[0].unlink()
+            except OSError:
+                pass
+            self._staged = None
+
+    def _dump_section(self, indent: str) -> str:
+        """序列化 mcpServers，後續行對齊原本的縮排"""
+        text = json.dumps(self.mcpServers, indent=2, ensure_ascii=False, default=to_plain)
+        return text.replace("\n", "\n" + indent) if indent else text
+
+    @staticmethod
+    def _to_byte_span(text: str, data: bytes, start: int, end: int) -> tuple[int, int, str]:
+        """將字元位置轉為位元組位置，並記錄該鍵所在行的縮排"""
+        line_start = text.rfind("\n", 0, start) + 1
+        indent = text[line_start : _skip_whitespace(text, line_start)]
+        if len(data) != len(text):
+            # 含非 ASCII 字元時，字元位置與位元組位置不同
+            end = len(text[:end].encode("utf-8"))
+            start = len(text[:start].encode("utf-8"))
+        return (start, end, indent)
 
 
 class ClientAdapter(ABC):
     """客戶端適配器基類"""
 
+    # 客戶端名稱（對應轉換表中的目標客戶端）
+    client_name: str = ""
+
     @abstractmethod
     def get_config_path(self) -> Path:
         """獲取配置文件路徑"""
         pass
 
-    @abstractmethod
     def normalize_config(self, config: dict) -> dict:
-        """標準化配置格式"""
-        pass
+        """
+        標準化配置為此客戶端的格式
+
+        類型轉換和欄位清理規則統一定義在 transport.CONVERSION_TABLE。
+        """
+        return render_servers(config, self.client_name)
 
     @abstractmethod
     def validate_config(self, config: dict) -> list[str]:
@@ -65,31 +277,16 @@ class ClientAdapter(ABC):
 
 
 class ClaudeCodeAdapter(ClientAdapter):
-    """Claude Code 適配器"""
+    """
+    Claude Code 適配器
+    - streamable-http → http (有 headers) 或 sse (無 headers)
+    """
+
+    client_name = "claude-code"
 
     def get_config_path(self) -> Path:
         return Path.home() / ".claude.json"
 
-    def normalize_config(self, config: dict) -> dict:
-        """
-        標準化配置為 Claude Code 格式
-        - streamable-http → http (有 headers) 或 sse (無 headers)
-        """
-        normalized = {}
-        for name, server in config.items():
-            server_copy = server.copy()
-
-            # Roo Code → Claude Code 類型轉換
-            if server_copy.get("type") == "streamable-http":
-                # 如果有 headers，轉為 http；否則轉為 sse
-                if "headers" in server_copy and server_copy["headers"]:
-                    server_copy["type"] = "http"
-                else:
-                    server_copy["type"] = "sse"
-
-            normalized[name] = server_copy
-        return normalized
-
     def validate_config(self, config: dict) -> list[str]:
         errors = []
         # 驗證必要欄位（僅針對 stdio 類型）
@@ -100,7 +297,12 @@ class ClaudeCodeAdapter(ClientAdapter):
 
 
 class RooCodeAdapter(ClientAdapter):
-    """Roo Code 適配器"""
+    """
+    Roo Code 適配器
+    - http/sse → streamable-http
+    """
+
+    client_name = "roo-code"
 
     def get_config_path(self) -> Path:
         return (
@@ -108,66 +310,42 @@ class RooCodeAdapter(ClientAdapter):
             / "Library/Application Support/Code/User/globalStorage/rooveterinaryinc.roo-cline/settings/mcp_settings.json"
         )
 
-    def normalize_config(self, config: dict) -> dict:
-        """
-        標準化配置為 Roo Code 格式
-        - http/sse → streamable-http
-        """
-        normalized = {}
-        for name, server in config.items():
-            server_copy = server.copy()
-
-            # Claude Code → Roo Code 類型轉換
-            if server_copy.get("type") in ["http", "sse"]:
-                server_copy["type"] = "streamable-http"
-
-            normalized[name] = server_copy
-        return normalized
-
     def validate_config(self, config: dict) -> list[str]:
         return []
 
 
 class ClaudeDesktopAdapter(ClientAdapter):
-    """Claude Desktop 適配器"""
+    """
+    Claude Desktop 適配器
+    - 只保留 stdio 類型的 MCP
+    - 過濾掉所有遠端 MCP (http, sse, streamable-http)
+    """
+
+    client_name = "claude-desktop"
 
     def get_config_path(self) -> Path:
         return Path.home() / "Library/Application Support/Claude/claude_desktop_config.json"
 
-    def normalize_config(self, config: dict) -> dict:
-        """
-        標準化配置為 Claude Desktop 格式
-        - 只保留 stdio 類型的 MCP
-        - 過濾掉所有遠端 MCP (http, sse, streamable-http)
-        """
-        filtered = {}
-        for name, server in config.items():
-            server_type = server.get("type", server.get("transport"))
-            # 只保留 stdio 類型
-            if server_type == "stdio":
-                filtered[name] = server
-        return filtered
-
     def validate_config(self, config: dict) -> list[str]:
         errors = []
         # Claude Desktop 只支援 stdio
         for name, server in config.get("mcpServers", {}).items():
-            server_type = server.get("type", server.get("transport"))
-            if server_type != "stdio":
+            if infer_type(server) != STDIO:
                 errors.append(f"{name}: Claude Desktop 只支援 stdio transport（已自動過濾）")
         return errors
 
 
 class GeminiAdapter(ClientAdapter):
-    """Gemini CLI 適配器"""
+    """
+    Gemini CLI 適配器
+    - http/sse → streamable-http
+    """
+
+    client_name = "gemini"
 
     def get_config_path(self) -> Path:
         return Path.home() / ".gemini/settings.json"
 
-    def normalize_config(self, config: dict) -> dict:
-        # Gemini 格式轉換
-        return config
-
     def validate_config(self, config: dict) -> list[str]:
         return []
 
@@ -175,7 +353,12 @@ class GeminiAdapter(ClientAdapter):
 class ConfigManager:
     """配置管理器 - 管理所有客戶端的配置"""
 
-    def __init__(self):
+    def __init__(self, server_clock=None):
+        """
+        Args:
+            server_clock: MCP 修改時鐘（預設使用全局實例）
+        """
+        self.server_clock = server_clock if server_clock is not None else get_server_clock()
         self.adapters = {
             "claude-code": ClaudeCodeAdapter(),
             "roo-code": RooCodeAdapter(),
@@ -190,21 +373,65 @@ class ConfigManager:
             config = ClientConfig(name, adapter.get_config_path())
             config.load()
             configs[name] = config
+
+            # 依摘要變化更新逐個 MCP 的修改時間
+            if config.last_modified is not None:
+                self.server_clock.observe(name, config.mcpServers, changed_at=config.last_modified)
+                config.section_modified = self.server_clock.section_changed_at(name)
+
+        self.server_clock.flush()
         return configs
 
-    def sync_all(self, source_config: ClientConfig):
-        """將源配置同步到所有客戶端"""
+    def sync_all(
+        self,
+        source_config: ClientConfig,
+        targets: dict[str, ClientConfig] | None = None,
+        on_client: Callable[[str, bool], None] | None = None,
+    ) -> list[str]:
+        """
+        將源配置同步到所有客戶端
+
+        內容已與目標格式相同的客戶端不會重寫文件；寫入的區段會記錄到修改時鐘，
+        之後重新載入時不會被當作該客戶端的新修改。
+
+        Args:
+            source_config: 源配置
+            targets: 已載入的目標配置（沿用其指紋與區段位置，只替換 mcpServers 區段）
+            on_client: 每個客戶端寫入前後的回調 (客戶端名稱, 是否已處理完畢)
+
+        Returns:
+            實際寫入的客戶端名稱
+        """
+        written = []
+        # 一次遍歷渲染所有目標客戶端的格式
+        rendered = render_targets(
+            source_config.mcpServers, (adapter.client_name for adapter in self.adapters.values())
+        )
+
         for name, adapter in self.adapters.items():
-            target_config = ClientConfig(name, adapter.get_config_path())
+            target_config = (targets or {}).get(name)
+            if target_config is None:
+                target_config = ClientConfig(name, adapter.get_config_path())
 
-            # 標準化和驗證
-            normalized = adapter.normalize_config(source_config.mcpServers)
+            # 驗證
+            normalized = rendered[adapter.client_name]
             errors = adapter.validate_config({"mcpServers": normalized})
 
             if errors:
                 # 記錄警告但繼續
                 print(f"警告: {name} 配置驗證失敗: {errors}")
 
-            # 寫入配置
-            target_config.mcpServers = normalized
-            target_config.save()
+            # 寫入配置（已存在且內容相同時略過，避免無謂的寫入和文件事件）
+            if on_client:
+                on_client(name, False)
+            if target_config.last_modified is None or target_config.mcpServers != normalized:
+                target_config.mcpServers = normalized
+                target_config.save()
+                # SyncMCP 自己的寫入不算是使用者修改 MCP 區段
+                self.server_clock.propagated(name, normalized)
+                written.append(name)
+            if on_client:
+                on_client(name, True)
+
+        self.server_clock.flush()
+        return written
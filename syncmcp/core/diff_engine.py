@@ -2,10 +2,24 @@
 差異檢測引擎 - 分析配置差異
 """
 
+import json
+from collections.abc import Iterator
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
+from .transport import FILTERING_CLIENTS
 
-@dataclass
+if TYPE_CHECKING:
+    from .config_manager import ClientConfig
+
+# 差異狀態（依顯示順序）
+DIFF_STATUSES = ("added", "removed", "modified", "unchanged")
+
+# 文字報告使用的符號
+_STATUS_MARKERS = {"added": "+", "removed": "-", "modified": "~"}
+
+
+@dataclass(slots=True)
 class DiffItem:
     """差異項目"""
 
@@ -14,71 +28,203 @@ class DiffItem:
     old_value: dict = None
     new_value: dict = None
 
+    def to_dict(self) -> dict:
+        """轉換為字典"""
+        return {
+            "name": self.name,
+            "status": self.status,
+            "old_value": self.old_value,
+            "new_value": self.new_value,
+        }
+
 
 class DiffReport:
-    """差異報告"""
+    """
+    差異報告
+
+    在 add_diff 時同步維護各狀態的索引和計數，
+    查詢統計資訊不需要重新掃描所有項目。
+    """
+
+    __slots__ = ("diffs", "_by_status", "_counts")
 
     def __init__(self):
         self.diffs: dict[str, list[DiffItem]] = {}
+        # status -> [(client, item)]，保持加入順序
+        self._by_status: dict[str, list[tuple[str, DiffItem]]] = {s: [] for s in DIFF_STATUSES}
+        # client -> status -> 數量
+        self._counts: dict[str, dict[str, int]] = {}
 
     def add_diff(self, client: str, diff_item: DiffItem):
         """新增差異項目"""
-        if client not in self.diffs:
-            self.diffs[client] = []
-        self.diffs[client].append(diff_item)
+        items = self.diffs.get(client)
+        if items is None:
+            items = self.diffs[client] = []
+            self._counts[client] = dict.fromkeys(DIFF_STATUSES, 0)
+        items.append(diff_item)
 
-    def to_text(self) -> str:
-        """轉換為文字報告"""
-        lines = []
-        for client, items in self.diffs.items():
-            if not items:
-                continue
-            lines.append(f"\n{client}:")
-            for item in items:
-                if item.status == "added":
-                    lines.append(f"  + {item.name}")
-                elif item.status == "removed":
-                    lines.append(f"  - {item.name}")
-                elif item.status == "modified":
-                    lines.append(f"  ~ {item.name}")
-        return "\n".join(lines) if lines else "無差異"
+        status = diff_item.status
+        self._by_status.setdefault(status, []).append((client, diff_item))
+        counts = self._counts[client]
+        counts[status] = counts.get(status, 0) + 1
+
+    def count(self, status: str, client: str | None = None) -> int:
+        """
+        獲取某狀態的項目數量
+
+        Args:
+            status: 差異狀態
+            client: 限定客戶端（預設全部）
+        """
+        if client is None:
+            return len(self._by_status.get(status, ()))
+        return self._counts.get(client, {}).get(status, 0)
+
+    def items_with_status(self, status: str) -> list[tuple[str, DiffItem]]:
+        """獲取某狀態的所有項目 [(client, item)]（依加入順序）"""
+        return self._by_status.get(status, [])
+
+    def names_with_status(self, client: str, status: str) -> list[str]:
+        """獲取特定客戶端中某狀態的 MCP 名稱"""
+        if not self.count(status, client):
+            return []
+        return [item.name for item in self.diffs[client] if item.status == status]
+
+    def get_statistics(self) -> dict[str, int]:
+        """獲取各狀態的總數"""
+        stats = {status: len(items) for status, items in self._by_status.items()}
+        stats["total"] = sum(len(items) for items in self.diffs.values())
+        return stats
+
+    def has_changes(self) -> bool:
+        """檢查是否有任何新增、移除或修改"""
+        return any(self._by_status[status] for status in _STATUS_MARKERS)
 
     def has_removals(self) -> bool:
         """檢查是否有配置被移除"""
-        for items in self.diffs.values():
-            if any(item.status == "removed" for item in items):
-                return True
-        return False
+        return bool(self._by_status["removed"])
 
     def get_removal_count(self, client: str) -> int:
         """獲取特定客戶端的移除數量"""
-        if client not in self.diffs:
-            return 0
-        return sum(1 for item in self.diffs[client] if item.status == "removed")
+        return self.count("removed", client)
+
+    # ------------------------------------------------------------------
+    # 串流輸出
+    # ------------------------------------------------------------------
+
+    def iter_text(self) -> Iterator[str]:
+        """逐行產生文字報告（不含換行符）"""
+        for client, items in self.diffs.items():
+            if not any(self._counts[client][status] for status in _STATUS_MARKERS):
+                continue
+            yield ""
+            yield f"{client}:"
+            for item in items:
+                marker = _STATUS_MARKERS.get(item.status)
+                if marker:
+                    yield f"  {marker} {item.name}"
+
+    def iter_markdown(self) -> Iterator[str]:
+        """逐行產生 Markdown 報告（不含換行符）"""
+        for client, items in self.diffs.items():
+            if not any(self._counts[client][status] for status in _STATUS_MARKERS):
+                continue
+            yield f"### {client}"
+            yield ""
+            for item in items:
+                marker = _STATUS_MARKERS.get(item.status)
+                if marker:
+                    yield f"- `{marker}` **{item.name}**"
+            yield ""
+
+    def iter_json(self, include_values: bool = False) -> Iterator[str]:
+        """
+        逐段產生 JSON 報告
+
+        組合所有片段即為一個完整的 JSON 物件：
+        {"statistics": {...}, "diffs": {client: [item, ...]}}
+
+        Args:
+            include_values: 是否包含 old_value / new_value
+        """
+        yield '{"statistics": '
+        yield json.dumps(self.get_statistics())
+        yield ', "diffs": {'
+        for client_index, (client, items) in enumerate(self.diffs.items()):
+            yield (", " if client_index else "") + json.dumps(client, ensure_ascii=False) + ": ["
+            for item_index, item in enumerate(items):
+                yield (", " if item_index else "") + self._dump_item(item, include_values)
+            yield "]"
+        yield "}}"
+
+    def iter_ndjson(self, include_values: bool = False) -> Iterator[str]:
+        """
+        逐行產生 NDJSON 報告（每行一個項目，不含換行符）
+
+        Args:
+            include_values: 是否包含 old_value / new_value
+        """
+        for client, items in self.diffs.items():
+            for item in items:
+                yield self._dump_item(item, include_values, client=client)
+
+    @staticmethod
+    def _dump_item(item: DiffItem, include_values: bool, client: str | None = None) -> str:
+        """序列化單個項目"""
+        data: dict[str, object] = {"client": client} if client is not None else {}
+        data["name"] = item.name
+        data["status"] = item.status
+        if include_values:
+            data["old_value"] = item.old_value
+            data["new_value"] = item.new_value
+        return json.dumps(data, ensure_ascii=False, default=dict)
+
+    def to_text(self) -> str:
+        """轉換為文字報告"""
+        text = "\n".join(self.iter_text())
+        return text if text else "無差異"
+
+    def to_markdown(self) -> str:
+        """轉換為 Markdown 報告"""
+        text = "\n".join(self.iter_markdown())
+        return text if text else "無差異"
+
+    def to_json(self, include_values: bool = False) -> str:
+        """轉換為 JSON 報告"""
+        return "".join(self.iter_json(include_values))
 
 
 class DiffEngine:
     """差異檢測引擎"""
 
-    def analyze(self, configs: dict[str, "ClientConfig"]) -> DiffReport:
-        """分析配置差異"""
+    def analyze(self, configs: dict[str, "ClientConfig"], source: str | None = None) -> DiffReport:
+        """
+        分析配置差異
+
+        Args:
+            configs: 客戶端配置
+            source: 指定的源客戶端（預設自動選擇，見 select_source）
+
+        Returns:
+            差異報告
+        """
         report = DiffReport()
 
         # 找出所有 MCP 的聯集
         all_mcps = self._get_all_mcp_names(configs)
 
-        # 確定「源」配置（最新的）
-        source = self._select_source(configs)
+        # 確定「源」配置（與同步寫入時使用相同的規則）
+        source_config = self._select_source(configs, source)
 
-        if not source:
+        if not source_config:
             return report
 
         # 對每個客戶端分析差異
         for client_name, config in configs.items():
-            if client_name == source.client_name:
+            if client_name == source_config.client_name:
                 continue  # 跳過源本身
 
-            self._compare_configs(source.mcpServers, config.mcpServers, client_name, report)
+            self._compare_configs(source_config.mcpServers, config.mcpServers, client_name, report)
 
         return report
 
@@ -89,14 +235,9 @@ class DiffEngine:
             all_names.update(config.mcpServers.keys())
         return all_names
 
-    def _select_source(self, configs: dict) -> "ClientConfig":
-        """選擇最新的配置作為源"""
-        latest = None
-        for config in configs.values():
-            if config.last_modified:
-                if not latest or config.last_modified > latest.last_modified:
-                    latest = config
-        return latest
+    def _select_source(self, configs: dict, preferred: str | None = None) -> "ClientConfig | None":
+        """選擇源配置（見 select_source）"""
+        return select_source(configs, preferred)
 
     def _compare_configs(self, source: dict, target: dict, client: str, report: DiffReport):
         """比較兩個配置"""
@@ -120,3 +261,33 @@ class DiffEngine:
                         name=name, status="modified", old_value=target[name], new_value=source[name]
                     ),
                 )
+
+
+def select_source(
+    configs: dict[str, "ClientConfig"], preferred: str | None = None
+) -> "ClientConfig | None":
+    """
+    選擇同步的源配置
+
+    優先使用指定且存在的客戶端；否則選 MCP 區段最新者（見 ClientConfig.recency）。
+    會過濾 MCP 的客戶端（如 Claude Desktop 不支援遠端 MCP）只有在沒有其他
+    候選時才會被自動選中，否則以它為源會刪除其他客戶端的遠端 MCP。
+
+    Args:
+        configs: 客戶端配置
+        preferred: 指定的源客戶端
+
+    Returns:
+        源配置，沒有任何存在的配置時返回 None
+    """
+    if preferred is not None:
+        config = configs.get(preferred)
+        if config is not None and config.last_modified:
+            return config
+
+    existing = [config for config in configs.values() if config.last_modified]
+    complete = [config for config in existing if config.client_name not in FILTERING_CLIENTS]
+    candidates = complete or existing
+    if not candidates:
+        return None
+    return max(candidates, key=lambda config: config.recency())
@@ -0,0 +1,673 @@
+"""
+健康檢查 - 並行啟動 stdio MCP 並完成 initialize 握手
+
+每個 MCP 在獨立的子進程中啟動，以信號量限制同時執行的數量，
+並對每個探測設定逾時，因此總耗時取決於最慢的 MCP 而非所有 MCP 的總和。
+遠端類型（http / sse）不在此探測。
+
+探測結果以「啟動方式 + 執行檔 mtime」的指紋快取在 ~/.syncmcp/health_cache.json，
+配置或執行檔未改變且未過期時直接沿用，不再重新啟動。
+"""
+
+import asyncio
+import json
+import os
+import re
+import shutil
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import asdict, dataclass, field, replace
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+from ..utils.digest import server_digest
+from .transport import STDIO, infer_type
+
+# 預設值
+PROBE_TIMEOUT = 30.0  # 秒（首次經 npx / uvx 下載可能很慢）
+MAX_CONCURRENT_PROBES = 8
+STDERR_TAIL_LINES = 20
+SHUTDOWN_GRACE = 1.0  # 關閉 stdin 後等待進程結束的時間（秒）
+HEALTH_CACHE_TTL = 3600.0  # 正常結果的快取時間（秒）
+FAILURE_CACHE_TTL = 60.0  # 失敗結果的快取時間（秒），讓修復後能很快看到新結果
+
+# 探測使用的 MCP 協議版本與客戶端資訊
+PROTOCOL_VERSION = "2025-06-18"
+CLIENT_INFO = {"name": "syncmcp-doctor", "version": "1.0"}
+
+_STREAM_LIMIT = 4 * 1024 * 1024  # 單行 JSON-RPC 訊息的上限
+
+
+class ProbeStatus(Enum):
+    """探測結果狀態"""
+
+    OK = "ok"
+    ERROR = "error"
+    TIMEOUT = "timeout"
+    SKIPPED = "skipped"  # 遠端類型或格式錯誤，未探測
+
+
+# 常見錯誤的診斷規則：(stderr 樣式, 建議)
+_DIAGNOSES: tuple[tuple[re.Pattern, str], ...] = (
+    (
+        re.compile(r"does not support Node v?([\d.]+)", re.I),
+        "Node 版本不符，請改用較新的 Node（可在 command 指定完整路徑）",
+    ),
+    (
+        re.compile(r"ModuleNotFoundError|No module named", re.I),
+        "缺少 Python 依賴，請在該 MCP 的虛擬環境中安裝",
+    ),
+    (
+        re.compile(r"ENOENT|No such file or directory", re.I),
+        "路徑錯誤，請確認 command 和 args 中的路徑存在",
+    ),
+    (
+        re.compile(r"401|Unauthorized|invalid api key", re.I),
+        "API Key 無效或未設置，請檢查 env 中的金鑰",
+    ),
+    (
+        re.compile(r"Invalid input|schema", re.I),
+        "配置格式不符，請檢查 type 欄位和參數",
+    ),
+)
+
+
+def diagnose(text: str) -> str | None:
+    """
+    依錯誤輸出推斷問題並給出建議
+
+    Args:
+        text: stderr 或錯誤訊息
+
+    Returns:
+        建議，無法辨識時返回 None
+    """
+    for pattern, hint in _DIAGNOSES:
+        if pattern.search(text):
+            return hint
+    return None
+
+
+@dataclass
+class ProbeTarget:
+    """要探測的 MCP（同一啟動方式在多個客戶端中只探測一次）"""
+
+    name: str
+    config: Mapping[str, Any]
+    clients: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ProbeResult:
+    """單個 MCP 的探測結果"""
+
+    name: str
+    status: ProbeStatus
+    clients: list[str] = field(default_factory=list)
+    command: str | None = None
+    latency_ms: float | None = None  # 從啟動到收到 initialize 回應的時間
+    server_name: str | None = None
+    server_version: str | None = None
+    protocol_version: str | None = None
+    error: str | None = None
+    hint: str | None = None
+    stderr_tail: list[str] = field(default_factory=list)
+    checked_at: float = field(default_factory=time.time)
+    cached: bool = False  # 是否來自快取
+
+    @property
+    def ok(self) -> bool:
+        """是否正常（未探測的遠端類型也視為正常）"""
+        return self.status in (ProbeStatus.OK, ProbeStatus.SKIPPED)
+
+    def to_dict(self) -> dict[str, Any]:
+        """轉換為可序列化的 dict"""
+        data = asdict(self)
+        data["status"] = self.status.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ProbeResult":
+        """從 dict 還原"""
+        data = dict(data)
+        data["status"] = ProbeStatus(data["status"])
+        return cls(**data)
+
+
+def launch_key(config: Mapping[str, Any]) -> tuple:
+    """MCP 的啟動方式（command、args、env、cwd），相同者只需探測一次"""
+    env = config.get("env")
+    return (
+        config.get("command"),
+        tuple(str(arg) for arg in config.get("args") or ()),
+        tuple(sorted((str(k), str(v)) for k, v in env.items())) if isinstance(env, Mapping) else (),
+        config.get("cwd"),
+    )
+
+
+def _launch_environment(config: Mapping[str, Any]) -> tuple[dict[str, str], str | None]:
+    """MCP 的啟動環境變數與解析後的執行檔路徑（找不到時為 None）"""
+    env = dict(os.environ)
+    if isinstance(config.get("env"), Mapping):
+        env.update({str(k): str(v) for k, v in config["env"].items()})
+    command = config.get("command")
+    if not isinstance(command, str) or not command:
+        return env, None
+    return env, shutil.which(command, path=env.get("PATH"))
+
+
+def probe_fingerprint(config: Mapping[str, Any]) -> str | None:
+    """
+    計算探測結果的快取指紋
+
+    由啟動方式、解析後的執行檔路徑及其 mtime 組成：
+    配置改變或執行檔被重新安裝時指紋隨之改變。
+
+    Args:
+        config: MCP 配置
+
+    Returns:
+        指紋，遠端類型返回 None（不需要快取）
+    """
+    if infer_type(config) != STDIO:
+        return None
+
+    _env, executable = _launch_environment(config)
+    mtime_ns = None
+    if executable is not None:
+        try:
+            mtime_ns = os.stat(executable).st_mtime_ns
+        except OSError:
+            pass
+
+    return server_digest(
+        {"launch": launch_key(config), "executable": executable, "mtime_ns": mtime_ns}
+    )
+
+
+def collect_targets(
+    configs: Mapping[str, Any], clients: Iterable[str] | None = None
+) -> list[ProbeTarget]:
+    """
+    從各客戶端配置收集要探測的 MCP
+
+    同名且啟動方式相同的 MCP 合併為一個目標。
+
+    Args:
+        configs: 客戶端名稱 -> ClientConfig
+        clients: 只收集這些客戶端（None 表示全部）
+
+    Returns:
+        ProbeTarget 列表（依名稱排序）
+    """
+    selected = set(clients) if clients is not None else None
+    targets: dict[tuple, ProbeTarget] = {}
+
+    for client, config in configs.items():
+        if selected is not None and client not in selected:
+            continue
+        for name, server in config.mcpServers.items():
+            if not isinstance(server, Mapping):
+                continue
+            key = (name, launch_key(server))
+            target = targets.get(key)
+            if target is None:
+                target = targets[key] = ProbeTarget(name, server)
+            target.clients.append(client)
+
+    return sorted(targets.values(), key=lambda target: (target.name, target.clients))
+
+
+class HealthCache:
+    """探測結果快取（旁路文件，以指紋為鍵）"""
+
+    def __init__(
+        self,
+        cache_file: Path | None = None,
+        ttl: float = HEALTH_CACHE_TTL,
+        failure_ttl: float = FAILURE_CACHE_TTL,
+    ):
+        """
+        初始化快取
+
+        Args:
+            cache_file: 快取文件路徑（預設 ~/.syncmcp/health_cache.json）
+            ttl: 正常結果的有效時間（秒）
+            failure_ttl: 失敗結果的有效時間（秒，不超過 ttl）
+        """
+        if cache_file is None:
+            cache_file = Path.home() / ".syncmcp" / "health_cache.json"
+
+        self.cache_file = Path(cache_file)
+        self.ttl = ttl
+        self.failure_ttl = min(failure_ttl, ttl)
+        self._entries: dict[str, ProbeResult] = {}
+        self._file_signature: tuple[int, int] | None = None
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint: str) -> ProbeResult | None:
+        """
+        取得仍有效的探測結果
+
+        Args:
+            fingerprint: probe_fingerprint() 的結果
+
+        Returns:
+            ProbeResult（cached=True），不存在或已過期時返回 None
+        """
+        with self._lock:
+            self._ensure_loaded()
+            result = self._entries.get(fingerprint)
+        if result is None or self._expired(result, time.time()):
+            return None
+        return replace(result, cached=True)
+
+    def put(self, fingerprint: str, result: ProbeResult):
+        """保存探測結果（未探測的結果不保存）"""
+        if result.status is ProbeStatus.SKIPPED:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[fingerprint] = replace(result, cached=False)
+            self._dirty = True
+
+    def results(self) -> list[ProbeResult]:
+        """所有仍有效的探測結果"""
+        now = time.time()
+        with self._lock:
+            self._ensure_loaded()
+            entries = list(self._entries.values())
+        return [
+            replace(result, cached=True) for result in entries if not self._expired(result, now)
+        ]
+
+    def clear(self):
+        """清空快取"""
+        with self._lock:
+            self._loaded = True
+            self._entries = {}
+            self._dirty = True
+
+    def flush(self):
+        """如有變更則寫回快取文件（同時移除過期項目）"""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            now = time.time()
+            self._entries = {
+                fingerprint: result
+                for fingerprint, result in self._entries.items()
+                if not self._expired(result, now)
+            }
+            data = {
+                "version": 1,
+                "entries": {
+                    fingerprint: result.to_dict() for fingerprint, result in self._entries.items()
+                },
+            }
+
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = self.cache_file.with_name(self.cache_file.name + ".tmp")
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_file, self.cache_file)
+                self._file_signature = self._signature()
+                self._dirty = False
+            except OSError as e:
+                # 寫入失敗不應該中斷程序（輸出到 stderr，避免干擾 MCP stdio）
+                print(f"Warning: Failed to save health cache: {e}", file=sys.stderr)
+
+    def _expired(self, result: ProbeResult, now: float) -> bool:
+        ttl = self.ttl if result.status is ProbeStatus.OK else self.failure_ttl
+        return now - result.checked_at >= ttl
+
+    def _signature(self) -> tuple[int, int] | None:
+        """快取文件的 (mtime_ns, size)，用於偵測其他進程的寫入"""
+        try:
+            stat = self.cache_file.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _ensure_loaded(self):
+        """首次使用或快取文件被其他進程更新時重新載入"""
+        signature = self._signature()
+        if self._loaded and (self._dirty or signature == self._file_signature):
+            return
+
+        self._loaded = True
+        self._file_signature = signature
+        self._entries = {}
+        if signature is None:
+            return
+
+        try:
+            with open(self.cache_file, encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = {
+                fingerprint: ProbeResult.from_dict(entry)
+                for fingerprint, entry in data.get("entries", {}).items()
+            }
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError, OSError):
+            self._entries = {}
+
+
+class HealthProber:
+    """並行探測 stdio MCP"""
+
+    def __init__(
+        self,
+        timeout: float = PROBE_TIMEOUT,
+        concurrency: int = MAX_CONCURRENT_PROBES,
+        cache: HealthCache | None = None,
+    ):
+        """
+        初始化探測器
+
+        Args:
+            timeout: 單個 MCP 的逾時（秒，含啟動與握手）
+            concurrency: 同時執行的探測數量上限
+            cache: 探測結果快取（None 表示每次都重新探測）
+        """
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.cache = cache
+
+    def run(
+        self,
+        targets: Iterable[ProbeTarget],
+        on_result: Callable[[ProbeResult], None] | None = None,
+        fresh: bool = False,
+    ) -> list[ProbeResult]:
+        """
+        同步執行所有探測（建立新的事件迴圈）
+
+        Args:
+            targets: 要探測的 MCP
+            on_result: 每個探測完成時的回調
+            fresh: 忽略快取，全部重新探測
+
+        Returns:
+            ProbeResult 列表（與 targets 順序相同）
+        """
+        return asyncio.run(self.probe_all(targets, on_result, fresh))
+
+    async def probe_all(
+        self,
+        targets: Iterable[ProbeTarget],
+        on_result: Callable[[ProbeResult], None] | None = None,
+        fresh: bool = False,
+    ) -> list[ProbeResult]:
+        """
+        並行探測所有 MCP（有快取時只探測指紋改變或已過期的項目）
+
+        Args:
+            targets: 要探測的 MCP
+            on_result: 每個探測完成時的回調
+            fresh: 忽略快取，全部重新探測
+
+        Returns:
+            ProbeResult 列表（與 targets 順序相同）
+        """
+        targets = list(targets)
+        # 指紋需要 stat 執行檔、快取需要讀文件：在執行緒中進行，不阻塞事件迴圈
+        fingerprints, cached = await asyncio.to_thread(self._lookup, targets, fresh)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def probe_one(target: ProbeTarget, hit: ProbeResult | None) -> ProbeResult:
+            if hit is not None:
+                result = replace(hit, name=target.name, clients=list(target.clients))
+            else:
+                async with semaphore:
+                    result = await self.probe(target)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        results = list(
+            await asyncio.gather(*(probe_one(target, hit) for target, hit in zip(targets, cached)))
+        )
+
+        if self.cache is not None:
+            await asyncio.to_thread(self._store, fingerprints, results)
+        return results
+
+    def _lookup(
+        self, targets: list[ProbeTarget], fresh: bool
+    ) -> tuple[list[str | None], list[ProbeResult | None]]:
+        """計算各目標的指紋並查詢快取"""
+        if self.cache is None:
+            return [None] * len(targets), [None] * len(targets)
+
+        fingerprints = [probe_fingerprint(target.config) for target in targets]
+        if fresh:
+            return fingerprints, [None] * len(targets)
+        return fingerprints, [
+            self.cache.get(fingerprint) if fingerprint else None for fingerprint in fingerprints
+        ]
+
+    def _store(self, fingerprints: list[str | None], results: list[ProbeResult]):
+        """保存新探測的結果"""
+        assert self.cache is not None
+        for fingerprint, result in zip(fingerprints, results):
+            if fingerprint and not result.cached:
+                self.cache.put(fingerprint, result)
+        self.cache.flush()
+
+    async def probe(self, target: ProbeTarget) -> ProbeResult:
+        """
+        探測單個 MCP：啟動進程、發送 initialize、等待回應
+
+        Args:
+            target: 要探測的 MCP
+
+        Returns:
+            ProbeResult
+        """
+        config = target.config
+        result = ProbeResult(
+            name=target.name,
+            status=ProbeStatus.SKIPPED,
+            clients=list(target.clients),
+            command=config.get("command"),
+        )
+
+        if infer_type(config) != STDIO:
+            result.error = "遠端 MCP，不進行啟動探測"
+            return result
+
+        command = config.get("command")
+        if not isinstance(command, str) or not command:
+            result.error = "缺少 command 欄位"
+            return result
+
+        env, executable = _launch_environment(config)
+        if executable is None:
+            result.status = ProbeStatus.ERROR
+            result.error = f"找不到命令: {command}"
+            result.hint = "請確認已安裝，或在 command 使用完整路徑"
+            return result
+
+        args = [str(arg) for arg in config.get("args") or ()]
+        stderr_tail: deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+        started = time.perf_counter()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                executable,
+                *args,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=env,
+                cwd=config.get("cwd") or None,
+                limit=_STREAM_LIMIT,
+                start_new_session=sys.platform != "win32",
+            )
+        except OSError as e:
+            result.status = ProbeStatus.ERROR
+            result.error = f"無法啟動: {e}"
+            result.hint = diagnose(str(e))
+            return result
+
+        assert process.stderr is not None  # 以 PIPE 啟動
+        stderr_reader = asyncio.create_task(_read_lines(process.stderr, stderr_tail))
+        try:
+            response = await asyncio.wait_for(_handshake(process), self.timeout)
+            result.latency_ms = (time.perf_counter() - started) * 1000
+            _apply_response(result, response, process.returncode)
+        except asyncio.TimeoutError:
+            result.status = ProbeStatus.TIMEOUT
+            result.error = f"{self.timeout:g} 秒內未回應 initialize"
+        except (OSError, ValueError) as e:
+            result.status = ProbeStatus.ERROR
+            result.error = f"通訊失敗: {e}"
+        finally:
+            await _shutdown(process)
+            try:
+                await asyncio.wait_for(stderr_reader, SHUTDOWN_GRACE)
+            except asyncio.TimeoutError:
+                stderr_reader.cancel()
+
+        result.stderr_tail = list(stderr_tail)
+        if result.status is ProbeStatus.ERROR and result.hint is None:
+            result.hint = diagnose("\n".join([result.error or "", *result.stderr_tail]))
+        return result
+
+
+async def _read_lines(stream: asyncio.StreamReader, lines: deque):
+    """持續讀取串流，保留最後幾行"""
+    while True:
+        line = await stream.readline()
+        if not line:
+            return
+        text = line.decode("utf-8", errors="replace").rstrip()
+        if text:
+            lines.append(text)
+
+
+async def _handshake(process: asyncio.subprocess.Process) -> dict | None:
+    """
+    發送 initialize 請求並等待對應的回應
+
+    Returns:
+        JSON-RPC 回應，進程在回應前結束時返回 None
+    """
+    request = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "initialize",
+        "params": {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": CLIENT_INFO,
+        },
+    }
+    assert process.stdin is not None and process.stdout is not None  # 以 PIPE 啟動
+    process.stdin.write(json.dumps(request).encode("utf-8") + b"\n")
+    await process.stdin.drain()
+
+    while True:
+        line = await process.stdout.readline()
+        if not line:
+            return None
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # 部分 MCP 會在 stdout 輸出日誌
+        if isinstance(message, dict) and message.get("id") == 1:
+            return message
+
+
+def _apply_response(result: ProbeResult, response: dict | None, returncode: int | None):
+    """依 initialize 回應填入探測結果"""
+    if response is None:
+        result.status = ProbeStatus.ERROR
+        result.latency_ms = None
+        exit_info = f"（exit code {returncode}）" if returncode is not None else ""
+        result.error = f"進程在回應 initialize 前結束{exit_info}"
+        return
+
+    if "error" in response:
+        error = response["error"]
+        message = error.get("message") if isinstance(error, dict) else error
+        result.status = ProbeStatus.ERROR
+        result.error = f"initialize 失敗: {message}"
+        return
+
+    info = response.get("result")
+    if not isinstance(info, dict):
+        result.status = ProbeStatus.ERROR
+        result.error = "initialize 回應格式錯誤"
+        return
+
+    server_info = info.get("serverInfo")
+    if server_info is None:
+        server_info = {}
+    elif not isinstance(server_info, dict):
+        result.status = ProbeStatus.ERROR
+        result.error = "initialize 回應格式錯誤: serverInfo 不是物件"
+        return
+
+    result.status = ProbeStatus.OK
+    result.server_name = server_info.get("name")
+    result.server_version = server_info.get("version")
+    result.protocol_version = info.get("protocolVersion")
+
+
+async def _shutdown(process: asyncio.subprocess.Process):
+    """關閉 stdin 讓 MCP 自行結束，逾時則終止整個進程組"""
+    if process.returncode is None and process.stdin is not None:
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            await asyncio.wait_for(process.wait(), SHUTDOWN_GRACE)
+            return
+        except asyncio.TimeoutError:
+            pass
+
+    for sig in (signal.SIGTERM, getattr(signal, "SIGKILL", signal.SIGTERM)):
+        if process.returncode is not None:
+            break
+        try:
+            if sys.platform != "win32":
+                # npx / uvx 會再啟動子進程，需要終止整個進程組
+                os.killpg(process.pid, sig)
+            else:
+                process.send_signal(sig)
+        except (ProcessLookupError, PermissionError):
+            break
+        try:
+            await asyncio.wait_for(process.wait(), SHUTDOWN_GRACE)
+        except asyncio.TimeoutError:
+            continue
+
+    if process.returncode is None:
+        await process.wait()
+
+
+# 全局探測結果快取
+_global_health_cache: HealthCache | None = None
+
+
+def get_health_cache() -> HealthCache:
+    """
+    獲取全局探測結果快取
+
+    Returns:
+        HealthCache 實例
+    """
+    global _global_health_cache
+    if _global_health_cache is None:
+        _global_health_cache = HealthCache()
+    return _global_health_cache
@@ -0,0 +1,96 @@
+"""
+唯讀查詢 - `syncmcp status / list / diff` 的資料來源
+
+查詢以配置快照為輸入、返回可 JSON 序列化的結果：
+常駐程序以溫快照回答，沒有常駐程序時 CLI 在本程序內載入配置後以同樣的函數計算，
+兩種方式的結果完全相同。
+"""
+
+import json
+from collections.abc import Callable
+from typing import Any
+
+from .records import to_plain
+from .snapshot import ConfigSnapshot, SnapshotCache
+
+
+def status_query(snapshot: ConfigSnapshot, params: dict[str, Any]) -> dict[str, Any]:
+    """各客戶端的配置路徑、MCP 數量與最後修改時間"""
+    return {
+        name: {
+            "path": str(config.file_path),
+            "mcp_count": len(config.mcpServers),
+            "last_modified": config.last_modified,
+            "exists": config.last_modified is not None,
+        }
+        for name, config in snapshot.configs.items()
+    }
+
+
+def list_query(snapshot: ConfigSnapshot, params: dict[str, Any]) -> dict[str, Any]:
+    """各客戶端的配置路徑與完整 mcpServers"""
+    # 經過 JSON 往返：ServerRecord 轉為普通 dict，與常駐程序回傳的結果一致
+    result: dict[str, Any] = json.loads(
+        json.dumps(
+            {
+                name: {"path": str(config.file_path), "mcpServers": config.mcpServers}
+                for name, config in snapshot.configs.items()
+            },
+            default=to_plain,
+        )
+    )
+    return result
+
+
+def diff_query(snapshot: ConfigSnapshot, params: dict[str, Any]) -> dict[str, Any]:
+    """差異報告文字與是否包含移除"""
+    report = snapshot.diff_report
+    return {
+        "text": report.to_text(),
+        "has_removals": report.has_removals(),
+        "statistics": report.get_statistics(),
+    }
+
+
+QUERIES: dict[str, Callable[[ConfigSnapshot, dict[str, Any]], Any]] = {
+    "status": status_query,
+    "list": list_query,
+    "diff": diff_query,
+}
+
+
+def run_query(snapshot: ConfigSnapshot, method: str, params: dict[str, Any] | None = None) -> Any:
+    """
+    以快照執行查詢（同一快照的相同查詢只計算一次）
+
+    Args:
+        snapshot: 配置快照
+        method: 查詢名稱（status / list / diff）
+        params: 查詢參數
+
+    Returns:
+        可 JSON 序列化的結果
+
+    Raises:
+        ValueError: 未知的查詢
+    """
+    query = QUERIES.get(method)
+    if query is None:
+        raise ValueError(f"未知的查詢: {method}")
+    params = params or {}
+    key = ("query", method, json.dumps(params, sort_keys=True))
+    return snapshot.memo(key, lambda: query(snapshot, params))
+
+
+def local_query(method: str, params: dict[str, Any] | None = None) -> Any:
+    """
+    在本程序內載入配置並執行查詢（沒有常駐程序時使用）
+
+    Args:
+        method: 查詢名稱
+        params: 查詢參數
+
+    Returns:
+        查詢結果
+    """
+    return run_query(SnapshotCache(watch=False).get(), method, params)
@@ -0,0 +1,228 @@
+"""
+MCP 配置記錄 - 不可變、雜湊共享 (hash-consed) 的 MCP 配置表示
+
+- ServerRecord: 凍結的 MCP 配置，快取摘要；內容相同的配置共用同一物件
+  （巢狀的 args / env 等以 tuple / MappingProxyType 保存，共用時不會被意外修改）
+- ServerView: 疊加在 ServerRecord 上的寫時複製視圖，只保存被改動的欄位
+
+比較兩個記錄時先比對物件身分，再比對快取的摘要，不需要逐欄位比較。
+"""
+
+import threading
+import weakref
+from collections.abc import Iterator, Mapping
+from types import MappingProxyType
+from typing import Any
+
+from ..utils.digest import server_digest
+
+
+class ServerRecord(Mapping):
+    """不可變的 MCP 配置記錄（請使用 intern_server 建立）"""
+
+    __slots__ = ("_data", "_digest", "_rendered", "__weakref__")
+
+    def __init__(self, data: dict, digest: str):
+        self._data = data
+        self._digest = digest
+        # 目標客戶端 -> 渲染結果（由 transport 填入，與記錄同生命週期）
+        self._rendered: dict[str, ServerRecord | ServerView | None] = {}
+
+    @property
+    def digest(self) -> str:
+        """配置摘要"""
+        return self._digest
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def __eq__(self, other: object) -> bool:
+        if other is self:
+            return True
+        if isinstance(other, (ServerRecord, ServerView)):
+            return self._digest == other.digest
+        if isinstance(other, Mapping):
+            # 巢狀值已凍結（tuple 與 list 不相等），以摘要比較內容
+            return self._digest == server_digest(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._digest)
+
+    def __repr__(self) -> str:
+        return f"ServerRecord({self._data!r})"
+
+    def to_dict(self) -> dict:
+        """轉換為可修改的一般 dict（巢狀值為新的 list / dict）"""
+        return {key: _thaw(value) for key, value in self._data.items()}
+
+
+class ServerView(Mapping):
+    """
+    疊加在 ServerRecord 上的唯讀視圖
+
+    只保存被覆寫和被移除的欄位，其餘欄位直接讀取底層記錄。
+    """
+
+    __slots__ = ("base", "_overrides", "_removed", "_digest", "__weakref__")
+
+    def __init__(
+        self,
+        base: ServerRecord,
+        overrides: Mapping[str, Any] | None = None,
+        removed: frozenset[str] = frozenset(),
+    ):
+        self.base = base
+        self._overrides = dict(overrides) if overrides else {}
+        self._removed = removed
+        self._digest: str | None = None
+
+    @property
+    def digest(self) -> str:
+        """配置摘要（首次使用時計算）"""
+        if self._digest is None:
+            self._digest = server_digest(self)
+        return self._digest
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._overrides:
+            return self._overrides[key]
+        if key in self._removed:
+            raise KeyError(key)
+        return self.base[key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.base:
+            if key not in self._removed:
+                yield key
+        for key in self._overrides:
+            if key not in self.base or key in self._removed:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._overrides:
+            return True
+        return key not in self._removed and key in self.base
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other: object) -> bool:
+        if other is self:
+            return True
+        if isinstance(other, (ServerRecord, ServerView)):
+            return self.digest == other.digest
+        if isinstance(other, Mapping):
+            return self.digest == server_digest(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        return f"ServerView({dict(self)!r})"
+
+    def to_dict(self) -> dict:
+        """實體化為可修改的一般 dict（巢狀值為新的 list / dict）"""
+        return {key: _thaw(value) for key, value in self.items()}
+
+
+def _freeze(value: Any) -> Any:
+    """將巢狀的 list / dict 轉為 tuple / MappingProxyType"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """_freeze 的反向操作：複製為新的 list / dict"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+# 摘要 -> 記錄（弱引用，沒有使用者時自動釋放）
+_INTERNED: "weakref.WeakValueDictionary[str, ServerRecord]" = weakref.WeakValueDictionary()
+_INTERN_LOCK = threading.Lock()
+
+
+def intern_server(server: Mapping[str, Any], owned: bool = False) -> ServerRecord:
+    """
+    取得 MCP 配置對應的共享記錄
+
+    內容相同的配置（不論來自哪個客戶端）返回同一個 ServerRecord。
+    記錄中的巢狀值會被凍結，需要修改時請使用 to_dict() 的副本。
+
+    Args:
+        server: MCP 配置（dict、ServerRecord 或 ServerView）
+        owned: server 是否為呼叫者不再使用的 dict（可直接接管頂層，免去複製）
+
+    Returns:
+        ServerRecord
+    """
+    if isinstance(server, ServerRecord):
+        return server
+
+    if isinstance(server, ServerView):
+        digest = server.digest
+        data = dict(server.items())
+    else:
+        data = server if owned and type(server) is dict else dict(server)
+        digest = server_digest(data)
+
+    with _INTERN_LOCK:
+        record = _INTERNED.get(digest)
+        if record is None:
+            for key, value in data.items():
+                data[key] = _freeze(value)
+            record = ServerRecord(data, digest)
+            _INTERNED[digest] = record
+        return record
+
+
+def intern_servers(servers: Mapping[str, Any], owned: bool = False) -> dict[str, Any]:
+    """
+    將 mcpServers 中的每個配置轉為共享記錄
+
+    非 Mapping 的項目（格式錯誤的配置）保持原樣。
+
+    Args:
+        servers: mcpServers（name -> 配置）
+        owned: 是否可直接接管各個 dict
+
+    Returns:
+        name -> ServerRecord
+    """
+    return {
+        name: intern_server(server, owned) if isinstance(server, Mapping) else server
+        for name, server in servers.items()
+    }
+
+
+def to_plain(obj: Any) -> Any:
+    """json 序列化輔助：將 ServerRecord / ServerView 轉為 dict"""
+    if isinstance(obj, Mapping):
+        return dict(obj.items())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,224 @@
+"""
+配置快照 - 常駐程序（MCP Server）使用的配置快取
+
+快照保存所有客戶端的配置和差異報告。配置文件變更時由 FileWatcher 標記失效，
+下次讀取時才重新載入；未失效期間唯讀查詢直接由記憶體回答。
+"""
+
+import itertools
+import sys
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TypeVar
+
+from ..utils.watcher import FileWatcher
+from .config_manager import ClientConfig, ConfigManager
+from .diff_engine import DiffEngine, DiffReport
+
+T = TypeVar("T")
+
+
+@dataclass
+class ConfigSnapshot:
+    """某一時刻所有客戶端配置的唯讀快照"""
+
+    configs: dict[str, ClientConfig]
+    diff_report: DiffReport
+    paths: tuple[Path, ...]
+    generation: int
+    created_at: float = field(default_factory=time.time)
+    _memo: dict[Any, Any] = field(default_factory=dict, repr=False)
+
+    def memo(self, key: Any, build: Callable[[], T]) -> T:
+        """
+        取得以此快照為基礎的計算結果（每個快照只計算一次）
+
+        Args:
+            key: 結果的鍵（例如工具名稱與參數）
+            build: 未命中時的計算函數
+
+        Returns:
+            計算結果
+        """
+        try:
+            value: T = self._memo[key]
+        except KeyError:
+            value = self._memo[key] = build()
+        return value
+
+
+class SnapshotCache:
+    """
+    配置快照快取
+
+    以當前各客戶端的配置路徑為鍵（HOME 改變時自動重建），
+    並監聽這些路徑，任一文件變更即讓快照失效。
+    """
+
+    def __init__(
+        self,
+        config_manager_factory: Callable[[], ConfigManager] = ConfigManager,
+        watch: bool = True,
+        poll_interval: float = 1.0,
+    ):
+        """
+        初始化快照快取
+
+        Args:
+            config_manager_factory: 建立 ConfigManager 的函數
+            watch: 是否監聽配置文件（False 時只能以 invalidate() 讓快照失效）
+            poll_interval: 無法使用 inotify 時的 stat 比對間隔（秒）
+        """
+        self._factory = config_manager_factory
+        self._watch = watch
+        self._poll_interval = poll_interval
+        self._diff_engine = DiffEngine()
+
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self._generation = 0
+        self._snapshot: ConfigSnapshot | None = None
+        self._watcher: FileWatcher | None = None
+        self._clients_by_path: dict[Path, str] = {}
+        self._listeners: list[Callable[[set[str]], None]] = []
+
+    @property
+    def watcher(self) -> FileWatcher | None:
+        """目前的文件監聽器"""
+        return self._watcher
+
+    def peek(self) -> ConfigSnapshot | None:
+        """
+        取得仍有效的快照，不進行任何載入（可在事件迴圈中直接呼叫）
+
+        Returns:
+            ConfigSnapshot，快照已失效或尚未載入時返回 None
+        """
+        return self._valid_snapshot(self._current_paths(self._factory()))
+
+    def get(self) -> ConfigSnapshot:
+        """
+        取得當前快照（失效或路徑改變時重新載入）
+
+        Returns:
+            ConfigSnapshot
+        """
+        config_manager = self._factory()
+        paths = self._current_paths(config_manager)
+
+        snapshot = self._valid_snapshot(paths)
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.paths != paths:
+                self._restart_watcher(dict(zip(paths, config_manager.adapters)))
+            elif snapshot.generation == self._generation:
+                return snapshot  # 其他執行緒已完成重新載入
+
+            # 先記下世代再載入：載入期間發生的變更會讓此快照立即失效
+            generation = self._generation
+            configs = config_manager.load_all()
+            snapshot = ConfigSnapshot(
+                configs=configs,
+                diff_report=self._diff_engine.analyze(configs),
+                paths=paths,
+                generation=generation,
+            )
+            self._snapshot = snapshot
+            return snapshot
+
+    def current_paths(self) -> tuple[Path, ...]:
+        """各客戶端當前的配置文件路徑（不載入配置）"""
+        return self._current_paths(self._factory())
+
+    @staticmethod
+    def _current_paths(config_manager: ConfigManager) -> tuple[Path, ...]:
+        return tuple(adapter.get_config_path() for adapter in config_manager.adapters.values())
+
+    def _valid_snapshot(self, paths: tuple[Path, ...]) -> ConfigSnapshot | None:
+        snapshot = self._snapshot
+        if (
+            snapshot is not None
+            and snapshot.paths == paths
+            and snapshot.generation == self._generation
+        ):
+            return snapshot
+        return None
+
+    def add_listener(self, listener: Callable[[set[str]], None]):
+        """
+        註冊失效通知（重複註冊同一回調無作用）
+
+        Args:
+            listener: 回調，參數為配置可能已變更的客戶端名稱
+                （可能在監聽執行緒中呼叫）
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[set[str]], None]):
+        """取消失效通知"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def invalidate(self, clients: set[str] | None = None):
+        """
+        讓當前快照失效（例如本程序剛寫入配置後）
+
+        Args:
+            clients: 配置已變更的客戶端（None 表示全部）
+        """
+        self._generation = next(self._counter)
+
+        if clients is None:
+            clients = set(self._clients_by_path.values())
+        for listener in list(self._listeners):
+            try:
+                listener(clients)
+            except Exception as e:
+                print(f"快照失效通知失敗: {e}", file=sys.stderr)
+
+    def close(self):
+        """停止監聽並清空快照"""
+        with self._lock:
+            if self._watcher is not None:
+                self._watcher.stop()
+                self._watcher = None
+            self._snapshot = None
+
+    def _on_change(self, paths: set[Path]):
+        clients_by_path = self._clients_by_path
+        self.invalidate({clients_by_path[path] for path in paths if path in clients_by_path})
+
+    def _restart_watcher(self, clients_by_path: dict[Path, str]):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        self._clients_by_path = clients_by_path
+        if self._watch:
+            self._watcher = FileWatcher(
+                clients_by_path, self._on_change, poll_interval=self._poll_interval
+            )
+            self._watcher.start()
+
+
+# 全域快照快取（常駐程序共用）
+_global_snapshot_cache: SnapshotCache | None = None
+
+
+def get_snapshot_cache() -> SnapshotCache:
+    """
+    獲取全域快照快取
+
+    Returns:
+        SnapshotCache 實例
+    """
+    global _global_snapshot_cache
+    if _global_snapshot_cache is None:
+        _global_snapshot_cache = SnapshotCache()
+    return _global_snapshot_cache
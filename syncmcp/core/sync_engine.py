@@ -3,10 +3,12 @@
 """
 
 import time
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from enum import Enum
 
-from ..utils import get_history_manager, get_logger
+from ..utils import get_history_manager, get_logger, run_context
+from .diff_engine import select_source
 
 
 class SyncStrategy(Enum):
@@ -25,6 +27,77 @@ class SyncResult:
     warnings: list[str]
     errors: list[str]
     backup_path: str | None
+    written: dict[str, str] = field(default_factory=dict)  # client -> 寫入內容的摘要
+    run_id: str | None = None  # 日誌中此次同步的關聯 ID
+
+
+# 同步階段（依執行順序）
+SYNC_PHASES = ("load", "diff", "backup", "write", "history")
+
+
+@dataclass(frozen=True)
+class SyncEvent:
+    """同步過程中的階段事件"""
+
+    phase: str  # SYNC_PHASES 之一
+    done: bool  # False 為階段開始，True 為階段完成
+    step: int  # 已完成的步數
+    total: int  # 總步數
+    client: str | None = None  # write 階段的目標客戶端
+    message: str = ""
+
+    @property
+    def fraction(self) -> float:
+        """完成比例（0.0 - 1.0）"""
+        return self.step / self.total if self.total else 1.0
+
+
+SyncProgressCallback = Callable[[SyncEvent], None]
+
+
+class _ProgressReporter:
+    """追蹤已完成步數並發送 SyncEvent；每個階段完成時記錄其耗時（span 事件）"""
+
+    def __init__(self, callback: SyncProgressCallback | None, total: int, logger=None):
+        self.callback = callback
+        self.total = total
+        self.step = 0
+        self.logger = logger
+        self.durations: dict[str, float] = {}  # 階段 -> 累計耗時（秒）
+        self._started: dict[tuple[str, str | None], float] = {}
+
+    def start(self, phase: str, message: str, client: str | None = None):
+        self._started[(phase, client)] = time.perf_counter()
+        if self.callback:
+            self.callback(SyncEvent(phase, False, self.step, self.total, client, message))
+
+    def done(self, phase: str, message: str, client: str | None = None, **counts):
+        self.step = min(self.step + 1, self.total)
+        started = self._started.pop((phase, client), None)
+        if started is not None:
+            duration = time.perf_counter() - started
+            self.durations[phase] = self.durations.get(phase, 0.0) + duration
+            if self.logger is not None:
+                self.logger.event(
+                    f"{phase} 完成",
+                    stacklevel=3,
+                    event="span",
+                    phase=phase,
+                    client=client,
+                    duration_ms=round(duration * 1000, 3),
+                    **counts,
+                )
+        if self.callback:
+            self.callback(SyncEvent(phase, True, self.step, self.total, client, message))
+
+    def phase_seconds(self) -> dict[str, float]:
+        """已完成階段的耗時（秒），供歷史記錄保存"""
+        return {phase: round(duration, 6) for phase, duration in self.durations.items()}
+
+    def finish(self, phase: str, message: str):
+        """最後一個階段完成（略過的步驟一併計入）"""
+        self.step = self.total - 1
+        self.done(phase, message)
 
 
 class SyncEngine:
@@ -42,22 +115,65 @@ class SyncEngine:
         strategy: SyncStrategy = SyncStrategy.AUTO,
         dry_run: bool = False,
         create_backup: bool = True,
+        progress: SyncProgressCallback | None = None,
+        source: str | None = None,
+    ) -> SyncResult:
+        """
+        執行同步操作
+
+        Args:
+            strategy: 同步策略
+            dry_run: 只預覽不寫入
+            create_backup: 寫入前是否創建備份
+            progress: 階段事件回調（在執行同步的執行緒中呼叫）
+            source: 指定源客戶端（例如剛被修改的客戶端）；
+                None 或該客戶端沒有配置文件時自動選擇最新者
+
+        Returns:
+            SyncResult（run_id 為此次同步在日誌中的關聯 ID）
+        """
+        with run_context() as run_id:
+            result = self._sync(strategy, dry_run, create_backup, progress, source)
+            result.run_id = run_id
+            return result
+
+    def _sync(
+        self,
+        strategy: SyncStrategy,
+        dry_run: bool,
+        create_backup: bool,
+        progress: SyncProgressCallback | None,
+        source: str | None,
     ) -> SyncResult:
-        """執行同步操作"""
         start_time = time.time()
         backup_path = None
 
+        # 總步數：載入、分析，實際同步時再加上備份、每個客戶端的寫入、記錄歷史
+        total = 2
+        if not dry_run:
+            total += int(create_backup) + len(self.config_manager.adapters) + 1
+        reporter = _ProgressReporter(progress, total, self.logger)
+
         try:
             self.logger.info(f"開始同步 (strategy={strategy.value}, dry_run={dry_run})")
 
             # 1. 載入所有客戶端配置
             self.logger.debug("載入客戶端配置...")
+            reporter.start("load", "載入客戶端配置")
             configs = self.config_manager.load_all()
             self.logger.info(f"載入了 {len(configs)} 個客戶端配置")
+            reporter.done(
+                "load",
+                f"載入了 {len(configs)} 個客戶端配置",
+                clients=len(configs),
+                servers=sum(len(config.mcpServers) for config in configs.values()),
+            )
 
             # 2. 分析差異
             self.logger.debug("分析配置差異...")
-            diff_report = self.diff_engine.analyze(configs)
+            reporter.start("diff", "分析配置差異")
+            # 與實際寫入使用相同的源，預覽的變更與警告才會與結果一致
+            diff_report = self.diff_engine.analyze(configs, source)
 
             # 3. 檢測警告（配置丟失等）
             warnings = self._detect_warnings(diff_report)
@@ -68,10 +184,17 @@ class SyncEngine:
             changes = self._prepare_changes(diff_report)
             total_changes = sum(len(c) for c in changes.values())
             self.logger.info(f"檢測到 {total_changes} 個變更")
+            reporter.done(
+                "diff",
+                f"檢測到 {total_changes} 個變更",
+                changes=total_changes,
+                warnings=len(warnings),
+            )
 
             # 5. 如果是 dry-run，返回預覽
             if dry_run:
                 self.logger.info("Dry-run 模式，不執行實際同步")
+                self._log_summary(strategy, True, start_time, reporter, total_changes, 0, True)
                 return SyncResult(
                     success=True, changes=changes, warnings=warnings, errors=[], backup_path=None
                 )
@@ -79,20 +202,37 @@ class SyncEngine:
             # 6. 創建備份
             if create_backup:
                 self.logger.info("創建備份...")
+                reporter.start("backup", "創建備份")
                 backup_path = self.backup_manager.create_backup(configs)
                 self.logger.info(f"備份已創建: {backup_path}")
+                reporter.done("backup", "備份已創建")
 
             # 7. 執行同步
             self.logger.info("執行配置同步...")
-            source = self._select_source(configs)
-            if source:
-                self.logger.debug(f"使用 {source.client_name} 作為源配置")
-                self.config_manager.sync_all(source)
-                self.logger.info("同步完成")
+            source_config = self._select_source(configs, source)
+            written = {}
+            if source_config:
+                self.logger.debug(f"使用 {source_config.client_name} 作為源配置")
+                fingerprints = {name: config.fingerprint for name, config in configs.items()}
+
+                def on_client(client: str, finished: bool):
+                    if not finished:
+                        reporter.start("write", f"寫入 {client}", client)
+                    elif configs[client].fingerprint != fingerprints[client]:
+                        reporter.done("write", f"已寫入 {client}", client, written=1)
+                    else:
+                        reporter.done("write", f"{client} 已是最新", client, written=0)
+
+                for client in self.config_manager.sync_all(
+                    source_config, targets=configs, on_client=on_client
+                ):
+                    written[client] = configs[client].fingerprint
+                self.logger.info(f"同步完成，寫入了 {len(written)} 個客戶端")
             else:
                 self.logger.warning("未找到可用的源配置")
 
             # 8. 記錄歷史
+            reporter.start("history", "記錄同步歷史")
             duration = time.time() - start_time
             self.history.add_entry(
                 success=True,
@@ -102,11 +242,21 @@ class SyncEngine:
                 errors=[],
                 backup_path=backup_path,
                 duration_seconds=duration,
+                phases=reporter.phase_seconds(),
             )
             self.logger.info(f"同步成功 (耗時 {duration:.2f}秒)")
+            reporter.finish("history", "同步完成")
+            self._log_summary(
+                strategy, False, start_time, reporter, total_changes, len(written), True
+            )
 
             return SyncResult(
-                success=True, changes=changes, warnings=warnings, errors=[], backup_path=backup_path
+                success=True,
+                changes=changes,
+                warnings=warnings,
+                errors=[],
+                backup_path=backup_path,
+                written=written,
             )
 
         except Exception as e:
@@ -132,22 +282,70 @@ class SyncEngine:
                 errors=[str(e)],
                 backup_path=backup_path,
                 duration_seconds=duration,
+                phases=reporter.phase_seconds(),
             )
 
+            self._log_summary(strategy, dry_run, start_time, reporter, 0, 0, False)
             return SyncResult(
                 success=False, changes={}, warnings=[], errors=[str(e)], backup_path=backup_path
             )
 
+    def _log_summary(
+        self,
+        strategy: SyncStrategy,
+        dry_run: bool,
+        start_time: float,
+        reporter: _ProgressReporter,
+        changes: int,
+        written: int,
+        success: bool,
+    ):
+        """記錄整次同步的摘要事件（總耗時、各階段耗時與數量）"""
+        self.logger.event(
+            "同步結束" if success else "同步失敗",
+            stacklevel=3,
+            event="sync",
+            strategy=strategy.value,
+            dry_run=dry_run,
+            success=success,
+            duration_ms=round((time.time() - start_time) * 1000, 3),
+            phases_ms={
+                phase: round(duration * 1000, 3) for phase, duration in reporter.durations.items()
+            },
+            changes=changes,
+            written=written,
+        )
+
+    def preview(self, diff_report) -> SyncResult:
+        """
+        由已有的差異報告產生同步預覽（不載入、不寫入）
+
+        結果與 dry-run 相同，供已持有最新配置快照的常駐程序使用。
+
+        Args:
+            diff_report: 差異報告
+
+        Returns:
+            SyncResult
+        """
+        return SyncResult(
+            success=True,
+            changes=self._prepare_changes(diff_report),
+            warnings=self._detect_warnings(diff_report),
+            errors=[],
+            backup_path=None,
+        )
+
     def _detect_warnings(self, diff_report) -> list[str]:
         """檢測潛在問題"""
         warnings = []
 
         # 檢測配置丟失
         if diff_report.has_removals():
-            for client, items in diff_report.diffs.items():
+            for client in diff_report.diffs:
                 removal_count = diff_report.get_removal_count(client)
                 if removal_count > 0:
-                    removed_names = [item.name for item in items if item.status == "removed"]
+                    removed_names = diff_report.names_with_status(client, "removed")
                     warnings.append(
                         f"⚠️  {client} 將失去 {removal_count} 個 MCP 配置: {', '.join(removed_names)}"
                     )
@@ -170,11 +368,6 @@ class SyncEngine:
                 changes[client] = client_changes
         return changes
 
-    def _select_source(self, configs):
-        """選擇源配置"""
-        latest = None
-        for config in configs.values():
-            if config.last_modified:
-                if not latest or config.last_modified > latest.last_modified:
-                    latest = config
-        return latest
+    def _select_source(self, configs, preferred: str | None = None):
+        """選擇源配置（見 diff_engine.select_source）"""
+        return select_source(configs, preferred)
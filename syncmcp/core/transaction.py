@@ -0,0 +1,656 @@
+"""
+配置交易 - 在同一份配置快照上累積多個修改，最後一次寫入
+
+交易開始時載入所有客戶端配置一次；之後的新增、修改、刪除和同步都只改動記憶體中的配置，
+查詢也以交易中的配置回答。commit() 時只備份一次，將所有有變更的客戶端寫入臨時檔，
+全部成功後才依序原子替換；替換途中失敗時還原已替換的文件。
+
+停用的 MCP 從各客戶端移除，原本的配置保存在 ~/.syncmcp/disabled_servers.json，
+啟用時依客戶端還原。
+"""
+
+import json
+import os
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from ..utils import get_history_manager, get_logger
+from .backup_manager import BackupManager
+from .config_manager import ClientConfig, ConfigManager
+from .diff_engine import DiffEngine, select_source
+from .queries import run_query
+from .records import to_plain
+from .snapshot import ConfigSnapshot
+from .transport import render_server, render_targets
+
+
+def disabled_servers_file() -> Path:
+    """已停用 MCP 的保存位置（~/.syncmcp/disabled_servers.json）"""
+    return Path.home() / ".syncmcp" / "disabled_servers.json"
+
+
+def load_disabled_servers(path: Path | None = None) -> dict[str, dict[str, dict]]:
+    """
+    讀取已停用的 MCP
+
+    Args:
+        path: 文件路徑（預設 ~/.syncmcp/disabled_servers.json）
+
+    Returns:
+        MCP 名稱 -> 客戶端 -> 原本的配置
+    """
+    path = Path(path) if path is not None else disabled_servers_file()
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_disabled_servers(data: dict[str, dict[str, dict]], path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(path.name + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, default=to_plain)
+    os.replace(tmp_file, path)
+
+
+@dataclass
+class CommitResult:
+    """交易提交結果"""
+
+    written: list[str]
+    changes: dict[str, list[str]]  # client -> ["+ name", "- name", "~ name"]
+    backup_path: str | None = None
+    duration_seconds: float = 0.0
+    warnings: list[str] = field(default_factory=list)
+
+
+class ConfigTransaction:
+    """配置交易"""
+
+    def __init__(
+        self,
+        config_manager: ConfigManager | None = None,
+        backup_manager: BackupManager | None = None,
+        strategy: str = "transaction",
+        disabled_file: Path | None = None,
+    ):
+        """
+        開始交易（載入所有客戶端配置）
+
+        Args:
+            config_manager: 配置管理器
+            backup_manager: 備份管理器（預設在需要備份時才建立）
+            strategy: 寫入同步歷史時使用的策略名稱
+            disabled_file: 已停用 MCP 的保存位置（預設 ~/.syncmcp/disabled_servers.json）
+        """
+        self.config_manager = config_manager if config_manager is not None else ConfigManager()
+        self._backup_manager = backup_manager
+        self.strategy = strategy
+        self.disabled_file = Path(disabled_file) if disabled_file else disabled_servers_file()
+        self.logger = get_logger()
+
+        self.configs: dict[str, ClientConfig] = self.config_manager.load_all()
+        self._original = {name: dict(config.mcpServers) for name, config in self.configs.items()}
+        self._disabled: dict[str, dict[str, dict]] | None = None  # 首次啟用 / 停用時載入
+        self._disabled_original: dict[str, dict[str, dict]] = {}
+        self._snapshot: ConfigSnapshot | None = None
+        self._generation = 0
+        self.warnings: list[str] = []
+        self.closed = False
+
+    def __enter__(self) -> "ConfigTransaction":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.closed:
+            self.rollback()
+
+    # ------------------------------------------------------------------
+    # 修改
+    # ------------------------------------------------------------------
+
+    def put(
+        self, name: str, server: Mapping[str, Any], clients: Iterable[str] | None = None
+    ) -> list[str]:
+        """
+        新增或取代 MCP（依各客戶端的格式渲染）
+
+        Args:
+            name: MCP 名稱
+            server: MCP 配置（任一客戶端的格式皆可）
+            clients: 目標客戶端（預設全部）
+
+        Returns:
+            實際寫入的客戶端（不支援此傳輸類型的客戶端會被略過並記錄警告）
+
+        Raises:
+            ValueError: 名稱或配置無效、未知的客戶端
+        """
+        return self.put_many({name: server}, clients)[name]
+
+    def put_many(
+        self, servers: Mapping[str, Mapping[str, Any]], clients: Iterable[str] | None = None
+    ) -> dict[str, list[str]]:
+        """
+        一次新增或取代多個 MCP（所有 MCP 在一次遍歷中渲染，每個客戶端只重建一次）
+
+        Args:
+            servers: MCP 名稱 -> 配置
+            clients: 目標客戶端（預設全部）
+
+        Returns:
+            MCP 名稱 -> 實際寫入的客戶端
+
+        Raises:
+            ValueError: 任一名稱或配置無效（此時不做任何修改）
+        """
+        for name, server in servers.items():
+            if not name:
+                raise ValueError("MCP 名稱不可為空")
+            if not isinstance(server, Mapping) or not ("command" in server or "url" in server):
+                raise ValueError(f"{name} 的配置需要 command 或 url")
+
+        targets = self._resolve_clients(clients)
+        rendered = render_targets({name: dict(server) for name, server in servers.items()}, targets)
+        applied: dict[str, list[str]] = {name: [] for name in servers}
+        for client in targets:
+            for name in servers:
+                entry = rendered[client].get(name)
+                if entry is None:
+                    self.warnings.append(f"{client} 不支援 {name} 的傳輸類型，已略過")
+                    continue
+                self._validate(client, name, entry)
+                applied[name].append(client)
+
+        # 全部驗證通過後才修改，避免命令只套用到部分客戶端
+        for client in targets:
+            entries = {name: rendered[client][name] for name in servers if client in applied[name]}
+            if entries:
+                config = self.configs[client]
+                config.mcpServers = {**config.mcpServers, **entries}
+        self._touch()
+        return applied
+
+    def update(
+        self, name: str, fields: Mapping[str, Any], clients: Iterable[str] | None = None
+    ) -> list[str]:
+        """
+        修改已存在的 MCP 的欄位
+
+        值為 None 表示刪除該欄位；值與原本的值都是物件（例如 env、headers）時合併，
+        其中值為 None 的鍵被刪除。
+
+        Args:
+            name: MCP 名稱
+            fields: 要修改的欄位
+            clients: 目標客戶端（預設全部）
+
+        Returns:
+            有此 MCP 而被修改的客戶端
+
+        Raises:
+            ValueError: 沒有任何目標客戶端有此 MCP
+        """
+        found = False
+        entries = {}
+        for client in self._resolve_clients(clients):
+            current = self.configs[client].mcpServers.get(name)
+            if not isinstance(current, Mapping):
+                continue
+            found = True
+            entry = render_server(_merge_fields(dict(current.items()), fields), client)
+            if entry is None:
+                self.warnings.append(f"{client} 不支援修改後 {name} 的傳輸類型，已略過")
+                continue
+            self._validate(client, name, entry)
+            entries[client] = entry
+
+        if not found:
+            raise ValueError(f"找不到 MCP: {name}")
+        for client, entry in entries.items():
+            config = self.configs[client]
+            config.mcpServers = {**config.mcpServers, name: entry}
+        self._touch()
+        return list(entries)
+
+    def remove(self, name: str, clients: Iterable[str] | None = None) -> list[str]:
+        """
+        刪除 MCP
+
+        Args:
+            name: MCP 名稱
+            clients: 目標客戶端（預設全部）
+
+        Returns:
+            有此 MCP 而被刪除的客戶端
+
+        Raises:
+            ValueError: 沒有任何目標客戶端有此 MCP
+        """
+        return self.remove_many([name], clients)[name]
+
+    def remove_many(
+        self, names: Iterable[str], clients: Iterable[str] | None = None
+    ) -> dict[str, list[str]]:
+        """
+        一次刪除多個 MCP（每個客戶端只重建一次）
+
+        Args:
+            names: MCP 名稱
+            clients: 目標客戶端（預設全部）
+
+        Returns:
+            MCP 名稱 -> 被刪除的客戶端
+
+        Raises:
+            ValueError: 任一 MCP 在所有目標客戶端中都不存在（此時不做任何修改）
+        """
+        names = list(names)
+        targets = self._resolve_clients(clients)
+        for name in names:
+            if not any(name in self.configs[client].mcpServers for client in targets):
+                raise ValueError(f"找不到 MCP: {name}")
+        removed = self._take(names, targets)
+        return {name: list(entries) for name, entries in removed.items()}
+
+    def disable(self, names: Iterable[str], clients: Iterable[str] | None = None) -> list[str]:
+        """
+        停用 MCP：從客戶端移除，原本的配置保存起來供 enable() 還原
+
+        Args:
+            names: MCP 名稱
+            clients: 目標客戶端（預設全部）
+
+        Returns:
+            實際被停用的 MCP（已停用或不存在的會被略過並記錄警告）
+        """
+        disabled = self._load_disabled()
+        removed = self._take(names, clients)
+        result = []
+        for name, entries in removed.items():
+            if not entries:
+                self.warnings.append(f"{name} 不存在或已停用")
+                continue
+            disabled[name] = {**disabled.get(name, {}), **entries}
+            result.append(name)
+        return result
+
+    def enable(self, names: Iterable[str], clients: Iterable[str] | None = None) -> list[str]:
+        """
+        啟用先前停用的 MCP（還原到停用時所在的客戶端）
+
+        Args:
+            names: MCP 名稱
+            clients: 只還原到這些客戶端（預設全部）
+
+        Returns:
+            實際被啟用的 MCP
+
+        Raises:
+            ValueError: MCP 沒有被停用
+        """
+        disabled = self._load_disabled()
+        targets = set(self._resolve_clients(clients))
+        names = list(names)
+        for name in names:
+            if not any(client in targets for client in disabled.get(name, {})):
+                raise ValueError(f"{name} 沒有被停用")
+
+        for name in names:
+            stashed = disabled[name]
+            for client in [client for client in stashed if client in targets]:
+                config = self.configs[client]
+                if name in config.mcpServers:
+                    self.warnings.append(f"{client} 已有 {name}，保留現有配置")
+                else:
+                    config.mcpServers = {**config.mcpServers, name: stashed[client]}
+                del stashed[client]
+            if not stashed:
+                del disabled[name]
+        self._touch()
+        return names
+
+    def disabled(self) -> dict[str, list[str]]:
+        """已停用的 MCP（名稱 -> 停用時所在的客戶端）"""
+        return {name: sorted(entries) for name, entries in self._load_disabled().items()}
+
+    def sync(self, source: str | None = None) -> str | None:
+        """
+        以一個客戶端為來源同步到所有客戶端（與 `syncmcp sync` 相同的規則）
+
+        Args:
+            source: 來源客戶端（預設自動選擇，見 diff_engine.select_source）
+
+        Returns:
+            使用的來源客戶端，沒有可用的來源時返回 None
+        """
+        if source is not None:
+            self._resolve_clients([source])
+            source_config: ClientConfig | None = self.configs[source]
+        else:
+            source_config = select_source(self.configs)
+        if source_config is None:
+            return None
+
+        rendered = render_targets(source_config.mcpServers, self.configs)
+        for client, servers in rendered.items():
+            self.configs[client].mcpServers = servers
+        self._touch()
+        return source_config.client_name
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> ConfigSnapshot:
+        """交易中的配置快照（供 core.queries 使用）"""
+        if self._snapshot is None or self._snapshot.generation != self._generation:
+            self._snapshot = ConfigSnapshot(
+                configs=self.configs,
+                diff_report=DiffEngine().analyze(self.configs),
+                paths=tuple(config.file_path for config in self.configs.values()),
+                generation=self._generation,
+            )
+        return self._snapshot
+
+    def query(self, method: str, params: dict[str, Any] | None = None) -> Any:
+        """以交易中的配置執行唯讀查詢（status / list / diff）"""
+        return run_query(self.snapshot(), method, params)
+
+    def changes(self) -> dict[str, list[str]]:
+        """相對交易開始時的變更摘要（client -> ["+ name", "- name", "~ name"]）"""
+        changes = {}
+        for client, config in self.configs.items():
+            before = self._original[client]
+            after = config.mcpServers
+            items = [f"+ {name}" for name in after if name not in before]
+            items += [f"- {name}" for name in before if name not in after]
+            items += [
+                f"~ {name}" for name in after if name in before and after[name] != before[name]
+            ]
+            if items:
+                changes[client] = items
+        return changes
+
+    def execute(self, command: Mapping[str, Any]) -> Any:
+        """
+        執行一個命令（`syncmcp batch` 每行一個）
+
+        支援的 op：
+            add     {"name", "config" | "servers", "clients"?}
+            set     {"name", "fields", "clients"?}
+            remove  {"name" | "names", "clients"?}
+            enable / disable  {"name" | "names", "clients"?}
+            sync    {"source"?}
+            status / list / diff  唯讀查詢
+            changes 目前累積的變更
+
+        Args:
+            command: 命令（含 op 欄位）
+
+        Returns:
+            可 JSON 序列化的結果
+
+        Raises:
+            ValueError: 未知的命令或參數錯誤
+        """
+        op = command.get("op")
+        clients = _command_names(command, "clients")
+        if op == "add":
+            if "servers" in command:
+                servers = command["servers"]
+                if not isinstance(servers, Mapping) or not all(
+                    isinstance(name, str) and isinstance(server, Mapping)
+                    for name, server in servers.items()
+                ):
+                    raise ValueError("servers 必須是 MCP 名稱 -> 配置物件")
+                return {"servers": self.put_many(servers, clients)}
+            config = command.get("config")
+            if not isinstance(config, Mapping):
+                raise ValueError("add 需要 config 物件")
+            return {"clients": self.put(_command_name(command, op), config, clients)}
+        if op == "set":
+            fields = command.get("fields")
+            if not isinstance(fields, Mapping) or not fields:
+                raise ValueError("set 需要 fields")
+            return {"clients": self.update(_command_name(command, op), fields, clients)}
+        if op in ("remove", "rm"):
+            names = _command_names(command, "names")
+            if names is not None:
+                return {"servers": self.remove_many(names, clients)}
+            return {"clients": self.remove(_command_name(command, op), clients)}
+        if op in ("enable", "disable"):
+            names = _command_names(command, "names") or [_command_name(command, op)]
+            method = self.enable if op == "enable" else self.disable
+            return {"servers": method(names, clients)}
+        if op == "sync":
+            source = command.get("source")
+            if source is not None and not isinstance(source, str):
+                raise ValueError("source 必須是字串")
+            return {"source": self.sync(source)}
+        if op in ("status", "list", "diff"):
+            return self.query(op)
+        if op == "changes":
+            return self.changes()
+        raise ValueError(f"未知的命令: {op}")
+
+    # ------------------------------------------------------------------
+    # 提交
+    # ------------------------------------------------------------------
+
+    def commit(self, create_backup: bool = True) -> CommitResult:
+        """
+        寫入所有有變更的客戶端
+
+        Args:
+            create_backup: 寫入前是否備份（整個交易只備份一次）
+
+        Returns:
+            CommitResult
+
+        Raises:
+            RuntimeError: 交易已結束
+            OSError: 寫入失敗（已寫入的文件會被還原）
+        """
+        self._ensure_open()
+        start_time = time.time()
+        changes = self.changes()
+        dirty = [self.configs[client] for client in changes]
+        # 有變更時為新的停用記錄，否則為 None
+        disabled = self._disabled if self._disabled != self._disabled_original else None
+        backup_path = None
+
+        try:
+            if dirty and create_backup:
+                backup_path = self.backup_manager.create_backup(self.configs)
+            if disabled is not None:
+                # 先保存新舊停用記錄的聯集：寫入配置途中失敗也不會遺失被停用的配置
+                _save_disabled_servers(
+                    _union(self._disabled_original, disabled), self.disabled_file
+                )
+            self._write_all(dirty)
+            if disabled is not None:
+                _save_disabled_servers(disabled, self.disabled_file)
+        except Exception as e:
+            self.closed = True
+            get_history_manager().add_entry(
+                success=False,
+                strategy=self.strategy,
+                changes={},
+                warnings=self.warnings,
+                errors=[str(e)],
+                backup_path=backup_path,
+                duration_seconds=time.time() - start_time,
+            )
+            raise
+
+        self.closed = True
+        duration = time.time() - start_time
+        if dirty:
+            get_history_manager().add_entry(
+                success=True,
+                strategy=self.strategy,
+                changes=changes,
+                warnings=self.warnings,
+                errors=[],
+                backup_path=backup_path,
+                duration_seconds=duration,
+            )
+        self.logger.info(f"交易已提交，寫入了 {len(dirty)} 個客戶端")
+        return CommitResult(
+            written=[config.client_name for config in dirty],
+            changes=changes,
+            backup_path=backup_path,
+            duration_seconds=duration,
+            warnings=list(self.warnings),
+        )
+
+    def rollback(self):
+        """放棄交易中的所有修改（不寫入任何文件）"""
+        for client, config in self.configs.items():
+            config.mcpServers = self._original[client]
+        self._disabled = None
+        self.closed = True
+
+    @property
+    def backup_manager(self) -> BackupManager:
+        """備份管理器"""
+        if self._backup_manager is None:
+            self._backup_manager = BackupManager()
+        return self._backup_manager
+
+    # ------------------------------------------------------------------
+    # 內部
+    # ------------------------------------------------------------------
+
+    def _write_all(self, dirty: list[ClientConfig]):
+        """兩階段寫入：先寫入所有臨時檔，全部成功後才替換原文件"""
+        originals: dict[Path, bytes | None] = {}
+        for config in dirty:
+            path = config.file_path.resolve()
+            originals[path] = path.read_bytes() if path.exists() else None
+
+        try:
+            for config in dirty:
+                config.stage()
+        except BaseException:
+            for config in dirty:
+                config.discard_staged()
+            raise
+
+        replaced = []
+        try:
+            for config in dirty:
+                config.commit_staged()
+                replaced.append(config)
+        except BaseException:
+            for config in dirty:
+                config.discard_staged()
+            for config in replaced:
+                self._restore(config.file_path.resolve(), originals)
+            raise
+
+    def _restore(self, path: Path, originals: dict[Path, bytes | None]):
+        original = originals[path]
+        try:
+            if original is None:
+                path.unlink()
+            else:
+                path.write_bytes(original)
+        except OSError as e:
+            self.logger.error(f"無法還原 {path}: {e}")
+
+    def _resolve_clients(self, clients: Iterable[str] | None) -> list[str]:
+        self._ensure_open()
+        if clients is None:
+            return list(self.configs)
+        clients = list(clients)
+        unknown = [client for client in clients if client not in self.configs]
+        if unknown:
+            raise ValueError(f"未知的客戶端: {', '.join(unknown)}")
+        return clients
+
+    def _validate(self, client: str, name: str, entry: Mapping[str, Any]):
+        adapter = self.config_manager.adapters[client]
+        errors = adapter.validate_config({"mcpServers": {name: to_plain(entry)}})
+        if errors:
+            raise ValueError(f"{client} 的 {name} 配置無效: {'; '.join(errors)}")
+
+    def _take(
+        self, names: Iterable[str], clients: Iterable[str] | None
+    ) -> dict[str, dict[str, dict]]:
+        """從目標客戶端移除 MCP，返回 名稱 -> 客戶端 -> 被移除的配置"""
+        names = list(dict.fromkeys(names))
+        removed: dict[str, dict[str, dict]] = {name: {} for name in names}
+        for client in self._resolve_clients(clients):
+            config = self.configs[client]
+            if not any(name in config.mcpServers for name in names):
+                continue
+            servers = dict(config.mcpServers)
+            for name in names:
+                if name in servers:
+                    removed[name][client] = to_plain(servers.pop(name))
+            config.mcpServers = servers
+        self._touch()
+        return removed
+
+    def _load_disabled(self) -> dict[str, dict[str, dict]]:
+        self._ensure_open()
+        if self._disabled is None:
+            self._disabled_original = load_disabled_servers(self.disabled_file)
+            self._disabled = {
+                name: dict(entries) for name, entries in self._disabled_original.items()
+            }
+        return self._disabled
+
+    def _touch(self):
+        self._generation += 1
+
+    def _ensure_open(self):
+        if self.closed:
+            raise RuntimeError("交易已結束")
+
+
+def _command_name(command: Mapping[str, Any], op: str) -> str:
+    """命令的 name 欄位（必須是非空字串）"""
+    name = command.get("name")
+    if not isinstance(name, str) or not name:
+        raise ValueError(f"{op} 需要 name")
+    return name
+
+
+def _command_names(command: Mapping[str, Any], key: str) -> list[str] | None:
+    """命令的名稱列表欄位（names / clients），不存在時返回 None"""
+    value = command.get(key)
+    if value is None:
+        return None
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"{key} 必須是字串列表")
+    return value
+
+
+def _merge_fields(current: dict[str, Any], fields: Mapping[str, Any]) -> dict[str, Any]:
+    """合併欄位：None 刪除欄位，兩邊都是物件時逐鍵合併"""
+    merged = dict(current)
+    for key, value in fields.items():
+        if value is None:
+            merged.pop(key, None)
+        elif isinstance(value, Mapping) and isinstance(merged.get(key), Mapping):
+            nested = {**merged[key], **value}
+            merged[key] = {k: v for k, v in nested.items() if v is not None}
+        else:
+            merged[key] = value
+    return merged
+
+
+def _union(
+    old: dict[str, dict[str, dict]], new: dict[str, dict[str, dict]]
+) -> dict[str, dict[str, dict]]:
+    """合併兩份停用記錄（同一客戶端以新的為準）"""
+    return {name: {**old.get(name, {}), **new.get(name, {})} for name in {*old, *new}}
@@ -0,0 +1,242 @@
+"""
+傳輸類型轉換 - 以轉換表統一處理各客戶端之間的 MCP 類型轉換
+
+轉換表以 (推斷類型, 目標客戶端, 是否有 headers) 為鍵，
+在模組載入時預先展開，渲染時只需一次字典查詢。
+渲染結果為疊加在共享記錄上的視圖，只保存被改動的欄位。
+"""
+
+import weakref
+from collections.abc import Iterable, Mapping
+from typing import Any, NamedTuple
+
+from .records import ServerRecord, ServerView, intern_server
+
+# 傳輸類型
+STDIO = "stdio"
+HTTP = "http"
+SSE = "sse"
+STREAMABLE_HTTP = "streamable-http"
+UNKNOWN_REMOTE = "remote"  # 無法辨識的遠端類型
+
+TRANSPORT_TYPES = (STDIO, HTTP, SSE, STREAMABLE_HTTP, UNKNOWN_REMOTE)
+
+# 客戶端
+CLIENTS = ("claude-code", "roo-code", "claude-desktop", "gemini")
+
+# Roo Code 特有欄位，其他客戶端不認得
+ROO_ONLY_FIELDS = frozenset({"autoApprove", "alwaysAllow", "disabled"})
+
+# 保留原有 type 欄位（不寫入）
+KEEP = "keep"
+# 移除 type 欄位（不論來源是否帶有）
+OMIT = "omit"
+# 過濾掉此 MCP
+DROP = "drop"
+
+# 轉換規格：推斷類型 -> 目標客戶端 -> 目標類型
+# 目標類型可為 (無 headers 時, 有 headers 時) 的二元組
+_CONVERSION_SPEC: dict[str, dict[str, str | tuple[str, str]]] = {
+    STDIO: {
+        "claude-code": STDIO,
+        "roo-code": STDIO,
+        "claude-desktop": OMIT,  # Desktop 的 stdio 不需要 type 欄位
+        "gemini": STDIO,
+    },
+    HTTP: {
+        "claude-code": HTTP,
+        "roo-code": STREAMABLE_HTTP,
+        "claude-desktop": DROP,  # Desktop 只支援 stdio
+        "gemini": STREAMABLE_HTTP,
+    },
+    SSE: {
+        "claude-code": SSE,
+        "roo-code": STREAMABLE_HTTP,
+        "claude-desktop": DROP,
+        "gemini": STREAMABLE_HTTP,
+    },
+    STREAMABLE_HTTP: {
+        "claude-code": (SSE, HTTP),  # 有 headers 轉為 http，否則 sse
+        "roo-code": STREAMABLE_HTTP,
+        "claude-desktop": DROP,
+        "gemini": STREAMABLE_HTTP,
+    },
+    UNKNOWN_REMOTE: {
+        "claude-code": SSE,
+        "roo-code": STREAMABLE_HTTP,
+        "claude-desktop": DROP,
+        "gemini": STREAMABLE_HTTP,
+    },
+}
+
+# 各目標客戶端需移除的欄位
+_STRIP_FIELDS: dict[str, frozenset[str]] = {
+    client: frozenset() if client == "roo-code" else ROO_ONLY_FIELDS for client in CLIENTS
+}
+
+
+class ConversionRule(NamedTuple):
+    """單個 (推斷類型, 客戶端, 是否有 headers) 的轉換規則"""
+
+    keep: bool  # False 表示過濾掉
+    target_type: str | None  # None 表示不改動 type 欄位
+    strip: frozenset[str]
+
+
+def _compile_table() -> dict[tuple[str, str, bool], ConversionRule]:
+    """將轉換規格展開為查詢表"""
+    table = {}
+    for inferred, targets in _CONVERSION_SPEC.items():
+        for client, target in targets.items():
+            for has_headers in (False, True):
+                out = target[has_headers] if isinstance(target, tuple) else target
+                if out == DROP:
+                    rule = ConversionRule(False, None, frozenset())
+                elif out == OMIT:
+                    rule = ConversionRule(True, None, _STRIP_FIELDS[client] | {"type"})
+                else:
+                    rule = ConversionRule(True, None if out == KEEP else out, _STRIP_FIELDS[client])
+                table[(inferred, client, has_headers)] = rule
+    return table
+
+
+CONVERSION_TABLE = _compile_table()
+
+# 會過濾掉部分 MCP 的客戶端：其配置不完整，不能自動選為同步來源
+FILTERING_CLIENTS = frozenset(
+    client for (_, client, _), rule in CONVERSION_TABLE.items() if not rule.keep
+)
+
+# 渲染結果保存在記錄本身（ServerRecord._rendered），視圖與記錄同生命週期，
+# 不會讓共享記錄在沒有使用者後仍留在記憶體中；這裡只以弱引用記下有快取的記錄供清空
+_RENDERED_RECORDS: "weakref.WeakSet[ServerRecord]" = weakref.WeakSet()
+
+
+def infer_type(server: Mapping[str, Any]) -> str:
+    """
+    推斷 MCP 的傳輸類型
+
+    優先使用 type 欄位，其次為舊格式的 transport 欄位，
+    都沒有時依 url / command 欄位推斷。
+
+    Args:
+        server: MCP 配置
+
+    Returns:
+        TRANSPORT_TYPES 之一
+    """
+    declared = server.get("type") or server.get("transport")
+    if declared in _CONVERSION_SPEC:
+        return str(declared)
+    if declared:
+        # 有宣告但無法辨識：有 command 視為 stdio，否則視為遠端
+        return STDIO if "command" in server else UNKNOWN_REMOTE
+    if "url" in server:
+        # 有 URL 表示遠端服務，預設用 streamable-http（最通用）
+        return STREAMABLE_HTTP
+    return STDIO
+
+
+def get_rule(server: Mapping[str, Any], client: str) -> ConversionRule:
+    """查詢 MCP 轉換到目標客戶端的規則"""
+    return CONVERSION_TABLE[(infer_type(server), client, bool(server.get("headers")))]
+
+
+def _apply_rule(record: ServerRecord, rule: ConversionRule) -> ServerRecord | ServerView | None:
+    """依規則產生目標配置：無需變動時返回原記錄，否則返回只含改動欄位的視圖"""
+    if not rule.keep:
+        return None
+
+    needs_type = rule.target_type is not None and record.get("type") != rule.target_type
+    removed = frozenset(field for field in rule.strip if field in record)
+    if not needs_type and not removed:
+        return record
+
+    overrides = {"type": rule.target_type} if needs_type else None
+    return ServerView(record, overrides, removed)
+
+
+def _render_cached(record: ServerRecord, client: str) -> ServerRecord | ServerView | None:
+    """查詢記錄上的渲染結果，未命中時依轉換表渲染並保存"""
+    cache = record._rendered
+    if client in cache:
+        return cache[client]
+
+    rendered = _apply_rule(record, get_rule(record, client))
+    if not cache:
+        _RENDERED_RECORDS.add(record)
+    cache[client] = rendered
+    return rendered
+
+
+def _as_record(server: Mapping[str, Any]) -> ServerRecord:
+    """取得配置的共享記錄（已是記錄時不做任何事）"""
+    if type(server) is ServerRecord:
+        return server
+    return intern_server(server)
+
+
+def render_server(server: Mapping[str, Any], client: str) -> Mapping[str, Any] | None:
+    """
+    將單個 MCP 渲染為目標客戶端的格式
+
+    相同內容的重複渲染以摘要快取並返回同一個唯讀物件。
+
+    Args:
+        server: MCP 配置
+        client: 目標客戶端
+
+    Returns:
+        目標格式的配置（ServerRecord 或 ServerView），或 None 表示應過濾掉
+    """
+    return _render_cached(_as_record(server), client)
+
+
+def render_servers(servers: Mapping[str, Mapping[str, Any]], client: str) -> dict:
+    """
+    將所有 MCP 渲染為目標客戶端的格式
+
+    Args:
+        servers: mcpServers（name -> 配置）
+        client: 目標客戶端
+
+    Returns:
+        目標格式的 mcpServers（被過濾的項目不包含在內）
+    """
+    return render_targets(servers, (client,))[client]
+
+
+def render_targets(
+    servers: Mapping[str, Mapping[str, Any]], clients: Iterable[str]
+) -> dict[str, dict]:
+    """
+    在一次遍歷中將所有 MCP 渲染為多個目標客戶端的格式
+
+    每個 MCP 只轉為共享記錄一次，供所有目標共用。
+
+    Args:
+        servers: mcpServers（name -> 配置）
+        clients: 目標客戶端列表
+
+    Returns:
+        客戶端 -> 目標格式的 mcpServers
+    """
+    clients = tuple(clients)
+    results: dict[str, dict] = {client: {} for client in clients}
+    targets = [(client, results[client]) for client in clients]
+
+    for name, server in servers.items():
+        record = _as_record(server)
+        for client, rendered_servers in targets:
+            rendered = _render_cached(record, client)
+            if rendered is not None:
+                rendered_servers[name] = rendered
+
+    return results
+
+
+def clear_render_cache():
+    """清空渲染快取"""
+    for record in list(_RENDERED_RECORDS):
+        record._rendered.clear()
+    _RENDERED_RECORDS.clear()
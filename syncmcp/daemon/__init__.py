@@ -0,0 +1,3 @@
+"""
+背景程序 - 自動同步、定期健康檢查和監控狀態
+"""
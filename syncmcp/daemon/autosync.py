@@ -0,0 +1,219 @@
+"""
+自動同步 - 監聽客戶端配置文件，變更後（防抖）自動執行同步
+
+編輯器常以「寫入臨時檔再改名」保存，一次保存會產生多個事件；
+事件在防抖時間內合併為一次同步。
+同步以被修改的客戶端為來源，只寫入內容需要改變的客戶端。
+同步寫入的內容摘要會被記下，之後由自己的寫入觸發的事件會被忽略，避免循環同步；
+只改動 mcpServers 以外內容的寫入（例如 Claude Code 保存的狀態）也不會觸發同步。
+"""
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from ..core.backup_manager import BackupManager
+from ..core.config_manager import ClientConfig, ConfigManager
+from ..core.diff_engine import DiffEngine
+from ..core.sync_engine import SyncEngine, SyncResult, SyncStrategy
+from ..utils import content_digest, get_logger
+from ..utils.watcher import FileWatcher
+
+DEBOUNCE_SECONDS = 2.0
+
+
+def _file_digest(path: Path) -> str | None:
+    """文件內容摘要，不存在時返回 None"""
+    try:
+        return content_digest(path.read_bytes())
+    except OSError:
+        return None
+
+
+def _section_key(client: str, path: Path) -> frozenset | None:
+    """mcpServers 區段的內容鍵（名稱與各 MCP 摘要），無法讀取時返回 None"""
+    config = ClientConfig(client, path)
+    try:
+        config.load()
+    except Exception:
+        return None
+    return frozenset(
+        (name, getattr(server, "digest", repr(server)))
+        for name, server in config.mcpServers.items()
+    )
+
+
+class AutoSync:
+    """配置文件變更後自動同步"""
+
+    def __init__(
+        self,
+        config_manager_factory: Callable[[], ConfigManager] = ConfigManager,
+        debounce: float = DEBOUNCE_SECONDS,
+        create_backup: bool = True,
+        poll_interval: float = 1.0,
+        dry_run: bool = False,
+    ):
+        """
+        初始化自動同步
+
+        Args:
+            config_manager_factory: 建立 ConfigManager 的函數
+            debounce: 最後一個事件後等待的時間（秒）
+            create_backup: 同步前是否備份
+            poll_interval: 無法使用 inotify 時的 stat 比對間隔（秒）
+            dry_run: 只預覽不寫入
+        """
+        self._factory = config_manager_factory
+        self.debounce = debounce
+        self.create_backup = create_backup
+        self.poll_interval = poll_interval
+        self.dry_run = dry_run
+        self.logger = get_logger()
+
+        self._cond = threading.Condition()
+        self._pending: set[str] = set()
+        self._deadline: float | None = None
+        self._written: dict[str, str] = {}  # client -> 本程序最後寫入的內容摘要
+        self._sections: dict[str, frozenset | None] = {}  # client -> 已知的 mcpServers 區段
+        self._paths: dict[str, Path] = {}
+        self._watcher: FileWatcher | None = None
+
+    @property
+    def paths(self) -> dict[str, Path]:
+        """監聽中的客戶端配置文件（client -> 路徑）"""
+        return dict(self._paths)
+
+    @property
+    def watcher(self) -> FileWatcher | None:
+        """目前的文件監聽器"""
+        return self._watcher
+
+    def start(self):
+        """開始監聽（重複呼叫無作用）"""
+        if self._watcher is not None:
+            return
+        config_manager = self._factory()
+        self._paths = {
+            name: adapter.get_config_path() for name, adapter in config_manager.adapters.items()
+        }
+        clients_by_path = {path: name for name, path in self._paths.items()}
+        self._sections = {name: _section_key(name, path) for name, path in self._paths.items()}
+
+        def on_change(paths: set[Path]):
+            self.notify({clients_by_path[path] for path in paths if path in clients_by_path})
+
+        self._watcher = FileWatcher(clients_by_path, on_change, poll_interval=self.poll_interval)
+        self._watcher.start()
+
+    def stop(self):
+        """停止監聽並喚醒等待中的 wait_due()"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        self.wake()
+
+    def notify(self, clients: set[str]):
+        """
+        標記客戶端配置已變更（重新開始防抖計時）
+
+        Args:
+            clients: 配置文件有變更的客戶端
+        """
+        if not clients:
+            return
+        with self._cond:
+            self._pending |= clients
+            self._deadline = time.monotonic() + self.debounce
+            self._cond.notify_all()
+
+    def wake(self):
+        """喚醒等待中的 wait_due()"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait_due(self, stop: threading.Event, timeout: float) -> bool:
+        """
+        等待直到有同步到期、stop 被設定或逾時
+
+        Args:
+            stop: 停止事件（設定後需呼叫 wake() 喚醒）
+            timeout: 最長等待時間（秒）
+
+        Returns:
+            是否有同步到期
+        """
+        end = time.monotonic() + timeout
+        with self._cond:
+            while not stop.is_set():
+                now = time.monotonic()
+                if self._deadline is not None and now >= self._deadline:
+                    return True
+                if now >= end:
+                    return False
+                until = end if self._deadline is None else min(end, self._deadline)
+                self._cond.wait(until - now)
+        return False
+
+    def run_pending(self) -> tuple[set[str], SyncResult | None]:
+        """
+        執行到期的同步
+
+        由本程序寫入造成的變更（內容摘要與寫入時相同）和
+        mcpServers 區段沒有改變的變更不會觸發同步。
+
+        Returns:
+            (有變更的客戶端, 同步結果)；沒有到期的變更時客戶端為空集合，
+            只有自己的寫入時同步結果為 None
+        """
+        with self._cond:
+            if self._deadline is None or time.monotonic() < self._deadline:
+                return set(), None
+            changed = self._pending
+            self._pending = set()
+            self._deadline = None
+
+        external = {
+            client
+            for client in changed
+            if client not in self._written
+            or _file_digest(self._paths[client]) != self._written[client]
+        }
+        for client in sorted(external):
+            section = _section_key(client, self._paths[client])
+            if section == self._sections.get(client):
+                external.discard(client)
+            else:
+                self._sections[client] = section
+        if not external:
+            self.logger.debug(f"mcpServers 未變更，略過: {', '.join(sorted(changed))}")
+            return changed, None
+
+        source = self._newest(external)
+        self.logger.info(f"偵測到配置變更: {', '.join(sorted(external))}，以 {source} 為來源同步")
+        config_manager = self._factory()
+        backup_manager = BackupManager()
+        engine = SyncEngine(config_manager, DiffEngine(), backup_manager)
+        result = engine.sync(
+            SyncStrategy.AUTO, dry_run=self.dry_run, create_backup=self.create_backup, source=source
+        )
+        self._written.update(result.written)
+        for client in result.written:
+            self._sections[client] = _section_key(client, self._paths[client])
+
+        if result.success and result.backup_path:
+            backup_manager.cleanup_old_backups()
+        return changed, result
+
+    def _newest(self, clients: set[str]) -> str:
+        """配置文件最近被修改的客戶端（同一批變更中可能有多個）"""
+
+        def mtime(client: str) -> int:
+            try:
+                return os.stat(self._paths[client]).st_mtime_ns
+            except OSError:
+                return -1
+
+        return max(sorted(clients), key=mtime)
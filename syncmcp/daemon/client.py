@@ -0,0 +1,84 @@
+"""
+常駐程序客戶端 - CLI 透過 Unix socket 向背景監控查詢
+
+協議為換行分隔的 JSON：
+    請求 {"id": 1, "method": "status", "params": {}}
+    回應 {"id": 1, "result": ...} 或 {"id": 1, "error": "..."}
+
+只使用標準庫且不匯入任何 syncmcp 核心模組，保持 CLI 啟動輕量。
+"""
+
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Any
+
+from .process import syncmcp_dir
+
+QUERY_TIMEOUT = 2.0  # 等待回應的時間（秒）
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+def socket_path() -> Path:
+    """常駐程序的 socket 路徑（~/.syncmcp/daemon.sock）"""
+    return syncmcp_dir() / "daemon.sock"
+
+
+def query(
+    method: str,
+    params: dict[str, Any] | None = None,
+    path: Path | None = None,
+    timeout: float = QUERY_TIMEOUT,
+) -> Any | None:
+    """
+    向常駐程序查詢
+
+    Args:
+        method: 查詢名稱（status / list / diff / monitor）
+        params: 查詢參數
+        path: socket 路徑（預設 ~/.syncmcp/daemon.sock）
+        timeout: 連線與等待回應的時間（秒）
+
+    Returns:
+        查詢結果；常駐程序未執行、逾時或回應錯誤時返回 None（呼叫者應自行計算）
+    """
+    path = Path(path) if path is not None else socket_path()
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+
+    request = json.dumps({"id": 1, "method": method, "params": params or {}})
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(request.encode("utf-8") + b"\n")
+            line = _read_line(sock)
+    except OSError:
+        return None  # 殘留的 socket 文件或常駐程序無回應
+
+    try:
+        response = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(response, dict) or "error" in response:
+        return None
+    return response.get("result")
+
+
+def _read_line(sock: socket.socket) -> bytes:
+    chunks = []
+    size = 0
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        newline = chunk.find(b"\n")
+        if newline >= 0:
+            chunks.append(chunk[:newline])
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > MAX_MESSAGE_BYTES:
+            raise OSError("回應過大")
+    return b"".join(chunks)
@@ -0,0 +1,319 @@
+"""
+指標匯出 - 以 OpenMetrics 文字格式輸出同步、健康檢查與存儲的指標
+
+`syncmcp metrics` 與背景監控（`monitor start --metrics-file`）以原子替換的方式
+寫出文字文件，供 node_exporter 的 textfile collector 讀取。資料取自同步歷史的
+累計數量、探測結果快取與監控狀態文件，不在每次匯出時重新解析客戶端配置
+（只有監控未執行時，`syncmcp metrics` 才在本程序內計算一次各客戶端的差異）。
+
+node_exporter 的 textfile collector 解析的是 Prometheus 文字格式，
+寫給它讀取時使用 `--format prometheus`。
+"""
+
+import math
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from ..core.health import HealthCache, ProbeResult, ProbeStatus, get_health_cache
+from ..utils import get_history_manager
+from ..utils.history import SyncHistoryManager
+from .process import syncmcp_dir
+from .status import load_fresh_status
+
+METRICS_FORMATS = ("openmetrics", "prometheus")
+
+# 各格式的 Content-Type（供需要以 HTTP 提供時參考）
+CONTENT_TYPES = {
+    "openmetrics": "application/openmetrics-text; version=1.0.0; charset=utf-8",
+    "prometheus": "text/plain; version=0.0.4; charset=utf-8",
+}
+
+DRIFT_STATUSES = ("added", "removed", "modified")
+# 未探測（遠端類型）的 MCP 不輸出探測指標
+PROBE_STATUSES = tuple(status for status in ProbeStatus if status is not ProbeStatus.SKIPPED)
+
+
+@dataclass
+class MetricFamily:
+    """一組同名的指標"""
+
+    name: str
+    type: str  # gauge / counter / summary
+    help: str
+    samples: list[tuple[str, dict[str, str], float]] = field(default_factory=list)
+
+    def add(self, value: float, suffix: str = "", **labels: Any):
+        """
+        新增一個樣本
+
+        Args:
+            value: 數值
+            suffix: 樣本名稱的後綴（counter 為 _total，summary 為 _sum / _count）
+            **labels: 標籤
+        """
+        self.samples.append((suffix, {key: str(val) for key, val in labels.items()}, value))
+
+
+def collect_metrics(
+    history: SyncHistoryManager | None = None,
+    health_cache: HealthCache | None = None,
+    backup_dir: Path | None = None,
+    drift: dict[str, dict[str, int]] | None = None,
+    probes: list[ProbeResult] | None = None,
+) -> list[MetricFamily]:
+    """
+    收集所有指標
+
+    Args:
+        history: 同步歷史（預設全局實例）
+        health_cache: 探測結果快取（預設全局實例，提供 probes 時不使用）
+        backup_dir: 備份目錄（預設 ~/.syncmcp/backups）
+        drift: 各客戶端的差異數量（預設取自監控狀態，監控未執行時在本程序內計算）
+        probes: 探測結果（預設取自快取）
+
+    Returns:
+        MetricFamily 列表
+    """
+    history = history if history is not None else get_history_manager()
+    if drift is None:
+        drift = current_drift()
+    if probes is None:
+        probes = (health_cache if health_cache is not None else get_health_cache()).results()
+    backup_dir = Path(backup_dir) if backup_dir is not None else syncmcp_dir() / "backups"
+
+    return [
+        *_sync_metrics(history),
+        *_drift_metrics(drift),
+        *_probe_metrics(probes),
+        *_storage_metrics(history, backup_dir),
+    ]
+
+
+def current_drift() -> dict[str, dict[str, int]]:
+    """
+    各客戶端與最新配置之間的差異數量
+
+    監控執行中且狀態仍有效時直接使用其結果；否則在本程序內載入配置計算。
+
+    Returns:
+        客戶端 -> 狀態（added / removed / modified）-> 數量
+    """
+    status = load_fresh_status()
+    drift = status.get("drift") if status is not None else None
+    if isinstance(drift, dict):
+        return drift
+
+    from ..core.snapshot import SnapshotCache
+
+    snapshot = SnapshotCache(watch=False).get()
+    return drift_counts(snapshot.diff_report, snapshot.configs)
+
+
+def drift_counts(report, clients) -> dict[str, dict[str, int]]:
+    """
+    由差異報告計算各客戶端的差異數量
+
+    Args:
+        report: DiffReport
+        clients: 客戶端名稱
+
+    Returns:
+        客戶端 -> 狀態 -> 數量
+    """
+    return {
+        client: {status: report.count(status, client) for status in DRIFT_STATUSES}
+        for client in clients
+    }
+
+
+def _sync_metrics(history: SyncHistoryManager) -> list[MetricFamily]:
+    totals = history.get_totals()
+
+    syncs = MetricFamily("syncmcp_syncs", "counter", "Completed syncs by outcome.")
+    for outcome in ("success", "failure"):
+        syncs.add(totals["syncs"][outcome], "_total", outcome=outcome)
+
+    changes = MetricFamily("syncmcp_sync_changes", "counter", "Changes applied by syncs.")
+    changes.add(totals["changes"], "_total")
+
+    duration = MetricFamily("syncmcp_sync_duration_seconds", "summary", "Sync duration.")
+    duration.add(totals["duration"]["sum"], "_sum")
+    duration.add(totals["duration"]["count"], "_count")
+
+    phases = MetricFamily(
+        "syncmcp_sync_phase_duration_seconds", "summary", "Sync duration by phase."
+    )
+    for phase, phase_totals in sorted(totals["phases"].items()):
+        phases.add(phase_totals["sum"], "_sum", phase=phase)
+        phases.add(phase_totals["count"], "_count", phase=phase)
+
+    families = [syncs, changes, duration, phases]
+    last = history.get_last_sync()
+    if last is not None:
+        timestamp = MetricFamily(
+            "syncmcp_last_sync_timestamp_seconds", "gauge", "Time of the last sync."
+        )
+        timestamp.add(datetime.fromisoformat(last.timestamp).timestamp())
+        success = MetricFamily(
+            "syncmcp_last_sync_success", "gauge", "Whether the last sync succeeded."
+        )
+        success.add(int(last.success))
+        last_phases = MetricFamily(
+            "syncmcp_last_sync_phase_duration_seconds", "gauge", "Phase durations of the last sync."
+        )
+        for phase, seconds in sorted((last.phases or {}).items()):
+            last_phases.add(seconds, phase=phase)
+        families.extend([timestamp, success, last_phases])
+    return families
+
+
+def _drift_metrics(drift: dict[str, dict[str, int]]) -> list[MetricFamily]:
+    family = MetricFamily(
+        "syncmcp_client_drift", "gauge", "MCP servers that differ from the newest config."
+    )
+    for client, counts in sorted(drift.items()):
+        for status in DRIFT_STATUSES:
+            family.add(counts.get(status, 0), client=client, status=status)
+    return [family]
+
+
+def _probe_metrics(probes: list[ProbeResult]) -> list[MetricFamily]:
+    # 同名 MCP 在不同客戶端可能有不同的啟動方式，只取最近一次的結果
+    latest: dict[str, ProbeResult] = {}
+    for result in probes:
+        if result.status is ProbeStatus.SKIPPED:
+            continue
+        current = latest.get(result.name)
+        if current is None or result.checked_at > current.checked_at:
+            latest[result.name] = result
+
+    up = MetricFamily("syncmcp_mcp_up", "gauge", "Whether the last probe of the MCP succeeded.")
+    status = MetricFamily("syncmcp_mcp_probe_status", "gauge", "Result of the last probe.")
+    latency = MetricFamily(
+        "syncmcp_mcp_probe_latency_seconds", "gauge", "Time from launch to initialize response."
+    )
+    checked = MetricFamily(
+        "syncmcp_mcp_probe_timestamp_seconds", "gauge", "Time of the last probe."
+    )
+    for name, result in sorted(latest.items()):
+        up.add(int(result.status is ProbeStatus.OK), mcp=name)
+        for value in PROBE_STATUSES:
+            status.add(int(result.status is value), mcp=name, status=value.value)
+        if result.latency_ms is not None:
+            latency.add(result.latency_ms / 1000, mcp=name)
+        checked.add(result.checked_at, mcp=name)
+    return [up, status, latency, checked]
+
+
+def _storage_metrics(history: SyncHistoryManager, backup_dir: Path) -> list[MetricFamily]:
+    count = 0
+    size = 0
+    try:
+        entries = [*os.scandir(backup_dir)]
+    except OSError:
+        entries = []
+    for entry in entries:
+        if entry.name.startswith("backup_") and entry.is_dir():
+            count += 1
+            size += _tree_size(entry.path)
+
+    backups = MetricFamily("syncmcp_backups", "gauge", "Number of stored backups.")
+    backups.add(count)
+    backup_bytes = MetricFamily("syncmcp_backup_store_bytes", "gauge", "Size of stored backups.")
+    backup_bytes.add(size)
+
+    history_entries = MetricFamily(
+        "syncmcp_history_entries", "gauge", "Entries kept in the sync history."
+    )
+    history_entries.add(len(history.get_history(limit=0)))
+    history_bytes = MetricFamily("syncmcp_history_bytes", "gauge", "Size of the sync history.")
+    history_bytes.add(_file_size(history.history_file) + _file_size(history.totals_file))
+    return [backups, backup_bytes, history_entries, history_bytes]
+
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            total += _file_size(Path(root) / name)
+    return total
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def render_metrics(families: list[MetricFamily], fmt: str = "openmetrics") -> str:
+    """
+    輸出為文字格式
+
+    Args:
+        families: collect_metrics() 的結果
+        fmt: openmetrics 或 prometheus（node_exporter textfile collector 使用）
+
+    Returns:
+        文字內容
+
+    Raises:
+        ValueError: 未知的格式
+    """
+    if fmt not in METRICS_FORMATS:
+        raise ValueError(f"未知的指標格式: {fmt}")
+
+    lines = []
+    for family in families:
+        # Prometheus 文字格式中 counter 的名稱包含 _total
+        name = family.name
+        if fmt == "prometheus" and family.type == "counter":
+            name += "_total"
+        lines.append(f"# HELP {name} {family.help}")
+        lines.append(f"# TYPE {name} {family.type}")
+        for suffix, labels, value in family.samples:
+            lines.append(f"{family.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    if fmt == "openmetrics":
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: Path, text: str):
+    """
+    以原子替換的方式寫入指標文件（讀取者不會讀到寫了一半的內容）
+
+    Args:
+        path: 指標文件路徑（node_exporter 只讀取 .prom 文件）
+        text: render_metrics() 的結果
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(path.name + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
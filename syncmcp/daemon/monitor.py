@@ -0,0 +1,411 @@
+"""
+背景監控 - 自動同步、定期 MCP 健康檢查、狀態文件、CLI 查詢服務
+
+- 主執行緒：等待配置文件變更，防抖後自動同步，更新狀態文件
+- 探測執行緒：依排程探測 stdio MCP；失敗的 MCP 以指數退避延後重試，
+  避免反覆啟動壞掉的 MCP
+- 查詢執行緒：在 ~/.syncmcp/daemon.sock 上以溫快照回答 status / list / diff
+- 指標文件：每次更新狀態文件時一併寫出（--metrics-file）
+"""
+
+import os
+import signal
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from ..core.config_manager import ClientConfig, ConfigManager
+from ..core.diff_engine import DiffEngine
+from ..core.health import (
+    MAX_CONCURRENT_PROBES,
+    PROBE_TIMEOUT,
+    HealthProber,
+    ProbeResult,
+    ProbeStatus,
+    ProbeTarget,
+    collect_targets,
+    get_health_cache,
+    probe_fingerprint,
+)
+from ..utils import get_logger
+from .autosync import DEBOUNCE_SECONDS, AutoSync
+from .metrics import collect_metrics, drift_counts, render_metrics, write_metrics
+from .process import remove_pid, syncmcp_dir, write_pid
+from .server import QueryServer
+from .status import file_stat_signature, write_status
+
+PROBE_INTERVAL = 900.0  # 正常 MCP 的探測間隔（秒）
+RETRY_BASE = 30.0  # 失敗 MCP 第一次重試的延遲（秒）
+RETRY_MAX = 3600.0  # 重試延遲上限（秒）
+HEARTBEAT = 60.0  # 沒有事件時更新狀態文件的間隔（秒）
+
+
+def monitor_pid_file() -> Path:
+    """監控進程的 pid 文件"""
+    return syncmcp_dir() / "monitor.pid"
+
+
+def monitor_log_file() -> Path:
+    """監控進程的輸出文件"""
+    return syncmcp_dir() / "logs" / "monitor.log"
+
+
+@dataclass
+class ProbeState:
+    """單個 MCP 的探測排程狀態"""
+
+    name: str
+    next_at: float
+    failures: int = 0
+    last: ProbeResult | None = None
+
+
+class ProbeSchedule:
+    """
+    探測排程
+
+    以「名稱 + 探測指紋」為鍵：配置或執行檔改變即視為新的 MCP，立即探測。
+    """
+
+    def __init__(
+        self,
+        interval: float = PROBE_INTERVAL,
+        retry_base: float = RETRY_BASE,
+        retry_max: float = RETRY_MAX,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        初始化探測排程
+
+        Args:
+            interval: 正常 MCP 的探測間隔（秒）
+            retry_base: 失敗後第一次重試的延遲（秒），之後每次加倍
+            retry_max: 重試延遲上限（秒）
+            clock: 時間來源
+        """
+        self.interval = interval
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.clock = clock
+        self._states: dict[tuple[str, str], ProbeState] = {}
+
+    @property
+    def states(self) -> list[ProbeState]:
+        """所有 MCP 的排程狀態"""
+        return list(self._states.values())
+
+    def retry_delay(self, failures: int) -> float:
+        """連續失敗 failures 次後的重試延遲"""
+        return min(self.retry_base * 2.0 ** max(failures - 1, 0), self.retry_max)
+
+    def update(self, targets: list[ProbeTarget]) -> list[tuple[tuple[str, str], ProbeTarget]]:
+        """
+        以當前配置更新排程（移除已不存在的 MCP）
+
+        Args:
+            targets: 當前所有探測目標
+
+        Returns:
+            [(鍵, 目標)]，只包含 stdio MCP
+        """
+        keyed = []
+        for target in targets:
+            fingerprint = probe_fingerprint(target.config)
+            if fingerprint is not None:
+                keyed.append(((target.name, fingerprint), target))
+
+        now = self.clock()
+        current = {key for key, _target in keyed}
+        self._states = {key: state for key, state in self._states.items() if key in current}
+        for key, target in keyed:
+            if key not in self._states:
+                self._states[key] = ProbeState(target.name, next_at=now)
+        return keyed
+
+    def due(self, keyed: list[tuple[tuple[str, str], ProbeTarget]]) -> list[tuple]:
+        """到期需要探測的目標"""
+        now = self.clock()
+        return [(key, target) for key, target in keyed if self._states[key].next_at <= now]
+
+    def record(self, key: tuple[str, str], result: ProbeResult):
+        """
+        記錄探測結果並排定下次探測
+
+        Args:
+            key: update() 返回的鍵
+            result: 探測結果
+        """
+        state = self._states.get(key)
+        if state is None:
+            return
+        state.last = result
+        if result.status is ProbeStatus.OK:
+            state.failures = 0
+            state.next_at = self.clock() + self.interval
+        else:
+            state.failures += 1
+            state.next_at = self.clock() + self.retry_delay(state.failures)
+
+    def next_due(self) -> float | None:
+        """最早的下次探測時間"""
+        return min((state.next_at for state in self._states.values()), default=None)
+
+
+class Monitor:
+    """背景監控主程序"""
+
+    def __init__(
+        self,
+        debounce: float = DEBOUNCE_SECONDS,
+        create_backup: bool = True,
+        autosync: bool = True,
+        probe: bool = True,
+        probe_interval: float = PROBE_INTERVAL,
+        probe_timeout: float = PROBE_TIMEOUT,
+        retry_base: float = RETRY_BASE,
+        retry_max: float = RETRY_MAX,
+        status_file: Path | None = None,
+        pid_file: Path | None = None,
+        serve: bool = True,
+        socket_file: Path | None = None,
+        config_manager_factory: Callable[[], ConfigManager] = ConfigManager,
+        metrics_file: Path | None = None,
+        metrics_format: str = "openmetrics",
+    ):
+        """
+        初始化監控
+
+        Args:
+            debounce: 配置變更後等待的時間（秒）
+            create_backup: 自動同步前是否備份
+            autosync: 配置變更後是否自動同步
+            probe: 是否定期探測 MCP 健康狀態
+            probe_interval: 正常 MCP 的探測間隔（秒）
+            probe_timeout: 單個 MCP 的探測逾時（秒）
+            retry_base: 失敗 MCP 第一次重試的延遲（秒）
+            retry_max: 重試延遲上限（秒）
+            status_file: 狀態文件路徑（預設 ~/.syncmcp/monitor_status.json）
+            pid_file: pid 文件路徑（預設 ~/.syncmcp/monitor.pid）
+            serve: 是否在 Unix socket 上提供 CLI 查詢服務
+            socket_file: socket 路徑（預設 ~/.syncmcp/daemon.sock）
+            config_manager_factory: 建立 ConfigManager 的函數
+            metrics_file: 指標文件路徑（None 表示不寫出）
+            metrics_format: 指標文件格式（openmetrics 或 prometheus）
+        """
+        self.autosync = AutoSync(
+            config_manager_factory, debounce=debounce, create_backup=create_backup
+        )
+        self.autosync_enabled = autosync
+        self.probe = probe
+        self.prober = HealthProber(
+            timeout=probe_timeout, concurrency=MAX_CONCURRENT_PROBES, cache=get_health_cache()
+        )
+        self.schedule = ProbeSchedule(probe_interval, retry_base, retry_max)
+        self.status_file = status_file
+        self.metrics_file = metrics_file
+        self.metrics_format = metrics_format
+        self.pid_file = pid_file if pid_file is not None else monitor_pid_file()
+        self.query_server = (
+            QueryServer(path=socket_file, handlers={"monitor": self._monitor_query})
+            if serve
+            else None
+        )
+        self.logger = get_logger()
+
+        self._factory = config_manager_factory
+        self._stop = threading.Event()
+        self._probe_wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._metrics_lock = threading.Lock()  # 主執行緒與探測執行緒都會寫出指標
+        self._started_at = time.time()
+        self._configs: dict[str, ClientConfig] = {}
+        self._clients: dict[str, dict[str, Any]] = {}
+        self._drift: dict[str, dict[str, int]] = {}
+        self._last_sync: dict[str, Any] | None = None
+        self._sync_count = 0
+
+    def run(self):
+        """執行監控直到 stop() 或收到 SIGTERM / SIGINT"""
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, lambda _signum, _frame: self.stop())
+
+        probe_thread = None
+        try:
+            if self.autosync_enabled:
+                self.autosync.start()
+            self._refresh_clients()
+            self._write_status()
+
+            if self.query_server is not None:
+                try:
+                    self.query_server.start()
+                except (OSError, RuntimeError) as e:
+                    self.logger.error(f"無法啟動查詢服務: {e}")
+                    self.query_server = None
+
+            # 開始監聽後才寫入 pid：`monitor start` 返回時之後的變更都會被處理
+            write_pid(self.pid_file)
+            self.logger.info(f"背景監控已啟動 (pid={os.getpid()})")
+
+            if self.probe:
+                probe_thread = threading.Thread(
+                    target=self._probe_loop, name="syncmcp-probe", daemon=True
+                )
+                probe_thread.start()
+
+            while not self._stop.is_set():
+                if self.autosync.wait_due(self._stop, HEARTBEAT):
+                    self._handle_changes()
+                self._write_status()
+        finally:
+            self._stop.set()
+            self._probe_wakeup.set()
+            self.autosync.stop()
+            if self.query_server is not None:
+                self.query_server.close()
+                self.query_server.cache.close()
+            if probe_thread is not None:
+                probe_thread.join(timeout=PROBE_TIMEOUT + 5)
+            remove_pid(self.pid_file)
+            self.logger.info("背景監控已停止")
+
+    def stop(self):
+        """要求監控停止（可在任何執行緒或信號處理中呼叫）"""
+        self._stop.set()
+        self._probe_wakeup.set()
+        self.autosync.wake()
+
+    def _handle_changes(self):
+        changed, result = self.autosync.run_pending()
+        if not changed:
+            return
+
+        if result is not None:
+            self._sync_count += 1
+            self._last_sync = {
+                "at": time.time(),
+                "trigger": sorted(changed),
+                "success": result.success,
+                "changes": result.changes,
+                "errors": result.errors,
+                "backup_path": result.backup_path,
+            }
+            if result.success:
+                self.logger.info(f"自動同步完成: {len(result.written)} 個客戶端已寫入")
+            else:
+                self.logger.error(f"自動同步失敗: {'; '.join(result.errors)}")
+
+        self._refresh_clients()
+        self._probe_wakeup.set()  # 配置可能已改變，讓探測執行緒重新檢查排程
+
+    def _refresh_clients(self):
+        """重新載入配置並更新狀態中的客戶端資訊"""
+        config_manager = self._factory()
+        # 先取得簽名再載入：載入期間的變更會讓簽名不一致，讀取者因此會自行重新計算
+        signatures = {
+            name: file_stat_signature(adapter.get_config_path())
+            for name, adapter in config_manager.adapters.items()
+        }
+        configs = config_manager.load_all()
+        clients = {
+            name: {
+                "path": str(config.file_path),
+                "mcp_count": len(config.mcpServers),
+                "last_modified": config.last_modified,
+                "exists": signatures[name] is not None,
+                "signature": signatures[name],
+            }
+            for name, config in configs.items()
+        }
+        # 差異數量隨配置變更計算一次，指標匯出時不必重新解析配置
+        drift = drift_counts(DiffEngine().analyze(configs), configs)
+        with self._lock:
+            self._configs = configs
+            self._clients = clients
+            self._drift = drift
+
+    def _probe_loop(self):
+        while not self._stop.is_set():
+            with self._lock:
+                keyed = self.schedule.update(collect_targets(self._configs))
+                due = self.schedule.due(keyed)
+
+            if due:
+                self.logger.debug(f"探測 {len(due)} 個 MCP")
+                results = self.prober.run([target for _key, target in due], fresh=True)
+                with self._lock:
+                    for (key, _target), result in zip(due, results):
+                        self.schedule.record(key, result)
+                for result in results:
+                    if result.status is not ProbeStatus.OK:
+                        self.logger.warning(f"MCP 健康檢查失敗: {result.name} - {result.error}")
+                self._write_status()
+
+            with self._lock:
+                next_due = self.schedule.next_due()
+            delay = HEARTBEAT if next_due is None else max(next_due - time.time(), 1.0)
+            self._probe_wakeup.wait(delay)
+            self._probe_wakeup.clear()
+
+    def _health_status(self) -> dict[str, Any]:
+        health = {}
+        for state in self.schedule.states:
+            last = state.last
+            health[state.name] = {
+                "status": last.status.value if last else "pending",
+                "latency_ms": last.latency_ms if last else None,
+                "error": last.error if last else None,
+                "clients": last.clients if last else [],
+                "checked_at": last.checked_at if last else None,
+                "failures": state.failures,
+                "next_probe_at": state.next_at,
+            }
+        return health
+
+    def _status_data(self) -> dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "started_at": self._started_at,
+            "backend": self.autosync.watcher.backend if self.autosync.watcher else None,
+            "sync_count": self._sync_count,
+            "socket": str(self.query_server.path) if self.query_server is not None else None,
+            "clients": self._clients,
+            "drift": self._drift,
+            "last_sync": self._last_sync,
+            "health": self._health_status() if self.probe else None,
+        }
+
+    def _monitor_query(self, params: dict[str, Any]) -> dict[str, Any]:
+        """查詢服務的 monitor 查詢：與狀態文件相同的內容"""
+        with self._lock:
+            return self._status_data()
+
+    def _write_status(self):
+        with self._lock:
+            data = self._status_data()
+            try:
+                write_status(data, self.status_file)
+            except OSError as e:
+                self.logger.error(f"無法寫入監控狀態: {e}")
+            drift = dict(self._drift)
+            probes = [state.last for state in self.schedule.states if state.last is not None]
+        if self.metrics_file is not None:
+            self._write_metrics(self.metrics_file, drift, probes if self.probe else None)
+
+    def _write_metrics(
+        self,
+        path: Path,
+        drift: dict[str, dict[str, int]],
+        probes: list[ProbeResult] | None,
+    ):
+        """寫出指標文件（只讀取歷史、探測結果與備份目錄，不重新解析配置）"""
+        try:
+            families = collect_metrics(drift=drift, probes=probes)
+            with self._metrics_lock:
+                write_metrics(path, render_metrics(families, self.metrics_format))
+        except (OSError, ValueError) as e:
+            self.logger.error(f"無法寫入指標文件: {e}")
@@ -0,0 +1,151 @@
+"""
+背景進程管理 - pid 文件、啟動與停止
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+def syncmcp_dir() -> Path:
+    """SyncMCP 資料目錄（~/.syncmcp）"""
+    return Path.home() / ".syncmcp"
+
+
+def pid_alive(pid: int) -> bool:
+    """進程是否仍在執行"""
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # 進程存在但屬於其他用戶
+    except OSError:
+        return False
+    return True
+
+
+def read_pid(pid_file: Path) -> int | None:
+    """
+    讀取 pid 文件
+
+    Args:
+        pid_file: pid 文件路徑
+
+    Returns:
+        仍在執行的進程 pid，文件不存在、格式錯誤或進程已結束時返回 None
+    """
+    try:
+        pid = int(Path(pid_file).read_text().strip())
+    except (OSError, ValueError):
+        return None
+    return pid if pid_alive(pid) else None
+
+
+def write_pid(pid_file: Path):
+    """寫入當前進程的 pid"""
+    pid_file = Path(pid_file)
+    pid_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = pid_file.with_name(pid_file.name + ".tmp")
+    tmp_file.write_text(f"{os.getpid()}\n")
+    os.replace(tmp_file, pid_file)
+
+
+def remove_pid(pid_file: Path):
+    """移除 pid 文件（只移除屬於當前進程的文件）"""
+    try:
+        if int(Path(pid_file).read_text().strip()) == os.getpid():
+            Path(pid_file).unlink()
+    except (OSError, ValueError):
+        pass
+
+
+def spawn_detached(args: list[str], pid_file: Path, log_file: Path, timeout: float = 5.0) -> int:
+    """
+    在背景啟動 `python -m syncmcp <args>`，等待其寫入 pid 文件
+
+    子進程脫離當前終端（新 session），輸出寫入 log_file。
+
+    Args:
+        args: syncmcp 命令列參數
+        pid_file: 子進程啟動後寫入的 pid 文件
+        log_file: stdout / stderr 輸出文件
+        timeout: 等待 pid 文件的時間（秒）
+
+    Returns:
+        子進程 pid
+
+    Raises:
+        RuntimeError: 子進程提前結束或未在時限內啟動
+    """
+    log_file = Path(log_file)
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(log_file, "ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "syncmcp", *args],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=sys.platform != "win32",
+            close_fds=True,
+        )
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(
+                f"背景進程啟動失敗（exit code {process.returncode}），詳見 {log_file}"
+            )
+        if read_pid(pid_file) == process.pid:
+            return process.pid
+        time.sleep(0.05)
+
+    process.terminate()
+    raise RuntimeError(f"背景進程未在 {timeout:g} 秒內啟動，詳見 {log_file}")
+
+
+def stop_process(pid_file: Path, timeout: float = 10.0) -> int | None:
+    """
+    停止 pid 文件記錄的進程（SIGTERM，逾時後 SIGKILL）
+
+    Args:
+        pid_file: pid 文件路徑
+        timeout: 等待進程結束的時間（秒）
+
+    Returns:
+        被停止的 pid，進程未在執行時返回 None
+    """
+    pid = read_pid(pid_file)
+    if pid is None:
+        return None
+
+    os.kill(pid, signal.SIGTERM)
+    deadline = time.monotonic() + timeout
+    while _reap(pid) and pid_alive(pid):
+        if time.monotonic() >= deadline:
+            os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+            break
+        time.sleep(0.05)
+
+    try:
+        Path(pid_file).unlink()
+    except OSError:
+        pass
+    return pid
+
+
+def _reap(pid: int) -> bool:
+    """回收已結束的子進程（由本進程啟動時），返回進程是否可能仍在執行"""
+    if sys.platform == "win32":
+        return True
+    try:
+        reaped, _status = os.waitpid(pid, os.WNOHANG)
+    except ChildProcessError:
+        return True  # 不是本進程的子進程
+    return reaped == 0
@@ -0,0 +1,168 @@
+"""
+查詢服務 - 常駐程序在 Unix socket 上以溫快照回答 CLI 查詢
+
+快照由 SnapshotCache 保存並隨配置文件變更失效；每次查詢前另外比對
+各配置文件的 stat 簽名，確保剛寫入、監聽事件尚未到達的變更也會被讀到。
+協議見 client.py。
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from ..core.queries import run_query
+from ..core.records import to_plain
+from ..core.snapshot import ConfigSnapshot, SnapshotCache
+from ..utils import get_logger
+from .client import MAX_MESSAGE_BYTES, socket_path
+from .status import file_stat_signature
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """處理一個連線中的所有請求（每行一個）"""
+
+    def handle(self):
+        server: QueryServer = self.server.query_server
+        while True:
+            line = self.rfile.readline(MAX_MESSAGE_BYTES)
+            if not line.strip():
+                return
+            response = server.handle_line(line)
+            try:
+                self.wfile.write(response.encode("utf-8") + b"\n")
+                self.wfile.flush()
+            except OSError:
+                return
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class QueryServer:
+    """Unix socket 查詢服務"""
+
+    def __init__(
+        self,
+        snapshot_cache: SnapshotCache | None = None,
+        path: Path | None = None,
+        handlers: dict[str, Callable[[dict[str, Any]], Any]] | None = None,
+    ):
+        """
+        初始化查詢服務
+
+        Args:
+            snapshot_cache: 配置快照快取（預設建立新的並監聽配置文件）
+            path: socket 路徑（預設 ~/.syncmcp/daemon.sock）
+            handlers: 額外的查詢（名稱 -> 以參數返回結果的函數）
+        """
+        self.cache = snapshot_cache if snapshot_cache is not None else SnapshotCache()
+        self.path = Path(path) if path is not None else socket_path()
+        self.handlers = dict(handlers or {})
+        self.logger = get_logger()
+
+        self._lock = threading.Lock()
+        self._snapshot: ConfigSnapshot | None = None
+        self._signatures: tuple | None = None
+        self._server: _UnixServer | None = None
+        self._thread: threading.Thread | None = None
+        self._inode: int | None = None
+
+    def start(self):
+        """
+        綁定 socket 並在背景執行緒中開始服務
+
+        Raises:
+            RuntimeError: 已有其他常駐程序在此 socket 上服務
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._remove_stale_socket()
+
+        old_umask = os.umask(0o177)  # socket 只允許當前用戶連線
+        try:
+            self._server = _UnixServer(str(self.path), _Handler)
+        finally:
+            os.umask(old_umask)
+        self._server.query_server = self
+        self._inode = os.stat(self.path).st_ino
+
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.1},
+            name="syncmcp-query",
+            daemon=True,
+        )
+        self._thread.start()
+        self.logger.info(f"查詢服務已啟動: {self.path}")
+
+    def close(self):
+        """停止服務並移除 socket 文件"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        try:
+            if os.stat(self.path).st_ino == self._inode:
+                self.path.unlink()
+        except OSError:
+            pass
+
+    def snapshot(self) -> ConfigSnapshot:
+        """取得與配置文件一致的快照"""
+        with self._lock:
+            # 先取得簽名再載入：載入期間的變更會讓下次查詢的簽名不一致而重新載入
+            signatures = tuple(file_stat_signature(path) for path in self.cache.current_paths())
+            snapshot = self.cache.get()
+            if snapshot is self._snapshot and signatures != self._signatures:
+                self.cache.invalidate()
+                snapshot = self.cache.get()
+            self._snapshot = snapshot
+            self._signatures = signatures
+            return snapshot
+
+    def handle_line(self, line: bytes) -> str:
+        """
+        處理一行請求
+
+        Args:
+            line: JSON 請求
+
+        Returns:
+            JSON 回應（不含換行）
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            method = request["method"]
+            params = request.get("params") or {}
+            if method in self.handlers:
+                result = self.handlers[method](params)
+            else:
+                result = run_query(self.snapshot(), method, params)
+            return json.dumps(
+                {"id": request_id, "result": result}, ensure_ascii=False, default=to_plain
+            )
+        except Exception as e:
+            self.logger.debug(f"查詢失敗: {e}")
+            return json.dumps({"id": request_id, "error": str(e)}, ensure_ascii=False)
+
+    def _remove_stale_socket(self):
+        if not self.path.exists():
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.settimeout(1.0)
+            probe.connect(str(self.path))
+        except OSError:
+            self.path.unlink(missing_ok=True)  # 上次未正常結束留下的 socket
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"已有常駐程序在 {self.path} 上服務")
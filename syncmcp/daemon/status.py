@@ -0,0 +1,94 @@
+"""
+監控狀態文件 - 背景監控寫入、`syncmcp status` 直接讀取
+
+狀態文件記錄每個客戶端配置文件的 stat 簽名；讀取時只需 stat 比對，
+簽名一致即可沿用其中的統計，不必重新解析配置。
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from .process import pid_alive, syncmcp_dir
+
+STATUS_VERSION = 1
+
+
+def status_file_path() -> Path:
+    """監控狀態文件路徑（~/.syncmcp/monitor_status.json）"""
+    return syncmcp_dir() / "monitor_status.json"
+
+
+def file_stat_signature(path: Path) -> list[int] | None:
+    """文件的 [mtime_ns, 大小, inode]，不存在時返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def read_status(path: Path | None = None) -> dict[str, Any] | None:
+    """
+    讀取監控狀態文件
+
+    Args:
+        path: 狀態文件路徑（預設 ~/.syncmcp/monitor_status.json）
+
+    Returns:
+        狀態資料，文件不存在或格式錯誤時返回 None
+    """
+    path = Path(path) if path is not None else status_file_path()
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != STATUS_VERSION:
+        return None
+    return data
+
+
+def write_status(data: dict[str, Any], path: Path | None = None):
+    """
+    以原子替換的方式寫入監控狀態文件
+
+    Args:
+        data: 狀態資料（會加上 version 和 updated_at）
+        path: 狀態文件路徑（預設 ~/.syncmcp/monitor_status.json）
+    """
+    path = Path(path) if path is not None else status_file_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    payload = {"version": STATUS_VERSION, **data, "updated_at": time.time()}
+    tmp_file = path.with_name(path.name + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, path)
+
+
+def load_fresh_status(path: Path | None = None) -> dict[str, Any] | None:
+    """
+    讀取仍然有效的監控狀態
+
+    監控進程必須仍在執行，且每個客戶端配置文件的 stat 簽名與記錄一致。
+
+    Args:
+        path: 狀態文件路徑（預設 ~/.syncmcp/monitor_status.json）
+
+    Returns:
+        狀態資料，無效時返回 None（呼叫者應自行計算）
+    """
+    data = read_status(path)
+    if data is None or not pid_alive(int(data.get("pid") or 0)):
+        return None
+
+    clients = data.get("clients")
+    if not isinstance(clients, dict) or not clients:
+        return None
+    for client in clients.values():
+        if file_stat_signature(Path(client["path"])) != client.get("signature"):
+            return None
+    return data
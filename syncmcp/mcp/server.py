@@ -6,25 +6,204 @@ SyncMCP MCP Server - 讓 LLM 可以管理 MCP 配置同步
 - 檢查同步狀態
 - 查看配置差異
 - 獲取衝突解決建議
+- 在所有客戶端新增、修改、刪除、啟用或停用 MCP
+- 訂閱配置狀態資源（配置文件變更時推送通知）
 """
 
 import asyncio
+import functools
+import json
+import threading
+import weakref
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
-
-from mcp.server import Server
-from mcp.types import TextContent, Tool
+from typing import Any, TypeVar
+
+from mcp.server.lowlevel import Server
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.types import (
+    Resource,
+    ResourceTemplate,
+    ServerCapabilities,
+    SubscribeRequest,
+    TextContent,
+    Tool,
+)
+from pydantic import AnyUrl
 
 from syncmcp.core.backup_manager import BackupManager
 from syncmcp.core.config_manager import ConfigManager
 from syncmcp.core.diff_engine import DiffEngine
-from syncmcp.core.sync_engine import SyncEngine, SyncStrategy
-from syncmcp.utils import get_logger
+from syncmcp.core.health import HealthProber, ProbeStatus, collect_targets, get_health_cache
+from syncmcp.core.records import to_plain
+from syncmcp.core.snapshot import ConfigSnapshot, get_snapshot_cache
+from syncmcp.core.sync_engine import (
+    SyncEngine,
+    SyncEvent,
+    SyncProgressCallback,
+    SyncResult,
+    SyncStrategy,
+)
+from syncmcp.utils import content_digest, get_logger
+
+
+class SyncMCPServer(Server):
+    """MCP Server：註冊了訂閱處理器時回報支援資源訂閱"""
+
+    def get_capabilities(
+        self, notification_options, experimental_capabilities
+    ) -> ServerCapabilities:
+        capabilities = super().get_capabilities(notification_options, experimental_capabilities)
+        if capabilities.resources is not None and SubscribeRequest in self.request_handlers:
+            capabilities.resources.subscribe = True
+        return capabilities
+
 
 # 創建 MCP Server 實例
-server = Server("syncmcp")
+server = SyncMCPServer("syncmcp")
 logger = get_logger(verbose=False)
 
+# 阻塞工作（載入、同步、文件 I/O）使用的執行緒數上限
+MAX_WORKERS = 4
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="syncmcp-worker")
+
+# 每個事件迴圈一把鎖：會寫入配置的工具依序執行，唯讀工具不受影響
+_mutation_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+    weakref.WeakKeyDictionary()
+)
+
+T = TypeVar("T")
+
+
+async def _run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """在執行緒池中執行阻塞函數，避免卡住事件迴圈"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+def _mutation_lock() -> asyncio.Lock:
+    """取得當前事件迴圈的寫入鎖"""
+    loop = asyncio.get_running_loop()
+    lock = _mutation_locks.get(loop)
+    if lock is None:
+        lock = _mutation_locks[loop] = asyncio.Lock()
+    return lock
+
+
+# 每個事件迴圈中排隊或執行中的同步：(策略, 是否備份) -> (Task, 進度監聽者)
+_pending_syncs: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _create_sync_engine() -> SyncEngine:
+    """建立同步引擎"""
+    return SyncEngine(ConfigManager(), DiffEngine(), BackupManager())
+
+
+def _progress_forwarder() -> SyncProgressCallback | None:
+    """
+    若當前請求帶有 progressToken，返回將同步事件轉發為 MCP 進度通知的回調
+
+    回調在執行緒池中被呼叫，通知會排入事件迴圈發送。
+    """
+    try:
+        ctx = server.request_context
+    except LookupError:
+        return None  # 不在 MCP 請求中（例如直接呼叫）
+
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+
+    def forward(event: SyncEvent):
+        # 進度值必須遞增，因此只轉發階段完成事件
+        if not event.done:
+            return
+        asyncio.run_coroutine_threadsafe(
+            ctx.session.send_progress_notification(
+                token,
+                event.step,
+                total=event.total,
+                message=event.message,
+                related_request_id=str(ctx.request_id),
+            ),
+            loop,
+        )
+
+    return forward
+
+
+async def _locked_sync(
+    strategy: SyncStrategy, create_backup: bool, listeners: list[SyncProgressCallback]
+) -> SyncResult:
+    """取得寫入鎖後在執行緒池中執行同步，進度事件發送給所有監聽者"""
+
+    def progress(event: SyncEvent):
+        for listener in list(listeners):
+            listener(event)
+
+    async with _mutation_lock():
+        try:
+            return await _run_blocking(
+                _create_sync_engine().sync,
+                strategy=strategy,
+                dry_run=False,
+                create_backup=create_backup,
+                progress=progress,
+            )
+        finally:
+            # 本程序剛寫入配置，不等文件監聽通知
+            get_snapshot_cache().invalidate()
+
+
+async def _coalesced_sync(
+    strategy: SyncStrategy, create_backup: bool, listener: SyncProgressCallback | None = None
+) -> SyncResult:
+    """
+    執行同步；相同參數的同步正在排隊或執行時，直接共用其結果
+
+    Args:
+        strategy: 同步策略
+        create_backup: 是否創建備份
+        listener: 進度回調（加入進行中的同步時，只會收到之後的事件）
+
+    Returns:
+        SyncResult
+    """
+    loop = asyncio.get_running_loop()
+    pending = _pending_syncs.setdefault(loop, {})
+    key = (strategy, create_backup)
+
+    entry = pending.get(key)
+    if entry is None or entry[0].done():
+        listeners: list[SyncProgressCallback] = []
+        task = loop.create_task(_locked_sync(strategy, create_backup, listeners))
+        entry = pending[key] = (task, listeners)
+        task.add_done_callback(
+            lambda done: pending.pop(key, None) if pending.get(key, (None,))[0] is done else None
+        )
+
+    task, listeners = entry
+    if listener is not None:
+        listeners.append(listener)
+
+    # 單一請求被取消時不影響其他共用此同步的請求
+    return await asyncio.shield(task)
+
+
+async def _get_snapshot() -> ConfigSnapshot:
+    """取得配置快照：快照有效時直接返回，需要重新載入時在執行緒池中進行"""
+    cache = get_snapshot_cache()
+    snapshot = cache.peek()
+    if snapshot is None:
+        snapshot = await _run_blocking(cache.get)
+    return snapshot
+
 
 # ============================================================================
 # Tool Definitions
@@ -125,6 +304,68 @@ async def list_tools() -> list[Tool]:
                 "required": [],
             },
         ),
+        Tool(
+            name="edit_mcp_servers",
+            description=(
+                "在所有客戶端新增、修改、刪除、啟用或停用 MCP。"
+                "所有操作在同一個交易中依各客戶端格式渲染，全部成功後才一次寫入並只備份一次；"
+                "任一操作失敗時不寫入任何文件。"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "operations": {
+                        "type": "array",
+                        "description": "依序執行的操作",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "op": {
+                                    "type": "string",
+                                    "enum": ["add", "set", "remove", "rm", "enable", "disable"],
+                                    "description": (
+                                        "add（新增或取代）、set（修改欄位，值為 null 刪除）、"
+                                        "remove / rm（刪除）、enable / disable（啟用 / 停用）"
+                                    ),
+                                },
+                                "name": {"type": "string", "description": "MCP 名稱"},
+                                "names": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                    "description": "多個 MCP 名稱（remove / enable / disable）",
+                                },
+                                "config": {
+                                    "type": "object",
+                                    "description": "add 的 MCP 配置（command/args/env 或 url）",
+                                },
+                                "servers": {
+                                    "type": "object",
+                                    "description": "add 一次新增多個 MCP（名稱 -> 配置）",
+                                },
+                                "fields": {"type": "object", "description": "set 要修改的欄位"},
+                                "clients": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                    "description": "只修改這些客戶端（預設全部）",
+                                },
+                            },
+                            "required": ["op"],
+                        },
+                    },
+                    "dry_run": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "是否只預覽變更而不實際執行",
+                    },
+                    "create_backup": {
+                        "type": "boolean",
+                        "default": True,
+                        "description": "是否在寫入前創建備份",
+                    },
+                },
+                "required": ["operations"],
+            },
+        ),
         Tool(
             name="troubleshoot_mcp",
             description=(
@@ -136,14 +377,14 @@ async def list_tools() -> list[Tool]:
                 "properties": {
                     "error_message": {
                         "type": "string",
-                        "description": "錯誤訊息或問題描述",
+                        "description": "錯誤訊息或問題描述（提供 mcp_name 時可省略）",
                     },
                     "mcp_name": {
                         "type": "string",
-                        "description": "有問題的 MCP 名稱（可選）",
+                        "description": "有問題的 MCP 名稱（會實際啟動以取得錯誤輸出）",
                     },
                 },
-                "required": ["error_message"],
+                "required": [],
             },
         ),
     ]
@@ -169,6 +410,8 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
             return await _suggest_conflict_resolution(arguments)
         elif name == "get_setup_guide":
             return await _get_setup_guide(arguments)
+        elif name == "edit_mcp_servers":
+            return await _edit_mcp_servers(arguments)
         elif name == "troubleshoot_mcp":
             return await _troubleshoot_mcp(arguments)
         else:
@@ -193,14 +436,14 @@ async def _sync_mcp_configs(arguments: dict) -> list[TextContent]:
     # 轉換策略
     strategy = SyncStrategy.AUTO if strategy_str == "auto" else SyncStrategy.MANUAL
 
-    # 創建管理器
-    config_manager = ConfigManager()
-    diff_engine = DiffEngine()
-    backup_manager = BackupManager()
-    sync_engine = SyncEngine(config_manager, diff_engine, backup_manager)
-
-    # 執行同步
-    result = sync_engine.sync(strategy=strategy, dry_run=dry_run, create_backup=create_backup)
+    if dry_run:
+        # 預覽直接由當前快照的差異報告產生
+        snapshot = await _get_snapshot()
+        result = snapshot.memo(
+            "sync_preview", lambda: _create_sync_engine().preview(snapshot.diff_report)
+        )
+    else:
+        result = await _coalesced_sync(strategy, create_backup, _progress_forwarder())
 
     # 格式化結果
     output_lines = []
@@ -248,11 +491,75 @@ async def _sync_mcp_configs(arguments: dict) -> list[TextContent]:
     return [TextContent(type="text", text="\n".join(output_lines))]
 
 
+_EDIT_OPS = {"add", "set", "remove", "rm", "enable", "disable"}
+
+
+def _apply_server_edits(operations: list, dry_run: bool, create_backup: bool) -> str:
+    """在一個交易中執行所有操作並一次寫入，返回 Markdown 結果"""
+    from syncmcp.core.transaction import ConfigTransaction
+
+    output_lines = ["# 🔍 MCP 修改預覽\n" if dry_run else "# ✅ MCP 修改完成\n"]
+    with ConfigTransaction(strategy="mcp-edit") as transaction:
+        for index, operation in enumerate(operations, 1):
+            if not isinstance(operation, dict) or operation.get("op") not in _EDIT_OPS:
+                raise ValueError(f"第 {index} 個操作無效: {operation}")
+            try:
+                transaction.execute(operation)
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"第 {index} 個操作 ({operation['op']}) 失敗，未寫入: {e}") from e
+
+        changes = transaction.changes()
+        result = None if dry_run else transaction.commit(create_backup=create_backup)
+
+    output_lines.append("## 📝 變更\n")
+    if not changes:
+        output_lines.append("沒有需要寫入的變更")
+    for client, items in changes.items():
+        output_lines.append(f"- {client}: {', '.join(items)}")
+
+    if transaction.warnings:
+        output_lines.append("\n## ⚠️ 警告\n")
+        output_lines.extend(f"- {warning}" for warning in transaction.warnings)
+
+    if result is not None and result.backup_path:
+        output_lines.append("\n## 💾 備份已創建\n")
+        output_lines.append(f"備份位置: `{Path(result.backup_path).name}`")
+        output_lines.append("如有問題可使用 CLI 恢復: `syncmcp restore`")
+    return "\n".join(output_lines)
+
+
+async def _edit_mcp_servers(arguments: dict) -> list[TextContent]:
+    """在所有客戶端修改 MCP"""
+    operations = arguments.get("operations") or []
+    if not isinstance(operations, list) or not operations:
+        return [TextContent(type="text", text="❌ 需要至少一個操作")]
+    dry_run = arguments.get("dry_run", False)
+    create_backup = arguments.get("create_backup", True)
+
+    async with _mutation_lock():
+        try:
+            text = await _run_blocking(_apply_server_edits, operations, dry_run, create_backup)
+        except ValueError as e:
+            return [TextContent(type="text", text=f"❌ {e}")]
+        finally:
+            if not dry_run:
+                get_snapshot_cache().invalidate()
+    return [TextContent(type="text", text=text)]
+
+
 async def _check_sync_status(arguments: dict) -> list[TextContent]:
     """檢查配置狀態"""
 
-    config_manager = ConfigManager()
-    configs = config_manager.load_all()
+    snapshot = await _get_snapshot()
+    text = snapshot.memo("check_sync_status", lambda: _format_sync_status(snapshot))
+    return [TextContent(type="text", text=text)]
+
+
+def _format_sync_status(snapshot: ConfigSnapshot) -> str:
+    """將快照格式化為狀態報告"""
+    from datetime import datetime
+
+    configs = snapshot.configs
 
     output_lines = []
     output_lines.append("# 📊 MCP 配置狀態\n")
@@ -272,12 +579,9 @@ async def _check_sync_status(arguments: dict) -> list[TextContent]:
         output_lines.append(f"- **配置文件**: `{config.file_path}`")
         output_lines.append(f"- **MCP 數量**: {len(config.mcpServers)}")
 
-        # 檢查文件是否存在
-        if Path(config.file_path).exists():
-            mtime = Path(config.file_path).stat().st_mtime
-            from datetime import datetime
-
-            mtime_str = datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S")
+        # 載入時文件是否存在
+        if config.last_modified is not None:
+            mtime_str = datetime.fromtimestamp(config.last_modified).strftime("%Y-%m-%d %H:%M:%S")
             output_lines.append(f"- **最後修改**: {mtime_str}")
             output_lines.append("- **狀態**: ✅ 正常")
         else:
@@ -292,46 +596,33 @@ async def _check_sync_status(arguments: dict) -> list[TextContent]:
 
         output_lines.append("")
 
-    return [TextContent(type="text", text="\n".join(output_lines))]
+    return "\n".join(output_lines)
 
 
 async def _show_config_diff(arguments: dict) -> list[TextContent]:
     """顯示配置差異"""
 
-    config_manager = ConfigManager()
-    diff_engine = DiffEngine()
+    snapshot = await _get_snapshot()
 
-    configs = config_manager.load_all()
-
-    if not configs:
+    if not snapshot.configs:
         return [TextContent(type="text", text="❌ 沒有找到任何配置文件")]
 
-    # 執行差異分析
-    diff_report = diff_engine.analyze(configs)
+    text = snapshot.memo("show_config_diff", lambda: _format_config_diff(snapshot))
+    return [TextContent(type="text", text=text)]
+
+
+def _format_config_diff(snapshot: ConfigSnapshot) -> str:
+    """將快照的差異報告格式化"""
+    diff_report = snapshot.diff_report
 
     output_lines = []
     output_lines.append("# 🔍 配置差異分析\n")
 
     # 統計摘要
     output_lines.append("## 📊 差異統計\n")
-    added = sum(
-        1
-        for client_items in diff_report.diffs.values()
-        for item in client_items
-        if item.status == "added"
-    )
-    removed = sum(
-        1
-        for client_items in diff_report.diffs.values()
-        for item in client_items
-        if item.status == "removed"
-    )
-    modified = sum(
-        1
-        for client_items in diff_report.diffs.values()
-        for item in client_items
-        if item.status == "modified"
-    )
+    added = diff_report.count("added")
+    removed = diff_report.count("removed")
+    modified = diff_report.count("modified")
 
     output_lines.append(f"- 新增: **{added}** 項")
     output_lines.append(f"- 刪除: **{removed}** 項")
@@ -341,43 +632,39 @@ async def _show_config_diff(arguments: dict) -> list[TextContent]:
     if diff_report.diffs:
         output_lines.append("## 📝 詳細差異\n")
         output_lines.append("```")
-        output_lines.append(diff_report.to_text())
+        output_lines.extend(diff_report.iter_text())
         output_lines.append("```\n")
     else:
         output_lines.append("✅ 所有配置已同步，無差異\n")
 
-    return [TextContent(type="text", text="\n".join(output_lines))]
+    return "\n".join(output_lines)
 
 
 async def _suggest_conflict_resolution(arguments: dict) -> list[TextContent]:
     """提供衝突解決建議"""
 
-    config_manager = ConfigManager()
-    diff_engine = DiffEngine()
+    snapshot = await _get_snapshot()
+    text = snapshot.memo(
+        "suggest_conflict_resolution", lambda: _format_conflict_resolution(snapshot)
+    )
+    return [TextContent(type="text", text=text)]
+
 
-    configs = config_manager.load_all()
-    diff_report = diff_engine.analyze(configs)
+def _format_conflict_resolution(snapshot: ConfigSnapshot) -> str:
+    """依快照的差異報告產生衝突解決建議"""
+    diff_report = snapshot.diff_report
 
     output_lines = []
     output_lines.append("# 💡 衝突解決建議\n")
 
     if not diff_report.diffs:
         output_lines.append("✅ 所有配置已同步，無需解決衝突。")
-        return [TextContent(type="text", text="\n".join(output_lines))]
-
-    # 統計各類差異
-    added_items = []
-    removed_items = []
-    modified_items = []
-
-    for client, items in diff_report.diffs.items():
-        for item in items:
-            if item.status == "added":
-                added_items.append((client, item))
-            elif item.status == "removed":
-                removed_items.append((client, item))
-            elif item.status == "modified":
-                modified_items.append((client, item))
+        return "\n".join(output_lines)
+
+    # 各類差異（由報告索引直接取得）
+    added_items = diff_report.items_with_status("added")
+    removed_items = diff_report.items_with_status("removed")
+    modified_items = diff_report.items_with_status("modified")
 
     if added_items:
         output_lines.append("## ➕ 新增的 MCP\n")
@@ -412,7 +699,7 @@ async def _suggest_conflict_resolution(arguments: dict) -> list[TextContent]:
     output_lines.append("3. **如有問題可恢復備份**:")
     output_lines.append("   使用 CLI: `syncmcp restore`")
 
-    return [TextContent(type="text", text="\n".join(output_lines))]
+    return "\n".join(output_lines)
 
 
 async def _get_setup_guide(arguments: dict) -> list[TextContent]:
@@ -436,8 +723,7 @@ async def _get_setup_guide(arguments: dict) -> list[TextContent]:
         ]
 
     # 讀取完整指南
-    with open(guide_path, "r", encoding="utf-8") as f:
-        full_guide = f.read()
+    full_guide = await _run_blocking(guide_path.read_text, encoding="utf-8")
 
     # 根據要求的章節返回內容
     if section == "全部":
@@ -486,6 +772,48 @@ async def _get_setup_guide(arguments: dict) -> list[TextContent]:
     ]
 
 
+async def _probe_named_server(mcp_name: str) -> tuple[list[str], str]:
+    """
+    啟動指定的 MCP 檢查健康狀態（配置和執行檔未改變時沿用快取結果）
+
+    Args:
+        mcp_name: MCP 名稱
+
+    Returns:
+        (輸出行, 失敗時的錯誤文字)
+    """
+    snapshot = await _get_snapshot()
+    targets = [target for target in collect_targets(snapshot.configs) if target.name == mcp_name]
+    if not targets:
+        return [f"⚠️ 沒有任何客戶端配置了 {mcp_name}\n"], ""
+
+    prober = HealthProber(cache=get_health_cache())
+    results = await prober.probe_all(targets)
+
+    lines = ["## 🩺 啟動檢查\n"]
+    errors = []
+    for result in results:
+        where = ", ".join(result.clients)
+        source = "（快取結果）" if result.cached else ""
+        if result.status is ProbeStatus.OK:
+            lines.append(f"- ✅ {where}: 正常回應 initialize（{result.latency_ms:.0f} ms）{source}")
+        elif result.status is ProbeStatus.SKIPPED:
+            lines.append(f"- ⚪ {where}: {result.error}")
+        else:
+            lines.append(f"- ❌ {where}: {result.error}{source}")
+            if result.hint:
+                lines.append(f"  - 💡 {result.hint}")
+            errors.append("\n".join([result.error or "", *result.stderr_tail]))
+
+    stderr_tail = next((r.stderr_tail for r in results if not r.ok and r.stderr_tail), None)
+    if stderr_tail:
+        lines.append("\n```")
+        lines.extend(stderr_tail)
+        lines.append("```")
+    lines.append("")
+    return lines, "\n".join(errors)
+
+
 async def _troubleshoot_mcp(arguments: dict) -> list[TextContent]:
     """診斷 MCP 問題並提供解決方案"""
 
@@ -497,6 +825,10 @@ async def _troubleshoot_mcp(arguments: dict) -> list[TextContent]:
 
     if mcp_name:
         output_lines.append(f"**問題 MCP**: {mcp_name}\n")
+        probe_lines, probe_errors = await _probe_named_server(mcp_name)
+        output_lines.extend(probe_lines)
+        if not error_message:
+            error_message = probe_errors
 
     output_lines.append(f"**錯誤訊息**: {error_message}\n")
 
@@ -640,6 +972,198 @@ async def _troubleshoot_mcp(arguments: dict) -> list[TextContent]:
     return [TextContent(type="text", text="\n".join(output_lines))]
 
 
+# ============================================================================
+# Resources
+# ============================================================================
+
+STATUS_URI = "syncmcp://status"
+DIFF_URI = "syncmcp://diff"
+CLIENT_URI_PREFIX = "syncmcp://clients/"
+JSON_MIME = "application/json"
+
+
+def _client_uri(client: str) -> str:
+    return f"{CLIENT_URI_PREFIX}{client}"
+
+
+def _status_resource(snapshot: ConfigSnapshot) -> dict:
+    """狀態資源：各客戶端的 MCP 列表與差異統計（不含 mtime，只在配置實際改變時變化）"""
+    return {
+        "in_sync": not snapshot.diff_report.has_changes(),
+        "statistics": snapshot.diff_report.get_statistics(),
+        "clients": {
+            name: {
+                "config_path": str(config.file_path),
+                "exists": config.last_modified is not None,
+                "mcp_count": len(config.mcpServers),
+                "servers": sorted(config.mcpServers),
+            }
+            for name, config in snapshot.configs.items()
+        },
+    }
+
+
+def _client_resource(snapshot: ConfigSnapshot, client: str) -> dict:
+    """客戶端資源：該客戶端的完整 mcpServers"""
+    config = snapshot.configs[client]
+    return {
+        "client": client,
+        "config_path": str(config.file_path),
+        "exists": config.last_modified is not None,
+        "mcpServers": config.mcpServers,
+    }
+
+
+def _render_resource(snapshot: ConfigSnapshot, uri: str) -> str:
+    """將資源渲染為 JSON 文字（每個快照只渲染一次）"""
+
+    def build() -> str:
+        if uri == STATUS_URI:
+            data = _status_resource(snapshot)
+        elif uri == DIFF_URI:
+            return snapshot.diff_report.to_json(include_values=True)
+        elif (
+            uri.startswith(CLIENT_URI_PREFIX) and uri[len(CLIENT_URI_PREFIX) :] in snapshot.configs
+        ):
+            data = _client_resource(snapshot, uri[len(CLIENT_URI_PREFIX) :])
+        else:
+            raise ValueError(f"未知的資源: {uri}")
+        return json.dumps(data, indent=2, ensure_ascii=False, default=to_plain)
+
+    return snapshot.memo(("resource", uri), build)
+
+
+@server.list_resources()
+async def list_resources() -> list[Resource]:
+    """列出所有可用的資源"""
+    snapshot = await _get_snapshot()
+    resources = [
+        Resource(
+            uri=AnyUrl(STATUS_URI),
+            name="status",
+            description="所有客戶端的 MCP 列表與同步狀態",
+            mimeType=JSON_MIME,
+        ),
+        Resource(
+            uri=AnyUrl(DIFF_URI),
+            name="diff",
+            description="客戶端之間的配置差異報告",
+            mimeType=JSON_MIME,
+        ),
+    ]
+    for client in snapshot.configs:
+        resources.append(
+            Resource(
+                uri=AnyUrl(_client_uri(client)),
+                name=f"clients/{client}",
+                description=f"{client} 的 MCP 配置",
+                mimeType=JSON_MIME,
+            )
+        )
+    return resources
+
+
+@server.list_resource_templates()
+async def list_resource_templates() -> list[ResourceTemplate]:
+    """列出資源模板"""
+    return [
+        ResourceTemplate(
+            uriTemplate=f"{CLIENT_URI_PREFIX}{{name}}",
+            name="client",
+            description="單個客戶端的 MCP 配置",
+            mimeType=JSON_MIME,
+        )
+    ]
+
+
+@server.read_resource()
+async def read_resource(uri: AnyUrl) -> list[ReadResourceContents]:
+    """讀取資源（由快照回答）"""
+    snapshot = await _get_snapshot()
+    return [ReadResourceContents(content=_render_resource(snapshot, str(uri)), mime_type=JSON_MIME)]
+
+
+class _ResourceSubscriptions:
+    """
+    資源訂閱
+
+    快照失效時（文件監聽或本程序寫入）重新產生被訂閱的資源，
+    內容摘要改變才推送 resources/updated，
+    避免與 MCP 無關的文件改寫（如 Claude Code 的狀態欄位）造成通知。
+    """
+
+    def __init__(self):
+        self._sessions: dict[str, weakref.WeakSet] = {}
+        self._digests: dict[str, str] = {}
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def subscribe(self, uri: str, session):
+        self._loop = asyncio.get_running_loop()
+        snapshot = await _get_snapshot()
+        # 記下訂閱當下的內容，之後只在內容改變時通知
+        self._digests[uri] = content_digest(_render_resource(snapshot, uri).encode())
+        self._sessions.setdefault(uri, weakref.WeakSet()).add(session)
+        get_snapshot_cache().add_listener(self.on_invalidated)
+
+    def unsubscribe(self, uri: str, session):
+        sessions = self._sessions.get(uri)
+        if sessions is not None:
+            sessions.discard(session)
+            if not sessions:
+                del self._sessions[uri]
+                self._digests.pop(uri, None)
+
+    def on_invalidated(self, clients: set[str]):
+        """快照失效回調（可能在監聽執行緒中呼叫）"""
+        affected = {STATUS_URI, DIFF_URI} | {_client_uri(client) for client in clients}
+        with self._lock:
+            affected &= set(self._sessions)
+            if not affected or self._loop is None:
+                return
+            schedule = not self._pending
+            self._pending |= affected
+        if schedule:
+            # 同一批文件事件只排程一次推送
+            self._loop.call_soon_threadsafe(self._loop.create_task, self._flush())
+
+    async def _flush(self):
+        with self._lock:
+            uris, self._pending = self._pending, set()
+
+        snapshot = await _get_snapshot()
+        for uri in uris:
+            try:
+                digest = content_digest(_render_resource(snapshot, uri).encode())
+            except (ValueError, KeyError):
+                digest = None  # 客戶端已不存在
+            if digest == self._digests.get(uri):
+                continue
+            self._digests[uri] = digest
+
+            for session in list(self._sessions.get(uri, ())):
+                try:
+                    await session.send_resource_updated(AnyUrl(uri))
+                except Exception:
+                    self.unsubscribe(uri, session)  # 連線已關閉
+
+
+_subscriptions = _ResourceSubscriptions()
+
+
+@server.subscribe_resource()
+async def subscribe_resource(uri: AnyUrl):
+    """訂閱資源變更"""
+    await _subscriptions.subscribe(str(uri), server.request_context.session)
+
+
+@server.unsubscribe_resource()
+async def unsubscribe_resource(uri: AnyUrl):
+    """取消訂閱資源變更"""
+    _subscriptions.unsubscribe(str(uri), server.request_context.session)
+
+
 # ============================================================================
 # Main Entry Point
 # ============================================================================
@@ -656,5 +1180,80 @@ async def main():
         await server.run(read_stream, write_stream, server.create_initialization_options())
 
 
+# Streamable HTTP 端點路徑
+HTTP_PATH = "/mcp"
+
+_LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class _StreamableHTTPEndpoint:
+    """將 HTTP 請求交給 session manager 的 ASGI 端點"""
+
+    def __init__(self, session_manager):
+        self.session_manager = session_manager
+
+    async def __call__(self, scope, receive, send):
+        await self.session_manager.handle_request(scope, receive, send)
+
+
+def create_http_app(host: str = "127.0.0.1", json_response: bool = False):
+    """
+    建立 Streamable HTTP 的 ASGI 應用
+
+    所有連線共用同一個 server（及其配置快照與文件監聽），
+    各客戶端以各自的 MCP session 區分。
+
+    Args:
+        host: 監聽位址（本機位址時啟用 DNS rebinding 防護）
+        json_response: 以 JSON 而非 SSE 串流回應
+
+    Returns:
+        Starlette 應用
+    """
+    import contextlib
+
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from mcp.server.transport_security import TransportSecuritySettings
+    from starlette.applications import Starlette
+    from starlette.routing import Route
+
+    security_settings = None
+    if host in _LOOPBACK_HOSTS:
+        security_settings = TransportSecuritySettings(
+            enable_dns_rebinding_protection=True,
+            allowed_hosts=["127.0.0.1:*", "localhost:*", "[::1]:*"],
+            allowed_origins=["http://127.0.0.1:*", "http://localhost:*", "http://[::1]:*"],
+        )
+
+    session_manager = StreamableHTTPSessionManager(
+        app=server, json_response=json_response, security_settings=security_settings
+    )
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async with session_manager.run():
+            yield
+
+    return Starlette(
+        routes=[Route(HTTP_PATH, endpoint=_StreamableHTTPEndpoint(session_manager))],
+        lifespan=lifespan,
+    )
+
+
+async def main_http(host: str = "127.0.0.1", port: int = 8765):
+    """
+    以 Streamable HTTP 啟動 MCP Server（單一程序服務多個客戶端）
+
+    Args:
+        host: 監聽位址
+        port: 監聽埠
+    """
+    import uvicorn
+
+    config = uvicorn.Config(create_http_app(host), host=host, port=port, log_level="warning")
+    logger.info(f"SyncMCP MCP Server 已啟動: http://{host}:{port}{HTTP_PATH}")
+    await uvicorn.Server(config).serve()
+
+
 if __name__ == "__main__":
     asyncio.run(main())
@@ -16,7 +16,7 @@ from rich.text import Text
 from ..core.backup_manager import BackupManager
 from ..core.config_manager import ConfigManager
 from ..core.diff_engine import DiffEngine
-from ..core.sync_engine import SyncEngine, SyncStrategy
+from ..core.sync_engine import SyncEngine, SyncEvent, SyncStrategy
 
 
 class SyncMCPTUI:
@@ -73,7 +73,11 @@ class SyncMCPTUI:
             transient=True,
         ) as progress:
             task = progress.add_task("載入配置...", total=None)
-            dry_run_result = self.sync_engine.sync(dry_run=True, create_backup=False)
+            dry_run_result = self.sync_engine.sync(
+                dry_run=True,
+                create_backup=False,
+                progress=lambda event: progress.update(task, description=f"{event.message}..."),
+            )
             progress.update(task, completed=True)
 
         # 2. 顯示變更預覽
@@ -108,19 +112,19 @@ class SyncMCPTUI:
             TaskProgressColumn(),
             console=self.console,
         ) as progress:
-            task = progress.add_task("同步中...", total=100)
+            task = progress.add_task("同步中...", total=None)
 
-            # 模擬進度（實際上 sync_engine 應該提供進度回調）
-            for i in range(0, 100, 20):
-                progress.update(task, completed=i)
+            def on_event(event: SyncEvent):
+                # 進度條由同步引擎的階段事件驅動
+                progress.update(
+                    task, total=event.total, completed=event.step, description=event.message
+                )
 
             # 執行同步
             result = self.sync_engine.sync(
-                strategy=SyncStrategy.AUTO, dry_run=False, create_backup=True
+                strategy=SyncStrategy.AUTO, dry_run=False, create_backup=True, progress=on_event
             )
 
-            progress.update(task, completed=100)
-
         # 6. 顯示結果
         self.console.print()
         if result.success:
@@ -1,7 +1,8 @@
 """
-工具模組 - 日誌、錯誤處理、歷史記錄
+工具模組 - 日誌、錯誤處理、歷史記錄、修改時鐘、文件監聽、效能分析
 """
 
+from .digest import content_digest, server_digest
 from .errors import (
     BackupError,
     ConfigNotFoundError,
@@ -18,13 +19,30 @@ from .errors import (
     format_error_for_display,
 )
 from .history import SyncHistoryEntry, SyncHistoryManager, get_history_manager
-from .logger import SyncMCPLogger, get_logger, set_verbose
+from .logger import (
+    JsonFormatter,
+    SyncMCPLogger,
+    current_run_id,
+    get_logger,
+    prune_logs,
+    run_context,
+    set_log_format,
+    set_verbose,
+)
+from .profiling import CommandProfiler, ProfileReport, profiles_dir
+from .server_clock import ServerClock, ServerStamp, get_server_clock
+from .watcher import FileWatcher
 
 __all__ = [
     # Logger
     "SyncMCPLogger",
     "get_logger",
     "set_verbose",
+    "set_log_format",
+    "run_context",
+    "current_run_id",
+    "JsonFormatter",
+    "prune_logs",
     # Errors
     "SyncMCPError",
     "ConfigNotFoundError",
@@ -43,4 +61,17 @@ __all__ = [
     "SyncHistoryEntry",
     "SyncHistoryManager",
     "get_history_manager",
+    # Server clock
+    "ServerClock",
+    "ServerStamp",
+    "get_server_clock",
+    # Digest
+    "server_digest",
+    "content_digest",
+    # Watcher
+    "FileWatcher",
+    # Profiling
+    "CommandProfiler",
+    "ProfileReport",
+    "profiles_dir",
 ]
@@ -0,0 +1,46 @@
+"""
+內容摘要 - MCP 配置項目的穩定雜湊
+"""
+
+import hashlib
+import json
+from collections.abc import Mapping
+from typing import Any
+
+
+def _encode_default(obj: Any) -> Any:
+    """讓 json 可以序列化非 dict 的 Mapping"""
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def server_digest(server: Mapping[str, Any]) -> str:
+    """
+    計算單個 MCP 配置的摘要
+
+    以排序後的 JSON 表示計算，因此欄位順序不影響結果。
+
+    Args:
+        server: MCP 配置
+
+    Returns:
+        十六進位摘要字串
+    """
+    payload = json.dumps(
+        server, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=_encode_default
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def content_digest(data: bytes) -> str:
+    """
+    計算原始文件內容的摘要
+
+    Args:
+        data: 文件內容
+
+    Returns:
+        十六進位摘要字串
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
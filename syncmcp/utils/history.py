@@ -1,8 +1,12 @@
 """
 同步歷史記錄 - 記錄每次同步的結果
+
+history.json 只保留最近 100 條記錄；history_totals.json 保存自開始記錄以來的
+累計數量（同步次數、變更數、各階段耗時），供指標匯出使用。
 """
 
 import json
+import os
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import Path
@@ -21,6 +25,7 @@ class SyncHistoryEntry:
     errors: list[str]
     backup_path: str | None = None
     duration_seconds: float | None = None
+    phases: dict[str, float] | None = None  # 階段 -> 耗時（秒）
 
     def to_dict(self) -> dict[str, Any]:
         """轉換為字典"""
@@ -46,6 +51,7 @@ class SyncHistoryManager:
             history_file = Path.home() / ".syncmcp" / "history.json"
 
         self.history_file = Path(history_file)
+        self.totals_file = self.history_file.with_name(f"{self.history_file.stem}_totals.json")
         self.history_file.parent.mkdir(parents=True, exist_ok=True)
 
         # 確保文件存在
@@ -61,6 +67,7 @@ class SyncHistoryManager:
         errors: list[str],
         backup_path: str | None = None,
         duration_seconds: float | None = None,
+        phases: dict[str, float] | None = None,
     ):
         """
         添加新的同步記錄
@@ -73,6 +80,7 @@ class SyncHistoryManager:
             errors: 錯誤列表
             backup_path: 備份路徑
             duration_seconds: 執行時間（秒）
+            phases: 各階段耗時（秒）
         """
         entry = SyncHistoryEntry(
             timestamp=datetime.now().isoformat(),
@@ -83,9 +91,13 @@ class SyncHistoryManager:
             errors=errors,
             backup_path=backup_path,
             duration_seconds=duration_seconds,
+            phases=phases,
         )
 
         history = self._load_history()
+        # 累計數量在截斷前更新（首次使用時由現有記錄計算）
+        totals = self._read_totals() or _totals_from(history)
+        _accumulate(totals, entry.to_dict())
         history.append(entry.to_dict())
 
         # 保留最近 100 條記錄
@@ -93,6 +105,17 @@ class SyncHistoryManager:
             history = history[-100:]
 
         self._save_history(history)
+        self._save_totals(totals)
+
+    def get_totals(self) -> dict[str, Any]:
+        """
+        獲取累計數量（不受歷史記錄保留條數限制，clear_history 也不會清除）
+
+        Returns:
+            {"syncs": {"success", "failure"}, "changes", "duration": {"sum", "count"},
+             "phases": {階段: {"sum", "count"}}}
+        """
+        return self._read_totals() or _totals_from(self._load_history())
 
     def get_history(self, limit: int = 10) -> list[SyncHistoryEntry]:
         """
@@ -182,6 +205,27 @@ class SyncHistoryManager:
             # 寫入失敗不應該中斷程序
             print(f"Warning: Failed to save history: {e}")
 
+    def _read_totals(self) -> dict[str, Any] | None:
+        """讀取累計數量，文件不存在或格式錯誤時返回 None"""
+        try:
+            with open(self.totals_file, encoding="utf-8") as f:
+                totals = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return None
+        if not isinstance(totals, dict) or totals.get("version") != TOTALS_VERSION:
+            return None
+        return totals
+
+    def _save_totals(self, totals: dict[str, Any]):
+        """保存累計數量（寫入臨時文件後原子替換，中途中斷不會留下不完整的文件）"""
+        try:
+            tmp_file = self.totals_file.with_name(self.totals_file.name + ".tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(totals, f, indent=2)
+            os.replace(tmp_file, self.totals_file)
+        except OSError as e:
+            print(f"Warning: Failed to save history totals: {e}")
+
     def format_entry_summary(self, entry: SyncHistoryEntry) -> str:
         """
         格式化單條記錄摘要
@@ -221,6 +265,36 @@ class SyncHistoryManager:
         return "\n".join(lines)
 
 
+TOTALS_VERSION = 1
+
+
+def _totals_from(entries: list[dict[str, Any]]) -> dict[str, Any]:
+    """由歷史記錄計算累計數量"""
+    totals = {
+        "version": TOTALS_VERSION,
+        "syncs": {"success": 0, "failure": 0},
+        "changes": 0,
+        "duration": {"sum": 0.0, "count": 0},
+        "phases": {},
+    }
+    for entry in entries:
+        _accumulate(totals, entry)
+    return totals
+
+
+def _accumulate(totals: dict[str, Any], entry: dict[str, Any]):
+    """將一條記錄計入累計數量"""
+    totals["syncs"]["success" if entry.get("success") else "failure"] += 1
+    totals["changes"] += sum(len(changes) for changes in (entry.get("changes") or {}).values())
+    if entry.get("duration_seconds") is not None:
+        totals["duration"]["sum"] += entry["duration_seconds"]
+        totals["duration"]["count"] += 1
+    for phase, seconds in (entry.get("phases") or {}).items():
+        phase_totals = totals["phases"].setdefault(phase, {"sum": 0.0, "count": 0})
+        phase_totals["sum"] += seconds
+        phase_totals["count"] += 1
+
+
 # 全局歷史管理器實例
 _history_manager: SyncHistoryManager | None = None
 
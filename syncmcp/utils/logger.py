@@ -1,105 +1,493 @@
 """
 日誌系統 - 統一的日誌記錄和管理
+
+記錄先放入佇列，由背景執行緒寫入文件與控制台，呼叫者（同步、MCP 工具）
+不會等待任何 I/O。日誌文件在第一筆記錄寫出時才建立。
+
+文件格式可選 text（預設）或 json：json 模式每行一個 JSON 物件，寫入
+syncmcp_YYYYMMDD.jsonl，帶有 run_id（同一次同步 / 命令的關聯 ID）以及
+event() 附加的結構化欄位（階段、客戶端、耗時、數量）。
+
+每個日文件超過 LOG_MAX_BYTES 時輪轉，輪轉出的文件由另一個背景執行緒壓縮為
+.gz；每次輪轉與開啟新的日文件後清理超過保留天數的文件，並在所有日誌文件
+合計超過 LOG_MAX_TOTAL_BYTES 時從最舊的開始刪除。
 """
 
+import atexit
+import copy
+import gzip
+import json
 import logging
+import os
+import queue
+import shutil
 import sys
-from datetime import datetime
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Any
+
+# 每個文件最大 10MB，保留 5 個壓縮備份；所有日誌文件合計最多 100MB、30 天
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_MAX_TOTAL_BYTES = 100 * 1024 * 1024
+LOG_KEEP_DAYS = 30
+
+LOG_FORMATS = ("text", "json")
+_LOG_SUFFIXES = {"text": "log", "json": "jsonl"}
+
+# 目前的同步 / 命令的關聯 ID
+_run_id: ContextVar[str | None] = ContextVar("syncmcp_run_id", default=None)
+
+# logger 名稱 -> 目前使用它的實例（建立同名的新實例時先停止舊實例）
+_owners: "dict[str, SyncMCPLogger]" = {}
+
+
+def current_run_id() -> str | None:
+    """目前的關聯 ID（不在 run_context 中時為 None）"""
+    return _run_id.get()
+
+
+@contextmanager
+def run_context(run_id: str | None = None) -> Iterator[str]:
+    """
+    在此範圍內記錄的日誌帶有同一個 run_id
+
+    Args:
+        run_id: 關聯 ID（預設產生新的）
+
+    Yields:
+        關聯 ID
+    """
+    run_id = run_id or uuid.uuid4().hex[:12]
+    token = _run_id.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _run_id.reset(token)
+
+
+class JsonFormatter(logging.Formatter):
+    """每筆記錄輸出為一行 JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "run_id": getattr(record, "run_id", None),
+            "module": record.module,
+            "line": record.lineno,
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _create_formatter(log_format: str) -> logging.Formatter:
+    if log_format == "json":
+        return JsonFormatter()
+    # 詳細格式（用於文件）
+    return logging.Formatter(
+        fmt="%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+
+class _ContextFilter(logging.Filter):
+    """在呼叫者的執行緒中記下 run_id（背景執行緒讀不到呼叫者的 contextvar）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "run_id", None) is None:
+            record.run_id = _run_id.get()
+        return True
+
+
+class _QueueHandler(QueueHandler):
+    """放入佇列前先展開訊息，保留堆疊追蹤文字與結構化欄位"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def prune_logs(
+    log_dir: Path,
+    max_total_bytes: int | None = LOG_MAX_TOTAL_BYTES,
+    keep_days: int | None = LOG_KEEP_DAYS,
+    exclude: tuple[str, ...] = (),
+) -> list[Path]:
+    """
+    刪除超過保留天數的日誌文件，並從最舊的開始刪除直到合計大小不超過上限
+
+    Args:
+        log_dir: 日誌目錄
+        max_total_bytes: 所有日誌文件的合計大小上限（None 表示不限制）
+        keep_days: 保留天數（None 表示不限制）
+        exclude: 不刪除的文件（正在寫入的文件），仍計入合計大小
+
+    Returns:
+        已刪除的文件
+    """
+    files = []
+    for path in Path(log_dir).glob("syncmcp_*"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+
+    excluded = {os.path.abspath(name) for name in exclude}
+    cutoff = time.time() - keep_days * 24 * 60 * 60 if keep_days is not None else None
+    total = sum(size for _, size, _ in files)
+    removed = []
+    for mtime, size, path in files:
+        expired = cutoff is not None and mtime < cutoff
+        oversized = max_total_bytes is not None and total > max_total_bytes
+        if not (expired or oversized) or os.path.abspath(path) in excluded:
+            continue
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed.append(path)
+    return removed
+
+
+class _CompressingRotatingFileHandler(RotatingFileHandler):
+    """輪轉出的文件在背景執行緒中壓縮為 .gz，之後清理整個日誌目錄"""
+
+    def __init__(
+        self,
+        filename: Path,
+        max_bytes: int,
+        backup_count: int,
+        max_total_bytes: int | None,
+        keep_days: int | None,
+    ):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self.max_total_bytes = max_total_bytes
+        self.keep_days = keep_days
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = self._rotate
+        self._worker: threading.Thread | None = None
+
+    def doRollover(self):  # noqa: N802 (覆寫 RotatingFileHandler)
+        # 上一個文件壓縮完成後才移動編號，避免覆蓋仍在壓縮的文件
+        self.wait()
+        super().doRollover()
+
+    def _rotate(self, source: str, dest: str):
+        # 寫入執行緒只做改名，壓縮交給背景執行緒
+        pending = dest.removesuffix(".gz")
+        os.replace(source, pending)
+        self._start_worker(self._compress_and_prune, pending, dest)
+
+    def prune(self):
+        """在背景執行緒中清理日誌目錄"""
+        self.wait()
+        self._start_worker(self._prune)
+
+    def _start_worker(self, target: Callable[..., None], *args: str):
+        self._worker = threading.Thread(
+            target=target, args=args, name="syncmcp-log-compress", daemon=True
+        )
+        self._worker.start()
+
+    def _compress_and_prune(self, source: str, dest: str):
+        partial = f"{dest}.tmp"
+        try:
+            with open(source, "rb") as src, gzip.open(partial, "wb") as out:
+                shutil.copyfileobj(src, out)
+            os.replace(partial, dest)
+            os.remove(source)
+        except OSError:
+            # 壓縮失敗時保留未壓縮的文件（仍由合計大小上限約束）
+            Path(partial).unlink(missing_ok=True)
+        self._prune()
+
+    def _prune(self):
+        prune_logs(
+            Path(self.baseFilename).parent,
+            self.max_total_bytes,
+            self.keep_days,
+            exclude=(self.baseFilename,),
+        )
+
+    def wait(self):
+        """等待背景的壓縮與清理完成"""
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def close(self):
+        super().close()
+        self.wait()
+
+
+class _LazyFileHandler(logging.Handler):
+    """第一筆記錄寫出時才建立日誌目錄並開啟日文件；日期改變時換到新的日文件"""
+
+    def __init__(
+        self,
+        log_dir: Path,
+        formatter: logging.Formatter,
+        suffix: str = "log",
+        max_bytes: int = LOG_MAX_BYTES,
+        backup_count: int = LOG_BACKUP_COUNT,
+        max_total_bytes: int | None = LOG_MAX_TOTAL_BYTES,
+        keep_days: int | None = LOG_KEEP_DAYS,
+    ):
+        super().__init__(logging.DEBUG)
+        self.log_dir = log_dir
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.max_total_bytes = max_total_bytes
+        self.keep_days = keep_days
+        self.setFormatter(formatter)
+        self._handler: _CompressingRotatingFileHandler | None = None
+        self._date: str | None = None
+
+    def configure(self, formatter: logging.Formatter, suffix: str):
+        """更換格式；副檔名不同時下一筆記錄寫入新文件"""
+        self.acquire()
+        try:
+            self.setFormatter(formatter)
+            if self._handler is not None:
+                self._handler.setFormatter(formatter)
+            if suffix != self.suffix:
+                self.suffix = suffix
+                if self._handler is not None:
+                    self._handler.close()
+                    self._handler = None
+        finally:
+            self.release()
+
+    def emit(self, record: logging.LogRecord):
+        # 日誌文件名包含日期（長時間執行的背景監控跨日時換到新文件）
+        date = time.strftime("%Y%m%d", time.localtime(record.created))
+        if self._handler is not None and date != self._date:
+            self._handler.close()
+            self._handler = None
+        if self._handler is None:
+            try:
+                self.log_dir.mkdir(parents=True, exist_ok=True)
+                handler = _CompressingRotatingFileHandler(
+                    self.log_dir / f"syncmcp_{date}.{self.suffix}",
+                    self.max_bytes,
+                    self.backup_count,
+                    self.max_total_bytes,
+                    self.keep_days,
+                )
+            except OSError:
+                self.handleError(record)
+                return
+            handler.setFormatter(self.formatter)
+            self._handler = handler
+            self._date = date
+            handler.prune()
+        self._handler.emit(record)
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+        super().close()
+
+
+class _StderrHandler(logging.StreamHandler):
+    """寫入當下的 sys.stderr（全局 logger 長期存在，sys.stderr 可能在之後被替換）"""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stderr
 
 
 class SyncMCPLogger:
     """SyncMCP 日誌管理器"""
 
     def __init__(
-        self, name: str = "syncmcp", log_dir: Path | None = None, verbose: bool = False
+        self,
+        name: str = "syncmcp",
+        log_dir: Path | None = None,
+        verbose: bool = False,
+        log_format: str = "text",
     ):
         """
-        初始化日誌系統
+        初始化日誌系統（不建立目錄也不開啟文件）
 
         Args:
             name: Logger 名稱
             log_dir: 日誌目錄（預設 ~/.syncmcp/logs/）
             verbose: 是否顯示 DEBUG 級別日誌
+            log_format: 日誌文件格式（text 或 json）
         """
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"未知的日誌格式: {log_format}")
         self.name = name
         self.verbose = verbose
+        self.log_format = log_format
 
         # 設定日誌目錄
         if log_dir is None:
             log_dir = Path.home() / ".syncmcp" / "logs"
         self.log_dir = Path(log_dir)
-        self.log_dir.mkdir(parents=True, exist_ok=True)
 
-        # 創建 logger
+        # 創建 logger；同名的舊實例先停止其背景執行緒
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG if verbose else logging.INFO)
-
-        # 清除現有 handlers（避免重複）
+        previous = _owners.get(name)
+        if previous is not None:
+            previous.close()
         self.logger.handlers.clear()
-
-        # 設定 handlers
-        self._setup_file_handler()
-        self._setup_console_handler()
-
-    def _setup_file_handler(self):
-        """設定文件 handler（帶日誌輪轉）"""
-        # 日誌文件名包含日期
-        log_file = self.log_dir / f"syncmcp_{datetime.now().strftime('%Y%m%d')}.log"
-
-        # 使用 RotatingFileHandler 實現日誌輪轉
-        # 每個文件最大 10MB，保留 5 個備份
-        file_handler = RotatingFileHandler(
-            log_file, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8"  # 10MB
+        _owners[name] = self
+
+        # 實際寫出的 handlers 由背景執行緒呼叫
+        self.file_handler = self._create_file_handler()
+        self.console_handler = self._create_console_handler()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._listener = QueueListener(
+            self._queue, self.file_handler, self.console_handler, respect_handler_level=True
         )
-        file_handler.setLevel(logging.DEBUG)
+        self._lock = threading.Lock()
+        self._closed = False
 
-        # 詳細格式（用於文件）
-        file_formatter = logging.Formatter(
-            fmt="%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
-        file_handler.setFormatter(file_formatter)
+        self.queue_handler = _QueueHandler(self._queue)
+        self.queue_handler.addFilter(_ContextFilter())
+        self.logger.addHandler(self.queue_handler)
+        self.set_verbose(verbose)
 
-        self.logger.addHandler(file_handler)
+        self._listener.start()
+        atexit.register(self.close)
 
-    def _setup_console_handler(self):
-        """設定控制台 handler"""
-        console_handler = logging.StreamHandler(sys.stderr)
+    def _create_file_handler(self) -> _LazyFileHandler:
+        """建立文件 handler（帶日誌輪轉，首次寫出時才開啟文件）"""
+        return _LazyFileHandler(
+            self.log_dir, _create_formatter(self.log_format), _LOG_SUFFIXES[self.log_format]
+        )
 
-        # 根據 verbose 設定級別
-        console_handler.setLevel(logging.DEBUG if self.verbose else logging.WARNING)
+    def _create_console_handler(self) -> logging.Handler:
+        """建立控制台 handler"""
+        console_handler = _StderrHandler()
 
         # 簡潔格式（用於控制台）
         console_formatter = logging.Formatter(fmt="%(levelname)s: %(message)s")
         console_handler.setFormatter(console_formatter)
+        return console_handler
 
-        self.logger.addHandler(console_handler)
+    def set_verbose(self, verbose: bool):
+        """
+        調整日誌級別（不重建 handlers）
+
+        Args:
+            verbose: 是否顯示 DEBUG 級別日誌
+        """
+        self.verbose = verbose
+        self.logger.setLevel(logging.DEBUG if verbose else logging.INFO)
+        self.console_handler.setLevel(logging.DEBUG if verbose else logging.WARNING)
+
+    def set_log_format(self, log_format: str):
+        """
+        更換日誌文件格式（不重建 handlers）
+
+        Args:
+            log_format: text 或 json
+
+        Raises:
+            ValueError: 未知的格式
+        """
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"未知的日誌格式: {log_format}")
+        if log_format == self.log_format:
+            return
+        self.log_format = log_format
+        # 之前放入佇列的記錄仍以原本的格式寫出
+        self.flush()
+        self.file_handler.configure(_create_formatter(log_format), _LOG_SUFFIXES[log_format])
+
+    def flush(self):
+        """等待佇列中的記錄全部寫出"""
+        with self._lock:
+            if self._closed:
+                return
+            self._listener.stop()
+            self._listener.start()
+
+    def close(self):
+        """寫出剩餘記錄並停止背景執行緒"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._listener.stop()
+            self.file_handler.close()
+        if _owners.get(self.name) is self:
+            del _owners[self.name]
+        self.logger.removeHandler(self.queue_handler)
+        atexit.unregister(self.close)
+
+    # 以下方法傳入 stacklevel=2，記錄中的文件與行號指向呼叫者而不是此模組
 
     def debug(self, message: str, **kwargs):
         """記錄 DEBUG 級別日誌"""
-        self.logger.debug(message, **kwargs)
+        self.logger.debug(message, stacklevel=2, **kwargs)
 
     def info(self, message: str, **kwargs):
         """記錄 INFO 級別日誌"""
-        self.logger.info(message, **kwargs)
+        self.logger.info(message, stacklevel=2, **kwargs)
 
     def warning(self, message: str, **kwargs):
         """記錄 WARNING 級別日誌"""
-        self.logger.warning(message, **kwargs)
+        self.logger.warning(message, stacklevel=2, **kwargs)
 
     def error(self, message: str, **kwargs):
         """記錄 ERROR 級別日誌"""
-        self.logger.error(message, **kwargs)
+        self.logger.error(message, stacklevel=2, **kwargs)
 
     def critical(self, message: str, **kwargs):
         """記錄 CRITICAL 級別日誌"""
-        self.logger.critical(message, **kwargs)
+        self.logger.critical(message, stacklevel=2, **kwargs)
 
     def exception(self, message: str, **kwargs):
         """記錄異常（包含堆疊追蹤）"""
-        self.logger.exception(message, **kwargs)
+        self.logger.exception(message, stacklevel=2, **kwargs)
+
+    def event(self, message: str, level: int = logging.INFO, stacklevel: int = 2, **fields: Any):
+        """
+        記錄帶有結構化欄位的事件（json 模式下成為獨立的欄位）
+
+        Args:
+            message: 訊息
+            level: 日誌級別
+            stacklevel: 記錄中的 module / line 取自第幾層呼叫者
+            **fields: 結構化欄位（例如 phase、client、duration_ms、數量）
+        """
+        self.logger.log(level, message, extra={"fields": fields}, stacklevel=stacklevel)
 
     @classmethod
     def get_logger(cls, name: str = "syncmcp", verbose: bool = False) -> "SyncMCPLogger":
@@ -115,20 +503,16 @@ class SyncMCPLogger:
         """
         return cls(name=name, verbose=verbose)
 
-    def cleanup_old_logs(self, keep_days: int = 30):
+    def cleanup_old_logs(self, keep_days: int = LOG_KEEP_DAYS):
         """
-        清理舊日誌文件
+        清理舊日誌文件（寫入日誌時也會自動清理，見 prune_logs）
 
         Args:
             keep_days: 保留天數（預設 30 天）
         """
         try:
-            cutoff_date = datetime.now().timestamp() - (keep_days * 24 * 60 * 60)
-
-            for log_file in self.log_dir.glob("syncmcp_*.log*"):
-                if log_file.stat().st_mtime < cutoff_date:
-                    log_file.unlink()
-                    self.info(f"Deleted old log file: {log_file.name}")
+            for log_file in prune_logs(self.log_dir, None, keep_days):
+                self.info(f"Deleted old log file: {log_file.name}")
 
         except Exception as e:
             self.error(f"Failed to cleanup old logs: {e}")
@@ -156,10 +540,19 @@ def get_logger(verbose: bool = False) -> SyncMCPLogger:
 
 def set_verbose(verbose: bool):
     """
-    設定全局 logger 的 verbose 級別
+    設定全局 logger 的 verbose 級別（只調整級別，不重建 handlers）
 
     Args:
         verbose: 是否顯示詳細日誌
     """
-    global _global_logger
-    _global_logger = SyncMCPLogger.get_logger(verbose=verbose)
+    get_logger(verbose=verbose).set_verbose(verbose)
+
+
+def set_log_format(log_format: str):
+    """
+    設定全局 logger 的日誌文件格式
+
+    Args:
+        log_format: text 或 json
+    """
+    get_logger().set_log_format(log_format)
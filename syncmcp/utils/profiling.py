@@ -0,0 +1,182 @@
+"""
+命令效能分析 - 以 cProfile 或 tracemalloc 包住單次 CLI 命令
+
+`syncmcp --profile[=cpu|mem] <命令>` 使用：cpu 模式寫出 pstats 文件（可用
+`python -m pstats` 或 snakeviz 開啟），mem 模式寫出記憶體配置最多的位置報告。
+文件保存在 ~/.syncmcp/profiles，可附在問題回報中。
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import cProfile
+
+PROFILE_MODES = ("cpu", "mem")
+
+# 摘要與報告中列出的項目數量
+SUMMARY_LINES = 10
+REPORT_LINES = 50
+TRACEBACK_FRAMES = 10  # 每個配置記錄的堆疊深度（越深越慢）
+
+
+def profiles_dir() -> Path:
+    """效能分析文件的保存位置（~/.syncmcp/profiles）"""
+    return Path.home() / ".syncmcp" / "profiles"
+
+
+@dataclass
+class ProfileReport:
+    """一次效能分析的結果"""
+
+    mode: str
+    path: Path
+    duration_seconds: float
+    summary: list[str] = field(default_factory=list)
+
+
+class CommandProfiler:
+    """包住單次命令的效能分析器"""
+
+    def __init__(self, mode: str, command: str | None = None, output_dir: Path | None = None):
+        """
+        初始化效能分析器
+
+        Args:
+            mode: cpu（cProfile）或 mem（tracemalloc）
+            command: 命令名稱（用於文件名稱）
+            output_dir: 保存位置（預設 ~/.syncmcp/profiles）
+
+        Raises:
+            ValueError: 未知的模式
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"未知的效能分析模式: {mode}")
+        self.mode = mode
+        self.command = command or "syncmcp"
+        self.output_dir = Path(output_dir) if output_dir is not None else profiles_dir()
+        self._profile: cProfile.Profile | None = None
+        self._started = 0.0
+
+    def start(self):
+        """開始分析"""
+        self._started = time.perf_counter()
+        if self.mode == "cpu":
+            import cProfile
+
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            import tracemalloc
+
+            tracemalloc.start(TRACEBACK_FRAMES)
+
+    def stop(self) -> ProfileReport:
+        """
+        結束分析並寫出報告
+
+        Returns:
+            ProfileReport（含文件路徑與簡短摘要）
+
+        Raises:
+            RuntimeError: 尚未呼叫 start()
+        """
+        duration = time.perf_counter() - self._started
+        if self.mode == "cpu":
+            profile = self._profile
+            if profile is None:
+                raise RuntimeError("尚未呼叫 start()")
+            profile.disable()
+            path = self._output_path("pstats")
+            profile.dump_stats(path)
+            summary = _cpu_summary(profile)
+            self._profile = None
+        else:
+            import tracemalloc
+
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            path = self._output_path("txt")
+            report, summary = _memory_report(snapshot, peak, self.command, duration)
+            path.write_text(report, encoding="utf-8")
+
+        summary.insert(0, f"耗時 {duration:.3f} 秒")
+        return ProfileReport(self.mode, path, duration, summary)
+
+    def _output_path(self, suffix: str) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        return self.output_dir / f"{timestamp}_{self.command}_{self.mode}.{suffix}"
+
+
+def _cpu_summary(profile: "cProfile.Profile") -> list[str]:
+    """累計時間最多的函數（與 pstats 的 cumtime / tottime / ncalls 相同）"""
+    entries = sorted(profile.getstats(), key=lambda entry: entry.totaltime, reverse=True)
+    lines = [f"{'cumtime':>9} {'tottime':>9} {'ncalls':>8}  function"]
+    for entry in entries[:SUMMARY_LINES]:
+        code = entry.code
+        if isinstance(code, str):
+            function, location = code, "~"  # 內建函數
+        else:
+            function = code.co_name
+            location = f"{Path(code.co_filename).name}:{code.co_firstlineno}"
+        lines.append(
+            f"{entry.totaltime:9.3f} {entry.inlinetime:9.3f} {entry.callcount:8d}"
+            f"  {function} ({location})"
+        )
+    return lines
+
+
+def _memory_report(snapshot, peak: int, command: str, duration: float) -> tuple[str, list[str]]:
+    """配置最多的位置（依行號與完整呼叫堆疊）"""
+    import tracemalloc
+
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        )
+    )
+    by_line = snapshot.statistics("lineno")
+    total = sum(stat.size for stat in by_line)
+
+    summary = [f"峰值 {_format_size(peak)}，結束時仍配置 {_format_size(total)}"]
+    summary.extend(
+        f"{_format_size(stat.size):>10} {stat.count:8d} 個  {_frame(stat.traceback[0])}"
+        for stat in by_line[:SUMMARY_LINES]
+    )
+
+    report = [
+        f"syncmcp {command} 記憶體分析",
+        f"耗時 {duration:.3f} 秒",
+        *summary[:1],
+        "",
+        f"## 配置最多的位置（前 {REPORT_LINES} 名）",
+    ]
+    report.extend(
+        f"{_format_size(stat.size):>10} {stat.count:8d} 個  {_frame(stat.traceback[0])}"
+        for stat in by_line[:REPORT_LINES]
+    )
+    report.extend(["", "## 配置最多的呼叫堆疊（前 10 名）"])
+    for stat in snapshot.statistics("traceback")[:10]:
+        report.append(f"\n{_format_size(stat.size)}，{stat.count} 個")
+        report.extend(f"    {line}" for line in stat.traceback.format())
+    return "\n".join(report) + "\n", summary
+
+
+def _frame(frame) -> str:
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def _format_size(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KB", "MB"):
+        if abs(value) < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
@@ -0,0 +1,308 @@
+"""
+MCP 修改時鐘 - 記錄每個客戶端中每個 MCP 配置最後一次變更的時間
+
+Claude Code 會頻繁改寫 ~/.claude.json 中與 MCP 無關的狀態，
+因此文件的 mtime 無法代表某個 MCP 何時被修改。
+這裡以旁路文件保存 (客戶端, MCP) → (摘要, 首次出現時間)，
+每次載入時只比對摘要，摘要改變才更新時間；任何 MCP 新增、修改或移除時
+也記下該客戶端 MCP 區段的變更時間，同步選擇來源時以此代替文件 mtime。
+SyncMCP 自己寫入的區段（propagated）不算是使用者的修改，不更新區段時間。
+"""
+
+import json
+import os
+import sys
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .digest import server_digest
+
+if TYPE_CHECKING:
+    from ..core.config_manager import ClientConfig
+
+
+@dataclass
+class ServerStamp:
+    """單個 MCP 在某客戶端中的版本戳記"""
+
+    digest: str
+    first_seen: float  # 此摘要首次被觀察到的時間（Unix timestamp）
+
+
+class ServerClock:
+    """MCP 修改時鐘（旁路存儲）"""
+
+    def __init__(self, clock_file: Path | None = None):
+        """
+        初始化修改時鐘
+
+        Args:
+            clock_file: 旁路文件路徑（預設 ~/.syncmcp/server_clock.json）
+        """
+        if clock_file is None:
+            clock_file = Path.home() / ".syncmcp" / "server_clock.json"
+
+        self.clock_file = Path(clock_file)
+        self._stamps: dict[str, dict[str, ServerStamp]] = {}
+        self._sections: dict[str, float] = {}  # 客戶端 -> MCP 區段最後變更時間
+        self._written: dict[str, str] = {}  # 客戶端 -> SyncMCP 最後寫入的區段摘要
+        self._file_signature: tuple[int, int] | None = None
+        self._loaded = False
+        self._dirty = False
+
+    def observe(
+        self, client: str, servers: Mapping[str, Mapping[str, Any]], changed_at: float | None = None
+    ) -> bool:
+        """
+        觀察客戶端當前的 MCP 配置，更新摘要有變化的項目
+
+        Args:
+            client: 客戶端名稱
+            servers: 該客戶端的 mcpServers
+            changed_at: 變更時間（通常為文件 mtime，預設為現在）
+
+        Returns:
+            是否有任何戳記被更新
+        """
+        self._ensure_loaded()
+
+        now = time.time()
+        stamp_time = min(changed_at, now) if changed_at else now
+        known = self._stamps.get(client, {})
+        updated: dict[str, ServerStamp] = {}
+        changed = len(known) != len(servers)
+
+        for name, server in servers.items():
+            digest = getattr(server, "digest", None) or server_digest(server)
+            stamp = known.get(name)
+            if stamp is None or stamp.digest != digest:
+                stamp = ServerStamp(digest=digest, first_seen=stamp_time)
+                changed = True
+            updated[name] = stamp
+
+        if changed:
+            self._stamps[client] = updated
+            if self._written.get(client) != _section_digest(updated):
+                self._sections[client] = stamp_time
+            self._dirty = True
+        return changed
+
+    def propagated(self, client: str, servers: Mapping[str, Mapping[str, Any]]):
+        """
+        記錄 SyncMCP 寫入客戶端的 MCP 區段
+
+        之後觀察到相同內容時只更新摘要，不視為使用者的修改。
+
+        Args:
+            client: 客戶端名稱
+            servers: 寫入的 mcpServers
+        """
+        self._ensure_loaded()
+        digest = _section_digest(
+            {
+                name: ServerStamp(
+                    digest=getattr(server, "digest", None) or server_digest(server), first_seen=0.0
+                )
+                for name, server in servers.items()
+            }
+        )
+        if self._written.get(client) != digest:
+            self._written[client] = digest
+            self._dirty = True
+
+    def get(self, client: str, server: str) -> ServerStamp | None:
+        """獲取某客戶端中某 MCP 的戳記"""
+        self._ensure_loaded()
+        return self._stamps.get(client, {}).get(server)
+
+    def section_changed_at(self, client: str) -> float | None:
+        """
+        客戶端的 MCP 區段最後一次變更（新增、修改或移除 MCP）的時間
+
+        Args:
+            client: 客戶端名稱
+
+        Returns:
+            Unix timestamp，沒有任何記錄時返回 None；
+            區段只被 SyncMCP 寫入過時返回 0.0
+        """
+        self._ensure_loaded()
+        changed_at = self._sections.get(client)
+        if changed_at is None and client in self._written:
+            return 0.0
+        if changed_at is None:
+            # 舊版旁路文件沒有區段時間，以最新的戳記代替
+            changed_at = max(
+                (stamp.first_seen for stamp in self._stamps.get(client, {}).values()),
+                default=None,
+            )
+        return changed_at
+
+    def newest(
+        self, server: str, clients: Iterable[str] | None = None
+    ) -> tuple[str, ServerStamp] | None:
+        """
+        找出某 MCP 最新版本所在的客戶端
+
+        Args:
+            server: MCP 名稱
+            clients: 限定比較的客戶端（預設全部）
+
+        Returns:
+            (客戶端名稱, 戳記)，沒有任何記錄時返回 None
+        """
+        self._ensure_loaded()
+        names = self._stamps.keys() if clients is None else clients
+
+        best: tuple[str, ServerStamp] | None = None
+        for client in names:
+            stamp = self._stamps.get(client, {}).get(server)
+            if stamp and (best is None or stamp.first_seen > best[1].first_seen):
+                best = (client, stamp)
+        return best
+
+    def resolve_newest(self, configs: dict[str, "ClientConfig"]) -> dict[str, str]:
+        """
+        為每個 MCP 選出最新版本所在的客戶端
+
+        沒有戳記的項目退回使用文件 mtime 比較。
+
+        Args:
+            configs: 客戶端配置（client -> ClientConfig）
+
+        Returns:
+            MCP 名稱 -> 客戶端名稱
+        """
+        self._ensure_loaded()
+        winners: dict[str, tuple[float, float, str]] = {}
+
+        for client, config in configs.items():
+            file_time = config.last_modified or 0.0
+            client_stamps = self._stamps.get(client, {})
+            for name in config.mcpServers:
+                stamp = client_stamps.get(name)
+                key = (stamp.first_seen if stamp else file_time, file_time, client)
+                current = winners.get(name)
+                if current is None or key[:2] > current[:2]:
+                    winners[name] = key
+
+        return {name: key[2] for name, key in winners.items()}
+
+    def merge_newest(self, configs: dict[str, "ClientConfig"]) -> dict[str, Mapping[str, Any]]:
+        """
+        以逐個 MCP「最新者勝出」的方式合併所有客戶端配置
+
+        Args:
+            configs: 客戶端配置（client -> ClientConfig）
+
+        Returns:
+            合併後的 mcpServers
+        """
+        return {
+            name: configs[client].mcpServers[name]
+            for name, client in self.resolve_newest(configs).items()
+        }
+
+    def forget(self, client: str):
+        """移除某客戶端的所有戳記"""
+        self._ensure_loaded()
+        if self._stamps.pop(client, None) is not None:
+            self._dirty = True
+        self._sections.pop(client, None)
+        self._written.pop(client, None)
+
+    def flush(self):
+        """如有變更則寫回旁路文件"""
+        if not self._dirty:
+            return
+
+        data = {
+            "version": 1,
+            "clients": {
+                client: {
+                    name: {"digest": stamp.digest, "first_seen": stamp.first_seen}
+                    for name, stamp in stamps.items()
+                }
+                for client, stamps in self._stamps.items()
+            },
+            "sections": self._sections,
+            "written": self._written,
+        }
+
+        try:
+            self.clock_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.clock_file.with_name(self.clock_file.name + ".tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_file, self.clock_file)
+            self._file_signature = self._signature()
+            self._dirty = False
+        except OSError as e:
+            # 寫入失敗不應該中斷程序（輸出到 stderr，避免干擾 MCP stdio）
+            print(f"Warning: Failed to save server clock: {e}", file=sys.stderr)
+
+    def _signature(self) -> tuple[int, int] | None:
+        """旁路文件的 (mtime_ns, size)，用於偵測其他進程的寫入"""
+        try:
+            stat = self.clock_file.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _ensure_loaded(self):
+        """首次使用或旁路文件被其他進程更新時重新載入"""
+        signature = self._signature()
+        if self._loaded and (self._dirty or signature == self._file_signature):
+            return
+
+        self._loaded = True
+        self._file_signature = signature
+        self._stamps = {}
+        self._sections = {}
+        self._written = {}
+        if signature is None:
+            return
+
+        try:
+            with open(self.clock_file, encoding="utf-8") as f:
+                data = json.load(f)
+            for client, stamps in data.get("clients", {}).items():
+                self._stamps[client] = {
+                    name: ServerStamp(digest=s["digest"], first_seen=s["first_seen"])
+                    for name, s in stamps.items()
+                }
+            self._sections = {
+                client: float(changed_at) for client, changed_at in data.get("sections", {}).items()
+            }
+            self._written = {
+                client: str(digest) for client, digest in data.get("written", {}).items()
+            }
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError, OSError):
+            self._stamps = {}
+            self._sections = {}
+            self._written = {}
+
+
+def _section_digest(stamps: Mapping[str, ServerStamp]) -> str:
+    """整個 MCP 區段的摘要（MCP 名稱 -> 配置摘要）"""
+    return server_digest({name: stamp.digest for name, stamp in stamps.items()})
+
+
+# 全局修改時鐘實例
+_server_clock: ServerClock | None = None
+
+
+def get_server_clock() -> ServerClock:
+    """
+    獲取全局修改時鐘實例
+
+    Returns:
+        ServerClock 實例
+    """
+    global _server_clock
+    if _server_clock is None:
+        _server_clock = ServerClock()
+    return _server_clock
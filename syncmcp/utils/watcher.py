@@ -0,0 +1,272 @@
+"""
+文件監聽 - 監聽配置文件變更
+
+Linux 上使用 inotify（透過 ctypes，無額外依賴）監聽文件所在目錄，
+其他平台或 inotify 不可用時退回為定期比對 stat。
+監聽目錄而非文件本身，因為編輯器和許多工具會以「寫入臨時檔再改名」的方式保存。
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+# inotify 事件（見 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+FileSignature = tuple[int, int, int] | None
+
+
+def file_signature(path: Path) -> FileSignature:
+    """文件的 (mtime_ns, 大小, inode)，文件不存在時返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class _Inotify:
+    """inotify 的最小封裝"""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify 僅在 Linux 上可用")
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add_watch.restype = ctypes.c_int
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.fd = fd
+
+    def add_watch(self, directory: Path) -> int:
+        wd = int(self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK))
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), str(directory))
+        return wd
+
+    def read_events(self) -> list[tuple[int, int, str]]:
+        """讀取所有待處理事件：[(wd, mask, 文件名)]"""
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset : offset + length].split(b"\0", 1)[0]
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """
+    監聽一組文件，有變更時在背景執行緒呼叫回調
+
+    inotify 可用時監聽各文件的上層目錄；
+    目錄不存在或 inotify 不可用的文件則每 poll_interval 秒比對一次 stat。
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        on_change: Callable[[set[Path]], None],
+        poll_interval: float = 1.0,
+        use_inotify: bool = True,
+    ):
+        """
+        初始化文件監聽器
+
+        Args:
+            paths: 要監聽的文件
+            on_change: 變更回調，參數為有變更的文件集合（在監聽執行緒中呼叫）
+            poll_interval: stat 比對的間隔（秒）
+            use_inotify: 是否嘗試使用 inotify
+        """
+        self.paths = tuple(dict.fromkeys(Path(p) for p in paths))
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+
+        self._inotify: _Inotify | None = None
+        self._watches: dict[int, Path] = {}  # wd -> 目錄
+        self._polled: dict[Path, FileSignature] = {}
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._wake_r: int | None = None
+        self._wake_w: int | None = None
+
+    @property
+    def backend(self) -> str:
+        """目前使用的監聽方式：inotify 或 poll"""
+        return "inotify" if self._inotify is not None else "poll"
+
+    @property
+    def running(self) -> bool:
+        """監聽執行緒是否在執行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """啟動監聽（重複呼叫無作用）"""
+        if self.running:
+            return
+
+        self._stop.clear()
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+
+        self._polled = {path: file_signature(path) for path in self.paths}
+        if self._inotify is not None:
+            self._watch_directories(self._inotify)
+            self._wake_r, self._wake_w = os.pipe()
+
+        self._thread = threading.Thread(target=self._run, name="syncmcp-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止監聽"""
+        self._stop.set()
+        if self._wake_w is not None:
+            os.write(self._wake_w, b"\0")
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        for fd in (self._wake_r, self._wake_w):
+            if fd is not None:
+                os.close(fd)
+        self._wake_r = self._wake_w = None
+        self._watches.clear()
+
+    def _watch_directories(self, inotify: _Inotify) -> set[Path]:
+        """
+        為尚未監聽的文件加上目錄監聽，成功者不再需要 stat 比對
+
+        Args:
+            inotify: 使用中的 inotify 實例
+
+        Returns:
+            在開始監聽前已經變更的文件
+        """
+        changed = set()
+        watched = set(self._watches.values())
+        for path in list(self._polled):
+            directory = path.parent
+            if directory not in watched:
+                try:
+                    self._watches[inotify.add_watch(directory)] = directory
+                except OSError:
+                    continue  # 目錄不存在或超出監聽上限，繼續以 stat 比對
+                watched.add(directory)
+            if file_signature(path) != self._polled.pop(path):
+                changed.add(path)
+        return changed
+
+    def _handle_events(self, inotify: _Inotify) -> set[Path]:
+        changed: set[Path] = set()
+        lost = False
+
+        for wd, mask, name in inotify.read_events():
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                # 目錄本身被刪除或移走：其中的文件改回 stat 比對
+                self._watches.pop(wd, None)
+                lost = True
+                for path in self.paths:
+                    if path.parent == directory:
+                        changed.add(path)
+                        self._polled[path] = file_signature(path)
+            elif name:
+                path = directory / name
+                if path in self.paths:
+                    changed.add(path)
+
+        if lost:
+            changed |= self._watch_directories(inotify)
+        return changed
+
+    def _poll(self) -> set[Path]:
+        changed = set()
+        for path, signature in list(self._polled.items()):
+            current = file_signature(path)
+            if current != signature:
+                self._polled[path] = current
+                changed.add(path)
+        return changed
+
+    def _run(self):
+        while not self._stop.is_set():
+            changed: set[Path] = set()
+
+            inotify = self._inotify
+            if inotify is not None:
+                readable, _, _ = select.select(
+                    [inotify.fd, self._wake_r], [], [], self.poll_interval
+                )
+                if self._stop.is_set():
+                    break
+                if inotify.fd in readable:
+                    changed |= self._handle_events(inotify)
+                if self._polled:
+                    # 目錄可能已被建立，重新嘗試監聽
+                    changed |= self._watch_directories(inotify)
+            else:
+                if self._stop.wait(self.poll_interval):
+                    break
+
+            changed |= self._poll()
+            if changed:
+                try:
+                    self.on_change(changed)
+                except Exception as e:
+                    print(f"文件監聽回調失敗: {e}", file=sys.stderr)
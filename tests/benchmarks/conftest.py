@@ -0,0 +1,174 @@
+"""
+效能基準測試的 fixtures
+
+以 `pytest tests/benchmarks --benchmark` 執行（預設略過）。每個基準執行數輪取中位數，
+與 baselines.json 比較，超過 基準 × 容許倍數 即失敗；`--benchmark-update` 以本次結果
+更新 baselines.json。合成配置的規模改變時舊基準不適用，只記錄結果不比較。
+"""
+
+import json
+import shutil
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pytest
+
+from .generate import DEFAULT_SCALE, write_configs
+
+BASELINES_FILE = Path(__file__).with_name("baselines.json")
+
+
+@dataclass
+class Measurement:
+    """一個基準的量測結果（秒）"""
+
+    name: str
+    median: float
+    best: float
+    rounds: int
+    baseline: float | None = None
+
+
+@dataclass
+class BenchmarkRecorder:
+    """執行基準並與已保存的基準比較"""
+
+    baselines: dict[str, dict[str, float]]
+    tolerance: float
+    update: bool
+    results: dict[str, Measurement] = field(default_factory=dict)
+
+    def __call__(
+        self,
+        name: str,
+        func: Callable[[], object],
+        setup: Callable[[], object] | None = None,
+        rounds: int = 5,
+    ) -> Measurement:
+        """
+        量測 func 的執行時間
+
+        Args:
+            name: 基準名稱（baselines.json 的鍵）
+            func: 要量測的函數
+            setup: 每輪之前執行、不計入時間的準備工作
+            rounds: 執行輪數
+
+        Returns:
+            Measurement
+
+        Raises:
+            AssertionError: 中位數超過 基準 × 容許倍數
+        """
+        timings = []
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+
+        baseline = self.baselines.get(name, {}).get("median")
+        measurement = Measurement(name, statistics.median(timings), min(timings), rounds, baseline)
+        self.results[name] = measurement
+
+        if baseline is not None and not self.update:
+            limit = baseline * self.tolerance
+            assert measurement.median <= limit, (
+                f"{name} 效能退步: 中位數 {measurement.median * 1000:.1f} ms，"
+                f"基準 {baseline * 1000:.1f} ms（容許 ×{self.tolerance}）"
+            )
+        return measurement
+
+
+_recorder_key = pytest.StashKey[BenchmarkRecorder]()
+
+
+def _load_baselines() -> dict:
+    try:
+        return json.loads(BASELINES_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+@pytest.fixture(scope="session")
+def benchmark(request) -> BenchmarkRecorder:
+    """量測並比較基準"""
+    saved = _load_baselines()
+    same_scale = saved.get("scale") == DEFAULT_SCALE.to_dict()
+    recorder = BenchmarkRecorder(
+        baselines=saved.get("benchmarks", {}) if same_scale else {},
+        tolerance=request.config.getoption("--benchmark-tolerance"),
+        update=request.config.getoption("--benchmark-update"),
+    )
+    request.config.stash[_recorder_key] = recorder
+    yield recorder
+
+    if recorder.update and recorder.results:
+        benchmarks = saved.get("benchmarks", {}) if same_scale else {}
+        for name, result in recorder.results.items():
+            benchmarks[name] = {"median": round(result.median, 6), "rounds": result.rounds}
+        saved = {"scale": DEFAULT_SCALE.to_dict(), "benchmarks": dict(sorted(benchmarks.items()))}
+        BASELINES_FILE.write_text(
+            json.dumps(saved, indent=2, ensure_ascii=False) + "\n", encoding="utf-8"
+        )
+
+
+@pytest.fixture(scope="session")
+def synthetic_home(tmp_path_factory) -> Path:
+    """產生一次合成配置（依預設規模），供各基準複製使用"""
+    home = tmp_path_factory.mktemp("synthetic-home")
+    patch = pytest.MonkeyPatch()
+    patch.setenv("HOME", str(home))
+    try:
+        write_configs(DEFAULT_SCALE)
+    finally:
+        patch.undo()
+    return home
+
+
+class BenchHome:
+    """含合成配置的主目錄"""
+
+    def __init__(self, path: Path, template: Path):
+        self.path = path
+        self.template = template
+        self.reset()
+
+    def reset(self):
+        """還原為產生時的配置（不計入量測時間）"""
+        shutil.copytree(self.template, self.path, dirs_exist_ok=True)
+
+
+@pytest.fixture
+def bench_home(tmp_path, monkeypatch, synthetic_home) -> BenchHome:
+    """以合成配置作為 HOME，並重設依 HOME 建立的全局實例"""
+    home = tmp_path / "home"
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setattr("syncmcp.utils.history._history_manager", None)
+    monkeypatch.setattr("syncmcp.utils.server_clock._server_clock", None)
+    bench = BenchHome(home, synthetic_home)
+    (home / ".syncmcp" / "backups").mkdir(parents=True)
+    return bench
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    recorder = config.stash.get(_recorder_key, None)
+    if recorder is None or not recorder.results:
+        return
+    terminalreporter.section("效能基準")
+    for result in recorder.results.values():
+        line = (
+            f"{result.name:<32} 中位數 {result.median * 1000:9.1f} ms"
+            f"  最佳 {result.best * 1000:9.1f} ms"
+        )
+        if result.baseline:
+            line += (
+                f"  基準 {result.baseline * 1000:9.1f} ms ({result.median / result.baseline:.2f}×)"
+            )
+        terminalreporter.write_line(line)
+    if recorder.update:
+        terminalreporter.write_line(f"已更新 {BASELINES_FILE}")
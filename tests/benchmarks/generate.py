@@ -0,0 +1,201 @@
+"""
+基準測試用的合成配置產生器
+
+產生接近真實使用規模的客戶端配置：含大量專案與對話記錄、數 MB 的 ~/.claude.json，
+以及數百到數千個帶有大型 env 和 args 的 MCP。各客戶端之間有少量差異
+（缺少、修改、僅支援 stdio），讓差異分析與同步有實際工作可做。
+
+也可直接執行，寫出一組配置供手動分析：
+    python -m tests.benchmarks.generate --home /tmp/bench-home --servers 2000
+"""
+
+import argparse
+import json
+import os
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Scale:
+    """合成配置的規模"""
+
+    servers: int = 1000  # MCP 數量
+    env_size: int = 20  # 每個 MCP 的環境變數數量
+    args_size: int = 16  # 每個 MCP 的命令參數數量
+    projects: int = 400  # ~/.claude.json 中的專案數量
+    history: int = 40  # 每個專案的對話記錄數量
+    seed: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+DEFAULT_SCALE = Scale()
+
+
+def _token(rng: random.Random, length: int) -> str:
+    return "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=length))
+
+
+def make_server(index: int, rng: random.Random, scale: Scale) -> dict[str, Any]:
+    """
+    產生一個 MCP 配置（每 8 個中有 1 個是遠端 MCP）
+
+    Args:
+        index: 序號
+        rng: 亂數產生器
+        scale: 規模
+
+    Returns:
+        MCP 配置
+    """
+    if index % 8 == 7:
+        return {
+            "type": "http",
+            "url": f"https://mcp-{index}.example.com/{_token(rng, 12)}/mcp",
+            "headers": {
+                f"X-Header-{key}": _token(rng, 48) for key in range(max(1, scale.env_size // 4))
+            },
+        }
+    return {
+        "type": "stdio",
+        "command": "npx" if index % 3 else "uvx",
+        "args": ["-y", f"@example/mcp-server-{index}"]
+        + [f"--option-{arg}={_token(rng, 24)}" for arg in range(scale.args_size)],
+        "env": {f"SERVER_{index}_VAR_{key}": _token(rng, 40) for key in range(scale.env_size)},
+    }
+
+
+def make_servers(scale: Scale = DEFAULT_SCALE) -> dict[str, dict[str, Any]]:
+    """產生 scale.servers 個 MCP（名稱 -> 配置）"""
+    rng = random.Random(scale.seed)
+    return {f"server-{index:05d}": make_server(index, rng, scale) for index in range(scale.servers)}
+
+
+def make_projects(scale: Scale = DEFAULT_SCALE) -> dict[str, dict[str, Any]]:
+    """產生 ~/.claude.json 的 projects 區段（每個專案含對話記錄）"""
+    rng = random.Random(scale.seed + 1)
+    projects = {}
+    for index in range(scale.projects):
+        projects[f"/home/user/src/project-{index:04d}"] = {
+            "allowedTools": [f"Bash(npm run {_token(rng, 6)}:*)" for _ in range(5)],
+            "history": [
+                {"display": _token(rng, 160), "pastedContents": {}} for _ in range(scale.history)
+            ],
+            "mcpServers": {},
+            "enabledMcpjsonServers": [],
+            "hasTrustDialogAccepted": True,
+            "lastCost": rng.random(),
+            "lastDuration": rng.randint(1000, 10_000_000),
+        }
+    return projects
+
+
+def client_servers(
+    servers: dict[str, dict[str, Any]], scale: Scale = DEFAULT_SCALE
+) -> dict[str, dict[str, dict[str, Any]]]:
+    """
+    由同一組 MCP 產生各客戶端略有差異的配置
+
+    claude-code 擁有全部；gemini 缺少約 10%；roo-code 修改約 5% 的 args；
+    claude-desktop 只有 stdio MCP。
+
+    Returns:
+        客戶端名稱 -> MCP 配置
+    """
+    rng = random.Random(scale.seed + 2)
+    names = list(servers)
+    missing = set(rng.sample(names, len(names) // 10))
+    modified = set(rng.sample(names, len(names) // 20))
+
+    roo = {}
+    for name, server in servers.items():
+        if name in modified and "args" in server:
+            server = {**server, "args": [*server["args"], f"--changed={_token(rng, 8)}"]}
+        roo[name] = server
+
+    return {
+        "claude-code": dict(servers),
+        "gemini": {name: server for name, server in servers.items() if name not in missing},
+        "roo-code": roo,
+        "claude-desktop": {
+            name: server for name, server in servers.items() if server.get("type") == "stdio"
+        },
+    }
+
+
+def write_configs(scale: Scale = DEFAULT_SCALE) -> dict[str, Path]:
+    """
+    在當前 HOME 下寫出所有客戶端的配置（路徑與各適配器一致）
+
+    Args:
+        scale: 規模
+
+    Returns:
+        客戶端名稱 -> 配置文件路徑
+    """
+    from syncmcp.core.config_manager import ConfigManager
+
+    servers = make_servers(scale)
+    paths = {}
+    for client, adapter in ConfigManager().adapters.items():
+        path = adapter.get_config_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        paths[client] = path
+
+    documents = {
+        client: {"mcpServers": entries}
+        for client, entries in client_servers(servers, scale).items()
+    }
+    documents["claude-code"] = {
+        "numStartups": 412,
+        "theme": "dark",
+        "projects": make_projects(scale),
+        "mcpServers": documents["claude-code"]["mcpServers"],
+        "tipsHistory": {f"tip-{index}": index for index in range(50)},
+    }
+    for client, document in documents.items():
+        paths[client].write_text(json.dumps(document, indent=2), encoding="utf-8")
+    return paths
+
+
+def make_history(entries: int, servers: int = 200) -> list[dict[str, Any]]:
+    """產生同步歷史記錄（每筆記錄含各客戶端的大量變更）"""
+    changes = {
+        client: [f"+ server-{index:05d}" for index in range(servers)]
+        for client in ("gemini", "roo-code", "claude-desktop")
+    }
+    return [
+        {
+            "timestamp": f"2025-01-01T00:00:{index % 60:02d}",
+            "success": True,
+            "strategy": "auto",
+            "changes": changes,
+            "warnings": [],
+            "errors": [],
+            "backup_path": f"backup_20250101_0000{index % 60:02d}",
+            "duration_seconds": 0.5,
+        }
+        for index in range(entries)
+    ]
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="產生基準測試用的合成 MCP 配置")
+    parser.add_argument("--home", type=Path, required=True, help="寫入配置的主目錄")
+    parser.add_argument("--servers", type=int, default=DEFAULT_SCALE.servers)
+    parser.add_argument("--projects", type=int, default=DEFAULT_SCALE.projects)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SCALE.seed)
+    args = parser.parse_args(argv)
+
+    os.environ["HOME"] = str(args.home.resolve())
+    scale = Scale(servers=args.servers, projects=args.projects, seed=args.seed)
+    for client, path in write_configs(scale).items():
+        print(f"{client}: {path} ({path.stat().st_size / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+效能基準：載入、差異分析、格式轉換、保存、備份、歷史記錄與完整同步
+
+使用合成的大型配置（見 generate.py），以 `make bench` 或
+`pytest tests/benchmarks --benchmark` 執行。
+"""
+
+import pytest
+
+from syncmcp.core.backup_manager import BackupManager
+from syncmcp.core.config_manager import ClientConfig, ConfigManager
+from syncmcp.core.diff_engine import DiffEngine
+from syncmcp.core.records import to_plain
+from syncmcp.core.sync_engine import SyncEngine, SyncStrategy
+from syncmcp.utils.history import SyncHistoryManager
+
+from .generate import DEFAULT_SCALE, make_history
+
+pytestmark = pytest.mark.benchmark
+
+
+def _claude_code_config() -> ClientConfig:
+    config = ClientConfig("claude-code", ConfigManager().adapters["claude-code"].get_config_path())
+    config.load()
+    return config
+
+
+def _engine() -> SyncEngine:
+    config_manager = ConfigManager()
+    return SyncEngine(config_manager, DiffEngine(), BackupManager())
+
+
+class TestConfigIO:
+    """配置文件載入與保存"""
+
+    def test_load_claude_json(self, bench_home, benchmark):
+        """載入數 MB 的 ~/.claude.json"""
+        result = benchmark("client_config.load", _claude_code_config)
+
+        assert len(_claude_code_config().mcpServers) == DEFAULT_SCALE.servers
+        assert result.median > 0
+
+    def test_load_all(self, bench_home, benchmark):
+        """載入所有客戶端"""
+        benchmark("config_manager.load_all", lambda: ConfigManager().load_all())
+
+    def test_save_claude_json(self, bench_home, benchmark):
+        """修改一個 MCP 後保存（只替換 mcpServers 區段）"""
+        state = {}
+
+        def setup():
+            bench_home.reset()
+            config = _claude_code_config()
+            config.mcpServers = {**config.mcpServers, "added": {"command": "npx"}}
+            state["config"] = config
+
+        benchmark("client_config.save", lambda: state["config"].save(), setup=setup)
+
+        assert "added" in _claude_code_config().mcpServers
+
+
+class TestAnalysis:
+    """差異分析與格式轉換"""
+
+    def test_diff_analyze(self, bench_home, benchmark):
+        """分析所有客戶端之間的差異"""
+        configs = ConfigManager().load_all()
+
+        benchmark("diff_engine.analyze", lambda: DiffEngine().analyze(configs))
+
+    def test_adapter_normalize(self, bench_home, benchmark):
+        """將所有 MCP 轉換為各客戶端的格式"""
+        config_manager = ConfigManager()
+        servers = to_plain(_claude_code_config().mcpServers)
+
+        def normalize():
+            for adapter in config_manager.adapters.values():
+                adapter.normalize_config(servers)
+
+        benchmark("adapter.normalize_config", normalize)
+
+
+class TestPersistence:
+    """備份與同步歷史"""
+
+    def test_create_backup(self, bench_home, benchmark):
+        """備份所有客戶端配置"""
+        configs = ConfigManager().load_all()
+        backup_manager = BackupManager(bench_home.path / ".syncmcp" / "backups")
+
+        benchmark("backup_manager.create_backup", lambda: backup_manager.create_backup(configs))
+
+    def test_history_add_entry(self, bench_home, benchmark):
+        """在已滿的歷史記錄中新增一筆"""
+        history = SyncHistoryManager(bench_home.path / ".syncmcp" / "history.json")
+        history._save_history(make_history(100))
+        changes = make_history(1)[0]["changes"]
+
+        benchmark(
+            "history.add_entry",
+            lambda: history.add_entry(True, "auto", changes, [], [], duration_seconds=1.0),
+        )
+
+
+class TestSync:
+    """完整同步"""
+
+    def test_sync_dry_run(self, bench_home, benchmark):
+        """預覽同步"""
+
+        def sync():
+            result = _engine().sync(SyncStrategy.AUTO, dry_run=True, source="claude-code")
+            assert result.success, result.errors
+
+        benchmark("sync_engine.sync.dry_run", sync)
+
+    def test_sync_write(self, bench_home, benchmark):
+        """同步並寫入所有客戶端（含備份與歷史記錄）"""
+
+        def sync():
+            result = _engine().sync(SyncStrategy.AUTO, source="claude-code")
+            assert result.success, result.errors
+
+        benchmark("sync_engine.sync.write", sync, setup=bench_home.reset, rounds=3)
+
+        configs = ConfigManager().load_all()
+        assert len(configs["gemini"].mcpServers) == DEFAULT_SCALE.servers
@@ -7,6 +7,33 @@ import json
 import pytest
 
 
+def pytest_addoption(parser):
+    group = parser.getgroup("syncmcp")
+    group.addoption(
+        "--benchmark", action="store_true", help="執行效能基準測試（tests/benchmarks，預設略過）"
+    )
+    group.addoption(
+        "--benchmark-update",
+        action="store_true",
+        help="執行效能基準測試並以結果更新 tests/benchmarks/baselines.json",
+    )
+    group.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=2.0,
+        help="中位數超過 基準 × 此倍數 時判定為效能退步（預設 2.0）",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark") or config.getoption("--benchmark-update"):
+        return
+    skip = pytest.mark.skip(reason="效能基準測試，使用 --benchmark 執行")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture
 def temp_dir(tmp_path):
     """創建臨時目錄"""
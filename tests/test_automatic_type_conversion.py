@@ -289,10 +289,12 @@ class TestRoundTripConversion:
             }
         }
 
-        # 所有客戶端都應該保持 stdio
+        # 所有客戶端都應該保持 stdio（Desktop 的 stdio 不寫入 type 欄位）
         assert claude_adapter.normalize_config(original)["test-mcp"]["type"] == "stdio"
         assert roo_adapter.normalize_config(original)["test-mcp"]["type"] == "stdio"
-        assert desktop_adapter.normalize_config(original)["test-mcp"]["type"] == "stdio"
+        desktop = desktop_adapter.normalize_config(original)["test-mcp"]
+        assert "type" not in desktop
+        assert desktop["command"] == "npx"
 
 
 class TestRealWorldScenarios:
@@ -3,6 +3,7 @@
 """
 
 import json
+import os
 import time
 from pathlib import Path
 
@@ -12,6 +13,7 @@ from syncmcp.core.backup_manager import BackupManager
 from syncmcp.core.config_manager import ConfigManager
 from syncmcp.core.diff_engine import DiffEngine
 from syncmcp.core.sync_engine import SyncEngine, SyncResult, SyncStrategy
+from syncmcp.utils.server_clock import ServerClock
 
 
 class TestBackupManager:
@@ -51,6 +53,16 @@ class TestBackupManager:
         if len(backups) >= 2:
             assert backups[0]["timestamp"] >= backups[1]["timestamp"]
 
+    def test_backups_in_same_second(self, backup_manager, mock_all_configs):
+        """同一秒內的多次備份不會互相覆蓋"""
+        configs = ConfigManager().load_all()
+
+        first = backup_manager.create_backup(configs)
+        second = backup_manager.create_backup(configs)
+
+        assert first != second
+        assert backup_manager.list_backups()[0]["id"] == second
+
     def test_restore_backup(self, backup_manager, mock_all_configs, mock_home_dir):
         """測試恢復備份"""
         config_manager = ConfigManager()
@@ -165,6 +177,94 @@ class TestSyncEngine:
         assert isinstance(history, list)
         assert len(history) > 0
 
+    def test_sync_uses_given_source(self, sync_components, mock_all_configs):
+        """指定來源時不論修改時間都以該客戶端為準"""
+        sync_engine = sync_components["sync_engine"]
+        gemini_path = sync_components["config_manager"].adapters["gemini"].get_config_path()
+        gemini_path.parent.mkdir(parents=True, exist_ok=True)
+        gemini_path.write_text(
+            json.dumps({"mcpServers": {"only-in-gemini": {"command": "uvx", "args": ["x"]}}})
+        )
+        os.utime(gemini_path, (1, 1))
+
+        result = sync_engine.sync(strategy=SyncStrategy.AUTO, create_backup=False, source="gemini")
+
+        assert result.success
+        code = json.loads(mock_all_configs["claude-code"].read_text())
+        assert list(code["mcpServers"]) == ["only-in-gemini"]
+
+    def test_sync_warnings_use_given_source(self, sync_components, mock_all_configs):
+        """指定來源時，預覽的變更與警告以該來源計算"""
+        sync_engine = sync_components["sync_engine"]
+        gemini_path = sync_components["config_manager"].adapters["gemini"].get_config_path()
+        gemini_path.parent.mkdir(parents=True, exist_ok=True)
+        gemini_path.write_text(
+            json.dumps({"mcpServers": {"only-in-gemini": {"command": "uvx", "args": ["x"]}}})
+        )
+        os.utime(gemini_path, (1, 1))
+
+        result = sync_engine.sync(
+            strategy=SyncStrategy.AUTO, dry_run=True, create_backup=False, source="gemini"
+        )
+
+        assert "gemini" not in result.changes
+        assert sorted(result.changes["claude-code"]) == [
+            "+ only-in-gemini",
+            "- brave-search",
+            "- filesystem",
+        ]
+        assert any("claude-code 將失去 2 個 MCP 配置" in warning for warning in result.warnings)
+        assert not any("gemini 將失去" in warning for warning in result.warnings)
+
+    def test_repeated_sync_keeps_remote_servers(self, mock_all_configs, mock_syncmcp_dir):
+        """反覆同步不會因 Claude Desktop 過濾遠端 MCP 而刪除其他客戶端的配置"""
+        clock = ServerClock(mock_syncmcp_dir / "server_clock.json")
+        config_manager = ConfigManager(server_clock=clock)
+        sync_engine = SyncEngine(
+            config_manager,
+            DiffEngine(),
+            BackupManager(backup_dir=mock_syncmcp_dir / "backups"),
+            verbose=False,
+        )
+        paths = {
+            name: adapter.get_config_path() for name, adapter in config_manager.adapters.items()
+        }
+        paths["gemini"].parent.mkdir(parents=True, exist_ok=True)
+        paths["gemini"].write_text(
+            json.dumps(
+                {
+                    "mcpServers": {
+                        "local": {"command": "uvx", "args": ["local"]},
+                        "remote": {
+                            "type": "streamable-http",
+                            "url": "https://example.com/mcp",
+                            "headers": {"Authorization": "Bearer x"},
+                        },
+                    }
+                }
+            )
+        )
+
+        result = sync_engine.sync(strategy=SyncStrategy.AUTO, create_backup=False, source="gemini")
+        assert result.success
+
+        for round_index in range(3):
+            # Claude Desktop 的 MCP 區段最新（例如應用程式改寫了條目），仍不能成為來源
+            desktop = json.loads(paths["claude-desktop"].read_text())
+            desktop["mcpServers"]["local"]["type"] = "stdio"
+            paths["claude-desktop"].write_text(json.dumps(desktop))
+            desktop_time = time.time() + 100 + round_index
+            os.utime(paths["claude-desktop"], (desktop_time, desktop_time))
+
+            result = sync_engine.sync(strategy=SyncStrategy.AUTO, create_backup=False)
+            assert result.success
+            assert not result.warnings
+
+            for client, path in paths.items():
+                servers = json.loads(path.read_text())["mcpServers"]
+                expected = {"local"} if client == "claude-desktop" else {"local", "remote"}
+                assert set(servers) == expected, (round_index, client)
+
     def test_sync_rollback_on_error(self, sync_components, monkeypatch):
         """測試同步錯誤時回滾"""
         sync_engine = sync_components["sync_engine"]
@@ -209,6 +309,42 @@ class TestSyncEngine:
         # 根據實際實現驗證
         assert isinstance(result, SyncResult)
 
+    def test_sync_emits_progress_events(self, sync_components):
+        """同步依序發送各階段事件，最後完成全部步數"""
+        sync_engine = sync_components["sync_engine"]
+        events = []
+
+        result = sync_engine.sync(
+            strategy=SyncStrategy.AUTO, dry_run=False, create_backup=True, progress=events.append
+        )
+
+        assert result.success is True
+        done = [event for event in events if event.done]
+        phases = [event.phase for event in done]
+        assert phases[:3] == ["load", "diff", "backup"]
+        assert phases[-1] == "history"
+        assert {event.client for event in done if event.phase == "write"} == set(
+            sync_components["config_manager"].adapters
+        )
+        assert [event.step for event in done] == list(range(1, len(done) + 1))
+        assert done[-1].step == done[-1].total
+        assert done[-1].fraction == 1.0
+
+    def test_dry_run_progress_events(self, sync_components):
+        """dry-run 只有載入與分析兩個階段"""
+        sync_engine = sync_components["sync_engine"]
+        events = []
+
+        sync_engine.sync(dry_run=True, create_backup=True, progress=events.append)
+
+        assert [(event.phase, event.done) for event in events] == [
+            ("load", False),
+            ("load", True),
+            ("diff", False),
+            ("diff", True),
+        ]
+        assert events[-1].step == events[-1].total == 2
+
     def test_prepare_changes(self, sync_components):
         """測試準備變更摘要"""
         sync_engine = sync_components["sync_engine"]
@@ -2,6 +2,8 @@
 測試 CLI 命令
 """
 
+import json
+
 import pytest
 from click.testing import CliRunner
 
@@ -171,6 +173,26 @@ class TestDoctorCommand:
         assert "click" in result.output
         assert "rich" in result.output
 
+    def test_doctor_probes_servers(self, runner, mock_home_dir):
+        """測試 doctor 啟動並檢查各 MCP"""
+        (mock_home_dir / ".claude.json").write_text(
+            json.dumps({"mcpServers": {"broken": {"command": "no-such-mcp-command"}}})
+        )
+
+        result = runner.invoke(cli, ["doctor", "--timeout", "5"])
+
+        assert result.exit_code == 0
+        assert "MCP 健康檢查" in result.output
+        assert "broken" in result.output
+        assert "找不到命令" in result.output
+
+    def test_doctor_no_probe(self, runner):
+        """測試 doctor --no-probe 跳過 MCP 檢查"""
+        result = runner.invoke(cli, ["doctor", "--no-probe"])
+
+        assert result.exit_code == 0
+        assert "MCP 健康檢查" not in result.output
+
     def test_doctor_help(self, runner):
         """測試 doctor --help"""
         result = runner.invoke(cli, ["doctor", "--help"])
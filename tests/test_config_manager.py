@@ -60,6 +60,81 @@ class TestClientConfig:
         with pytest.raises(FileNotFoundError):
             config.load()
 
+    def test_holds_only_mcp_section(self, temp_dir):
+        """只保存 mcpServers 區段，不保留完整文件"""
+        config_file = temp_dir / "big.json"
+        config_file.write_text(
+            json.dumps(
+                {"projects": {"p": {"history": ["x"] * 100}}, "mcpServers": {"a": {"command": "x"}}}
+            )
+        )
+
+        config = ClientConfig("claude-code", config_file)
+        config.load()
+
+        assert not hasattr(config, "__dict__")
+        assert config.fingerprint is not None
+        assert dict(config.mcpServers["a"]) == {"command": "x"}
+        assert config.load_document()["projects"]["p"]["history"][0] == "x"
+
+    def test_save_splices_section(self, temp_dir):
+        """文件未被修改時只替換 mcpServers 區段，其餘位元組保持原樣"""
+        config_file = temp_dir / "claude.json"
+        original = (
+            '{\n  "theme":   "dark",\n  "mcpServers": {"a": {"command": "x"}},\n'
+            '  "note": "中文"\n}\n'
+        )
+        config_file.write_text(original, encoding="utf-8")
+
+        config = ClientConfig("claude-code", config_file)
+        config.load()
+        config.mcpServers = {"b": {"command": "y"}}
+        config.save()
+
+        text = config_file.read_text(encoding="utf-8")
+        assert text.startswith('{\n  "theme":   "dark",\n  "mcpServers": {\n    "b": {')
+        assert text.endswith('  },\n  "note": "中文"\n}\n')
+        assert json.loads(text)["mcpServers"] == {"b": {"command": "y"}}
+
+        # 連續保存仍使用更新後的區段位置
+        config.mcpServers = {}
+        config.save()
+        assert json.loads(config_file.read_text(encoding="utf-8")) == {
+            "theme": "dark",
+            "mcpServers": {},
+            "note": "中文",
+        }
+
+    def test_save_after_external_change(self, temp_dir):
+        """文件在載入後被其他程序修改時，重新載入完整文件再寫入"""
+        config_file = temp_dir / "claude.json"
+        config_file.write_text(json.dumps({"mcpServers": {}, "theme": "dark"}))
+
+        config = ClientConfig("claude-code", config_file)
+        config.load()
+        config_file.write_text(json.dumps({"theme": "light", "mcpServers": {}, "extra": 1}))
+
+        config.mcpServers = {"a": {"command": "x"}}
+        config.save()
+
+        data = json.loads(config_file.read_text())
+        assert data == {"theme": "light", "mcpServers": {"a": {"command": "x"}}, "extra": 1}
+
+    def test_load_rejects_malformed_json(self, temp_dir):
+        """格式錯誤的文件仍拋出 JSONDecodeError"""
+        config_file = temp_dir / "bad.json"
+        config_file.write_text('{"mcpServers": {}} trailing')
+
+        with pytest.raises(json.JSONDecodeError):
+            ClientConfig("test-client", config_file).load()
+
+    def test_commit_without_stage(self, temp_dir):
+        """沒有先呼叫 stage() 時 commit_staged 拋出 RuntimeError"""
+        config = ClientConfig("test-client", temp_dir / "config.json")
+
+        with pytest.raises(RuntimeError):
+            config.commit_staged()
+
 
 class TestClaudeCodeAdapter:
     """測試 Claude Code Adapter"""
@@ -235,3 +310,15 @@ class TestConfigManager:
 
         # 驗證同步結果
         # 注意：實際驗證需要根據 sync 方法的實現
+
+    def test_sync_all_skips_unchanged(self, mock_all_configs):
+        """內容已相同的客戶端不重寫文件"""
+        manager = ConfigManager()
+        manager.sync_all(manager.load_all()["claude-code"])
+        mtimes = {name: path.stat().st_mtime_ns for name, path in mock_all_configs.items()}
+
+        configs = manager.load_all()
+        written = manager.sync_all(configs["claude-code"], targets=configs)
+
+        assert written == []
+        assert {name: path.stat().st_mtime_ns for name, path in mock_all_configs.items()} == mtimes
@@ -2,6 +2,7 @@
 測試差異檢測引擎 (DiffEngine)
 """
 
+import json
 
 import pytest
 
@@ -71,6 +72,60 @@ class TestDiffReport:
         report.add_diff("claude-code", DiffItem("mcp2", "removed"))
         assert report.has_removals()
 
+    def test_status_counters(self):
+        """測試 add_diff 時維護的狀態計數"""
+        report = DiffReport()
+        report.add_diff("claude-code", DiffItem("mcp1", "added"))
+        report.add_diff("claude-code", DiffItem("mcp2", "removed"))
+        report.add_diff("roo-code", DiffItem("mcp2", "removed"))
+        report.add_diff("roo-code", DiffItem("mcp3", "modified"))
+
+        assert report.count("removed") == 2
+        assert report.count("removed", "roo-code") == 1
+        assert report.count("added", "roo-code") == 0
+        assert report.count("added", "unknown-client") == 0
+        assert report.get_removal_count("claude-code") == 1
+        assert report.get_statistics() == {
+            "added": 1,
+            "removed": 2,
+            "modified": 1,
+            "unchanged": 0,
+            "total": 4,
+        }
+        assert [c for c, _ in report.items_with_status("removed")] == ["claude-code", "roo-code"]
+        assert report.names_with_status("roo-code", "modified") == ["mcp3"]
+
+    def test_diff_item_uses_slots(self):
+        """測試 DiffItem 使用 __slots__"""
+        item = DiffItem("mcp1", "added")
+        assert not hasattr(item, "__dict__")
+
+    def test_streaming_renderers(self):
+        """測試串流輸出（text / markdown / JSON / NDJSON）"""
+        report = DiffReport()
+        report.add_diff("claude-code", DiffItem("mcp1", "added", new_value={"command": "x"}))
+        report.add_diff("gemini", DiffItem("mcp2", "removed"))
+
+        assert "\n".join(report.iter_text()) == report.to_text()
+        assert "### claude-code" in report.to_markdown()
+
+        data = json.loads(report.to_json(include_values=True))
+        assert data["statistics"]["total"] == 2
+        assert data["diffs"]["claude-code"][0]["new_value"] == {"command": "x"}
+
+        lines = [json.loads(line) for line in report.iter_ndjson()]
+        assert lines == [
+            {"client": "claude-code", "name": "mcp1", "status": "added"},
+            {"client": "gemini", "name": "mcp2", "status": "removed"},
+        ]
+
+    def test_empty_report_renderers(self):
+        """測試空報告的輸出"""
+        report = DiffReport()
+        assert report.to_text() == "無差異"
+        assert list(report.iter_ndjson()) == []
+        assert json.loads(report.to_json())["diffs"] == {}
+
 
 class TestDiffEngine:
     """測試 DiffEngine"""
@@ -0,0 +1,344 @@
+"""
+測試 MCP 健康檢查 (health)
+"""
+
+import os
+import sys
+import textwrap
+import time
+
+import pytest
+
+from syncmcp.core.config_manager import ClientConfig
+from syncmcp.core.health import (
+    HealthCache,
+    HealthProber,
+    ProbeResult,
+    ProbeStatus,
+    ProbeTarget,
+    collect_targets,
+    diagnose,
+    probe_fingerprint,
+)
+
+# 最小的 stdio MCP：可選延遲後回應 initialize，stdin 關閉時結束
+STUB_SERVER = textwrap.dedent("""
+    import json, sys, time
+
+    delay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.0
+    time.sleep(delay)
+    print("stub starting", file=sys.stderr, flush=True)
+    print("not json log line", flush=True)
+    for line in sys.stdin:
+        message = json.loads(line)
+        if message.get("method") == "initialize":
+            response = {
+                "jsonrpc": "2.0",
+                "id": message["id"],
+                "result": {
+                    "protocolVersion": message["params"]["protocolVersion"],
+                    "capabilities": {},
+                    "serverInfo": {"name": "stub", "version": "1.2.3"},
+                },
+            }
+            print(json.dumps(response), flush=True)
+    """)
+
+CRASHING_SERVER = textwrap.dedent("""
+    import sys
+    print("Traceback (most recent call last):", file=sys.stderr)
+    print("ModuleNotFoundError: No module named 'missing_dep'", file=sys.stderr)
+    sys.exit(1)
+    """)
+
+# initialize 回應中的 serverInfo 不是物件
+MALFORMED_SERVER = textwrap.dedent("""
+    import json, sys
+
+    for line in sys.stdin:
+        message = json.loads(line)
+        response = {
+            "jsonrpc": "2.0",
+            "id": message["id"],
+            "result": {"protocolVersion": "2024-11-05", "serverInfo": "stub 1.2.3"},
+        }
+        print(json.dumps(response), flush=True)
+    """)
+
+HANGING_SERVER = textwrap.dedent("""
+    import time
+    time.sleep(60)
+    """)
+
+
+@pytest.fixture
+def stubs(tmp_path):
+    """寫入各種 stub MCP，返回 名稱 -> 腳本路徑"""
+    scripts = {}
+    for name, source in {
+        "stub": STUB_SERVER,
+        "crash": CRASHING_SERVER,
+        "malformed": MALFORMED_SERVER,
+        "hang": HANGING_SERVER,
+    }.items():
+        path = tmp_path / f"{name}.py"
+        path.write_text(source)
+        scripts[name] = str(path)
+    return scripts
+
+
+def _target(name: str, script: str, *args: str) -> ProbeTarget:
+    return ProbeTarget(name, {"type": "stdio", "command": sys.executable, "args": [script, *args]})
+
+
+class TestProbe:
+    """測試單個 MCP 的探測"""
+
+    def test_healthy_server(self, stubs):
+        """完成 initialize 握手並記錄伺服器資訊"""
+        [result] = HealthProber(timeout=10).run([_target("ok", stubs["stub"])])
+
+        assert result.status is ProbeStatus.OK
+        assert result.server_name == "stub"
+        assert result.server_version == "1.2.3"
+        assert result.latency_ms is not None and result.latency_ms > 0
+        assert result.stderr_tail == ["stub starting"]
+
+    def test_crashing_server(self, stubs):
+        """進程提前結束時記錄 stderr 並給出診斷"""
+        [result] = HealthProber(timeout=10).run([_target("crash", stubs["crash"])])
+
+        assert result.status is ProbeStatus.ERROR
+        assert "ModuleNotFoundError" in result.stderr_tail[-1]
+        assert result.hint is not None and "Python" in result.hint
+
+    def test_malformed_server_info(self, stubs):
+        """serverInfo 格式錯誤時記錄為協議錯誤，而不是讓探測崩潰"""
+        [result] = HealthProber(timeout=10).run([_target("bad", stubs["malformed"])])
+
+        assert result.status is ProbeStatus.ERROR
+        assert result.error == "initialize 回應格式錯誤: serverInfo 不是物件"
+        assert result.server_name is None
+
+    def test_timeout(self, stubs):
+        """超過逾時即停止並終止進程"""
+        started = time.perf_counter()
+        [result] = HealthProber(timeout=0.5).run([_target("hang", stubs["hang"])])
+
+        assert result.status is ProbeStatus.TIMEOUT
+        assert time.perf_counter() - started < 5
+
+    def test_missing_command(self):
+        """找不到命令"""
+        target = ProbeTarget("missing", {"command": "definitely-not-a-real-command-xyz"})
+        [result] = HealthProber().run([target])
+
+        assert result.status is ProbeStatus.ERROR
+        assert "找不到命令" in result.error
+
+    def test_remote_server_skipped(self):
+        """遠端 MCP 不探測"""
+        [result] = HealthProber().run([ProbeTarget("remote", {"url": "https://x"})])
+
+        assert result.status is ProbeStatus.SKIPPED
+        assert result.ok
+
+
+class TestConcurrency:
+    """測試並行探測"""
+
+    def test_bounded_by_slowest(self, stubs):
+        """總耗時取決於最慢的 MCP，而非總和"""
+        targets = [_target(f"slow-{i}", stubs["stub"], "0.8") for i in range(5)]
+
+        started = time.perf_counter()
+        results = HealthProber(timeout=10, concurrency=5).run(targets)
+        elapsed = time.perf_counter() - started
+
+        assert all(result.status is ProbeStatus.OK for result in results)
+        assert [result.name for result in results] == [target.name for target in targets]
+        assert elapsed < 0.8 * 5 * 0.6
+
+    def test_concurrency_cap(self, stubs):
+        """同時執行的探測不超過上限"""
+        targets = [_target(f"slow-{i}", stubs["stub"], "0.4") for i in range(3)]
+
+        started = time.perf_counter()
+        HealthProber(timeout=10, concurrency=1).run(targets)
+
+        assert time.perf_counter() - started >= 0.4 * 3
+
+    def test_on_result_callback(self, stubs):
+        """每個探測完成時呼叫回調"""
+        seen = []
+        HealthProber(timeout=10).run(
+            [_target("a", stubs["stub"]), _target("b", stubs["crash"])],
+            on_result=lambda result: seen.append(result.name),
+        )
+        assert sorted(seen) == ["a", "b"]
+
+
+class TestHealthCache:
+    """測試探測結果快取"""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return HealthCache(tmp_path / "health_cache.json")
+
+    @pytest.fixture
+    def executable(self, tmp_path):
+        """可直接執行的 stub MCP（用於測試執行檔 mtime）"""
+        path = tmp_path / "stub-mcp"
+        path.write_text(f"#!{sys.executable}\n{STUB_SERVER}")
+        path.chmod(0o755)
+        return path
+
+    def test_second_run_uses_cache(self, stubs, cache):
+        """配置未改變時沿用快取結果"""
+        prober = HealthProber(timeout=10, cache=cache)
+        target = _target("ok", stubs["stub"], "0.3")
+
+        [first] = prober.run([target])
+        started = time.perf_counter()
+        [second] = prober.run([target])
+
+        assert not first.cached
+        assert second.cached
+        assert second.status is ProbeStatus.OK
+        assert second.latency_ms == first.latency_ms
+        assert time.perf_counter() - started < 0.3
+
+    def test_persists_across_instances(self, stubs, cache, tmp_path):
+        """快取保存到文件，其他程序可沿用"""
+        target = _target("ok", stubs["stub"])
+        HealthProber(timeout=10, cache=cache).run([target])
+
+        other = HealthCache(tmp_path / "health_cache.json")
+        [result] = HealthProber(timeout=10, cache=other).run([target])
+
+        assert result.cached
+
+    def test_config_change_reprobes(self, stubs, cache):
+        """配置改變時重新探測"""
+        prober = HealthProber(timeout=10, cache=cache)
+        prober.run([_target("ok", stubs["stub"])])
+
+        [result] = prober.run([_target("ok", stubs["stub"], "0.1")])
+
+        assert not result.cached
+
+    def test_executable_change_reprobes(self, executable, cache):
+        """執行檔被重新安裝（mtime 改變）時重新探測"""
+        target = ProbeTarget("exe", {"command": str(executable)})
+        prober = HealthProber(timeout=10, cache=cache)
+        fingerprint = probe_fingerprint(target.config)
+        prober.run([target])
+
+        stat = executable.stat()
+        os.utime(executable, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        [result] = prober.run([target])
+
+        assert probe_fingerprint(target.config) != fingerprint
+        assert not result.cached
+        assert result.status is ProbeStatus.OK
+
+    def test_fresh_bypasses_cache(self, stubs, cache):
+        """fresh 忽略快取並更新快取"""
+        prober = HealthProber(timeout=10, cache=cache)
+        target = _target("ok", stubs["stub"])
+        [first] = prober.run([target])
+
+        [second] = prober.run([target], fresh=True)
+        [third] = prober.run([target])
+
+        assert not second.cached
+        assert third.cached
+        assert third.checked_at == second.checked_at > first.checked_at
+
+    def test_ttl_expiry(self, stubs, tmp_path):
+        """超過有效時間後重新探測"""
+        cache = HealthCache(tmp_path / "health_cache.json", ttl=0)
+        prober = HealthProber(timeout=10, cache=cache)
+        target = _target("ok", stubs["stub"])
+        prober.run([target])
+
+        [result] = prober.run([target])
+
+        assert not result.cached
+
+    def test_failures_expire_sooner(self, stubs, tmp_path):
+        """失敗結果使用較短的有效時間"""
+        cache = HealthCache(tmp_path / "health_cache.json", ttl=3600, failure_ttl=0)
+        prober = HealthProber(timeout=10, cache=cache)
+        prober.run([_target("ok", stubs["stub"]), _target("crash", stubs["crash"])])
+
+        results = prober.run([_target("ok", stubs["stub"]), _target("crash", stubs["crash"])])
+
+        assert [result.cached for result in results] == [True, False]
+
+    def test_cached_result_uses_current_name(self, stubs, cache):
+        """相同啟動方式在不同名稱下共用結果，但顯示當前名稱"""
+        prober = HealthProber(timeout=10, cache=cache)
+        prober.run([_target("old-name", stubs["stub"])])
+
+        [result] = prober.run([_target("new-name", stubs["stub"])])
+
+        assert result.cached
+        assert result.name == "new-name"
+
+
+class TestCollectTargets:
+    """測試探測目標收集"""
+
+    def test_merges_same_launch_across_clients(self, tmp_path):
+        """相同啟動方式的 MCP 只探測一次"""
+        code = ClientConfig("claude-code", tmp_path / "a.json")
+        code.mcpServers = {"fs": {"type": "stdio", "command": "npx", "args": ["fs"]}}
+        desktop = ClientConfig("claude-desktop", tmp_path / "b.json")
+        desktop.mcpServers = {
+            "fs": {"command": "npx", "args": ["fs"]},
+            "other": {"command": "uvx", "args": ["other"]},
+        }
+
+        targets = collect_targets({"claude-code": code, "claude-desktop": desktop})
+
+        assert [(t.name, t.clients) for t in targets] == [
+            ("fs", ["claude-code", "claude-desktop"]),
+            ("other", ["claude-desktop"]),
+        ]
+
+    def test_filter_clients(self, tmp_path):
+        """只收集指定客戶端"""
+        code = ClientConfig("claude-code", tmp_path / "a.json")
+        code.mcpServers = {"fs": {"command": "npx"}}
+        gemini = ClientConfig("gemini", tmp_path / "b.json")
+        gemini.mcpServers = {"ctx": {"command": "uvx"}}
+
+        targets = collect_targets({"claude-code": code, "gemini": gemini}, clients=["gemini"])
+
+        assert [t.name for t in targets] == ["ctx"]
+
+
+class TestDiagnose:
+    """測試錯誤診斷"""
+
+    @pytest.mark.parametrize(
+        "text,keyword",
+        [
+            ("chrome-devtools-mcp does not support Node v22.7.0", "Node"),
+            ("Error: ENOENT: no such file or directory", "路徑"),
+            ("HTTP 401 Unauthorized", "API Key"),
+        ],
+    )
+    def test_known_errors(self, text, keyword):
+        """辨識常見錯誤"""
+        assert keyword in diagnose(text)
+
+    def test_unknown_error(self):
+        """無法辨識時返回 None"""
+        assert diagnose("something odd") is None
+
+    def test_result_round_trip(self):
+        """ProbeResult 可序列化與還原"""
+        result = ProbeResult("fs", ProbeStatus.TIMEOUT, clients=["gemini"], error="逾時")
+        assert ProbeResult.from_dict(result.to_dict()) == result
@@ -0,0 +1,95 @@
+"""
+測試啟動時的匯入時間（以 python -X importtime 解析）
+
+`syncmcp mcp` 在每個 AI 客戶端啟動時都會被呼叫，冷啟動時間直接影響編輯器。
+"""
+
+import subprocess
+import sys
+from dataclasses import dataclass
+
+# 預算（毫秒，累計匯入時間）；留有餘裕以容納較慢的 CI 機器
+VERSION_BUDGET_MS = 150  # syncmcp --version
+MCP_SERVER_BUDGET_MS = 3000  # syncmcp.mcp.server（大部分為 mcp 函式庫本身）
+
+
+@dataclass
+class ImportRecord:
+    """-X importtime 的一行"""
+
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+    parent: str | None
+
+
+def _import_profile(*args: str) -> dict[str, ImportRecord]:
+    """以 -X importtime 執行 Python，返回 模組 -> 紀錄（含匯入它的上層模組）"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # 子模組先於上層模組輸出，因此反向處理以還原樹狀結構
+    lines = [line for line in result.stderr.splitlines() if line.startswith("import time:")]
+    records: dict[str, ImportRecord] = {}
+    stack: list[tuple[int, str]] = []
+    for line in reversed(lines[1:]):  # 第一行是欄位標題
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        parent = stack[-1][1] if stack else None
+        records.setdefault(
+            name, ImportRecord(name, int(self_us), int(cumulative_us), depth, parent)
+        )
+        stack.append((depth, name))
+    return records
+
+
+def _total_ms(records: dict[str, ImportRecord], prefix: str) -> float:
+    """某套件頂層模組的累計匯入時間"""
+    return (
+        sum(
+            record.cumulative_us
+            for record in records.values()
+            if record.parent is None and record.name.startswith(prefix)
+        )
+        / 1000
+    )
+
+
+def _imported_by_syncmcp(records: dict[str, ImportRecord], package: str) -> list[str]:
+    """列出由 syncmcp 模組直接匯入的某套件模組"""
+    return [
+        record.name
+        for record in records.values()
+        if (record.name == package or record.name.startswith(package + "."))
+        and record.parent is not None
+        and record.parent.startswith("syncmcp")
+    ]
+
+
+class TestImportTime:
+    """測試冷啟動匯入"""
+
+    def test_version_imports_only_click(self):
+        """syncmcp --version 不載入 rich、InquirerPy、mcp 或核心引擎"""
+        records = _import_profile("-m", "syncmcp", "--version")
+
+        for module in ("rich", "InquirerPy", "mcp", "syncmcp.core", "syncmcp.tui"):
+            assert module not in records, f"{module} 不應在 --version 時載入"
+        assert _total_ms(records, "syncmcp") < VERSION_BUDGET_MS
+
+    def test_mcp_server_startup(self):
+        """MCP Server 不載入 TUI，且 syncmcp 本身不匯入 rich"""
+        records = _import_profile("-c", "import syncmcp.cli, syncmcp.mcp.server")
+
+        assert "InquirerPy" not in records
+        assert "syncmcp.tui" not in records
+        assert _imported_by_syncmcp(records, "rich") == []
+        assert _total_ms(records, "syncmcp") < MCP_SERVER_BUDGET_MS
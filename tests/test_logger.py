@@ -0,0 +1,322 @@
+"""
+測試日誌系統（佇列寫出、延遲建立文件、調整級別、JSON 格式與 run_id、壓縮輪轉與清理）
+"""
+
+import gzip
+import json
+import logging
+import os
+import time
+
+import pytest
+
+from syncmcp.core.backup_manager import BackupManager
+from syncmcp.core.config_manager import ConfigManager
+from syncmcp.core.diff_engine import DiffEngine
+from syncmcp.core.sync_engine import SyncEngine, SyncStrategy
+from syncmcp.utils import logger as logger_module
+from syncmcp.utils.logger import (
+    SyncMCPLogger,
+    _LazyFileHandler,
+    current_run_id,
+    prune_logs,
+    run_context,
+)
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    return tmp_path / "logs"
+
+
+@pytest.fixture
+def sync_logger(log_dir):
+    instance = SyncMCPLogger(name="syncmcp-test", log_dir=log_dir)
+    yield instance
+    instance.close()
+
+
+class TestSyncMCPLogger:
+    """測試 SyncMCPLogger"""
+
+    def test_no_io_until_first_record(self, sync_logger, log_dir):
+        """建立 logger 時不建立目錄也不開啟文件"""
+        assert not log_dir.exists()
+
+        sync_logger.info("第一筆記錄")
+        sync_logger.flush()
+
+        [log_file] = log_dir.glob("syncmcp_*.log")
+        assert "第一筆記錄" in log_file.read_text(encoding="utf-8")
+
+    def test_exception_traceback_written(self, sync_logger, log_dir):
+        """異常的堆疊追蹤寫入文件"""
+        try:
+            raise RuntimeError("出錯了")
+        except RuntimeError:
+            sync_logger.exception("同步失敗")
+        sync_logger.flush()
+
+        text = next(log_dir.glob("syncmcp_*.log")).read_text(encoding="utf-8")
+        assert "同步失敗" in text
+        assert "RuntimeError: 出錯了" in text
+
+    def test_caller_does_not_wait_for_io(self, sync_logger, log_dir, monkeypatch):
+        """寫入文件很慢時，記錄日誌仍立即返回"""
+        original = _LazyFileHandler.emit
+
+        def slow_emit(self, record):
+            time.sleep(0.2)
+            original(self, record)
+
+        monkeypatch.setattr(_LazyFileHandler, "emit", slow_emit)
+
+        started = time.perf_counter()
+        for i in range(5):
+            sync_logger.info(f"記錄 {i}")
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.1
+        sync_logger.flush()
+        text = next(log_dir.glob("syncmcp_*.log")).read_text(encoding="utf-8")
+        assert "記錄 4" in text
+
+    def test_set_verbose_keeps_handlers(self, sync_logger):
+        """調整級別不重建 handlers"""
+        handlers = list(sync_logger.logger.handlers)
+
+        sync_logger.set_verbose(True)
+
+        assert sync_logger.logger.handlers == handlers
+        assert sync_logger.logger.level == logging.DEBUG
+        assert sync_logger.console_handler.level == logging.DEBUG
+
+        sync_logger.set_verbose(False)
+
+        assert sync_logger.logger.level == logging.INFO
+        assert sync_logger.console_handler.level == logging.WARNING
+
+    def test_console_writes_current_stderr(self, sync_logger, capsys):
+        """控制台輸出寫到當下的 sys.stderr"""
+        sync_logger.warning("注意")
+        sync_logger.flush()
+
+        assert "WARNING: 注意" in capsys.readouterr().err
+
+    def test_new_instance_replaces_previous(self, sync_logger, log_dir):
+        """同名的新實例停止舊實例，不重複輸出"""
+        replacement = SyncMCPLogger(name="syncmcp-test", log_dir=log_dir)
+        try:
+            assert sync_logger.logger.handlers == [replacement.queue_handler]
+        finally:
+            replacement.close()
+
+
+def _read_json_lines(log_dir) -> list[dict]:
+    [log_file] = log_dir.glob("syncmcp_*.jsonl")
+    return [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+
+
+class TestJsonFormat:
+    """測試 JSON 日誌格式"""
+
+    @pytest.fixture
+    def json_logger(self, log_dir):
+        instance = SyncMCPLogger(name="syncmcp-test", log_dir=log_dir, log_format="json")
+        yield instance
+        instance.close()
+
+    def test_one_object_per_line(self, json_logger, log_dir):
+        """每筆記錄一行 JSON，包含結構化欄位"""
+        json_logger.info("一般訊息")
+        json_logger.event("載入完成", phase="load", duration_ms=12.5, servers=3)
+        json_logger.flush()
+
+        plain, event = _read_json_lines(log_dir)
+        assert plain["msg"] == "一般訊息"
+        assert plain["level"] == "INFO"
+        assert plain["run_id"] is None
+        assert event["phase"] == "load"
+        assert event["duration_ms"] == 12.5
+        assert event["servers"] == 3
+
+    def test_run_id_from_context(self, json_logger, log_dir):
+        """run_context 中的記錄帶有同一個 run_id（由背景執行緒寫出時仍保留）"""
+        with run_context() as run_id:
+            assert current_run_id() == run_id
+            json_logger.info("第一筆")
+            json_logger.info("第二筆")
+        assert current_run_id() is None
+        json_logger.flush()
+
+        assert [entry["run_id"] for entry in _read_json_lines(log_dir)] == [run_id, run_id]
+
+    def test_exception_field(self, json_logger, log_dir):
+        """異常的堆疊追蹤放在 exc 欄位"""
+        try:
+            raise RuntimeError("出錯了")
+        except RuntimeError:
+            json_logger.exception("同步失敗")
+        json_logger.flush()
+
+        [entry] = _read_json_lines(log_dir)
+        assert "RuntimeError: 出錯了" in entry["exc"]
+
+    def test_switch_format(self, sync_logger, log_dir):
+        """更換格式後寫入 .jsonl 文件"""
+        sync_logger.info("文字")
+        sync_logger.set_log_format("json")
+        sync_logger.info("JSON")
+        sync_logger.flush()
+
+        assert "文字" in next(log_dir.glob("syncmcp_*.log")).read_text(encoding="utf-8")
+        assert [entry["msg"] for entry in _read_json_lines(log_dir)] == ["JSON"]
+
+    def test_unknown_format(self, sync_logger):
+        """未知格式拋出 ValueError"""
+        with pytest.raises(ValueError):
+            sync_logger.set_log_format("xml")
+
+
+class TestSyncSpans:
+    """測試同步記錄的各階段耗時"""
+
+    def test_sync_phases_logged(self, mock_all_configs, mock_syncmcp_dir, log_dir):
+        """同步的每個階段與摘要都帶有同一個 run_id 與耗時"""
+        engine = SyncEngine(
+            ConfigManager(), DiffEngine(), BackupManager(mock_syncmcp_dir / "backups")
+        )
+        engine.logger = SyncMCPLogger(name="syncmcp-test", log_dir=log_dir, log_format="json")
+        try:
+            result = engine.sync(SyncStrategy.AUTO, dry_run=False, create_backup=True)
+            engine.logger.flush()
+        finally:
+            engine.logger.close()
+
+        assert result.success
+        entries = _read_json_lines(log_dir)
+        assert {entry["run_id"] for entry in entries} == {result.run_id}
+
+        spans = [entry for entry in entries if entry.get("event") == "span"]
+        assert {"load", "diff", "backup", "write"} <= {span["phase"] for span in spans}
+        assert all(span["duration_ms"] >= 0 for span in spans)
+        load = next(span for span in spans if span["phase"] == "load")
+        assert load["clients"] == len(mock_all_configs)
+        assert {span["client"] for span in spans if span["phase"] == "write"} == set(
+            engine.config_manager.adapters
+        )
+
+        [summary] = [entry for entry in entries if entry.get("event") == "sync"]
+        assert summary["success"] is True
+        assert summary["strategy"] == "auto"
+        assert set(summary["phases_ms"]) >= {"load", "diff", "write"}
+
+
+def _record(message: str, created: float | None = None) -> logging.LogRecord:
+    record = logging.LogRecord("syncmcp-test", logging.INFO, __file__, 1, message, None, None)
+    if created is not None:
+        record.created = created
+    return record
+
+
+def _write_file(path, size: int, age_days: float = 0):
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age_days * 24 * 60 * 60
+    os.utime(path, (mtime, mtime))
+
+
+class TestRotation:
+    """測試壓縮輪轉與日誌目錄的大小上限"""
+
+    def test_rotated_files_compressed(self, log_dir):
+        """輪轉出的文件壓縮為 .gz，目前的文件保持未壓縮"""
+        handler = _LazyFileHandler(
+            log_dir, logging.Formatter("%(message)s"), max_bytes=200, backup_count=3
+        )
+        try:
+            for i in range(20):
+                handler.emit(_record(f"記錄 {i:02d} " + "-" * 40))
+        finally:
+            handler.close()
+
+        [current] = log_dir.glob("syncmcp_*.log")
+        backups = sorted(log_dir.glob("syncmcp_*.log.*"))
+        assert [path.name.removeprefix(current.name) for path in backups] == [
+            ".1.gz",
+            ".2.gz",
+            ".3.gz",
+        ]
+        newest_backup = gzip.decompress(backups[0].read_bytes()).decode("utf-8")
+        assert "記錄" in newest_backup
+        assert "記錄 19" in current.read_text(encoding="utf-8")
+
+    def test_total_size_capped(self, log_dir):
+        """所有日文件合計超過上限時刪除最舊的文件"""
+        log_dir.mkdir()
+        _write_file(log_dir / "syncmcp_20250101.log", 400, age_days=3)
+        _write_file(log_dir / "syncmcp_20250102.log.1.gz", 400, age_days=2)
+        _write_file(log_dir / "syncmcp_20250103.log", 400, age_days=1)
+
+        handler = _LazyFileHandler(
+            log_dir, logging.Formatter("%(message)s"), max_bytes=200, max_total_bytes=1000
+        )
+        try:
+            for i in range(10):
+                handler.emit(_record(f"記錄 {i} " + "-" * 40))
+        finally:
+            handler.close()
+
+        remaining = {path.name for path in log_dir.iterdir()}
+        assert "syncmcp_20250101.log" not in remaining
+        assert "syncmcp_20250103.log" in remaining
+        assert sum(path.stat().st_size for path in log_dir.iterdir()) <= 1000
+
+    def test_new_day_opens_new_file(self, log_dir):
+        """記錄的日期改變時寫入新的日文件"""
+        handler = _LazyFileHandler(log_dir, logging.Formatter("%(message)s"))
+        day = 24 * 60 * 60
+        try:
+            handler.emit(_record("昨天", time.time() - day))
+            handler.emit(_record("今天"))
+        finally:
+            handler.close()
+
+        assert len(list(log_dir.glob("syncmcp_*.log"))) == 2
+
+    def test_prune_keeps_excluded_and_recent(self, log_dir):
+        """清理刪除過期文件，不刪除排除的文件"""
+        log_dir.mkdir()
+        old = log_dir / "syncmcp_20240101.log"
+        active = log_dir / "syncmcp_20240102.log"
+        recent = log_dir / "syncmcp_20250101.log"
+        _write_file(old, 10, age_days=40)
+        _write_file(active, 10, age_days=40)
+        _write_file(recent, 10)
+
+        removed = prune_logs(log_dir, None, keep_days=30, exclude=(str(active),))
+
+        assert removed == [old]
+        assert active.exists() and recent.exists()
+
+
+class TestGlobalLogger:
+    """測試全局 logger"""
+
+    def test_set_verbose_reuses_instance(self, tmp_path, monkeypatch):
+        """set_verbose 不重建全局 logger"""
+        monkeypatch.setattr(logger_module, "_global_logger", None)
+        monkeypatch.setenv("HOME", str(tmp_path))
+
+        instance = logger_module.get_logger()
+        try:
+            logger_module.set_verbose(True)
+
+            assert logger_module.get_logger() is instance
+            assert instance.verbose is True
+            logger_module.set_verbose(False)
+            assert not (tmp_path / ".syncmcp").exists()
+        finally:
+            # 新實例取代了原本的全局 logger，之後的測試重新建立
+            instance.close()
+            monkeypatch.undo()
+            logger_module._global_logger = None
@@ -0,0 +1,102 @@
+"""
+測試 MCP Server 的 Streamable HTTP 模式（含本機負載測試）
+"""
+
+import asyncio
+import socket
+import time
+
+import click
+import pytest
+import uvicorn
+from mcp.client.session import ClientSession
+from mcp.client.streamable_http import streamable_http_client
+
+from syncmcp.cli import _parse_http_address
+from syncmcp.mcp.server import HTTP_PATH, create_http_app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+async def http_url(mock_all_configs):
+    """在背景啟動 HTTP 模式的 MCP Server"""
+    port = _free_port()
+    http_server = uvicorn.Server(
+        uvicorn.Config(create_http_app(), host="127.0.0.1", port=port, log_level="warning")
+    )
+    task = asyncio.create_task(http_server.serve())
+    while not http_server.started:
+        await asyncio.sleep(0.01)
+
+    yield f"http://127.0.0.1:{port}{HTTP_PATH}"
+
+    http_server.should_exit = True
+    await task
+
+
+async def _run_client(url: str, calls: int) -> list[str]:
+    """以獨立 session 連線並連續呼叫工具"""
+    async with streamable_http_client(url) as (read_stream, write_stream, _):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            results = await asyncio.gather(
+                *(session.call_tool("check_sync_status", {}) for _ in range(calls))
+            )
+            return [result.content[0].text for result in results]
+
+
+class TestHTTPTransport:
+    """測試 HTTP 傳輸"""
+
+    @pytest.mark.asyncio
+    async def test_single_client(self, http_url):
+        """單一客戶端可列出工具並呼叫"""
+        async with streamable_http_client(http_url) as (read_stream, write_stream, _):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                tools = await session.list_tools()
+                assert "sync_mcp_configs" in {tool.name for tool in tools.tools}
+
+                result = await session.call_tool("show_config_diff", {})
+                assert "配置差異分析" in result.content[0].text
+
+    @pytest.mark.asyncio
+    async def test_concurrent_clients_load(self, http_url):
+        """多個客戶端同時呼叫工具，全部成功且共用同一份快照"""
+        clients, calls = 10, 5
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(_run_client(http_url, calls) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+        texts = [text for client_results in results for text in client_results]
+        assert len(texts) == clients * calls
+        assert len(set(texts)) == 1  # 共用同一個快照的渲染結果
+        assert "MCP 配置狀態" in texts[0]
+        assert elapsed < 20
+
+
+class TestParseHTTPAddress:
+    """測試 --http 位址解析"""
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("127.0.0.1:8765", ("127.0.0.1", 8765)),
+            ("8765", ("127.0.0.1", 8765)),
+            (":9000", ("127.0.0.1", 9000)),
+            ("[::1]:8765", ("::1", 8765)),
+        ],
+    )
+    def test_valid(self, value, expected):
+        assert _parse_http_address(value) == expected
+
+    @pytest.mark.parametrize("value", ["localhost", "127.0.0.1:abc", "127.0.0.1:70000"])
+    def test_invalid(self, value):
+        with pytest.raises(click.BadParameter):
+            _parse_http_address(value)
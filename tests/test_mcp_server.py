@@ -2,13 +2,21 @@
 測試 MCP Server
 """
 
+import asyncio
+import json
+import sys
+import threading
+import time
 
 import pytest
-from mcp.types import TextContent, Tool
+from mcp.shared.memory import create_connected_server_and_client_session
+from mcp.types import ResourceUpdatedNotification, ServerNotification, TextContent, Tool
 
+from syncmcp.core.sync_engine import SyncEngine, SyncResult
 from syncmcp.mcp.server import (
     call_tool,
     list_tools,
+    server,
 )
 
 
@@ -21,7 +29,7 @@ class TestMCPServerTools:
         tools = await list_tools()
 
         assert isinstance(tools, list)
-        assert len(tools) == 6  # 更新為 6 個工具
+        assert len(tools) == 7
 
         tool_names = [t.name for t in tools]
         assert "sync_mcp_configs" in tool_names
@@ -30,6 +38,7 @@ class TestMCPServerTools:
         assert "suggest_conflict_resolution" in tool_names
         assert "get_setup_guide" in tool_names
         assert "troubleshoot_mcp" in tool_names
+        assert "edit_mcp_servers" in tool_names
 
     @pytest.mark.asyncio
     async def test_tool_schemas(self):
@@ -219,6 +228,103 @@ class TestMCPServerErrorHandling:
         assert "錯誤" in output or "失敗" in output or "Error" in output.lower() or len(output) > 0
 
 
+class TestTroubleshootTool:
+    """測試 troubleshoot_mcp 工具"""
+
+    @pytest.mark.asyncio
+    async def test_probes_named_server(self, mock_home_dir, tmp_path, monkeypatch):
+        """提供 mcp_name 時實際啟動該 MCP，並沿用快取結果"""
+        from syncmcp.core.health import HealthCache
+
+        cache = HealthCache(tmp_path / "health_cache.json")
+        monkeypatch.setattr(sys.modules[call_tool.__module__], "get_health_cache", lambda: cache)
+        (mock_home_dir / ".claude.json").write_text(
+            json.dumps(
+                {
+                    "mcpServers": {
+                        "broken": {
+                            "type": "stdio",
+                            "command": sys.executable,
+                            "args": ["-c", "import missing_dep"],
+                        }
+                    }
+                }
+            )
+        )
+
+        result = await call_tool("troubleshoot_mcp", {"mcp_name": "broken"})
+        text = result[0].text
+
+        assert "啟動檢查" in text
+        assert "No module named 'missing_dep'" in text
+        assert "Python 模組依賴缺失" in text
+
+        result = await call_tool("troubleshoot_mcp", {"mcp_name": "broken"})
+        assert "快取結果" in result[0].text
+
+    @pytest.mark.asyncio
+    async def test_unknown_server(self, mock_home_dir):
+        """找不到 MCP 時提示"""
+        result = await call_tool(
+            "troubleshoot_mcp", {"mcp_name": "nope", "error_message": "ENOENT"}
+        )
+        assert "沒有任何客戶端配置了 nope" in result[0].text
+
+
+class TestEditServersTool:
+    """測試 edit_mcp_servers 工具"""
+
+    @staticmethod
+    def _servers(client):
+        from syncmcp.core.config_manager import ConfigManager
+
+        path = ConfigManager().adapters[client].get_config_path()
+        return json.loads(path.read_text())["mcpServers"]
+
+    @pytest.mark.asyncio
+    async def test_operations_applied_together(self, mock_all_configs, mock_syncmcp_dir):
+        """所有操作在同一個交易中寫入"""
+        result = await call_tool(
+            "edit_mcp_servers",
+            {
+                "operations": [
+                    {"op": "add", "name": "fs", "config": {"command": "npx", "args": ["fs"]}},
+                    {"op": "set", "name": "fs", "fields": {"env": {"A": "1"}}},
+                ],
+                "create_backup": False,
+            },
+        )
+
+        assert "MCP 修改完成" in result[0].text
+        for client in ("claude-code", "gemini"):
+            assert self._servers(client)["fs"]["env"] == {"A": "1"}
+
+    @pytest.mark.asyncio
+    async def test_failure_writes_nothing(self, mock_all_configs, mock_syncmcp_dir):
+        """任一操作失敗時不寫入"""
+        before = self._servers("claude-code")
+
+        result = await call_tool(
+            "edit_mcp_servers",
+            {
+                "operations": [
+                    {"op": "add", "name": "fs", "config": {"command": "npx"}},
+                    {"op": "remove", "name": "nope"},
+                ]
+            },
+        )
+
+        assert "第 2 個操作" in result[0].text
+        assert self._servers("claude-code") == before
+
+    @pytest.mark.asyncio
+    async def test_rejects_read_operations(self, mock_all_configs):
+        """只接受修改操作"""
+        result = await call_tool("edit_mcp_servers", {"operations": [{"op": "status"}]})
+
+        assert "❌" in result[0].text
+
+
 class TestMCPServerIntegration:
     """測試 MCP Server 整合功能"""
 
@@ -263,3 +369,222 @@ class TestMCPServerIntegration:
                 assert item.type == "text"
                 assert isinstance(item.text, str)
                 assert len(item.text) > 0
+
+
+class _SlowSync:
+    """替代 SyncEngine.sync：阻塞一段時間並記錄同時執行的數量"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def install(self, monkeypatch):
+        monkeypatch.setattr(SyncEngine, "sync", lambda engine, **kwargs: self(**kwargs))
+        return self
+
+    def __call__(self, strategy, dry_run=False, create_backup=True, progress=None):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return SyncResult(success=True, changes={}, warnings=[], errors=[], backup_path=None)
+
+
+class TestMCPServerConcurrency:
+    """測試阻塞工作不會卡住事件迴圈"""
+
+    @pytest.mark.asyncio
+    async def test_status_latency_during_slow_sync(self, mock_all_configs, monkeypatch):
+        """同步進行中，唯讀工具仍能即時回應"""
+        slow_sync = _SlowSync(delay=0.5).install(monkeypatch)
+
+        await call_tool("check_sync_status", {})  # 預先載入快照
+
+        sync_task = asyncio.create_task(call_tool("sync_mcp_configs", {"dry_run": False}))
+        await asyncio.sleep(0.05)
+        assert slow_sync.active == 1
+
+        start = time.perf_counter()
+        result = await call_tool("check_sync_status", {})
+        latency = time.perf_counter() - start
+
+        assert "MCP 配置狀態" in result[0].text
+        assert latency < 0.1
+        assert not sync_task.done()
+
+        await sync_task
+
+    @pytest.mark.asyncio
+    async def test_mutating_tools_are_serialized(self, mock_all_configs, monkeypatch):
+        """寫入配置的工具依序執行"""
+        slow_sync = _SlowSync(delay=0.1).install(monkeypatch)
+
+        await asyncio.gather(
+            call_tool("sync_mcp_configs", {"create_backup": True}),
+            call_tool("sync_mcp_configs", {"create_backup": False}),
+        )
+
+        assert slow_sync.calls == 2
+        assert slow_sync.max_active == 1
+
+    @pytest.mark.asyncio
+    async def test_dry_run_answered_from_snapshot(self, mock_all_configs, monkeypatch):
+        """dry-run 由快照產生預覽，不執行同步也不等待寫入鎖"""
+        slow_sync = _SlowSync(delay=0.5).install(monkeypatch)
+
+        sync_task = asyncio.create_task(call_tool("sync_mcp_configs", {}))
+        await asyncio.sleep(0.05)
+
+        start = time.perf_counter()
+        result = await call_tool("sync_mcp_configs", {"dry_run": True})
+
+        assert time.perf_counter() - start < 0.1
+        assert "Dry Run" in result[0].text
+        assert slow_sync.calls == 1
+
+        await sync_task
+
+
+class TestSyncCoalescing:
+    """測試同步請求合併"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_sync(self, mock_all_configs, monkeypatch):
+        """同時到達的相同同步請求只執行一次"""
+        slow_sync = _SlowSync(delay=0.1).install(monkeypatch)
+
+        results = await asyncio.gather(*(call_tool("sync_mcp_configs", {}) for _ in range(5)))
+
+        assert slow_sync.calls == 1
+        assert len({result[0].text for result in results}) == 1
+
+    @pytest.mark.asyncio
+    async def test_queued_request_is_joined(self, mock_all_configs, monkeypatch):
+        """排隊中的同步被後來的相同請求共用"""
+        slow_sync = _SlowSync(delay=0.1).install(monkeypatch)
+
+        first = asyncio.create_task(call_tool("sync_mcp_configs", {"create_backup": False}))
+        await asyncio.sleep(0.02)
+        # first 執行中；以下兩個請求排在寫入鎖之後，應合併為一次
+        queued = [asyncio.create_task(call_tool("sync_mcp_configs", {})) for _ in range(2)]
+        await asyncio.gather(first, *queued)
+
+        assert slow_sync.calls == 2
+        assert slow_sync.max_active == 1
+
+    @pytest.mark.asyncio
+    async def test_later_request_runs_new_sync(self, mock_all_configs, monkeypatch):
+        """前一次同步完成後的請求會重新執行"""
+        slow_sync = _SlowSync(delay=0.01).install(monkeypatch)
+
+        await call_tool("sync_mcp_configs", {})
+        await call_tool("sync_mcp_configs", {})
+
+        assert slow_sync.calls == 2
+
+
+class TestSyncProgress:
+    """測試同步進度通知"""
+
+    @pytest.mark.asyncio
+    async def test_progress_notifications(self, mock_all_configs, mock_syncmcp_dir):
+        """請求帶有 progressToken 時轉發同步階段事件"""
+        updates = []
+
+        async def on_progress(progress, total, message):
+            updates.append((progress, total, message))
+
+        async with create_connected_server_and_client_session(server) as client:
+            result = await client.call_tool(
+                "sync_mcp_configs", {"create_backup": False}, progress_callback=on_progress
+            )
+
+        assert "同步完成" in result.content[0].text
+        assert updates
+        progress_values = [progress for progress, _, _ in updates]
+        assert progress_values == sorted(progress_values)
+        assert updates[-1][0] == updates[-1][1]
+
+
+class TestResources:
+    """測試 MCP 資源與訂閱"""
+
+    @pytest.mark.asyncio
+    async def test_list_and_read_resources(self, mock_all_configs):
+        """列出並讀取狀態、差異和客戶端資源"""
+        async with create_connected_server_and_client_session(server) as client:
+            capabilities = client.get_server_capabilities()
+            assert capabilities.resources.subscribe is True
+
+            listed = await client.list_resources()
+            uris = {str(resource.uri) for resource in listed.resources}
+            assert {"syncmcp://status", "syncmcp://diff", "syncmcp://clients/claude-code"} <= uris
+
+            status = json.loads((await client.read_resource("syncmcp://status")).contents[0].text)
+            assert "filesystem" in status["clients"]["claude-code"]["servers"]
+
+            claude = json.loads(
+                (await client.read_resource("syncmcp://clients/claude-code")).contents[0].text
+            )
+            assert claude["mcpServers"]["filesystem"]["command"] == "npx"
+
+            diff = json.loads((await client.read_resource("syncmcp://diff")).contents[0].text)
+            assert "statistics" in diff
+
+    @pytest.mark.asyncio
+    async def test_subscription_pushes_updates(self, mock_all_configs):
+        """訂閱後修改配置文件會收到 resources/updated"""
+        updated = asyncio.Queue()
+
+        async def on_message(message):
+            if isinstance(message, ServerNotification) and isinstance(
+                message.root, ResourceUpdatedNotification
+            ):
+                updated.put_nowait(str(message.root.params.uri))
+
+        async with create_connected_server_and_client_session(
+            server, message_handler=on_message
+        ) as client:
+            await client.subscribe_resource("syncmcp://clients/claude-code")
+
+            claude_path = mock_all_configs["claude-code"]
+            data = json.loads(claude_path.read_text())
+            data["mcpServers"]["new-mcp"] = {"type": "stdio", "command": "new"}
+            claude_path.write_text(json.dumps(data))
+
+            uri = await asyncio.wait_for(updated.get(), timeout=3)
+            assert uri == "syncmcp://clients/claude-code"
+
+            await client.unsubscribe_resource("syncmcp://clients/claude-code")
+
+    @pytest.mark.asyncio
+    async def test_unrelated_rewrite_is_not_pushed(self, mock_all_configs):
+        """文件改寫但 MCP 未變時不推送"""
+        updated = asyncio.Queue()
+
+        async def on_message(message):
+            if isinstance(message, ServerNotification) and isinstance(
+                message.root, ResourceUpdatedNotification
+            ):
+                updated.put_nowait(str(message.root.params.uri))
+
+        async with create_connected_server_and_client_session(
+            server, message_handler=on_message
+        ) as client:
+            await client.subscribe_resource("syncmcp://clients/claude-code")
+
+            claude_path = mock_all_configs["claude-code"]
+            data = json.loads(claude_path.read_text())
+            data["numStartups"] = 42
+            claude_path.write_text(json.dumps(data))
+
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(updated.get(), timeout=0.5)
+
+            await client.unsubscribe_resource("syncmcp://clients/claude-code")
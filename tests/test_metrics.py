@@ -0,0 +1,208 @@
+"""
+測試指標匯出（同步累計數量、差異、探測結果、存儲大小與輸出格式）
+"""
+
+import pytest
+from click.testing import CliRunner
+
+from syncmcp.cli import cli
+from syncmcp.core.health import ProbeResult, ProbeStatus
+from syncmcp.daemon.metrics import MetricFamily, collect_metrics, render_metrics, write_metrics
+from syncmcp.daemon.monitor import Monitor
+from syncmcp.utils.history import SyncHistoryManager
+
+
+@pytest.fixture
+def history(tmp_path):
+    return SyncHistoryManager(tmp_path / "history.json")
+
+
+def _samples(families: list[MetricFamily]) -> dict[tuple, float]:
+    """(樣本名稱, 排序後的標籤) -> 數值"""
+    return {
+        (family.name + suffix, tuple(sorted(labels.items()))): value
+        for family in families
+        for suffix, labels, value in family.samples
+    }
+
+
+def _collect(history, tmp_path, **kwargs) -> dict[tuple, float]:
+    kwargs.setdefault("drift", {})
+    kwargs.setdefault("probes", [])
+    return _samples(collect_metrics(history=history, backup_dir=tmp_path / "backups", **kwargs))
+
+
+class TestHistoryTotals:
+    """測試同步歷史的累計數量"""
+
+    def test_totals_not_limited_by_history(self, history):
+        """歷史記錄只保留 100 條，累計數量持續增加"""
+        for i in range(105):
+            history.add_entry(i % 5 != 0, "auto", {"gemini": ["+ a"]}, [], [], None, 1.0)
+
+        totals = history.get_totals()
+
+        assert len(history.get_history(limit=0)) == 100
+        assert totals["syncs"] == {"success": 84, "failure": 21}
+        assert totals["changes"] == 105
+        assert totals["duration"]["count"] == 105
+
+    def test_totals_seeded_from_existing_history(self, history):
+        """升級前已有的歷史記錄計入累計數量"""
+        history.add_entry(True, "auto", {}, [], [], phases={"load": 0.5})
+        history.totals_file.unlink()
+
+        history.add_entry(True, "auto", {}, [], [], phases={"load": 0.25})
+
+        assert history.get_totals()["phases"]["load"] == {"sum": 0.75, "count": 2}
+        assert history.get_last_sync().phases == {"load": 0.25}
+
+    def test_totals_written_atomically(self, history, monkeypatch):
+        """寫入中斷時保留原本的累計數量，不留下不完整的文件"""
+        history.add_entry(True, "auto", {"gemini": ["+ a"]}, [], [])
+
+        def fail_replace(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr("syncmcp.utils.history.os.replace", fail_replace)
+        history._save_totals({"syncs": {"success": 99, "failure": 0}})
+
+        assert history.get_totals()["syncs"] == {"success": 1, "failure": 0}
+
+
+class TestCollect:
+    """測試指標收集"""
+
+    def test_sync_metrics(self, history, tmp_path):
+        """同步次數、結果與各階段耗時"""
+        history.add_entry(True, "auto", {"gemini": ["+ a", "+ b"]}, [], [], None, 2.0, {"load": 1})
+        history.add_entry(False, "auto", {}, [], ["失敗"], None, 1.0, {"load": 3})
+
+        samples = _collect(history, tmp_path)
+
+        assert samples[("syncmcp_syncs_total", (("outcome", "success"),))] == 1
+        assert samples[("syncmcp_syncs_total", (("outcome", "failure"),))] == 1
+        assert samples[("syncmcp_sync_changes_total", ())] == 2
+        assert samples[("syncmcp_sync_phase_duration_seconds_sum", (("phase", "load"),))] == 4
+        assert samples[("syncmcp_sync_phase_duration_seconds_count", (("phase", "load"),))] == 2
+        assert samples[("syncmcp_last_sync_success", ())] == 0
+        assert samples[("syncmcp_history_entries", ())] == 2
+
+    def test_drift_and_probes(self, history, tmp_path):
+        """各客戶端的差異與每個 MCP 最近一次的探測結果"""
+        probes = [
+            ProbeResult("fs", ProbeStatus.ERROR, checked_at=100.0),
+            ProbeResult("fs", ProbeStatus.OK, latency_ms=250.0, checked_at=200.0),
+            ProbeResult("remote", ProbeStatus.SKIPPED),
+        ]
+
+        samples = _collect(
+            history,
+            tmp_path,
+            drift={"gemini": {"added": 2, "removed": 0, "modified": 1}},
+            probes=probes,
+        )
+
+        assert samples[("syncmcp_client_drift", (("client", "gemini"), ("status", "added")))] == 2
+        assert samples[("syncmcp_mcp_up", (("mcp", "fs"),))] == 1
+        assert samples[("syncmcp_mcp_probe_latency_seconds", (("mcp", "fs"),))] == 0.25
+        assert samples[("syncmcp_mcp_probe_status", (("mcp", "fs"), ("status", "error")))] == 0
+        assert not any(labels == (("mcp", "remote"),) for _name, labels in samples)
+
+    def test_backup_store_size(self, history, tmp_path):
+        """備份數量與大小"""
+        backup = tmp_path / "backups" / "backup_20250101_000000"
+        backup.mkdir(parents=True)
+        (backup / "gemini.json").write_bytes(b"x" * 100)
+        (backup / "metadata.json").write_bytes(b"y" * 20)
+
+        samples = _collect(history, tmp_path)
+
+        assert samples[("syncmcp_backups", ())] == 1
+        assert samples[("syncmcp_backup_store_bytes", ())] == 120
+
+
+class TestRender:
+    """測試輸出格式"""
+
+    @pytest.fixture
+    def families(self):
+        counter = MetricFamily("syncmcp_syncs", "counter", "Syncs.")
+        counter.add(3, "_total", outcome="success")
+        gauge = MetricFamily("syncmcp_mcp_up", "gauge", "Up.")
+        gauge.add(1, mcp='quote"back\\slash')
+        return [counter, gauge]
+
+    def test_openmetrics(self, families):
+        """OpenMetrics：counter 名稱不含 _total，以 # EOF 結尾"""
+        text = render_metrics(families)
+
+        assert "# TYPE syncmcp_syncs counter\n" in text
+        assert 'syncmcp_syncs_total{outcome="success"} 3\n' in text
+        assert 'syncmcp_mcp_up{mcp="quote\\"back\\\\slash"} 1\n' in text
+        assert text.endswith("# EOF\n")
+
+    def test_prometheus(self, families):
+        """Prometheus 文字格式：counter 名稱包含 _total，沒有 # EOF"""
+        text = render_metrics(families, "prometheus")
+
+        assert "# TYPE syncmcp_syncs_total counter\n" in text
+        assert "# EOF" not in text
+
+    def test_unknown_format(self, families):
+        """未知格式拋出 ValueError"""
+        with pytest.raises(ValueError):
+            render_metrics(families, "json")
+
+    def test_write_replaces_file(self, tmp_path):
+        """寫入後不留下臨時文件"""
+        path = tmp_path / "textfile" / "syncmcp.prom"
+
+        write_metrics(path, "a 1\n")
+        write_metrics(path, "a 2\n")
+
+        assert path.read_text() == "a 2\n"
+        assert [p.name for p in path.parent.iterdir()] == ["syncmcp.prom"]
+
+
+class TestMetricsOutputs:
+    """測試 metrics 命令與背景監控的指標文件"""
+
+    @pytest.fixture(autouse=True)
+    def _reset_history(self, monkeypatch):
+        monkeypatch.setattr("syncmcp.utils.history._history_manager", None)
+
+    def test_cli_stdout(self, mock_all_configs, mock_syncmcp_dir):
+        """未執行監控時在本程序內計算差異並輸出"""
+        result = CliRunner().invoke(cli, ["metrics"])
+
+        assert result.exit_code == 0, result.output
+        assert 'syncmcp_client_drift{client="claude-code"' in result.output
+        assert result.output.endswith("# EOF\n")
+
+    def test_cli_output_file(self, mock_all_configs, mock_syncmcp_dir, tmp_path):
+        """--output 寫入文件"""
+        path = tmp_path / "syncmcp.prom"
+
+        result = CliRunner().invoke(cli, ["metrics", "-o", str(path), "--format", "prometheus"])
+
+        assert result.exit_code == 0, result.output
+        assert "# TYPE syncmcp_syncs_total counter" in path.read_text()
+
+    def test_monitor_writes_metrics(self, mock_all_configs, mock_syncmcp_dir, tmp_path):
+        """監控更新狀態時寫出指標文件（差異取自其已載入的配置）"""
+        path = tmp_path / "syncmcp.prom"
+        monitor = Monitor(
+            autosync=False,
+            probe=False,
+            serve=False,
+            status_file=tmp_path / "status.json",
+            metrics_file=path,
+        )
+        monitor._refresh_clients()
+
+        monitor._write_status()
+
+        text = path.read_text()
+        assert 'syncmcp_client_drift{client="gemini"' in text
+        assert text.endswith("# EOF\n")
@@ -0,0 +1,303 @@
+"""
+測試背景監控 (daemon)
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from syncmcp.cli import cli
+from syncmcp.core.health import ProbeResult, ProbeStatus, ProbeTarget
+from syncmcp.daemon.autosync import AutoSync
+from syncmcp.daemon.monitor import ProbeSchedule
+from syncmcp.daemon.process import read_pid
+from syncmcp.daemon.status import (
+    file_stat_signature,
+    load_fresh_status,
+    read_status,
+    write_status,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _stdio_target(name: str, *args: str) -> ProbeTarget:
+    return ProbeTarget(name, {"command": sys.executable, "args": list(args)})
+
+
+class TestProbeSchedule:
+    """測試探測排程"""
+
+    def test_new_targets_due_immediately(self):
+        """新的 MCP 立即探測，遠端 MCP 不排程"""
+        schedule = ProbeSchedule(clock=_Clock())
+        keyed = schedule.update([_stdio_target("a"), ProbeTarget("web", {"url": "https://x"})])
+
+        assert [target.name for _key, target in schedule.due(keyed)] == ["a"]
+
+    def test_exponential_backoff(self):
+        """連續失敗時重試延遲加倍，直到上限"""
+        clock = _Clock()
+        schedule = ProbeSchedule(interval=900, retry_base=30, retry_max=100, clock=clock)
+        [(key, target)] = schedule.update([_stdio_target("a")])
+
+        delays = []
+        for _ in range(4):
+            schedule.record(key, ProbeResult("a", ProbeStatus.ERROR))
+            delays.append(schedule.next_due() - clock.now)
+
+        assert delays == [30, 60, 100, 100]
+        assert schedule.due([(key, target)]) == []
+
+    def test_success_resets_backoff(self):
+        """成功後恢復正常間隔"""
+        clock = _Clock()
+        schedule = ProbeSchedule(interval=900, retry_base=30, clock=clock)
+        [(key, _target)] = schedule.update([_stdio_target("a")])
+
+        schedule.record(key, ProbeResult("a", ProbeStatus.TIMEOUT))
+        schedule.record(key, ProbeResult("a", ProbeStatus.OK))
+
+        [state] = schedule.states
+        assert state.failures == 0
+        assert state.next_at == clock.now + 900
+
+    def test_changed_config_is_new_target(self):
+        """配置改變時立即重新探測，已移除的 MCP 不再排程"""
+        clock = _Clock()
+        schedule = ProbeSchedule(clock=clock)
+        [(key, _target)] = schedule.update([_stdio_target("a")])
+        schedule.record(key, ProbeResult("a", ProbeStatus.OK))
+
+        keyed = schedule.update([_stdio_target("a", "--changed")])
+
+        assert len(schedule.states) == 1
+        assert len(schedule.due(keyed)) == 1
+
+
+class TestAutoSync:
+    """測試自動同步"""
+
+    @pytest.fixture
+    def autosync(self, mock_claude_code_config, mock_syncmcp_dir):
+        autosync = AutoSync(debounce=0.2, create_backup=False, poll_interval=0.1)
+        autosync.start()
+        yield autosync
+        autosync.stop()
+
+    @staticmethod
+    def _edit(path, name):
+        data = json.loads(path.read_text())
+        data["mcpServers"][name] = {"type": "stdio", "command": "npx", "args": [name]}
+        path.write_text(json.dumps(data))
+
+    def test_burst_coalesced_into_one_sync(self, autosync, mock_claude_code_config):
+        """連續多次保存只觸發一次同步"""
+        stop = threading.Event()
+        for i in range(3):
+            self._edit(mock_claude_code_config, f"new-{i}")
+            time.sleep(0.05)
+
+        assert autosync.wait_due(stop, 5)
+        changed, result = autosync.run_pending()
+
+        assert changed == {"claude-code"}
+        assert result.success
+        assert set(result.written) == set(autosync.paths) - {"claude-code"}
+        assert not autosync.wait_due(stop, 0.1) or autosync.run_pending()[1] is None
+
+    def test_ignores_own_writes(self, autosync, mock_claude_code_config):
+        """同步自己寫入造成的事件不會再次觸發同步"""
+        stop = threading.Event()
+        self._edit(mock_claude_code_config, "new")
+        assert autosync.wait_due(stop, 5)
+        assert autosync.run_pending()[1] is not None
+
+        # 同步寫入了其他客戶端，這些事件在防抖後應被忽略
+        assert autosync.wait_due(stop, 5)
+        changed, result = autosync.run_pending()
+        assert changed and "claude-code" not in changed
+        assert result is None
+
+    def test_external_change_after_sync(self, autosync, mock_claude_code_config):
+        """同步後的外部修改仍會觸發同步"""
+        stop = threading.Event()
+        self._edit(mock_claude_code_config, "first")
+        autosync.wait_due(stop, 5)
+        autosync.run_pending()
+        autosync.wait_due(stop, 5)
+        autosync.run_pending()
+
+        self._edit(mock_claude_code_config, "second")
+        assert autosync.wait_due(stop, 5)
+        _changed, result = autosync.run_pending()
+
+        assert result is not None and result.success
+
+    def test_ignores_changes_outside_mcp_section(self, autosync, mock_claude_code_config):
+        """只改動 mcpServers 以外的內容不觸發同步"""
+        stop = threading.Event()
+        data = json.loads(mock_claude_code_config.read_text())
+        data["numStartups"] = 42
+        mock_claude_code_config.write_text(json.dumps(data))
+
+        assert autosync.wait_due(stop, 5)
+        changed, result = autosync.run_pending()
+
+        assert changed == {"claude-code"}
+        assert result is None
+
+    def test_removal_propagates_from_changed_client(self, mock_all_configs, mock_syncmcp_dir):
+        """以被修改的客戶端為來源，刪除的 MCP 也會同步到其他客戶端"""
+        autosync = AutoSync(debounce=0.2, create_backup=False, poll_interval=0.1)
+        autosync.start()
+        try:
+            stop = threading.Event()
+            self._edit(mock_all_configs["claude-code"], "temp")
+            autosync.wait_due(stop, 5)
+            autosync.run_pending()
+            autosync.wait_due(stop, 5)
+            autosync.run_pending()
+
+            path = autosync.paths["gemini"]
+            data = json.loads(path.read_text())
+            del data["mcpServers"]["temp"]
+            path.write_text(json.dumps(data))
+            assert autosync.wait_due(stop, 5)
+            changed, result = autosync.run_pending()
+        finally:
+            autosync.stop()
+
+        assert changed == {"gemini"}
+        assert result.success
+        code = json.loads(mock_all_configs["claude-code"].read_text())
+        assert "temp" not in code["mcpServers"]
+
+    def test_wait_returns_on_stop(self, autosync):
+        """stop 被設定後 wait_due 立即返回"""
+        stop = threading.Event()
+        threading.Timer(0.1, lambda: (stop.set(), autosync.wake())).start()
+
+        started = time.perf_counter()
+        assert not autosync.wait_due(stop, 10)
+        assert time.perf_counter() - started < 5
+
+
+class TestStatusFile:
+    """測試監控狀態文件"""
+
+    @pytest.fixture
+    def status_file(self, mock_claude_code_config, tmp_path):
+        path = tmp_path / "monitor_status.json"
+        clients = {
+            "claude-code": {
+                "path": str(mock_claude_code_config),
+                "mcp_count": 42,
+                "last_modified": None,
+                "exists": True,
+                "signature": file_stat_signature(mock_claude_code_config),
+            }
+        }
+        write_status({"pid": os.getpid(), "clients": clients}, path)
+        return path
+
+    def test_fresh_status(self, status_file):
+        """監控執行中且配置未變更時有效"""
+        data = load_fresh_status(status_file)
+        assert data["clients"]["claude-code"]["mcp_count"] == 42
+
+    def test_stale_after_config_change(self, status_file, mock_claude_code_config):
+        """配置文件變更後失效"""
+        mock_claude_code_config.write_text('{"mcpServers": {}}  ')
+        assert load_fresh_status(status_file) is None
+
+    def test_stale_when_monitor_gone(self, status_file):
+        """監控進程已結束時失效"""
+        data = json.loads(status_file.read_text())
+        data["pid"] = 2**22 + 12345
+        status_file.write_text(json.dumps(data))
+        assert load_fresh_status(status_file) is None
+
+
+class TestMonitorCommands:
+    """測試 monitor 命令"""
+
+    @pytest.fixture
+    def runner(self):
+        return CliRunner()
+
+    def test_status_reads_monitor_file(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """背景監控的狀態有效時 status 直接使用"""
+        clients = {
+            "claude-code": {
+                "path": str(mock_claude_code_config),
+                "mcp_count": 42,
+                "last_modified": None,
+                "exists": True,
+                "signature": file_stat_signature(mock_claude_code_config),
+            }
+        }
+        write_status({"pid": os.getpid(), "clients": clients, "health": None})
+
+        result = runner.invoke(cli, ["status", "--format", "json"])
+
+        assert result.exit_code == 0
+        assert '"mcp_count": 42' in result.output
+        assert "signature" not in result.output
+
+    def test_watch_help(self, runner):
+        """watch 命令可用"""
+        result = runner.invoke(cli, ["watch", "--help"])
+
+        assert result.exit_code == 0
+        assert "--debounce" in result.output
+
+    def test_monitor_status_not_running(self, runner, mock_syncmcp_dir):
+        """未執行時提示如何啟動"""
+        result = runner.invoke(cli, ["monitor", "status"])
+
+        assert result.exit_code == 0
+        assert "未在執行" in result.output
+
+    def test_start_and_stop(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """在背景啟動、自動同步、停止"""
+        result = runner.invoke(
+            cli, ["monitor", "start", "--debounce", "0.2", "--no-probe", "--no-backup"]
+        )
+        assert result.exit_code == 0, result.output
+        pid_file = mock_syncmcp_dir / "monitor.pid"
+        try:
+            assert read_pid(pid_file) is not None
+
+            data = json.loads(mock_claude_code_config.read_text())
+            data["mcpServers"]["added"] = {"type": "stdio", "command": "npx"}
+            mock_claude_code_config.write_text(json.dumps(data))
+
+            deadline = time.monotonic() + 10
+            status = {}
+            while time.monotonic() < deadline:
+                status = read_status() or {}
+                if status.get("sync_count"):
+                    break
+                time.sleep(0.1)
+            assert status["sync_count"] == 1
+            assert status["last_sync"]["trigger"] == ["claude-code"]
+
+            result = runner.invoke(cli, ["monitor", "status"])
+            assert "執行中" in result.output
+        finally:
+            result = runner.invoke(cli, ["monitor", "stop"])
+
+        assert "已停止" in result.output
+        assert read_pid(pid_file) is None
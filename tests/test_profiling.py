@@ -0,0 +1,101 @@
+"""
+測試命令效能分析 (--profile)
+"""
+
+import pstats
+
+import pytest
+from click.testing import CliRunner
+
+from syncmcp.cli import cli
+from syncmcp.utils import CommandProfiler
+
+
+def _busy():
+    return sorted(str(i) * 3 for i in range(20000))
+
+
+class TestCommandProfiler:
+    """測試效能分析器"""
+
+    def test_cpu_writes_pstats(self, tmp_path):
+        """cpu 模式寫出可由 pstats 讀取的文件"""
+        profiler = CommandProfiler("cpu", "sync", output_dir=tmp_path)
+        profiler.start()
+        _busy()
+        report = profiler.stop()
+
+        assert report.path.parent == tmp_path
+        assert report.path.name.endswith("_sync_cpu.pstats")
+        assert any("_busy" in line for line in report.summary)
+        stats = pstats.Stats(str(report.path))
+        assert any(function == "_busy" for _, _, function in stats.stats)
+
+    def test_mem_writes_report(self, tmp_path):
+        """mem 模式寫出配置最多的位置"""
+        profiler = CommandProfiler("mem", "sync", output_dir=tmp_path)
+        profiler.start()
+        data = _busy()
+        report = profiler.stop()
+
+        assert data
+        assert report.path.suffix == ".txt"
+        assert "峰值" in report.summary[1]
+        assert "test_profiling.py" in report.path.read_text(encoding="utf-8")
+
+    def test_unknown_mode(self, tmp_path):
+        """未知的模式"""
+        with pytest.raises(ValueError):
+            CommandProfiler("disk", output_dir=tmp_path)
+
+
+class TestProfileOption:
+    """測試 --profile 選項"""
+
+    @pytest.fixture
+    def runner(self):
+        return CliRunner()
+
+    def test_default_mode_is_cpu(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """省略模式時使用 cpu，報告寫入 ~/.syncmcp/profiles"""
+        result = runner.invoke(cli, ["--profile", "status", "--format", "json"])
+
+        assert result.exit_code == 0, result.output
+        profiles = list((mock_syncmcp_dir / "profiles").glob("*_status_cpu.pstats"))
+        assert len(profiles) == 1
+        # 摘要寫到 stderr，不混入標準輸出
+        assert '"mcp_count": 2' in result.stdout
+        assert "效能分析" not in result.stdout
+        assert "效能分析 (cpu)" in result.stderr
+
+    def test_default_mode_after_option_value(
+        self, runner, mock_claude_code_config, mock_syncmcp_dir
+    ):
+        """其他選項的值（--log-format json）之後的 --profile 仍可省略模式"""
+        result = runner.invoke(cli, ["--log-format", "json", "--profile", "status"])
+
+        assert result.exit_code == 0, result.output
+        assert list((mock_syncmcp_dir / "profiles").glob("*_status_cpu.pstats"))
+
+    def test_mem_mode(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """--profile=mem 寫出記憶體報告"""
+        result = runner.invoke(cli, ["--profile=mem", "list", "claude-code"])
+
+        assert result.exit_code == 0, result.output
+        assert list((mock_syncmcp_dir / "profiles").glob("*_list_mem.txt"))
+        assert "峰值" in result.stderr
+
+    def test_report_written_when_command_fails(
+        self, runner, mock_claude_code_config, mock_syncmcp_dir
+    ):
+        """命令失敗時仍寫出報告"""
+        result = runner.invoke(cli, ["--profile", "cpu", "server", "rm", "nope"])
+
+        assert result.exit_code == 1
+        assert list((mock_syncmcp_dir / "profiles").glob("*_server_cpu.pstats"))
+
+    def test_without_profile(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """未使用 --profile 時不寫出任何文件"""
+        runner.invoke(cli, ["status"])
+
+        assert not (mock_syncmcp_dir / "profiles").exists()
@@ -0,0 +1,164 @@
+"""
+測試常駐查詢服務 (daemon.server / daemon.client) 與共用查詢 (core.queries)
+"""
+
+import json
+import socket
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from syncmcp.cli import cli
+from syncmcp.core.queries import local_query, run_query
+from syncmcp.core.snapshot import SnapshotCache
+from syncmcp.daemon.client import query
+from syncmcp.daemon.server import QueryServer
+
+
+@pytest.fixture
+def server(mock_claude_code_config, mock_syncmcp_dir):
+    """在預設 socket 路徑上執行的查詢服務"""
+    query_server = QueryServer(
+        SnapshotCache(watch=False), handlers={"monitor": lambda params: {"pid": 4242}}
+    )
+    query_server.start()
+    yield query_server
+    query_server.close()
+
+
+class TestQueries:
+    """測試共用查詢"""
+
+    def test_status(self, mock_claude_code_config):
+        """狀態包含路徑、MCP 數量與是否存在"""
+        status = local_query("status")
+
+        assert status["claude-code"]["mcp_count"] == 2
+        assert status["claude-code"]["exists"] is True
+        assert status["claude-code"]["path"] == str(mock_claude_code_config)
+
+    def test_list_is_plain_json(self, mock_claude_code_config):
+        """列表結果可直接 JSON 序列化"""
+        configs = local_query("list")
+
+        assert json.loads(json.dumps(configs)) == configs
+        assert configs["claude-code"]["mcpServers"]["filesystem"]["command"] == "npx"
+
+    def test_memoized_per_snapshot(self, mock_claude_code_config):
+        """同一快照的相同查詢只計算一次"""
+        snapshot = SnapshotCache(watch=False).get()
+
+        assert run_query(snapshot, "diff") is run_query(snapshot, "diff")
+
+    def test_unknown_query(self, mock_claude_code_config):
+        """未知的查詢"""
+        with pytest.raises(ValueError):
+            local_query("nope")
+
+
+class TestQueryServer:
+    """測試 socket 查詢"""
+
+    def test_same_result_as_local(self, server):
+        """常駐程序與本程序計算的結果相同"""
+        for method in ("status", "list", "diff"):
+            assert query(method) == local_query(method)
+
+    def test_extra_handler(self, server):
+        """額外的查詢"""
+        assert query("monitor") == {"pid": 4242}
+
+    def test_sees_fresh_writes(self, server, mock_claude_code_config):
+        """剛寫入的變更立即可見（不依賴監聽事件）"""
+        assert query("status")["claude-code"]["mcp_count"] == 2
+
+        data = json.loads(mock_claude_code_config.read_text())
+        data["mcpServers"]["added"] = {"type": "stdio", "command": "npx"}
+        mock_claude_code_config.write_text(json.dumps(data))
+
+        assert query("status")["claude-code"]["mcp_count"] == 3
+
+    def test_errors_fall_back(self, server):
+        """錯誤回應返回 None，由呼叫者自行計算"""
+        assert query("nope") is None
+
+    def test_multiple_requests_per_connection(self, server):
+        """同一連線可連續送出多個請求"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(str(server.path))
+            stream = sock.makefile("rwb")
+            for request_id in (1, 2):
+                stream.write(json.dumps({"id": request_id, "method": "status"}).encode() + b"\n")
+                stream.flush()
+                assert json.loads(stream.readline())["id"] == request_id
+
+    def test_status_is_fast(self, server):
+        """快照已載入時查詢只需數毫秒"""
+        query("status")
+
+        timings = []
+        for _ in range(20):
+            started = time.perf_counter()
+            query("status")
+            timings.append(time.perf_counter() - started)
+
+        assert sorted(timings)[len(timings) // 2] < 0.02
+
+    def test_no_daemon(self, mock_syncmcp_dir):
+        """沒有常駐程序時返回 None"""
+        assert query("status") is None
+
+    def test_stale_socket_replaced(self, mock_claude_code_config, mock_syncmcp_dir):
+        """上次未正常結束留下的 socket 文件會被取代"""
+        stale = QueryServer(SnapshotCache(watch=False))
+        stale.path.parent.mkdir(parents=True, exist_ok=True)
+        leftover = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        leftover.bind(str(stale.path))
+        leftover.close()
+        assert query("status") is None
+
+        stale.start()
+        try:
+            assert query("status") is not None
+        finally:
+            stale.close()
+        assert not stale.path.exists()
+
+    def test_refuses_second_server(self, server):
+        """已有常駐程序時不會搶佔 socket"""
+        with pytest.raises(RuntimeError):
+            QueryServer(SnapshotCache(watch=False)).start()
+
+
+class TestCLI:
+    """測試 CLI 使用常駐程序"""
+
+    @pytest.fixture
+    def runner(self):
+        return CliRunner()
+
+    def test_status_uses_daemon(self, runner, server, monkeypatch):
+        """常駐程序執行中時 status 不在本程序載入配置"""
+        import syncmcp.core.queries
+
+        def fail(*args, **kwargs):
+            raise AssertionError("不應在本程序內計算")
+
+        monkeypatch.setattr(syncmcp.core.queries, "local_query", fail)
+
+        result = runner.invoke(cli, ["status", "--format", "json"])
+
+        assert result.exit_code == 0, result.output
+        assert '"mcp_count": 2' in result.output
+
+    def test_list_and_diff_without_daemon(self, runner, mock_claude_code_config):
+        """沒有常駐程序時在本程序內計算"""
+        result = runner.invoke(cli, ["list", "claude-code"])
+        assert result.exit_code == 0
+        assert "filesystem" in result.output
+
+        result = runner.invoke(cli, ["diff"])
+        assert result.exit_code == 0
+        assert "配置差異分析" in result.output
@@ -0,0 +1,124 @@
+"""
+測試 MCP 配置記錄 (ServerRecord / ServerView)
+"""
+
+import json
+
+import pytest
+
+from syncmcp.core.config_manager import ConfigManager
+from syncmcp.core.records import ServerRecord, ServerView, intern_server, to_plain
+from syncmcp.utils.server_clock import ServerClock
+
+
+class TestServerRecord:
+    """測試 ServerRecord"""
+
+    def test_identical_entries_share_object(self):
+        """內容相同的配置共用同一物件（不論欄位順序）"""
+        first = intern_server({"command": "npx", "args": ["a"]})
+        second = intern_server({"args": ["a"], "command": "npx"})
+
+        assert first is second
+        assert isinstance(first, ServerRecord)
+
+    def test_intern_is_idempotent(self):
+        """已是記錄時直接返回"""
+        record = intern_server({"command": "npx"})
+        assert intern_server(record) is record
+
+    def test_record_is_frozen(self):
+        """記錄不可修改"""
+        record = intern_server({"command": "npx"})
+        with pytest.raises(TypeError):
+            record["command"] = "uvx"
+
+    def test_nested_values_are_frozen(self):
+        """巢狀的 args / env 不可修改，to_dict() 返回獨立的副本"""
+        record = intern_server({"command": "npx", "args": ["a"], "env": {"K": "v"}})
+
+        with pytest.raises(AttributeError):
+            record["args"].append("b")
+        with pytest.raises(TypeError):
+            record["env"]["K"] = "x"
+
+        plain = record.to_dict()
+        plain["args"].append("b")
+        plain["env"]["K"] = "x"
+        assert record == {"command": "npx", "args": ["a"], "env": {"K": "v"}}
+
+    def test_equality_with_dict(self):
+        """可與一般 dict 比較"""
+        record = intern_server({"command": "npx"})
+
+        assert record == {"command": "npx"}
+        assert {"command": "npx"} == record
+        assert record != {"command": "uvx"}
+
+    def test_digest_is_cached(self):
+        """摘要在建立時計算並快取"""
+        record = intern_server({"command": "npx"})
+        assert record.digest == intern_server({"command": "npx"}).digest
+        assert hash(record) == hash(record.digest)
+
+
+class TestServerView:
+    """測試 ServerView"""
+
+    def test_overlay_reads_through(self):
+        """未改動的欄位直接讀取底層記錄"""
+        base = intern_server({"type": "sse", "url": "https://x", "alwaysAllow": ["t"]})
+        view = ServerView(base, {"type": "streamable-http"}, frozenset({"alwaysAllow"}))
+
+        assert view["type"] == "streamable-http"
+        assert view["url"] == "https://x"
+        assert "alwaysAllow" not in view
+        assert len(view) == 2
+        assert view.to_dict() == {"type": "streamable-http", "url": "https://x"}
+        # 底層記錄不受影響
+        assert base["type"] == "sse"
+
+    def test_view_equality_uses_digest(self):
+        """視圖與內容相同的記錄相等"""
+        base = intern_server({"type": "sse", "url": "https://x"})
+        view = ServerView(base, {"type": "http"})
+
+        assert view == intern_server({"type": "http", "url": "https://x"})
+
+    def test_intern_view_materializes(self):
+        """視圖可實體化為共享記錄"""
+        base = intern_server({"type": "sse", "url": "https://y"})
+        view = ServerView(base, {"type": "http"})
+
+        assert intern_server(view) is intern_server({"type": "http", "url": "https://y"})
+
+    def test_json_serialization(self):
+        """可透過 to_plain 序列化為 JSON"""
+        base = intern_server({"type": "sse", "url": "https://x"})
+        data = {"mcpServers": {"a": base, "b": ServerView(base, {"type": "http"})}}
+
+        loaded = json.loads(json.dumps(data, default=to_plain))
+
+        assert loaded["mcpServers"]["b"] == {"type": "http", "url": "https://x"}
+
+
+class TestLoadedConfigs:
+    """測試載入的配置使用共享記錄"""
+
+    def test_identical_entries_across_clients(self, mock_claude_code_config, mock_home_dir):
+        """不同客戶端中相同的 MCP 共用同一物件"""
+        gemini_path = mock_home_dir / ".gemini" / "settings.json"
+        gemini_path.parent.mkdir()
+        servers = json.loads(mock_claude_code_config.read_text())["mcpServers"]
+        gemini_path.write_text(
+            json.dumps({"mcpServers": {"brave-search": servers["brave-search"]}})
+        )
+
+        manager = ConfigManager(server_clock=ServerClock(mock_home_dir / "clock.json"))
+        configs = manager.load_all()
+
+        claude = configs["claude-code"].mcpServers["brave-search"]
+        gemini = configs["gemini"].mcpServers["brave-search"]
+
+        assert isinstance(claude, ServerRecord)
+        assert claude is gemini
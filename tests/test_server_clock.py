@@ -0,0 +1,222 @@
+"""
+測試 MCP 修改時鐘 (ServerClock)
+"""
+
+import json
+import os
+
+import pytest
+
+from syncmcp.core.config_manager import ClientConfig, ConfigManager
+from syncmcp.core.diff_engine import DiffEngine
+from syncmcp.utils.server_clock import ServerClock
+
+
+@pytest.fixture
+def clock_file(temp_dir):
+    """旁路文件路徑"""
+    return temp_dir / "server_clock.json"
+
+
+def _make_config(temp_dir, client: str, servers: dict, mtime: float) -> ClientConfig:
+    config = ClientConfig(client, temp_dir / f"{client}.json")
+    config.mcpServers = servers
+    config.last_modified = mtime
+    return config
+
+
+class TestServerClock:
+    """測試 ServerClock"""
+
+    def test_first_observation_uses_changed_at(self, clock_file):
+        """首次觀察使用傳入的變更時間"""
+        clock = ServerClock(clock_file)
+        changed = clock.observe("claude-code", {"a": {"command": "x"}}, changed_at=100.0)
+
+        assert changed is True
+        assert clock.get("claude-code", "a").first_seen == 100.0
+
+    def test_unchanged_digest_keeps_first_seen(self, clock_file):
+        """摘要未變時保留原本的時間（即使文件 mtime 改變）"""
+        clock = ServerClock(clock_file)
+        clock.observe("claude-code", {"a": {"command": "x", "args": ["1"]}}, changed_at=100.0)
+
+        # 欄位順序不同但內容相同
+        changed = clock.observe(
+            "claude-code", {"a": {"args": ["1"], "command": "x"}}, changed_at=500.0
+        )
+
+        assert changed is False
+        assert clock.get("claude-code", "a").first_seen == 100.0
+
+    def test_changed_digest_updates_first_seen(self, clock_file):
+        """摘要改變時更新時間"""
+        clock = ServerClock(clock_file)
+        clock.observe("claude-code", {"a": {"command": "x"}, "b": {"command": "y"}}, 100.0)
+        clock.observe("claude-code", {"a": {"command": "x2"}, "b": {"command": "y"}}, 200.0)
+
+        assert clock.get("claude-code", "a").first_seen == 200.0
+        assert clock.get("claude-code", "b").first_seen == 100.0
+
+    def test_removed_server_is_dropped(self, clock_file):
+        """被移除的 MCP 不再保留戳記"""
+        clock = ServerClock(clock_file)
+        clock.observe("roo-code", {"a": {"command": "x"}, "b": {"command": "y"}}, 100.0)
+        clock.observe("roo-code", {"a": {"command": "x"}}, 200.0)
+
+        assert clock.get("roo-code", "b") is None
+
+    def test_flush_and_reload(self, clock_file):
+        """寫回旁路文件後可由新實例讀回"""
+        clock = ServerClock(clock_file)
+        clock.observe("gemini", {"a": {"command": "x"}}, 123.0)
+        clock.flush()
+
+        data = json.loads(clock_file.read_text())
+        assert data["clients"]["gemini"]["a"]["first_seen"] == 123.0
+
+        reloaded = ServerClock(clock_file)
+        assert reloaded.get("gemini", "a").first_seen == 123.0
+
+    def test_flush_skips_when_clean(self, clock_file):
+        """沒有變更時不寫文件"""
+        clock = ServerClock(clock_file)
+        clock.flush()
+        assert not clock_file.exists()
+
+    def test_newest(self, clock_file):
+        """找出某 MCP 最新版本所在的客戶端"""
+        clock = ServerClock(clock_file)
+        clock.observe("claude-code", {"a": {"command": "old"}}, 100.0)
+        clock.observe("roo-code", {"a": {"command": "new"}}, 300.0)
+        clock.observe("gemini", {"a": {"command": "mid"}}, 200.0)
+
+        client, stamp = clock.newest("a")
+        assert client == "roo-code"
+        assert stamp.first_seen == 300.0
+
+        client, _ = clock.newest("a", clients=["claude-code", "gemini"])
+        assert client == "gemini"
+
+        assert clock.newest("missing") is None
+
+    def test_section_changed_at(self, clock_file):
+        """MCP 區段的變更時間只在新增、修改或移除 MCP 時更新"""
+        clock = ServerClock(clock_file)
+        servers = {"a": {"command": "x"}, "b": {"command": "y"}}
+        clock.observe("claude-code", servers, changed_at=100.0)
+        clock.observe("claude-code", servers, changed_at=200.0)
+        assert clock.section_changed_at("claude-code") == 100.0
+
+        clock.observe("claude-code", {"a": {"command": "x"}}, changed_at=300.0)
+        assert clock.section_changed_at("claude-code") == 300.0
+        assert clock.section_changed_at("gemini") is None
+
+        clock.flush()
+        assert ServerClock(clock_file).section_changed_at("claude-code") == 300.0
+
+    def test_propagated_write_is_not_an_edit(self, clock_file):
+        """SyncMCP 寫入的區段不更新區段時間，之後使用者的修改照常更新"""
+        clock = ServerClock(clock_file)
+        clock.observe("gemini", {"a": {"command": "x"}}, changed_at=100.0)
+
+        synced = {"a": {"command": "x"}, "b": {"command": "y"}}
+        clock.propagated("gemini", synced)
+        assert clock.observe("gemini", synced, changed_at=200.0) is True
+        assert clock.get("gemini", "b").first_seen == 200.0
+        assert clock.section_changed_at("gemini") == 100.0
+
+        clock.observe("gemini", {"a": {"command": "z"}}, changed_at=300.0)
+        assert clock.section_changed_at("gemini") == 300.0
+
+    def test_propagated_only_client_is_oldest(self, clock_file):
+        """只被 SyncMCP 寫入過的客戶端區段時間為 0，且可從旁路文件重新載入"""
+        clock = ServerClock(clock_file)
+        clock.propagated("roo-code", {"a": {"command": "x"}})
+        clock.observe("roo-code", {"a": {"command": "x"}}, changed_at=500.0)
+        assert clock.section_changed_at("roo-code") == 0.0
+
+        clock.flush()
+        assert ServerClock(clock_file).section_changed_at("roo-code") == 0.0
+
+    def test_resolve_newest_per_server(self, clock_file, temp_dir):
+        """逐個 MCP 選出最新版本，不受無關的文件改寫影響"""
+        clock = ServerClock(clock_file)
+        claude = _make_config(
+            temp_dir, "claude-code", {"a": {"command": "a1"}, "b": {"command": "b1"}}, 100.0
+        )
+        roo = _make_config(
+            temp_dir, "roo-code", {"a": {"command": "a1"}, "b": {"command": "b2"}}, 100.0
+        )
+        clock.observe("claude-code", claude.mcpServers, 100.0)
+        clock.observe("roo-code", roo.mcpServers, 100.0)
+
+        # Roo Code 修改了 b
+        roo.mcpServers = {"a": {"command": "a1"}, "b": {"command": "b3"}}
+        roo.last_modified = 200.0
+        clock.observe("roo-code", roo.mcpServers, 200.0)
+
+        # Claude Code 只改寫了無關狀態（mtime 更新但 MCP 未變）
+        claude.last_modified = 300.0
+        clock.observe("claude-code", claude.mcpServers, 300.0)
+
+        winners = clock.resolve_newest({"claude-code": claude, "roo-code": roo})
+        assert winners["b"] == "roo-code"
+
+        merged = clock.merge_newest({"claude-code": claude, "roo-code": roo})
+        assert merged["b"] == {"command": "b3"}
+        assert merged["a"] == {"command": "a1"}
+
+
+class TestConfigManagerIntegration:
+    """測試 ConfigManager 載入時更新時鐘"""
+
+    def test_load_all_observes_clients(self, mock_all_configs, clock_file):
+        """load_all 會為存在的配置文件記錄戳記"""
+        clock = ServerClock(clock_file)
+        manager = ConfigManager(server_clock=clock)
+        manager.load_all()
+
+        assert clock.get("claude-code", "filesystem") is not None
+        assert clock_file.exists()
+
+    def test_unrelated_rewrite_does_not_select_source(self, mock_all_configs, clock_file):
+        """~/.claude.json 只改寫與 MCP 無關的狀態時不會成為同步來源"""
+        for index, path in enumerate(mock_all_configs.values()):
+            os.utime(path, (1000.0 + index, 1000.0 + index))
+        gemini = ConfigManager().adapters["gemini"].get_config_path()
+        gemini.parent.mkdir(parents=True, exist_ok=True)
+        gemini.write_text(json.dumps({"mcpServers": {"a": {"command": "x"}}}))
+        os.utime(gemini, (2000.0, 2000.0))
+
+        clock = ServerClock(clock_file)
+        ConfigManager(server_clock=clock).load_all()
+
+        claude_json = mock_all_configs["claude-code"]
+        data = json.loads(claude_json.read_text())
+        data["numStartups"] = 42
+        claude_json.write_text(json.dumps(data, indent=2))
+        os.utime(claude_json, (3000.0, 3000.0))
+
+        configs = ConfigManager(server_clock=clock).load_all()
+        assert configs["claude-code"].last_modified == 3000.0
+        assert configs["claude-code"].section_modified == 1000.0
+        assert DiffEngine()._select_source(configs).client_name == "gemini"
+
+    def test_sync_all_does_not_stamp_its_own_writes(self, mock_all_configs, clock_file):
+        """sync_all 寫入的客戶端重新載入後不會變成最新的來源"""
+        for index, path in enumerate(mock_all_configs.values()):
+            os.utime(path, (1000.0 + index, 1000.0 + index))
+
+        clock = ServerClock(clock_file)
+        configs = ConfigManager(server_clock=clock).load_all()
+        before = {name: config.section_modified for name, config in configs.items()}
+
+        manager = ConfigManager(server_clock=clock)
+        manager.sync_all(configs["claude-code"], targets=configs)
+
+        reloaded = ConfigManager(server_clock=clock).load_all()
+        for name, config in reloaded.items():
+            # 原本不存在的配置文件由 SyncMCP 建立，視為最舊
+            expected = before[name] if before[name] is not None else 0.0
+            assert config.section_modified == expected
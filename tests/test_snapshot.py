@@ -0,0 +1,107 @@
+"""
+測試配置快照快取 (SnapshotCache)
+"""
+
+import json
+import time
+
+import pytest
+
+from syncmcp.core.snapshot import SnapshotCache
+
+
+@pytest.fixture
+def cache():
+    snapshot_cache = SnapshotCache(poll_interval=0.05)
+    yield snapshot_cache
+    snapshot_cache.close()
+
+
+def _wait_for_reload(cache, previous, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        snapshot = cache.get()
+        if snapshot is not previous:
+            return snapshot
+        time.sleep(0.02)
+    return previous
+
+
+class TestSnapshotCache:
+    """測試 SnapshotCache"""
+
+    def test_returns_cached_snapshot(self, mock_all_configs, cache):
+        """未變更時返回同一個快照"""
+        first = cache.get()
+        assert "filesystem" in first.configs["claude-code"].mcpServers
+        assert cache.get() is first
+
+    def test_invalidate_reloads(self, mock_all_configs, cache):
+        """invalidate 後重新載入"""
+        first = cache.get()
+        cache.invalidate()
+        assert cache.get() is not first
+
+    def test_file_change_invalidates(self, mock_all_configs, cache):
+        """配置文件被修改後快照失效"""
+        first = cache.get()
+
+        claude = mock_all_configs["claude-code"]
+        data = json.loads(claude.read_text())
+        data["mcpServers"]["new-mcp"] = {"type": "stdio", "command": "new"}
+        claude.write_text(json.dumps(data))
+
+        second = _wait_for_reload(cache, first)
+        assert second is not first
+        assert "new-mcp" in second.configs["claude-code"].mcpServers
+
+    def test_home_change_rebuilds(self, mock_all_configs, cache, tmp_path, monkeypatch):
+        """HOME 改變時以新路徑重新載入"""
+        first = cache.get()
+
+        other_home = tmp_path / "other"
+        other_home.mkdir()
+        monkeypatch.setenv("HOME", str(other_home))
+
+        second = cache.get()
+        assert second is not first
+        assert second.configs["claude-code"].mcpServers == {}
+
+    def test_memo_computed_once_per_snapshot(self, mock_all_configs, cache):
+        """memo 在同一快照內只計算一次"""
+        calls = []
+        snapshot = cache.get()
+
+        def build():
+            calls.append(1)
+            return "result"
+
+        assert snapshot.memo("key", build) == "result"
+        assert snapshot.memo("key", build) == "result"
+        assert len(calls) == 1
+
+    def test_cached_read_is_fast(self, mock_all_configs, cache):
+        """快照命中時讀取遠低於 1 毫秒"""
+        cache.get()
+
+        rounds = 200
+        start = time.perf_counter()
+        for _ in range(rounds):
+            cache.get()
+        assert (time.perf_counter() - start) / rounds < 0.001
+
+    def test_listener_receives_changed_clients(self, mock_all_configs, cache):
+        """文件變更時通知監聽者，參數為受影響的客戶端"""
+        notified = []
+        cache.add_listener(notified.append)
+        cache.get()
+
+        mock_all_configs["claude-code"].write_text(json.dumps({"mcpServers": {}}))
+
+        deadline = time.monotonic() + 3
+        while not notified and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert {"claude-code"} in notified
+
+        cache.invalidate()
+        assert notified[-1] == set(mock_all_configs)
@@ -0,0 +1,424 @@
+"""
+測試配置交易 (transaction) 與 batch / server 命令
+"""
+
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from syncmcp.cli import cli
+from syncmcp.core.backup_manager import BackupManager
+from syncmcp.core.config_manager import ClientConfig
+from syncmcp.core.transaction import ConfigTransaction, load_disabled_servers
+
+FS = {"type": "stdio", "command": "npx", "args": ["fs"]}
+REMOTE = {"type": "http", "url": "https://example.com/mcp"}
+
+
+@pytest.fixture
+def transaction(mock_claude_code_config, mock_syncmcp_dir):
+    return ConfigTransaction(backup_manager=BackupManager(mock_syncmcp_dir / "backups"))
+
+
+def _servers(path):
+    return json.loads(path.read_text())["mcpServers"]
+
+
+class TestMutations:
+    """測試交易中的修改"""
+
+    def test_put_renders_per_client(self, transaction):
+        """依各客戶端格式渲染，不支援的客戶端略過並記錄警告"""
+        applied = transaction.put("remote", REMOTE)
+
+        assert "claude-desktop" not in applied
+        assert transaction.configs["gemini"].mcpServers["remote"]["type"] == "streamable-http"
+        assert transaction.configs["claude-code"].mcpServers["remote"]["type"] == "http"
+        assert any("claude-desktop" in warning for warning in transaction.warnings)
+
+    def test_put_limited_to_clients(self, transaction):
+        """只修改指定的客戶端"""
+        assert transaction.put("fs", FS, clients=["gemini"]) == ["gemini"]
+        assert "fs" not in transaction.configs["claude-code"].mcpServers
+
+    def test_put_invalid(self, transaction):
+        """無效的配置或客戶端"""
+        with pytest.raises(ValueError):
+            transaction.put("broken", {"args": []})
+        with pytest.raises(ValueError):
+            transaction.put("fs", FS, clients=["nope"])
+
+    def test_update_merges_fields(self, transaction):
+        """修改欄位，值為 None 時刪除欄位"""
+        transaction.put("fs", {**FS, "env": {"A": "1"}})
+
+        transaction.update("fs", {"args": ["fs", "/tmp"], "env": None})
+
+        server = transaction.configs["claude-code"].mcpServers["fs"]
+        assert server.to_dict()["args"] == ["fs", "/tmp"]
+        assert "env" not in server
+
+    def test_remove(self, transaction):
+        """刪除所有客戶端中的 MCP"""
+        assert transaction.remove("filesystem") == ["claude-code"]
+        with pytest.raises(ValueError):
+            transaction.remove("filesystem")
+
+    def test_queries_see_pending_changes(self, transaction):
+        """查詢以交易中的配置回答"""
+        transaction.put("fs", FS)
+
+        assert transaction.query("status")["claude-code"]["mcp_count"] == 3
+        assert transaction.changes()["claude-code"] == ["+ fs"]
+
+    def test_sync_from_source(self, transaction):
+        """以指定客戶端為來源同步"""
+        transaction.put("fs", FS, clients=["gemini"])
+
+        assert transaction.sync("gemini") == "gemini"
+        assert list(transaction.configs["claude-code"].mcpServers) == ["fs"]
+
+    def test_put_many_single_pass(self, transaction, monkeypatch):
+        """大量新增只渲染一次，任一無效時不做任何修改"""
+        import syncmcp.core.transaction as module
+
+        calls = []
+        original = module.render_targets
+        monkeypatch.setattr(
+            module, "render_targets", lambda *args: calls.append(1) or original(*args)
+        )
+        servers = {f"server-{i}": {"command": "npx", "args": [str(i)]} for i in range(200)}
+
+        applied = transaction.put_many(servers)
+
+        assert len(calls) == 1
+        assert len(applied) == 200
+        assert len(transaction.configs["gemini"].mcpServers) == 200
+        with pytest.raises(ValueError):
+            transaction.put_many({"ok": FS, "broken": {"args": []}})
+        assert "ok" not in transaction.configs["gemini"].mcpServers
+
+    def test_update_merges_nested(self, transaction):
+        """env 逐鍵合併，值為 None 的鍵被刪除"""
+        transaction.put("fs", {**FS, "env": {"A": "1", "B": "2"}})
+
+        transaction.update("fs", {"env": {"B": None, "C": "3"}})
+
+        assert transaction.configs["claude-code"].mcpServers["fs"]["env"] == {"A": "1", "C": "3"}
+
+    def test_remove_many(self, transaction):
+        """一次刪除多個 MCP，任一不存在時不做任何修改"""
+        with pytest.raises(ValueError):
+            transaction.remove_many(["filesystem", "nope"])
+        assert "filesystem" in transaction.configs["claude-code"].mcpServers
+
+        removed = transaction.remove_many(["filesystem", "brave-search"])
+
+        assert removed == {"filesystem": ["claude-code"], "brave-search": ["claude-code"]}
+        assert transaction.configs["claude-code"].mcpServers == {}
+
+    @pytest.mark.parametrize(
+        "command",
+        [
+            {"op": "add", "config": FS},
+            {"op": "add", "name": "fs"},
+            {"op": "add", "servers": ["fs"]},
+            {"op": "add", "servers": {"fs": "npx"}},
+            {"op": "add", "name": "fs", "config": FS, "clients": "claude-code"},
+            {"op": "set", "name": 1, "fields": {"args": []}},
+            {"op": "remove"},
+            {"op": "remove", "names": "filesystem"},
+            {"op": "disable", "names": [1]},
+            {"op": "sync", "source": ["claude-code"]},
+        ],
+    )
+    def test_execute_rejects_malformed_command(self, transaction, command):
+        """execute 對缺少或型別錯誤的欄位拋出 ValueError，且不做任何修改"""
+        before = dict(transaction.configs["claude-code"].mcpServers)
+
+        with pytest.raises(ValueError):
+            transaction.execute(command)
+
+        assert transaction.configs["claude-code"].mcpServers == before
+
+
+class TestDisable:
+    """測試停用與啟用"""
+
+    def test_disable_then_enable(self, mock_claude_code_config, mock_syncmcp_dir):
+        """停用後從配置移除並保存，啟用時原樣還原"""
+        original = _servers(mock_claude_code_config)["filesystem"]
+
+        transaction = ConfigTransaction()
+        assert transaction.disable(["filesystem"]) == ["filesystem"]
+        transaction.commit(create_backup=False)
+
+        assert "filesystem" not in _servers(mock_claude_code_config)
+        assert load_disabled_servers() == {"filesystem": {"claude-code": original}}
+        assert ConfigTransaction().disabled() == {"filesystem": ["claude-code"]}
+
+        transaction = ConfigTransaction()
+        transaction.enable(["filesystem"])
+        transaction.commit(create_backup=False)
+
+        assert _servers(mock_claude_code_config)["filesystem"] == original
+        assert load_disabled_servers() == {}
+
+    def test_enable_unknown(self, transaction):
+        """沒有被停用的 MCP 無法啟用"""
+        with pytest.raises(ValueError):
+            transaction.enable(["filesystem"])
+
+    def test_rollback_keeps_stash(self, mock_claude_code_config, mock_syncmcp_dir):
+        """未提交時不寫入停用記錄"""
+        with ConfigTransaction() as transaction:
+            transaction.disable(["filesystem"])
+
+        assert load_disabled_servers() == {}
+        assert "filesystem" in _servers(mock_claude_code_config)
+
+
+class TestCommit:
+    """測試交易提交"""
+
+    def test_nothing_written_before_commit(self, transaction, mock_claude_code_config):
+        """提交前不寫入任何文件"""
+        before = mock_claude_code_config.read_bytes()
+        transaction.put("fs", FS)
+
+        assert mock_claude_code_config.read_bytes() == before
+
+    def test_commit_writes_once_with_one_backup(
+        self, transaction, mock_claude_code_config, mock_syncmcp_dir, monkeypatch
+    ):
+        """多個修改只寫入一次、備份一次、記錄一筆歷史"""
+        monkeypatch.setattr("syncmcp.utils.history._history_manager", None)
+        for i in range(20):
+            transaction.put(f"server-{i}", {"command": "npx", "args": [str(i)]})
+        transaction.remove("brave-search")
+
+        result = transaction.commit()
+
+        assert "claude-code" in result.written
+        assert len(_servers(mock_claude_code_config)) == 21
+        assert len(BackupManager(mock_syncmcp_dir / "backups").list_backups()) == 1
+        history = json.loads((mock_syncmcp_dir / "history.json").read_text())
+        assert len(history) == 1
+        assert history[0]["strategy"] == "transaction"
+
+    def test_unchanged_clients_not_written(self, transaction, mock_claude_code_config):
+        """沒有變更的客戶端不寫入"""
+        transaction.put("fs", FS, clients=["claude-code"])
+
+        result = transaction.commit(create_backup=False)
+
+        assert result.written == ["claude-code"]
+
+    def test_keeps_other_keys(self, transaction, mock_claude_code_config):
+        """只替換 mcpServers，保留其他內容"""
+        data = json.loads(mock_claude_code_config.read_text())
+        data["numStartups"] = 7
+        mock_claude_code_config.write_text(json.dumps(data))
+        transaction = ConfigTransaction()
+
+        transaction.put("fs", FS, clients=["claude-code"])
+        transaction.commit(create_backup=False)
+
+        assert json.loads(mock_claude_code_config.read_text())["numStartups"] == 7
+
+    def test_symlink_preserved(self, mock_home_dir, mock_syncmcp_dir, tmp_path):
+        """配置文件是符號連結時寫入其指向的文件"""
+        real = tmp_path / "dotfiles" / "claude.json"
+        real.parent.mkdir()
+        real.write_text(json.dumps({"mcpServers": {}}))
+        (mock_home_dir / ".claude.json").symlink_to(real)
+
+        transaction = ConfigTransaction()
+        transaction.put("fs", FS, clients=["claude-code"])
+        transaction.commit(create_backup=False)
+
+        assert (mock_home_dir / ".claude.json").is_symlink()
+        assert "fs" in _servers(real)
+
+    def test_failed_replace_restores(self, transaction, mock_claude_code_config, monkeypatch):
+        """替換途中失敗時還原已替換的文件"""
+        before = mock_claude_code_config.read_bytes()
+        transaction.put("fs", FS)
+
+        original = ClientConfig.commit_staged
+        calls = []
+
+        def flaky(config):
+            calls.append(config.client_name)
+            if len(calls) == 2:
+                raise OSError("磁碟已滿")
+            original(config)
+
+        monkeypatch.setattr(ClientConfig, "commit_staged", flaky)
+
+        with pytest.raises(OSError):
+            transaction.commit(create_backup=False)
+
+        assert mock_claude_code_config.read_bytes() == before
+        assert list(mock_claude_code_config.parent.rglob("*.tmp")) == []
+
+    def test_context_manager_rolls_back(self, mock_claude_code_config, mock_syncmcp_dir):
+        """未提交就離開時放棄修改"""
+        before = mock_claude_code_config.read_bytes()
+        with ConfigTransaction() as transaction:
+            transaction.put("fs", FS)
+
+        assert transaction.closed
+        assert mock_claude_code_config.read_bytes() == before
+        with pytest.raises(RuntimeError):
+            transaction.put("fs", FS)
+
+
+class TestBatchCommand:
+    """測試 batch 命令"""
+
+    @pytest.fixture
+    def runner(self):
+        return CliRunner()
+
+    @staticmethod
+    def _lines(*commands):
+        return "".join(json.dumps(command) + "\n" for command in commands)
+
+    @staticmethod
+    def _results(output):
+        return [json.loads(line) for line in output.splitlines() if line.strip()]
+
+    def test_streams_results_and_commits_once(
+        self, runner, mock_claude_code_config, mock_syncmcp_dir
+    ):
+        """每個命令輸出一行結果，最後一次寫入"""
+        stdin = self._lines(
+            {"op": "add", "name": "fs", "config": FS, "id": "a"},
+            {"op": "set", "name": "fs", "fields": {"env": {"A": "1"}}},
+            {"op": "status"},
+        )
+
+        result = runner.invoke(cli, ["batch", "--no-backup"], input=stdin)
+
+        assert result.exit_code == 0, result.output
+        results = self._results(result.output)
+        assert [r["op"] for r in results] == ["add", "set", "status", "commit"]
+        assert results[0]["id"] == "a"
+        assert results[2]["result"]["claude-code"]["mcp_count"] == 3
+        assert "claude-code" in results[-1]["result"]["written"]
+        assert _servers(mock_claude_code_config)["fs"]["env"] == {"A": "1"}
+
+    def test_error_aborts_commit(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """任何命令失敗時不寫入"""
+        before = mock_claude_code_config.read_bytes()
+        stdin = self._lines({"op": "add", "name": "fs", "config": FS}, {"op": "remove"})
+        stdin += "not json\n"
+
+        result = runner.invoke(cli, ["batch"], input=stdin)
+
+        assert result.exit_code == 1
+        results = self._results(result.output)
+        assert [r["ok"] for r in results] == [True, False, False, False]
+        assert mock_claude_code_config.read_bytes() == before
+
+    def test_non_object_line(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """合法 JSON 但不是物件的行回報錯誤（id 為行號）"""
+        result = runner.invoke(cli, ["batch"], input='[1, 2]\n"x"\n')
+
+        assert result.exit_code == 1
+        results = self._results(result.output)
+        assert [(r["id"], r["ok"]) for r in results[:2]] == [(1, False), (2, False)]
+        assert results[-1]["op"] == "commit"
+
+    def test_dry_run(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """dry-run 只輸出變更"""
+        before = mock_claude_code_config.read_bytes()
+
+        result = runner.invoke(
+            cli, ["batch", "--dry-run"], input=self._lines({"op": "remove", "name": "filesystem"})
+        )
+
+        assert result.exit_code == 0
+        commit = self._results(result.output)[-1]
+        assert commit["result"]["changes"] == {"claude-code": ["- filesystem"]}
+        assert mock_claude_code_config.read_bytes() == before
+
+
+class TestServerCommand:
+    """測試 server 命令"""
+
+    @pytest.fixture
+    def runner(self):
+        return CliRunner()
+
+    def test_add_everywhere(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """新增到所有客戶端並只備份一次"""
+        result = runner.invoke(
+            cli,
+            ["server", "add", "fs", "npx", "-y", "fs", "--env", "A=1", "--client", "claude-code"],
+        )
+
+        assert result.exit_code == 0, result.output
+        assert _servers(mock_claude_code_config)["fs"] == {
+            "type": "stdio",
+            "command": "npx",
+            "args": ["-y", "fs"],
+            "env": {"A": "1"},
+        }
+        assert len(BackupManager(mock_syncmcp_dir / "backups").list_backups()) == 1
+
+    def test_add_from_file(self, runner, mock_claude_code_config, mock_syncmcp_dir, tmp_path):
+        """從文件一次新增多個 MCP"""
+        source = tmp_path / "servers.json"
+        servers = {f"server-{i}": {"command": "npx", "args": [str(i)]} for i in range(50)}
+        source.write_text(json.dumps({"mcpServers": servers}))
+
+        result = runner.invoke(
+            cli, ["server", "add", "--from-file", str(source), "--client", "claude-code"]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert len(_servers(mock_claude_code_config)) == 52
+
+    def test_set_and_unset(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """修改欄位並刪除單一環境變數"""
+        runner.invoke(cli, ["server", "add", "fs", "npx", "--env", "A=1", "--env", "B=2"])
+
+        result = runner.invoke(
+            cli, ["server", "set", "fs", "--arg", "/tmp", "--unset", "env.A", "--no-backup"]
+        )
+
+        assert result.exit_code == 0, result.output
+        server = _servers(mock_claude_code_config)["fs"]
+        assert server["args"] == ["/tmp"]
+        assert server["env"] == {"B": "2"}
+
+    def test_rm_dry_run(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """dry-run 只顯示變更"""
+        before = mock_claude_code_config.read_bytes()
+
+        result = runner.invoke(cli, ["server", "rm", "filesystem", "--dry-run"])
+
+        assert result.exit_code == 0
+        assert "- filesystem" in result.output
+        assert mock_claude_code_config.read_bytes() == before
+
+    def test_disable_enable(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """停用後可再啟用"""
+        assert runner.invoke(cli, ["server", "disable", "filesystem"]).exit_code == 0
+        assert "filesystem" not in _servers(mock_claude_code_config)
+
+        result = runner.invoke(cli, ["server", "enable", "filesystem"])
+        assert result.exit_code == 0, result.output
+        assert "filesystem" in _servers(mock_claude_code_config)
+
+    def test_unknown_server(self, runner, mock_claude_code_config, mock_syncmcp_dir):
+        """不存在的 MCP 返回錯誤碼"""
+        before = mock_claude_code_config.read_bytes()
+
+        result = runner.invoke(cli, ["server", "rm", "nope"])
+
+        assert result.exit_code == 1
+        assert mock_claude_code_config.read_bytes() == before
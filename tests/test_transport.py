@@ -0,0 +1,147 @@
+"""
+測試傳輸類型轉換表 (transport)
+"""
+
+import gc
+import weakref
+
+import pytest
+
+from syncmcp.core.config_manager import GeminiAdapter
+from syncmcp.core.records import ServerView, intern_server
+from syncmcp.core.transport import (
+    CLIENTS,
+    CONVERSION_TABLE,
+    TRANSPORT_TYPES,
+    clear_render_cache,
+    infer_type,
+    render_server,
+    render_servers,
+    render_targets,
+)
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache():
+    """每個測試前清空渲染快取"""
+    clear_render_cache()
+    yield
+    clear_render_cache()
+
+
+class TestInferType:
+    """測試類型推斷"""
+
+    @pytest.mark.parametrize(
+        "server,expected",
+        [
+            ({"type": "stdio", "command": "npx"}, "stdio"),
+            ({"type": "http", "url": "https://x"}, "http"),
+            ({"transport": "sse", "url": "https://x"}, "sse"),
+            ({"url": "https://x"}, "streamable-http"),
+            ({"command": "npx"}, "stdio"),
+            ({"type": "websocket", "url": "wss://x"}, "remote"),
+            ({}, "stdio"),
+        ],
+    )
+    def test_infer_type(self, server, expected):
+        """依 type / transport / url / command 推斷"""
+        assert infer_type(server) == expected
+
+
+class TestConversionTable:
+    """測試轉換表"""
+
+    def test_table_is_complete(self):
+        """每個 (類型, 客戶端, headers) 組合都有規則"""
+        for inferred in TRANSPORT_TYPES:
+            for client in CLIENTS:
+                for has_headers in (False, True):
+                    assert (inferred, client, has_headers) in CONVERSION_TABLE
+
+    def test_desktop_drops_remote(self):
+        """Claude Desktop 過濾所有遠端類型"""
+        for inferred in TRANSPORT_TYPES:
+            rule = CONVERSION_TABLE[(inferred, "claude-desktop", False)]
+            assert rule.keep is (inferred == "stdio")
+
+    def test_desktop_stdio_omits_type(self):
+        """Claude Desktop 的 stdio 配置不論來源是否帶有 type，渲染結果都不含 type"""
+        with_type = render_server(
+            {"type": "stdio", "command": "npx", "args": ["a"]}, "claude-desktop"
+        )
+        without_type = render_server({"command": "npx", "args": ["a"]}, "claude-desktop")
+
+        assert "type" not in with_type
+        assert "type" not in without_type
+        assert with_type == without_type == {"command": "npx", "args": ["a"]}
+
+    def test_strips_roo_fields_for_other_clients(self):
+        """非 Roo Code 目標移除 Roo 特有欄位"""
+        server = {"type": "streamable-http", "url": "https://x", "alwaysAllow": ["t"]}
+
+        assert "alwaysAllow" not in render_server(server, "claude-code")
+        assert "alwaysAllow" not in render_server(server, "gemini")
+        assert render_server(server, "roo-code") == server
+
+
+class TestRendering:
+    """測試渲染"""
+
+    def test_gemini_converts_remote(self):
+        """Gemini 現在也會轉換遠端類型"""
+        result = GeminiAdapter().normalize_config({"ctx": {"type": "http", "url": "https://x"}})
+        assert result["ctx"]["type"] == "streamable-http"
+
+    def test_unchanged_server_is_not_copied(self):
+        """無需轉換時直接沿用原記錄"""
+        record = intern_server({"type": "stdio", "command": "npx"})
+        assert render_server(record, "claude-code") is record
+
+    def test_changed_server_is_overlay_view(self):
+        """需要轉換時返回只含改動欄位的視圖"""
+        record = intern_server({"type": "sse", "url": "https://x", "alwaysAllow": ["t"]})
+
+        rendered = render_server(record, "gemini")
+
+        assert isinstance(rendered, ServerView)
+        assert rendered.base is record
+        assert rendered == {"type": "streamable-http", "url": "https://x"}
+
+    def test_render_does_not_mutate_input(self):
+        """渲染不修改輸入"""
+        server = {"type": "sse", "url": "https://x"}
+        render_server(server, "roo-code")
+        assert server == {"type": "sse", "url": "https://x"}
+
+    def test_repeated_render_is_memoized(self):
+        """相同內容的重複渲染返回同一物件"""
+        first = render_server({"type": "sse", "url": "https://x"}, "roo-code")
+        second = render_server({"url": "https://x", "type": "sse"}, "roo-code")
+        assert first is second
+
+    def test_render_cache_does_not_keep_records(self):
+        """渲染快取不會讓沒有使用者的記錄留在記憶體中"""
+        record = intern_server({"type": "sse", "url": "https://cache-test"})
+        render_server(record, "gemini")
+        ref = weakref.ref(record)
+
+        del record
+        gc.collect()
+
+        assert ref() is None
+
+    def test_render_targets_single_pass(self):
+        """一次遍歷渲染所有目標"""
+        servers = {
+            "fs": {"type": "stdio", "command": "npx"},
+            "ctx": {"type": "http", "url": "https://x", "headers": {"K": "v"}},
+        }
+
+        results = render_targets(servers, CLIENTS)
+
+        assert set(results) == set(CLIENTS)
+        assert results["roo-code"]["ctx"]["type"] == "streamable-http"
+        assert results["claude-code"]["ctx"]["type"] == "http"
+        assert "ctx" not in results["claude-desktop"]
+        assert results == {client: render_servers(servers, client) for client in CLIENTS}
@@ -0,0 +1,106 @@
+"""
+測試文件監聽 (FileWatcher)
+"""
+
+import threading
+
+import pytest
+
+from syncmcp.utils.watcher import FileWatcher
+
+
+class _Recorder:
+    """收集回調通知的文件"""
+
+    def __init__(self):
+        self.paths = set()
+        self.event = threading.Event()
+
+    def __call__(self, paths):
+        self.paths |= paths
+        self.event.set()
+
+    def wait(self, timeout=3.0) -> bool:
+        result = self.event.wait(timeout)
+        self.event.clear()
+        return result
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "poll"])
+def use_inotify(request):
+    return request.param
+
+
+class TestFileWatcher:
+    """測試 FileWatcher"""
+
+    def test_detects_modification(self, temp_dir, use_inotify):
+        """文件內容改變時通知"""
+        target = temp_dir / "config.json"
+        target.write_text("{}")
+        recorder = _Recorder()
+
+        watcher = FileWatcher([target], recorder, poll_interval=0.05, use_inotify=use_inotify)
+        watcher.start()
+        try:
+            target.write_text('{"mcpServers": {}}')
+            assert recorder.wait()
+            assert target in recorder.paths
+        finally:
+            watcher.stop()
+
+    def test_detects_atomic_replace(self, temp_dir, use_inotify):
+        """以「寫入臨時檔再改名」方式保存時也會通知"""
+        target = temp_dir / "config.json"
+        target.write_text("{}")
+        recorder = _Recorder()
+
+        watcher = FileWatcher([target], recorder, poll_interval=0.05, use_inotify=use_inotify)
+        watcher.start()
+        try:
+            tmp = temp_dir / "config.json.tmp"
+            tmp.write_text('{"a": 1}')
+            tmp.replace(target)
+            assert recorder.wait()
+            assert recorder.paths == {target}
+        finally:
+            watcher.stop()
+
+    def test_ignores_unrelated_files(self, temp_dir):
+        """同目錄下的其他文件不觸發通知"""
+        target = temp_dir / "config.json"
+        target.write_text("{}")
+        recorder = _Recorder()
+
+        watcher = FileWatcher([target], recorder, poll_interval=0.05)
+        watcher.start()
+        try:
+            (temp_dir / "other.json").write_text("{}")
+            assert not recorder.wait(timeout=0.3)
+        finally:
+            watcher.stop()
+
+    def test_missing_directory_created_later(self, temp_dir):
+        """監聽時目錄尚不存在，之後建立文件也會通知"""
+        target = temp_dir / "later" / "config.json"
+        recorder = _Recorder()
+
+        watcher = FileWatcher([target], recorder, poll_interval=0.05)
+        watcher.start()
+        try:
+            target.parent.mkdir()
+            target.write_text("{}")
+            assert recorder.wait()
+            assert target in recorder.paths
+        finally:
+            watcher.stop()
+
+    def test_stop_is_idempotent(self, temp_dir):
+        """停止後執行緒結束，重複停止無副作用"""
+        watcher = FileWatcher([temp_dir / "a.json"], lambda paths: None, poll_interval=0.05)
+        watcher.start()
+        assert watcher.running
+
+        watcher.stop()
+        watcher.stop()
+        assert not watcher.running